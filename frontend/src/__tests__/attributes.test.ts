@@ -0,0 +1,37 @@
+import { describe, it, expect } from 'vitest';
+import { attributeValue, featureAttributes } from '../utils/attributes';
+import type { AttributeSidecar } from '../types';
+
+const sidecar: AttributeSidecar = {
+  layer: 'buildings',
+  features: 4,
+  columns: {
+    osm_id: { values: ['way/0', 'way/1', 'way/2', 'way/3'] },
+    height_source: { values: ['osm', 'levels'], codes: [0, 0, 1, null] },
+    name: { rows: [1, 3], values: ['Museion', 'Duomo'] },
+    building_type: { rows: [2], values: ['church'], codes: [0] },
+  },
+};
+
+describe('attributeValue', () => {
+  it('decodes plain, dictionary and sparse columns', () => {
+    expect(attributeValue(sidecar.columns.osm_id, 2)).toBe('way/2');
+    expect(attributeValue(sidecar.columns.height_source, 2)).toBe('levels');
+    expect(attributeValue(sidecar.columns.height_source, 3)).toBeNull();
+    expect(attributeValue(sidecar.columns.name, 3)).toBe('Duomo');
+    expect(attributeValue(sidecar.columns.name, 0)).toBeNull();
+    expect(attributeValue(sidecar.columns.name, 9)).toBeNull();
+    expect(attributeValue(sidecar.columns.building_type, 2)).toBe('church');
+  });
+});
+
+describe('featureAttributes', () => {
+  it('collects every column of a feature', () => {
+    expect(featureAttributes(sidecar, 1)).toEqual({
+      osm_id: 'way/1',
+      height_source: 'osm',
+      name: 'Museion',
+      building_type: null,
+    });
+  });
+});
@@ -1,6 +1,7 @@
 import { describe, it, expect } from 'vitest';
-import { heightToColor } from '../layers/buildingLayer';
+import { heightToColor, bandsInRange, sliceSortedByHeight } from '../layers/buildingLayer';
 import { HEIGHT_COLOR_SCALE } from '../utils/constants';
+import type { BuildingProperties, GeoJsonFeatureCollection, HeightBand } from '../types';
 
 describe('heightToColor', () => {
   it('returns first colour for height 0', () => {
@@ -29,3 +30,41 @@ describe('heightToColor', () => {
     });
   });
 });
+
+function sortedBuildings(heights: number[]): GeoJsonFeatureCollection<BuildingProperties> {
+  return {
+    type: 'FeatureCollection',
+    features: heights.map((height) => ({
+      type: 'Feature',
+      geometry: { type: 'Polygon', coordinates: [] },
+      properties: { height } as BuildingProperties,
+    })),
+  } as unknown as GeoJsonFeatureCollection<BuildingProperties>;
+}
+
+describe('height bands', () => {
+  const band = (n: number, lo: number, hi: number): HeightBand => ({
+    band: n,
+    file: `height_bands/band_${n}.geojson`,
+    min_height: lo,
+    max_height: hi,
+    count: 1,
+    height_range: [lo + 1, hi - 1],
+    bbox: { west: 0, south: 0, east: 0, north: 0 },
+  });
+
+  it('selects only the bands overlapping the range', () => {
+    const bands = [band(0, 0, 10), band(1, 10, 20), band(2, 20, 40)];
+    expect(bandsInRange(bands, [12, 25]).map((b) => b.band)).toEqual([1, 2]);
+    expect(bandsInRange(bands, [0, 300])).toHaveLength(3);
+  });
+
+  it('slices sorted buildings to an inclusive height range', () => {
+    const data = sortedBuildings([3, 5, 5, 8, 12, 12, 20]);
+    const heights = (d: GeoJsonFeatureCollection<BuildingProperties>) =>
+      d.features.map((f) => f.properties.height);
+    expect(heights(sliceSortedByHeight(data, [5, 12]))).toEqual([5, 5, 8, 12, 12]);
+    expect(heights(sliceSortedByHeight(data, [13, 19]))).toEqual([]);
+    expect(sliceSortedByHeight(data, [0, 300])).toBe(data);
+  });
+});
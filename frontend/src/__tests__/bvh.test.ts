@@ -0,0 +1,62 @@
+import { describe, it, expect } from 'vitest';
+import { parseBvh, queryBox, raycast } from '../utils/bvh';
+
+/** Root with a leaf of two prisms in the west and a leaf of one in the east. */
+function sidecar(): ArrayBuffer {
+  const items = [
+    [0, 0, 0, 1, 1, 10],
+    [2, 0, 0, 3, 1, 30],
+    [10, 0, 0, 11, 1, 20],
+  ];
+  const nodes = [
+    [0, 0, 0, 11, 1, 30],
+    [0, 0, 0, 3, 1, 30],
+    [10, 0, 0, 11, 1, 20],
+  ];
+  const buffer = new ArrayBuffer(16 + nodes.length * 32 + items.length * 24);
+  const header = new DataView(buffer);
+  'BVH1'.split('').forEach((c, i) => header.setUint8(i, c.charCodeAt(0)));
+  header.setUint32(4, nodes.length, true);
+  header.setUint32(8, items.length, true);
+  header.setUint32(12, 2, true);
+  new Float32Array(buffer, 16, 18).set(nodes.flat());
+  new Int32Array(buffer, 16 + 72, 3).set([2, 0, 2]);   // root: right child 2; leaves: first feature
+  new Int32Array(buffer, 16 + 84, 3).set([0, 2, 1]);   // root internal; leaf sizes
+  new Float32Array(buffer, 16 + 96, 18).set(items.flat());
+  return buffer;
+}
+
+describe('parseBvh', () => {
+  it('views the sidecar arrays', () => {
+    const bvh = parseBvh(sidecar());
+    expect(bvh.leafSize).toBe(2);
+    expect(Array.from(bvh.count)).toEqual([0, 2, 1]);
+    expect(bvh.itemBounds.length).toBe(18);
+  });
+
+  it('rejects other files', () => {
+    expect(() => parseBvh(new ArrayBuffer(16))).toThrow('Not a BVH file');
+  });
+});
+
+describe('queryBox', () => {
+  const bvh = parseBvh(sidecar());
+
+  it('returns the prisms intersecting the box', () => {
+    expect(queryBox(bvh, [0.5, 0, 0, 2.5, 1, 5])).toEqual([0, 1]);
+    expect(queryBox(bvh, [0, 0, 25, 20, 1, 40])).toEqual([1]);   // only the tall one reaches 25 m
+    expect(queryBox(bvh, [5, 0, 0, 6, 1, 100])).toEqual([]);
+  });
+});
+
+describe('raycast', () => {
+  const bvh = parseBvh(sidecar());
+
+  it('picks the nearest prism along the ray', () => {
+    // horizontal ray at 15 m from the east: passes over the 10 m prism, hits the 20 m one first
+    expect(raycast(bvh, [20, 0.5, 15], [-1, 0, 0])).toEqual({ index: 2, t: 9 });
+    // at 25 m, only the 30 m prism is tall enough
+    expect(raycast(bvh, [20, 0.5, 25], [-1, 0, 0])).toEqual({ index: 1, t: 17 });
+    expect(raycast(bvh, [20, 0.5, 50], [-1, 0, 0])).toBeNull();
+  });
+});
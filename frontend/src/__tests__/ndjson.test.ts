@@ -0,0 +1,42 @@
+import { describe, it, expect } from 'vitest';
+import { NdjsonParser, rangesForBbox } from '../utils/ndjson';
+import type { NdjsonIndex } from '../types';
+
+describe('NdjsonParser', () => {
+  it('buffers lines split across network chunks', () => {
+    const bytes = new TextEncoder().encode('{"a":1}\n{"a":"é"}\n{"a":3}\n');
+    const parser = new NdjsonParser<{ a: unknown }>();
+    // split inside the second record (and inside the 2-byte "é")
+    const cut = 15;
+    expect(parser.push(bytes.slice(0, cut))).toEqual([{ a: 1 }]);
+    expect(parser.push(bytes.slice(cut), true)).toEqual([{ a: 'é' }, { a: 3 }]);
+  });
+});
+
+describe('rangesForBbox', () => {
+  const index: NdjsonIndex = {
+    layer: 'buildings',
+    order: 'hilbert',
+    features: 6,
+    bytes: 60,
+    chunk_size: 2,
+    chunks: [
+      { offset: 0, length: 20, count: 2, bbox: [0, 0, 1, 1] },
+      { offset: 20, length: 20, count: 2, bbox: [3, 3, 4, 4] },
+      { offset: 40, length: 20, count: 2, bbox: [0, 1, 1, 2] },
+    ],
+  };
+
+  it('merges adjacent chunks into one range', () => {
+    expect(rangesForBbox(index, [0, 0, 4, 4])).toEqual([{ offset: 0, length: 60 }]);
+    expect(rangesForBbox(index, [0.5, 0.5, 3.5, 3.5])).toEqual([{ offset: 0, length: 60 }]);
+  });
+
+  it('keeps separate ranges around skipped chunks', () => {
+    expect(rangesForBbox(index, [0, 0, 1, 2])).toEqual([
+      { offset: 0, length: 20 },
+      { offset: 40, length: 20 },
+    ]);
+    expect(rangesForBbox(index, [9, 9, 10, 10])).toEqual([]);
+  });
+});
@@ -0,0 +1,34 @@
+import { describe, it, expect } from 'vitest';
+import { labelLevel, streetLabels } from '../utils/streetLabels';
+import type { StreetLabelIndex } from '../types';
+
+const index: StreetLabelIndex = {
+  min_zoom: 14,
+  max_zoom: 16,
+  font_px: 12,
+  names: ['Corso Libertà', 'Via Museo'],
+  classes: ['major', 'minor', 'path', 'other'],
+  levels: [
+    { zoom: 14, lon: [11.34], lat: [46.5], angle: [0], name: [0], road_class: [0] },
+    { zoom: 15, lon: [11.34, 11.35], lat: [46.5, 46.49], angle: [0, 90], name: [0, 1], road_class: [0, 1] },
+    { zoom: 16, lon: [], lat: [], angle: [], name: [], road_class: [] },
+  ],
+};
+
+describe('labelLevel', () => {
+  it('picks the finest level at or below the zoom', () => {
+    expect(labelLevel(index, 13.9)).toBeNull();
+    expect(labelLevel(index, 14)?.zoom).toBe(14);
+    expect(labelLevel(index, 15.7)?.zoom).toBe(15);
+    expect(labelLevel(index, 19)?.zoom).toBe(16);
+  });
+});
+
+describe('streetLabels', () => {
+  it('resolves names and classes', () => {
+    expect(streetLabels(index, index.levels[1])).toEqual([
+      { position: [11.34, 46.5], text: 'Corso Libertà', angle: 0, roadClass: 'major' },
+      { position: [11.35, 46.49], text: 'Via Museo', angle: 90, roadClass: 'minor' },
+    ]);
+  });
+});
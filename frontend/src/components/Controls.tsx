@@ -1,6 +1,6 @@
 import type React from 'react';
 import { useMapStore } from '../store/mapStore';
-import { useMetadata } from '../hooks/useMapData';
+import { useFeatureProperties, useMetadata } from '../hooks/useMapData';
 import type { BuildingProperties } from '../types';
 
 export default function Controls() {
@@ -22,7 +22,7 @@ export default function Controls() {
   const togglePerfOverlay = useMapStore((s) => s.togglePerfOverlay);
   const { data: metadata } = useMetadata();
 
-  const bp = selectedBuilding?.properties as BuildingProperties | undefined;
+  const bp = useFeatureProperties<BuildingProperties>('buildings', selectedBuilding);
 
   return (
     <div style={panelStyle}>
@@ -6,23 +6,31 @@ import { Map } from 'react-map-gl/maplibre';
 import type { Map as MaplibreMap, MapLibreEvent } from 'maplibre-gl';
 import 'maplibre-gl/dist/maplibre-gl.css';
 
-import { useBuildingsData, useRoadsData, usePoisData } from '../hooks/useMapData';
+import { useBuildingsData, useBlocksData, useRoadsData, usePoisData, useLandmarksData, useStreetLabels } from '../hooks/useMapData';
 import { useMapStore } from '../store/mapStore';
-import { createBuildingSolidLayer, createBuildingWireframeLayer } from '../layers/buildingLayer';
+import { createBlockLayer, createBuildingSolidLayer, createBuildingWireframeLayer } from '../layers/buildingLayer';
 import { createRoadLayer } from '../layers/roadLayer';
 import { createLandmarkLayer } from '../layers/landmarkLayer';
 import { createPoiLayer } from '../layers/poiLayer';
-import { AWS_TERRAIN_TILES_URL, BASEMAP_STYLE_URL, INITIAL_VIEW_STATE } from '../utils/constants';
-import type { HoverInfo } from '../types';
+import { createStreetLabelLayer } from '../layers/streetLabelLayer';
+import { AWS_TERRAIN_TILES_URL, BASEMAP_STYLE_URL, BLOCKS_MAX_ZOOM, INITIAL_VIEW_STATE } from '../utils/constants';
+import type { HoverInfo, ViewState } from '../types';
 
 import Tooltip from './Tooltip';
 
 export default function Map3D() {
   const [flyTarget, setFlyTarget] = useState<object>({ ...INITIAL_VIEW_STATE });
+  // Only the overview/detail switch re-renders, not every view-state change
+  const [overview, setOverview] = useState(INITIAL_VIEW_STATE.zoom < BLOCKS_MAX_ZOOM);
+  // Street labels are placed per integer zoom: re-render only when it changes
+  const [labelZoom, setLabelZoom] = useState(Math.floor(INITIAL_VIEW_STATE.zoom));
 
   const { data: buildings, isLoading: loadingBuildings } = useBuildingsData();
+  const { data: blocks } = useBlocksData();
   const { data: roads, isLoading: loadingRoads } = useRoadsData();
   const { data: pois } = usePoisData();
+  const { data: landmarks } = useLandmarksData();
+  const { data: streetLabels } = useStreetLabels();
 
   const showBuildings = useMapStore((s) => s.showBuildings);
   const showRoads = useMapStore((s) => s.showRoads);
@@ -38,27 +46,35 @@ export default function Map3D() {
 
   const layers = useMemo(() => {
     const result = [];
-    if (showBuildings) {
+    // Overview zooms draw city blocks (when the pipeline exported them) instead of buildings
+    const blockView = overview && blocks != null;
+    if (showBuildings && blockView) {
+      const block = createBlockLayer(blocks);
+      if (block) result.push(block);
+    } else if (showBuildings) {
       const solid = createBuildingSolidLayer(buildings ?? null, heightRange, colourMode);
       if (solid) result.push(solid);
     }
-    if (showWireframe) {
+    if (showWireframe && !blockView) {
       const wire = createBuildingWireframeLayer(buildings ?? null, heightRange);
       if (wire) result.push(wire);
     }
     if (showRoads) {
       const road = createRoadLayer(roads ?? null);
       if (road) result.push(road);
+      const labels = createStreetLabelLayer(streetLabels, labelZoom);
+      if (labels) result.push(labels);
     }
     if (showPois) {
       const poi = createPoiLayer(pois ?? null);
       if (poi) result.push(poi);
     }
     if (showLandmarks) {
-      result.push(createLandmarkLayer());
+      // Pipeline landmarks when available, curated Bolzano list otherwise
+      result.push(createLandmarkLayer(landmarks?.landmarks));
     }
     return result;
-  }, [buildings, roads, pois, showBuildings, showRoads, showWireframe, showLandmarks, showPois, heightRange, colourMode]);
+  }, [buildings, blocks, overview, roads, pois, landmarks, streetLabels, labelZoom, showBuildings, showRoads, showWireframe, showLandmarks, showPois, heightRange, colourMode]);
 
   const isLoading = loadingBuildings || loadingRoads;
 
@@ -135,6 +151,10 @@ export default function Map3D() {
         layers={layers}
         controller={{ dragRotate: true, touchRotate: true, pitchRange: [0, 85] }}
         onClick={handleClick}
+        onViewStateChange={({ viewState }: { viewState: ViewState }) => {
+          setOverview(viewState.zoom < BLOCKS_MAX_ZOOM);
+          setLabelZoom(Math.floor(viewState.zoom));
+        }}
         onHover={(info: HoverInfo) => {
           if (info.object) {
             setHoverInfo(info);
@@ -1,6 +1,6 @@
 import type React from 'react';
 import { useMapStore } from '../store/mapStore';
-import type { PoiProperties } from '../types';
+import { useFeatureProperties } from '../hooks/useMapData';
 import { POI_CATEGORY_EMOJI } from '../utils/constants';
 
 /**
@@ -10,10 +10,10 @@ import { POI_CATEGORY_EMOJI } from '../utils/constants';
 export default function PoiPanel() {
   const selectedPoi = useMapStore((s) => s.selectedPoi);
   const setSelectedPoi = useMapStore((s) => s.setSelectedPoi);
+  const p = useFeatureProperties('pois', selectedPoi);
 
-  if (!selectedPoi) return null;
+  if (!selectedPoi || !p) return null;
 
-  const p = selectedPoi.properties as PoiProperties;
   const emoji = POI_CATEGORY_EMOJI[p.category] ?? '📌';
   const coords = (selectedPoi.geometry as GeoJSON.Point).coordinates;
 
@@ -1,4 +1,5 @@
 import type { HoverInfo, BuildingProperties, RoadProperties, PoiProperties } from '../types';
+import { useFeatureProperties } from '../hooks/useMapData';
 import { LAYER_IDS, POI_CATEGORY_EMOJI } from '../utils/constants';
 
 interface TooltipProps {
@@ -6,12 +7,13 @@ interface TooltipProps {
 }
 
 export default function Tooltip({ info }: TooltipProps) {
-  if (!info.object) return null;
-
   const { x, y, object, layer } = info;
   const layerId = layer?.id ?? '';
   const isBuilding = layerId === LAYER_IDS.BUILDINGS_SOLID;
   const isPoi = layerId === 'pois';
+  const properties = useFeatureProperties(isBuilding ? 'buildings' : isPoi ? 'pois' : 'roads', object);
+
+  if (!object || !properties) return null;
 
   return (
     <div
@@ -32,11 +34,11 @@ export default function Tooltip({ info }: TooltipProps) {
       }}
     >
       {isBuilding ? (
-        <BuildingTooltip props={object.properties as BuildingProperties} />
+        <BuildingTooltip props={properties as BuildingProperties} />
       ) : isPoi ? (
-        <PoiTooltip props={object.properties as PoiProperties} />
+        <PoiTooltip props={properties as PoiProperties} />
       ) : (
-        <RoadTooltip props={object.properties as RoadProperties} />
+        <RoadTooltip props={properties as RoadProperties} />
       )}
     </div>
   );
@@ -49,6 +51,7 @@ function BuildingTooltip({ props }: { props: BuildingProperties }) {
       {props.height != null && <div>Height: {props.height.toFixed(1)} m</div>}
       <div>Source: {props.height_source}</div>
       {props.building_type && <div>Type: {props.building_type}</div>}
+      {!!props.poi_count && <div>Places: {props.poi_count}</div>}
     </>
   );
 }
@@ -1,6 +1,8 @@
 import { useQuery } from '@tanstack/react-query';
-import type { GeoJsonFeatureCollection, BuildingProperties, RoadProperties, PoiProperties, PipelineMetadata } from '../types';
-import { BUILDINGS_URL, ROADS_URL, POIS_URL, METADATA_URL } from '../utils/constants';
+import type { GeoJsonFeature, GeoJsonFeatureCollection, BuildingProperties, BlockProperties, RoadProperties, PoiProperties, PipelineMetadata, PoiClusterIndex, StreetLabelIndex, CityIndex, AttributeSidecar } from '../types';
+import type { Landmark } from '../layers/landmarkLayer';
+import { DATA_BASE_URL, BUILDINGS_URL, BLOCKS_URL, ROADS_URL, POIS_URL, METADATA_URL, LANDMARKS_URL, POI_CLUSTERS_URL, STREET_LABELS_URL, CITY_INDEX_URL } from '../utils/constants';
+import { featureAttributes } from '../utils/attributes';
 
 async function fetchJson<T>(url: string): Promise<T> {
   const res = await fetch(url);
@@ -18,6 +20,16 @@ export function useBuildingsData() {
   });
 }
 
+/** Fetch the city-block aggregate drawn instead of buildings at overview zooms */
+export function useBlocksData() {
+  return useQuery<GeoJsonFeatureCollection<BlockProperties>>({
+    queryKey: ['blocks'],
+    queryFn: () => fetchJson(BLOCKS_URL),
+    staleTime: Infinity,
+    retry: 1,
+  });
+}
+
 /** Fetch roads GeoJSON */
 export function useRoadsData() {
   return useQuery<GeoJsonFeatureCollection<RoadProperties>>({
@@ -47,3 +59,69 @@ export function useMetadata() {
     retry: 1,
   });
 }
+
+/**
+ * A feature's full properties: its render properties plus, when the layer
+ * was exported with --split-attributes, the rest from the layer's attribute
+ * sidecar — fetched the first time a feature of the layer is inspected.
+ * Undefined until the sidecar has loaded (or failed to, leaving only the
+ * render properties).
+ */
+export function useFeatureProperties<P>(
+  layer: string,
+  feature: GeoJsonFeature<P> | null | undefined,
+): P | undefined {
+  const { data: metadata } = useMetadata();
+  const file = metadata?.attributes?.[layer]?.file;
+  const { data: sidecar, isError } = useQuery<AttributeSidecar>({
+    queryKey: ['attributes', layer],
+    queryFn: () => fetchJson(`${DATA_BASE_URL}/${file}`),
+    enabled: !!feature && !!file,
+    staleTime: Infinity,
+    retry: 1,
+  });
+  if (!feature) return undefined;
+  if (!file || feature.id == null || isError) return feature.properties;
+  if (!sidecar) return undefined;
+  return { ...featureAttributes(sidecar, feature.id), ...feature.properties } as P;
+}
+
+/** Fetch pipeline-extracted landmarks (landmarks.json) */
+export function useLandmarksData() {
+  return useQuery<{ landmarks: Landmark[] }>({
+    queryKey: ['landmarks'],
+    queryFn: () => fetchJson(LANDMARKS_URL),
+    staleTime: Infinity,
+    retry: 1,
+  });
+}
+
+/** Fetch the precomputed zoom-level POI cluster index */
+export function usePoiClusters() {
+  return useQuery<PoiClusterIndex>({
+    queryKey: ['poi-clusters'],
+    queryFn: () => fetchJson(POI_CLUSTERS_URL),
+    staleTime: Infinity,
+    retry: 1,
+  });
+}
+
+/** Fetch the precomputed per-zoom street label placement */
+export function useStreetLabels() {
+  return useQuery<StreetLabelIndex>({
+    queryKey: ['street-labels'],
+    queryFn: () => fetchJson(STREET_LABELS_URL),
+    staleTime: Infinity,
+    retry: 1,
+  });
+}
+
+/** Fetch the multi-city index (cities.json) — paths are relative to DATA_ROOT_URL */
+export function useCityIndex() {
+  return useQuery<CityIndex>({
+    queryKey: ['city-index'],
+    queryFn: () => fetchJson(CITY_INDEX_URL),
+    staleTime: Infinity,
+    retry: 1,
+  });
+}
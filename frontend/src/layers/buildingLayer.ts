@@ -1,5 +1,5 @@
 import { GeoJsonLayer } from '@deck.gl/layers';
-import type { GeoJsonFeatureCollection, BuildingProperties } from '../types';
+import type { GeoJsonFeatureCollection, BuildingProperties, BlockProperties, HeightBand } from '../types';
 import {
   LAYER_IDS,
   HEIGHT_COLOR_SCALE,
@@ -64,6 +64,49 @@ function filterByHeight(
   };
 }
 
+/**
+ * Height bands (metadata.height_bands.bands) holding any building within
+ * [minH, maxH] — the only band files a height-range view needs to load.
+ */
+export function bandsInRange(
+  bands: HeightBand[],
+  [minH, maxH]: [number, number],
+): HeightBand[] {
+  return bands.filter((b) => b.height_range[1] >= minH && b.height_range[0] <= maxH);
+}
+
+/** First index in height-sorted features whose height is above `h` (or at least `h` if inclusive). */
+function heightBound(
+  features: GeoJsonFeatureCollection<BuildingProperties>['features'],
+  h: number,
+  inclusive: boolean,
+): number {
+  let lo = 0;
+  let hi = features.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    const m = features[mid].properties.height;
+    if (m < h || (!inclusive && m === h)) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+/**
+ * filterByHeight() for buildings sorted by ascending height (a band file,
+ * or a height-sorted tile cut at its last `height_bands` offset): two
+ * binary searches and a slice instead of a scan.
+ */
+export function sliceSortedByHeight(
+  data: GeoJsonFeatureCollection<BuildingProperties>,
+  [minH, maxH]: [number, number],
+): GeoJsonFeatureCollection<BuildingProperties> {
+  const start = heightBound(data.features, minH, true);
+  const end = heightBound(data.features, maxH, false);
+  if (start === 0 && end === data.features.length) return data;
+  return { ...data, features: data.features.slice(start, Math.max(start, end)) };
+}
+
 /**
  * Solid extruded building layer – coloured either by height gradient or
  * by semantic building type depending on `colourMode`.
@@ -129,3 +172,30 @@ export function createBuildingWireframeLayer(
     },
   });
 }
+
+/**
+ * City-block layer for overview zooms – one extrusion per block at its
+ * area-weighted mean height instead of one per building. Not pickable:
+ * blocks have no per-building attributes to show.
+ */
+export function createBlockLayer(data: GeoJsonFeatureCollection<BlockProperties> | null) {
+  if (!data) return null;
+
+  return new GeoJsonLayer({
+    id: LAYER_IDS.BLOCKS,
+    data: data as unknown as GeoJsonLayer['props']['data'],
+    extruded: true,
+    filled: true,
+    wireframe: false,
+    getElevation: (f: { properties: BlockProperties }) => f.properties.height,
+    getFillColor: (f: { properties: BlockProperties }) =>
+      heightToColor(f.properties.height, HEIGHT_COLOR_SCALE),
+    pickable: false,
+    material: {
+      ambient: 0.3,
+      diffuse: 0.8,
+      shininess: 32,
+      specularColor: [200, 200, 200],
+    },
+  });
+}
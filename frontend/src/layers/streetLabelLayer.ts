@@ -0,0 +1,35 @@
+import { TextLayer } from '@deck.gl/layers';
+import type { StreetLabel, StreetLabelIndex } from '../types';
+import { LAYER_IDS } from '../utils/constants';
+import { labelLevel, streetLabels } from '../utils/streetLabels';
+
+/**
+ * Street names placed by the pipeline (street_labels.json): one level per
+ * zoom, already free of overlaps and oriented along the street — the layer
+ * only draws them. Labels lie flat on the map (billboard: false), so their
+ * angles stay aligned with the streets as the map rotates.
+ */
+export function createStreetLabelLayer(index: StreetLabelIndex | null | undefined, zoom: number) {
+  if (!index) return null;
+  const level = labelLevel(index, zoom);
+  if (!level) return null;
+
+  return new TextLayer<StreetLabel>({
+    id: LAYER_IDS.STREET_LABELS,
+    data: streetLabels(index, level),
+    getPosition: (d) => d.position,
+    getText: (d) => d.text,
+    getAngle: (d) => d.angle,
+    getSize: index.font_px,
+    getColor: (d) => (d.roadClass === 'major' ? [40, 40, 40, 255] : [70, 70, 70, 230]),
+    fontFamily: 'system-ui, -apple-system, sans-serif',
+    fontWeight: '600',
+    // Street names use accented and non-Latin letters the default ASCII atlas lacks
+    characterSet: 'auto',
+    outlineWidth: 2,
+    outlineColor: [255, 255, 255, 220],
+    fontSettings: { sdf: true },
+    billboard: false,
+    pickable: false,
+  });
+}
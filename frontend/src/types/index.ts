@@ -3,11 +3,15 @@ export interface GeoJsonFeature<P = Record<string, unknown>> {
   type: 'Feature';
   geometry: GeoJSON.Geometry;
   properties: P;
+  /** Position in the layer file — the key into its attribute sidecar (--split-attributes) */
+  id?: number;
 }
 
 export interface GeoJsonFeatureCollection<P = Record<string, unknown>> {
   type: 'FeatureCollection';
   features: GeoJsonFeature<P>[];
+  /** Height-sorted building tiles (--height-bands): features[height_bands[i]..height_bands[i+1]) is band i */
+  height_bands?: number[];
 }
 
 // ─── Building Properties ─────────────────────────────────────────────
@@ -16,16 +20,36 @@ export type HeightSource = 'osm' | 'overture' | 'levels' | 'default';
 export interface BuildingProperties {
   /** Final computed height in metres */
   height: number;
+  /** Ground elevation under the footprint (m a.s.l.), present when the ETL ran with a DEM */
+  base_elevation?: number | null;
   /** Where the height value came from */
   height_source: HeightSource;
   /** OSM building type tag (e.g., "residential", "commercial") */
   building_type: string | null;
   /** Building name if available */
   name: string | null;
+  /** Stable OSM ID ("way/123"), referenced by POI building_id */
+  osm_id?: string;
+  /** Number of POIs inside / snapped to this building */
+  poi_count?: number;
+  /** Bitmask of POI categories present (see POI_CATEGORY_BITS) */
+  poi_mask?: number;
   /** Fill colour as [R, G, B, A] – computed at render time */
   fill_color?: [number, number, number, number];
 }
 
+// ─── City Block Properties (blocks.geojson, overview zooms) ──────────
+export interface BlockProperties {
+  /** Footprint-area-weighted mean height of the block's buildings in metres */
+  height: number;
+  /** Height of the tallest building in the block */
+  max_height: number;
+  /** Number of buildings dissolved into the block */
+  building_count: number;
+  /** Lowest ground elevation under the block, present when the ETL ran with a DEM */
+  base_elevation?: number | null;
+}
+
 // ─── POI Properties ──────────────────────────────────────────────────
 export interface PoiProperties {
   /** Display name (empty string when unknown) */
@@ -34,6 +58,63 @@ export interface PoiProperties {
   category: string;
   /** Raw OSM tag value, e.g. "restaurant" */
   amenity_tag: string;
+  /** osm_id of the containing / nearest building, null when unmatched */
+  building_id?: string | null;
+}
+
+// ─── POI Cluster Index (poi_clusters.json) ───────────────────────────
+export interface PoiClusterLevel {
+  zoom: number;
+  /** Member centroid per cluster */
+  lon: number[];
+  lat: number[];
+  count: number[];
+  /** Flat row-major counts, `categories.length` per cluster */
+  category_counts: number[];
+  /** CSR offsets (clusters + 1) into the next level, or into `leaves` for the last level */
+  children: number[];
+}
+
+export interface PoiClusterIndex {
+  min_zoom: number;
+  max_zoom: number;
+  radius_px: number;
+  categories: string[];
+  levels: PoiClusterLevel[];
+  /** POI feature indices into pois.geojson, grouped by finest cluster */
+  leaves: number[];
+}
+
+// ─── Street Labels (street_labels.json) ──────────────────────────────
+export interface StreetLabelLevel {
+  zoom: number;
+  /** Label anchor per label */
+  lon: number[];
+  lat: number[];
+  /** Degrees counter-clockwise from east, within (-90, 90] */
+  angle: number[];
+  /** Index into `names` */
+  name: number[];
+  /** Index into `classes` */
+  road_class: number[];
+}
+
+export interface StreetLabelIndex {
+  min_zoom: number;
+  max_zoom: number;
+  /** Text size (px) the placement assumed */
+  font_px: number;
+  names: string[];
+  classes: string[];
+  levels: StreetLabelLevel[];
+}
+
+/** One placed street label, as drawn by the TextLayer */
+export interface StreetLabel {
+  position: [number, number];
+  text: string;
+  angle: number;
+  roadClass: string;
 }
 
 // ─── Road Properties ─────────────────────────────────────────────────
@@ -67,13 +148,113 @@ export interface PipelineMetadata {
   stats: {
     buildings_count: number;
     roads_count: number;
-    avg_building_height: number;
-    max_building_height: number;
+    /** null for a city without buildings */
+    avg_building_height: number | null;
+    max_building_height: number | null;
+    /** Approximate height quantiles (p10, p25, p50, p75, p90, p99) in metres; null without buildings */
+    height_quantiles?: Record<string, number | null>;
     height_sources: Record<string, number>;
+    /** Building count per OSM building_type, most common first */
+    building_types?: Record<string, number>;
     pct_known_height: number;
   };
   data_sources: Record<string, string>;
   files: Record<string, string>;
+  /** Present when the pipeline ran with --ndjson: Hilbert-ordered NDJSON + chunk index per layer */
+  streams?: Record<string, { file: string; index: string }>;
+  /** Present when the pipeline ran with --split-attributes: non-render properties by layer */
+  attributes?: Record<string, { file: string }>;
+  /** Present when the pipeline ran with --bvh: buildings.geojson is then in BVH leaf order */
+  bvh?: Record<string, { file: string; nodes: number; leaf_size: number }>;
+  /** Present when the pipeline ran with --height-bands */
+  height_bands?: {
+    /** Band upper edges in metres; the last band is open-ended */
+    edges: number[];
+    bands: HeightBand[];
+  };
+}
+
+/** Chunk index of a Hilbert-ordered NDJSON export (<layer>.ndjson.index.json) */
+export interface NdjsonIndex {
+  layer: string;
+  order: 'hilbert';
+  features: number;
+  bytes: number;
+  chunk_size: number;
+  chunks: NdjsonChunk[];
+}
+
+export interface NdjsonChunk {
+  /** Byte range of the chunk's lines in the .ndjson file */
+  offset: number;
+  length: number;
+  count: number;
+  /** [west, south, east, north] of the chunk's features */
+  bbox: [number, number, number, number];
+}
+
+/**
+ * BVH over building prisms (buildings.bvh), as typed-array views of the
+ * sidecar. Bounds are [minx, miny, minz, maxx, maxy, maxz] per node or
+ * feature (lon/lat degrees, metres). Internal nodes: count 0, left child
+ * = node + 1, right child = offset; leaves: features [offset, offset + count).
+ */
+export interface Bvh {
+  leafSize: number;
+  nodeBounds: Float32Array;
+  offset: Int32Array;
+  count: Int32Array;
+  /** Feature prism bounds in leaf order (= buildings.geojson order) */
+  itemBounds: Float32Array;
+}
+
+/**
+ * Columnar attribute sidecar (<layer>.attributes.json), keyed by feature id.
+ * A column with `rows` only has values for those (sorted) feature ids; with
+ * `codes`, entry k is values[codes[k]] (dictionary encoding), otherwise values[k].
+ */
+export interface AttributeSidecar {
+  layer: string;
+  features: number;
+  columns: Record<string, AttributeColumn>;
+}
+
+export interface AttributeColumn {
+  rows?: number[];
+  values: unknown[];
+  codes?: (number | null)[];
+}
+
+/** One height band file: buildings sorted by ascending height */
+export interface HeightBand {
+  band: number;
+  /** Path relative to the city directory, e.g. "height_bands/band_2.geojson" */
+  file: string;
+  /** Band limits in metres: [min_height, max_height), max_height null = open */
+  min_height: number;
+  max_height: number | null;
+  count: number;
+  /** Actual [lowest, highest] building height in the band */
+  height_range: [number, number];
+  bbox: { west: number; south: number; east: number; north: number };
+}
+
+// ─── City Index (cities.json, written by pipeline.batch) ─────────────
+export interface CityIndexEntry {
+  name: string;
+  slug: string;
+  bounds: { west: number; south: number; east: number; north: number };
+  center: { lon: number; lat: number };
+  generated_at: string | null;
+  /** Paths relative to the data root, e.g. "bolzano_italy/metadata.json" */
+  metadata: string;
+  files: Record<string, string>;
+  counts: { buildings: number; roads: number; pois: number };
+}
+
+export interface CityIndex {
+  generated_at: string;
+  cities: CityIndexEntry[];
 }
 
 // ─── Tooltip / Hover Info ────────────────────────────────────────────
@@ -0,0 +1,32 @@
+import type { AttributeColumn, AttributeSidecar } from '../types';
+
+/** Value of one sidecar column for a feature id (null when the feature has none). */
+export function attributeValue(column: AttributeColumn, id: number): unknown {
+  let k = id;
+  if (column.rows) {
+    // rows are sorted: binary search for the feature id
+    let lo = 0;
+    let hi = column.rows.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      if (column.rows[mid] < id) lo = mid + 1;
+      else hi = mid;
+    }
+    if (column.rows[lo] !== id) return null;
+    k = lo;
+  }
+  if (column.codes) {
+    const code = column.codes[k];
+    return code == null ? null : column.values[code];
+  }
+  return column.values[k] ?? null;
+}
+
+/** All sidecar properties of a feature id. */
+export function featureAttributes(sidecar: AttributeSidecar, id: number): Record<string, unknown> {
+  const props: Record<string, unknown> = {};
+  for (const [name, column] of Object.entries(sidecar.columns)) {
+    props[name] = attributeValue(column, id);
+  }
+  return props;
+}
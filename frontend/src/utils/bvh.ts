@@ -0,0 +1,122 @@
+import type { Bvh } from '../types';
+
+const MAGIC = 'BVH1';
+const HEADER_BYTES = 16;
+
+/** View a buildings.bvh sidecar as typed arrays (no copy). */
+export function parseBvh(buffer: ArrayBuffer): Bvh {
+  const header = new DataView(buffer, 0, HEADER_BYTES);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC) throw new Error('Not a BVH file');
+  const nodes = header.getUint32(4, true);
+  const features = header.getUint32(8, true);
+
+  let pos = HEADER_BYTES;
+  const take = <T>(View: new (b: ArrayBuffer, o: number, n: number) => T, n: number): T => {
+    const view = new View(buffer, pos, n);
+    pos += n * 4;
+    return view;
+  };
+  return {
+    leafSize: header.getUint32(12, true),
+    nodeBounds: take(Float32Array, nodes * 6),
+    offset: take(Int32Array, nodes),
+    count: take(Int32Array, nodes),
+    itemBounds: take(Float32Array, features * 6),
+  };
+}
+
+function overlaps(bounds: Float32Array, i: number, box: ArrayLike<number>): boolean {
+  const o = i * 6;
+  return (
+    bounds[o] <= box[3] && bounds[o + 3] >= box[0] &&
+    bounds[o + 1] <= box[4] && bounds[o + 4] >= box[1] &&
+    bounds[o + 2] <= box[5] && bounds[o + 5] >= box[2]
+  );
+}
+
+/**
+ * Feature indices (into buildings.geojson) whose prisms intersect
+ * `box` = [minx, miny, minz, maxx, maxy, maxz], e.g. the view bbox for culling.
+ */
+export function queryBox(bvh: Bvh, box: ArrayLike<number>): number[] {
+  const found: number[] = [];
+  if (!bvh.count.length) return found;
+  const stack = [0];
+  while (stack.length) {
+    const node = stack.pop()!;
+    if (!overlaps(bvh.nodeBounds, node, box)) continue;
+    const n = bvh.count[node];
+    if (n === 0) {
+      stack.push(bvh.offset[node], node + 1);
+      continue;
+    }
+    for (let i = bvh.offset[node]; i < bvh.offset[node] + n; i++) {
+      if (overlaps(bvh.itemBounds, i, box)) found.push(i);
+    }
+  }
+  return found.sort((a, b) => a - b);
+}
+
+/** Ray parameter t ≥ 0 at which the ray enters box i; Infinity if it misses. */
+function rayEntry(
+  bounds: Float32Array,
+  i: number,
+  origin: ArrayLike<number>,
+  direction: ArrayLike<number>,
+): number {
+  let enter = 0;
+  let exit = Infinity;
+  for (let axis = 0; axis < 3; axis++) {
+    const lo = bounds[i * 6 + axis];
+    const hi = bounds[i * 6 + 3 + axis];
+    if (direction[axis] === 0) {
+      if (origin[axis] < lo || origin[axis] > hi) return Infinity;
+      continue;
+    }
+    const t1 = (lo - origin[axis]) / direction[axis];
+    const t2 = (hi - origin[axis]) / direction[axis];
+    enter = Math.max(enter, Math.min(t1, t2));
+    exit = Math.min(exit, Math.max(t1, t2));
+  }
+  return exit >= enter ? enter : Infinity;
+}
+
+/**
+ * Nearest building prism hit by a ray (hover picking), nearer child first so
+ * subtrees behind the best hit are skipped. Returns the feature index and
+ * ray parameter, or null.
+ */
+export function raycast(
+  bvh: Bvh,
+  origin: ArrayLike<number>,
+  direction: ArrayLike<number>,
+): { index: number; t: number } | null {
+  let best = -1;
+  let bestT = Infinity;
+  if (!bvh.count.length) return null;
+  const stack: [number, number][] = [[0, rayEntry(bvh.nodeBounds, 0, origin, direction)]];
+  while (stack.length) {
+    const [node, tNode] = stack.pop()!;
+    if (tNode === Infinity || tNode > bestT) continue;
+    const n = bvh.count[node];
+    if (n > 0) {
+      for (let i = bvh.offset[node]; i < bvh.offset[node] + n; i++) {
+        const t = rayEntry(bvh.itemBounds, i, origin, direction);
+        if (t < bestT || (t === bestT && t < Infinity && i < best)) {
+          best = i;
+          bestT = t;
+        }
+      }
+      continue;
+    }
+    const left = node + 1;
+    const right = bvh.offset[node];
+    const tLeft = rayEntry(bvh.nodeBounds, left, origin, direction);
+    const tRight = rayEntry(bvh.nodeBounds, right, origin, direction);
+    // push the farther child first so the nearer one is visited next
+    if (tLeft <= tRight) stack.push([right, tRight], [left, tLeft]);
+    else stack.push([left, tLeft], [right, tRight]);
+  }
+  return best >= 0 ? { index: best, t: bestT } : null;
+}
@@ -1,6 +1,8 @@
 // ─── Environment Variables ────────────────────────────────────────────
 export const MAPTILER_API_KEY = import.meta.env.VITE_MAPTILER_API_KEY as string;
 export const DATA_BASE_URL = (import.meta.env.VITE_DATA_BASE_URL as string) ?? '/data/bolzano_italy';
+/** Root of all city outputs — holds the cities.json index written by pipeline.batch */
+export const DATA_ROOT_URL = (import.meta.env.VITE_DATA_ROOT_URL as string) ?? '/data';
 
 // ─── Map Defaults ────────────────────────────────────────────────────
 /** Bolzano, Italy – Alpine valley overview on load.
@@ -16,6 +18,9 @@ export const INITIAL_VIEW_STATE = {
   maxZoom: 20,
 } as const;
 
+/** Below this zoom the city-block layer (blocks.geojson) replaces individual buildings */
+export const BLOCKS_MAX_ZOOM = 14;
+
 // ─── Tile URLs ───────────────────────────────────────────────────────
 // OpenFreeMap: free, no API key, no domain restrictions — works on localhost.
 // MapTiler streets-v2 returns 403 on localhost due to key domain restrictions.
@@ -32,6 +37,11 @@ export const BUILDINGS_URL = `${DATA_BASE_URL}/buildings.geojson`;
 export const ROADS_URL = `${DATA_BASE_URL}/roads.geojson`;
 export const POIS_URL = `${DATA_BASE_URL}/pois.geojson`;
 export const METADATA_URL = `${DATA_BASE_URL}/metadata.json`;
+export const LANDMARKS_URL = `${DATA_BASE_URL}/landmarks.json`;
+export const POI_CLUSTERS_URL = `${DATA_BASE_URL}/poi_clusters.json`;
+export const STREET_LABELS_URL = `${DATA_BASE_URL}/street_labels.json`;
+export const BLOCKS_URL = `${DATA_BASE_URL}/blocks.geojson`;
+export const CITY_INDEX_URL = `${DATA_ROOT_URL}/cities.json`;
 
 // ─── POI Category Colours ──────────────────────────────────────────────────────────
 /** RGBA colour per POI category, matching the ETL classification. */
@@ -58,6 +68,18 @@ export const POI_CATEGORY_EMOJI: Record<string, string> = {
   other:         '📍',
 };
 
+/** Bit per category in building `poi_mask` — same order as POI_CATEGORIES in the ETL. */
+export const POI_CATEGORY_BITS: Record<string, number> = {
+  food:          1 << 0,
+  healthcare:    1 << 1,
+  education:     1 << 2,
+  finance:       1 << 3,
+  accommodation: 1 << 4,
+  culture:       1 << 5,
+  shopping:      1 << 6,
+  other:         1 << 7,
+};
+
 // ─── Height → Color Scale ────────────────────────────────────────────
 /** Low buildings → cool blue, mid → green/yellow, tall → red */
 export const HEIGHT_COLOR_SCALE: [number, [number, number, number, number]][] = [
@@ -156,5 +178,7 @@ export const ROAD_WIDTH_SCALE: Record<string, number> = {
 export const LAYER_IDS = {
   BUILDINGS_SOLID: 'buildings-solid',
   BUILDINGS_WIREFRAME: 'buildings-wireframe',
+  BLOCKS: 'buildings-blocks',
   ROADS: 'roads-path',
+  STREET_LABELS: 'street-labels',
 } as const;
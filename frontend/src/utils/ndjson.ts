@@ -0,0 +1,70 @@
+import type { GeoJsonFeature, NdjsonChunk, NdjsonIndex } from '../types';
+
+/**
+ * Splits newline-delimited JSON arriving in arbitrary byte chunks into
+ * parsed records. A line split across two network chunks is buffered until
+ * its newline arrives.
+ */
+export class NdjsonParser<T> {
+  private decoder = new TextDecoder();
+  private rest = '';
+
+  /** Parse every complete line in `bytes`; pass `done` on the last call. */
+  push(bytes: Uint8Array, done = false): T[] {
+    const text = this.rest + this.decoder.decode(bytes, { stream: !done });
+    const lines = text.split('\n');
+    this.rest = done ? '' : (lines.pop() ?? '');
+    return lines.filter((line) => line.length > 0).map((line) => JSON.parse(line) as T);
+  }
+}
+
+/**
+ * Stream a whole NDJSON export, handing over features in batches as they
+ * arrive so the map can render before the download finishes.
+ * `range` restricts the request to a byte range (see rangesForBbox).
+ */
+export async function streamNdjson<P>(
+  url: string,
+  onFeatures: (features: GeoJsonFeature<P>[]) => void,
+  range?: { offset: number; length: number },
+): Promise<number> {
+  const headers: HeadersInit = range
+    ? { Range: `bytes=${range.offset}-${range.offset + range.length - 1}` }
+    : {};
+  const res = await fetch(url, { headers });
+  if (!res.ok || !res.body) throw new Error(`Failed to fetch ${url}: ${res.status}`);
+
+  const parser = new NdjsonParser<GeoJsonFeature<P>>();
+  const reader = res.body.getReader();
+  let count = 0;
+  for (;;) {
+    const { done, value } = await reader.read();
+    const features = parser.push(value ?? new Uint8Array(), done);
+    if (features.length) {
+      count += features.length;
+      onFeatures(features);
+    }
+    if (done) return count;
+  }
+}
+
+/**
+ * Byte ranges covering the chunks that intersect a [west, south, east, north]
+ * view. Chunks are in Hilbert order, so neighbouring chunks usually merge
+ * into a few contiguous ranges — one range request each.
+ */
+export function rangesForBbox(
+  index: NdjsonIndex,
+  [west, south, east, north]: [number, number, number, number],
+): { offset: number; length: number }[] {
+  const hits = index.chunks.filter(
+    (c: NdjsonChunk) => c.bbox[0] <= east && c.bbox[2] >= west && c.bbox[1] <= north && c.bbox[3] >= south,
+  );
+  const ranges: { offset: number; length: number }[] = [];
+  for (const c of hits) {
+    const last = ranges[ranges.length - 1];
+    if (last && last.offset + last.length === c.offset) last.length += c.length;
+    else ranges.push({ offset: c.offset, length: c.length });
+  }
+  return ranges;
+}
@@ -0,0 +1,23 @@
+import type { StreetLabel, StreetLabelIndex, StreetLabelLevel } from '../types';
+
+/**
+ * Label level for a view zoom: the finest level at or below it, the finest
+ * level above max_zoom, and null below min_zoom (no street labels).
+ */
+export function labelLevel(index: StreetLabelIndex, zoom: number): StreetLabelLevel | null {
+  let best: StreetLabelLevel | null = null;
+  for (const level of index.levels) {
+    if (level.zoom <= zoom && (!best || level.zoom > best.zoom)) best = level;
+  }
+  return best;
+}
+
+/** Rows of one label level, ready for a TextLayer. */
+export function streetLabels(index: StreetLabelIndex, level: StreetLabelLevel): StreetLabel[] {
+  return level.name.map((name, i) => ({
+    position: [level.lon[i], level.lat[i]],
+    text: index.names[name],
+    angle: level.angle[i],
+    roadClass: index.classes[level.road_class[i]] ?? 'other',
+  }));
+}
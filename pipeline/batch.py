@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Urban3D Navigator — Multi-City Batch Runner
+
+Runs the full pipeline for every city in a catalogue on a process pool.
+Workers share one on-disk cache for Overpass responses and Overture query
+results (CACHE_DIR), each city runs under its own address-space limit, and
+the run ends with a combined report plus a global cities.json index the
+frontend uses to discover cities.
+
+Catalogue (JSON):
+    {"cities": [
+        {"name": "Bolzano, Italy", "bbox": [46.515, 46.465, 11.385, 11.315]},
+        {"name": "Trento, Italy", "boundary": "Trento, Italy"},
+        {"name": "Milan, Italy", "bbox": [...], "use_overture": true,
+         "memory_limit_mb": 12000}
+    ]}
+
+A city needs a bbox (north, south, east, west) or a boundary — a GeoJSON
+file or a place name geocoded via Nominatim — whose bounds become the bbox.
+Optional keys: use_overture, tiled, height_bands, ndjson, bvh, split_attributes, dem_path, dedupe,
+memory_limit_mb.
+
+Usage:
+    python -m pipeline.batch                                  # config.CITY_CATALOGUE
+    python -m pipeline.batch my_cities.json --workers 3
+    python -m pipeline.batch --only "Bolzano, Italy" --only "Trento, Italy"
+    python -m pipeline.batch --index-only                     # rebuild cities.json
+
+Outputs (in --output-dir):
+    <slug>/               per-city artifacts, as written by pipeline.run
+    logs/<slug>.log       per-city pipeline output
+    batch_report.json     status, duration, feature counts and worker peak RSS per city
+    cities.json           every city with a metadata.json: bounds, center, files
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from pipeline.config import (
+    BATCH_MEMORY_LIMIT_MB,
+    BATCH_WORKERS,
+    CACHE_DIR,
+    CACHE_MAX_AGE_H,
+    CITY_CATALOGUE,
+    DEM_PATH,
+    EXPORT_BVH,
+    EXPORT_HEIGHT_BANDS,
+    EXPORT_NDJSON,
+    EXPORT_TILES,
+    OUTPUT_DIR,
+    QA_DEDUPE,
+    SPLIT_ATTRIBUTES,
+    USE_OVERTURE,
+)
+from pipeline.run import city_slug, run_pipeline
+from pipeline.stages.checkpoint import atomic_write
+from pipeline.stages.request_planner import use_response_cache
+from pipeline.stages.schema import enable_copy_on_write, peak_rss_mb
+
+BBox = tuple[float, float, float, float]
+
+
+def load_catalogue(path: Path) -> list[dict]:
+    """
+    Read and validate a city catalogue.
+
+    Raises:
+        ValueError: If an entry has no name, no bbox/boundary, or a duplicate slug
+    """
+    cities = json.loads(Path(path).read_text())["cities"]
+    slugs: set[str] = set()
+    for i, entry in enumerate(cities):
+        if not entry.get("name"):
+            raise ValueError(f"Catalogue entry {i} has no name")
+        if "bbox" not in entry and "boundary" not in entry:
+            raise ValueError(f"{entry['name']}: needs a bbox or a boundary")
+        if "bbox" in entry and len(entry["bbox"]) != 4:
+            raise ValueError(f"{entry['name']}: bbox must be [north, south, east, west]")
+        slug = city_slug(entry["name"])
+        if slug in slugs:
+            raise ValueError(f"{entry['name']}: duplicate output directory {slug}")
+        slugs.add(slug)
+    return cities
+
+
+def resolve_bbox(entry: dict) -> BBox:
+    """(north, south, east, west) of a catalogue entry's bbox or boundary."""
+    if "bbox" in entry:
+        north, south, east, west = (float(v) for v in entry["bbox"])
+        return north, south, east, west
+
+    boundary = entry["boundary"]
+    if Path(boundary).suffix.lower() in (".geojson", ".json") and Path(boundary).exists():
+        import geopandas as gpd
+
+        gdf = gpd.read_file(boundary)
+    else:
+        import osmnx as ox
+
+        gdf = ox.geocode_to_gdf(boundary)
+    west, south, east, north = gdf.to_crs("EPSG:4326").total_bounds
+    return float(north), float(south), float(east), float(west)
+
+
+def _prune_cache(cache_dir: Path, max_age_h: float) -> int:
+    """Delete cache files older than max_age_h; returns the number removed."""
+    if not cache_dir.exists():
+        return 0
+    cutoff = time.time() - max_age_h * 3600
+    removed = 0
+    for path in cache_dir.rglob("*"):
+        if path.is_file() and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def _address_space_bytes() -> int:
+    """Current virtual memory size of this process (0 where /proc is unavailable)."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[0])
+    except (OSError, ValueError, IndexError):
+        return 0
+    import resource
+
+    return pages * resource.getpagesize()
+
+
+def _limit_memory(limit_mb: float | None) -> None:
+    """
+    Let this process grow its address space by at most limit_mb (None = no
+    limit). Only the soft limit is set, so later cities can raise it again;
+    allocations beyond it raise MemoryError inside the city's run.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    soft = (
+        resource.RLIM_INFINITY if limit_mb is None
+        else _address_space_bytes() + int(limit_mb * 1024 * 1024)
+    )
+    if hard != resource.RLIM_INFINITY and (soft == resource.RLIM_INFINITY or soft > hard):
+        soft = hard
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+# Queue on which pool workers announce the cities they start (see run_batch)
+_started = None
+
+
+def _init_worker(cache_dir: Path | None, started=None) -> None:
+    global _started
+    if cache_dir is not None:
+        use_response_cache(cache_dir / "osm")
+    _started = started
+
+
+def _run_tracked(runner: Callable[..., dict], entry: dict, *args) -> dict:
+    """Pool task: announce the city as started, then run it."""
+    if _started is not None:
+        _started.put(entry["name"])
+    return runner(entry, *args)
+
+
+def _run_isolated(runner: Callable[..., dict], entry: dict, *args, cache_dir: Path | None = None) -> dict:
+    """
+    Run one city in a fresh child process. A child killed outright (OOM
+    killer) becomes a failed summary for this city only.
+    """
+    with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(cache_dir,)) as pool:
+        try:
+            return pool.submit(runner, entry, *args).result()
+        except BrokenProcessPool as e:
+            return {"city": entry["name"], "slug": city_slug(entry["name"]), "status": "failed",
+                    "error": f"worker died: {e}"}
+
+
+def run_city(
+    entry: dict,
+    output_dir: Path,
+    cache_dir: Path | None = None,
+    memory_limit_mb: float | None = BATCH_MEMORY_LIMIT_MB,
+) -> dict:
+    """
+    Run the pipeline for one catalogue entry (in a pool worker).
+
+    Pipeline output goes to logs/<slug>.log; failures are caught and
+    reported instead of raised so one city cannot stop the batch.
+
+    Returns:
+        Summary: city, slug, status ("ok" / "out_of_memory" / "failed"),
+        seconds, counts (from metadata.json), worker_peak_rss_mb, error
+    """
+    name = entry["name"]
+    slug = city_slug(name)
+    log_path = output_dir / "logs" / f"{slug}.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    summary: dict = {"city": name, "slug": slug, "status": "ok", "error": None}
+
+    start = time.perf_counter()
+    _limit_memory(entry.get("memory_limit_mb", memory_limit_mb))
+    with open(log_path, "w") as log, contextlib.redirect_stdout(log):
+        try:
+            city_dir = run_pipeline(
+                city=name,
+                bbox=resolve_bbox(entry),
+                output_dir=output_dir,
+                use_overture=entry.get("use_overture", USE_OVERTURE),
+                tiled=entry.get("tiled", EXPORT_TILES),
+                height_bands=entry.get("height_bands", EXPORT_HEIGHT_BANDS),
+                ndjson=entry.get("ndjson", EXPORT_NDJSON),
+                bvh=entry.get("bvh", EXPORT_BVH),
+                split_attributes=entry.get("split_attributes", SPLIT_ATTRIBUTES),
+                dem_path=Path(entry["dem_path"]) if entry.get("dem_path") else DEM_PATH,
+                dedupe=entry.get("dedupe", QA_DEDUPE),
+                cache_dir=cache_dir,
+            )
+            stats = json.loads((city_dir / "metadata.json").read_text())["stats"]
+            summary["counts"] = {
+                layer: stats[f"{layer}_count"] for layer in ("buildings", "roads", "pois")
+            }
+        except MemoryError:
+            summary.update(status="out_of_memory", error="MemoryError")
+            traceback.print_exc(file=log)
+        except Exception as e:
+            summary.update(status="failed", error=f"{type(e).__name__}: {e}")
+            traceback.print_exc(file=log)
+    _limit_memory(None)
+
+    summary["seconds"] = round(time.perf_counter() - start, 1)
+    summary["worker_peak_rss_mb"] = peak_rss_mb()  # workers are reused: max over their cities so far
+    return summary
+
+
+def write_city_index(output_dir: Path) -> Path:
+    """
+    Write cities.json: every city directory in output_dir with a metadata.json.
+
+    File paths are relative to output_dir, so the frontend can load any city
+    from the index alone.
+    """
+    cities = []
+    for metadata_path in sorted(output_dir.glob("*/metadata.json")):
+        metadata = json.loads(metadata_path.read_text())
+        slug = metadata_path.parent.name
+        cities.append(
+            {
+                "name": metadata["city"],
+                "slug": slug,
+                "bounds": metadata["bounds"],
+                "center": metadata["center"],
+                "generated_at": metadata.get("generated_at"),
+                "metadata": f"{slug}/metadata.json",
+                "files": {key: f"{slug}/{rel}" for key, rel in metadata.get("files", {}).items()},
+                "counts": {
+                    layer: metadata["stats"].get(f"{layer}_count")
+                    for layer in ("buildings", "roads", "pois")
+                },
+            }
+        )
+
+    path = output_dir / "cities.json"
+    index = {"generated_at": datetime.now(timezone.utc).isoformat(), "cities": cities}
+    with atomic_write(path) as tmp:
+        tmp.write_text(json.dumps(index, indent=2, ensure_ascii=False))
+    print(f"  City index written: {path} ({len(cities)} cities)")
+    return path
+
+
+def run_batch(
+    catalogue_path: Path = CITY_CATALOGUE,
+    output_dir: Path = OUTPUT_DIR,
+    workers: int = BATCH_WORKERS,
+    cache_dir: Path | None = CACHE_DIR,
+    memory_limit_mb: float | None = BATCH_MEMORY_LIMIT_MB,
+    only: list[str] | None = None,
+    runner: Callable[..., dict] = run_city,
+) -> dict:
+    """
+    Run every catalogue city across a process pool.
+
+    A worker killed outright breaks the whole pool. The cities it was
+    running then rerun one per child process, so the death is charged
+    only to the city that causes it; cities that had not started yet go
+    to a fresh pool.
+
+    Args:
+        catalogue_path: City catalogue JSON
+        output_dir: Root output directory (one subdirectory per city)
+        workers: Worker processes
+        cache_dir: Shared response cache (None = each worker's osmnx default)
+        memory_limit_mb: Default per-city limit (entries may set memory_limit_mb)
+        only: Restrict the run to these city names
+        runner: City function, called as runner(entry, output_dir, cache_dir,
+            memory_limit_mb) in a worker; returns a run_city summary
+
+    Returns:
+        The combined report (also written to batch_report.json)
+    """
+    cities = load_catalogue(catalogue_path)
+    if only:
+        unknown = set(only) - {c["name"] for c in cities}
+        if unknown:
+            raise ValueError(f"Not in catalogue: {sorted(unknown)}")
+        cities = [c for c in cities if c["name"] in only]
+
+    print(f"{'=' * 60}")
+    print(f"Urban3D Navigator — Batch run")
+    print(f"Cities: {len(cities)} · workers: {workers} · catalogue: {catalogue_path}")
+    print(f"{'=' * 60}")
+
+    if cache_dir is not None:
+        removed = _prune_cache(cache_dir, CACHE_MAX_AGE_H)
+        print(f"  Shared cache: {cache_dir} ({removed} stale entries removed)")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    started = datetime.now(timezone.utc)
+    results: dict[str, dict] = {}
+    args = (output_dir, cache_dir, memory_limit_mb)
+
+    def record(name: str, summary: dict) -> None:
+        results[name] = summary
+        print(f"  [{len(results)}/{len(cities)}] {name}: {summary['status']}"
+              + (f" ({summary.get('seconds')} s)" if summary["status"] == "ok" else
+                 f" — {summary['error']}"))
+
+    pending = cities
+    while pending:
+        announced = multiprocessing.SimpleQueue()
+        broken = []
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(cache_dir, announced)
+        ) as pool:
+            futures = {pool.submit(_run_tracked, runner, entry, *args): entry for entry in pending}
+            for future in as_completed(futures):
+                try:
+                    record(futures[future]["name"], future.result())
+                except BrokenProcessPool:  # a worker was killed (e.g. by the OOM killer)
+                    broken.append(futures[future])
+        running = set()
+        while not announced.empty():
+            running.add(announced.get())
+        announced.close()
+
+        # Without any announced city the worker died before running one:
+        # isolate them all, so every round makes progress
+        isolate = [entry for entry in broken if entry["name"] in running] or broken
+        if isolate:
+            print(f"  Worker died — rerunning {len(isolate)} cities one per process, "
+                  f"{len(broken) - len(isolate)} in a fresh pool")
+        for entry in isolate:
+            record(entry["name"], _run_isolated(runner, entry, *args, cache_dir=cache_dir))
+        pending = [entry for entry in broken if entry not in isolate]
+
+    ordered = [results[c["name"]] for c in cities]
+    report = {
+        "started_at": started.isoformat(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "workers": workers,
+        "succeeded": sum(r["status"] == "ok" for r in ordered),
+        "failed": sum(r["status"] != "ok" for r in ordered),
+        "cities": ordered,
+    }
+    with atomic_write(output_dir / "batch_report.json") as tmp:
+        tmp.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    write_city_index(output_dir)
+
+    print(f"\n{'=' * 60}")
+    print(f"Batch complete: {report['succeeded']} ok, {report['failed']} failed")
+    for r in ordered:
+        counts = r.get("counts") or {}
+        print(f"  {r['city']:<28} {r['status']:<14} "
+              f"{counts.get('buildings', '-'):>8} buildings  {r.get('seconds', '-')} s")
+    print(f"{'=' * 60}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban3D Navigator multi-city batch run")
+    parser.add_argument(
+        "catalogue", nargs="?", type=Path, default=CITY_CATALOGUE,
+        help=f"City catalogue JSON (default: {CITY_CATALOGUE.name})",
+    )
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument(
+        "--memory-limit-mb", type=float, default=BATCH_MEMORY_LIMIT_MB,
+        help="Default per-city address-space limit (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=CACHE_DIR,
+        help="Shared Overpass / Overture response cache",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the shared cache")
+    parser.add_argument(
+        "--only", action="append", metavar="CITY", help="Run only this city (repeatable)"
+    )
+    parser.add_argument(
+        "--index-only", action="store_true", help="Only rebuild cities.json from existing outputs"
+    )
+    args = parser.parse_args()
+    enable_copy_on_write()  # inherited by the forked workers
+
+    if args.index_only:
+        write_city_index(args.output_dir)
+        return
+
+    report = run_batch(
+        catalogue_path=args.catalogue,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        memory_limit_mb=args.memory_limit_mb or None,
+        only=args.only,
+    )
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
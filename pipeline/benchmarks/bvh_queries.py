@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Urban3D Navigator — BVH Query Benchmark
+
+Times the building BVH (pipeline.stages.bvh) against brute force over every
+prism of a synthetic city, and checks that both return the same buildings:
+
+- frustum: perspective views from 150–500 m up, looking across the city
+- box: 100–400 m query boxes (range selection, tile culling)
+- ray: picking rays from the camera through random ground points
+
+Brute force uses the same vectorised box tests on all prisms, so any
+result mismatch is a traversal bug, not a precision difference.
+
+Usage:
+    python -m pipeline.benchmarks.bvh_queries                      # 50k-building synthetic city
+    python -m pipeline.benchmarks.bvh_queries --buildings 200000 --queries 500 --leaf-size 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from pipeline.config import BVH_LEAF_SIZE
+
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "bvh_queries.json"
+FOV_DEG = 50.0            # deck.gl's default vertical field of view is ~37°; wider is the harder case
+ASPECT = 16 / 9
+FAR_M = 3_000.0
+
+
+def synthetic_prisms(n_buildings: int, seed: int = 0) -> np.ndarray:
+    """Prism bounds of a processed synthetic city, in its metric working CRS."""
+    from pipeline.benchmarks.synthetic_city import generate_buildings, synthetic_bbox
+    from pipeline.stages.bvh import prism_bounds
+    from pipeline.stages.clean_geometry import clean_geometries
+    from pipeline.stages.process_heights import process_heights
+    from pipeline.stages.working_crs import WorkingCRS
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        buildings = clean_geometries(process_heights(generate_buildings(n_buildings, seed)))
+    return prism_bounds(WorkingCRS.from_bbox(synthetic_bbox(n_buildings)).project(buildings))
+
+
+def synthetic_queries(bounds: np.ndarray, n: int, seed: int = 0) -> dict[str, list]:
+    """Random frustums (6 planes), boxes (lo, hi) and rays (origin, direction) over the prisms."""
+    from pipeline.stages.bvh import frustum_planes
+
+    rng = np.random.default_rng(seed)
+    lo, hi = bounds[:, :3].min(axis=0), bounds[:, 3:].max(axis=0)
+    ground = lambda k: np.column_stack([rng.uniform(lo[0], hi[0], k), rng.uniform(lo[1], hi[1], k)])  # noqa: E731
+
+    eyes = np.column_stack([ground(n), lo[2] + rng.uniform(150, 500, n)])
+    heading = rng.uniform(0, 2 * np.pi, n)
+    reach = rng.uniform(300, 1_000, n)
+    targets = np.column_stack([
+        eyes[:, 0] + np.cos(heading) * reach, eyes[:, 1] + np.sin(heading) * reach, np.full(n, lo[2]),
+    ])
+    box_lo = np.column_stack([ground(n), np.full(n, lo[2])])
+    box_size = rng.uniform(100, 400, (n, 1))
+    ray_targets = np.column_stack([ground(n), np.full(n, lo[2])])
+    return {
+        "frustum": [frustum_planes(e, t, FOV_DEG, ASPECT, 1.0, FAR_M) for e, t in zip(eyes, targets)],
+        "box": [(b, b + np.r_[box_size[i, 0], box_size[i, 0], hi[2] - lo[2]]) for i, b in enumerate(box_lo)],
+        "ray": [(e, t - e) for e, t in zip(eyes, ray_targets)],
+    }
+
+
+def _timed(fn, queries: list) -> tuple[list, float]:
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return results, time.perf_counter() - start
+
+
+def run_benchmark(bounds: np.ndarray, n_queries: int, leaf_size: int = BVH_LEAF_SIZE, seed: int = 0) -> dict:
+    """
+    Build the BVH over prism bounds and time each query kind against brute force.
+
+    Returns:
+        {"build": {...}, "frustum" | "box" | "ray": {"queries", "mismatches",
+        "mean_results", "bvh_ms", "brute_force_ms", "speedup"}}
+    """
+    from pipeline.stages.bvh import box_planes, build_bvh, frustum_test, ray_entry
+
+    start = time.perf_counter()
+    tree = build_bvh(bounds, leaf_size)
+    build_s = time.perf_counter() - start
+    tree.span  # cached subtree ranges, computed once per loaded tree
+    items = tree.item_bounds
+    queries = synthetic_queries(bounds, n_queries, seed)
+
+    def brute_ray(ray):
+        t = ray_entry(items, *ray)
+        k = int(np.argmin(t))
+        return (k, float(t[k])) if np.isfinite(t[k]) else None
+
+    kinds = {
+        "frustum": (tree.query_frustum, lambda planes: np.flatnonzero(frustum_test(items, planes)[0])),
+        "box": (lambda b: tree.query_box(*b), lambda b: np.flatnonzero(frustum_test(items, box_planes(*b))[0])),
+        "ray": (lambda r: tree.raycast(*r), brute_ray),
+    }
+    results = {
+        "build": {
+            "buildings": len(bounds), "nodes": len(tree.bounds), "leaf_size": leaf_size,
+            "seconds": round(build_s, 3),
+        },
+    }
+    for kind, (bvh_fn, brute_fn) in kinds.items():
+        fast, fast_s = _timed(bvh_fn, queries[kind])
+        slow, slow_s = _timed(brute_fn, queries[kind])
+        if kind == "ray":
+            mismatches = sum(
+                (a is None) != (b is None) or (a is not None and (a[0] != b[0] or not np.isclose(a[1], b[1])))
+                for a, b in zip(fast, slow)
+            )
+            sizes = [a is not None for a in fast]
+        else:
+            mismatches = sum(not np.array_equal(a, b) for a, b in zip(fast, slow))
+            sizes = [len(a) for a in fast]
+        results[kind] = {
+            "queries": len(fast),
+            "mismatches": int(mismatches),
+            "mean_results": round(float(np.mean(sizes)), 2) if sizes else 0.0,
+            "bvh_ms": round(fast_s / max(len(fast), 1) * 1000, 3),
+            "brute_force_ms": round(slow_s / max(len(slow), 1) * 1000, 3),
+            "speedup": round(slow_s / fast_s, 1) if fast_s else None,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban3D Navigator BVH query benchmark")
+    parser.add_argument("--buildings", type=int, default=50_000, help="Synthetic city size")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per kind")
+    parser.add_argument("--leaf-size", type=int, default=BVH_LEAF_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    print(f"{'=' * 60}")
+    print("Urban3D Navigator — BVH query benchmark")
+    print(f"{'=' * 60}")
+    print(f"  Building synthetic city ({args.buildings:,} buildings)...")
+    bounds = synthetic_prisms(args.buildings, args.seed)
+    results = run_benchmark(bounds, args.queries, args.leaf_size, args.seed)
+
+    build = results["build"]
+    print(f"  BVH: {build['nodes']:,} nodes in {build['seconds']:.2f} s")
+    for kind in ("frustum", "box", "ray"):
+        r = results[kind]
+        print(f"  {kind:<8} bvh {r['bvh_ms']:>8.3f} ms   brute force {r['brute_force_ms']:>8.3f} ms   "
+              f"{r['speedup']:>6}×   {r['mean_results']:>9} results/query   {r['mismatches']} mismatches")
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "buildings": args.buildings,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\n  Results written: {args.output}")
+    if any(results[kind]["mismatches"] for kind in ("frustum", "box", "ray")):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Urban3D Navigator — Tile Server Replay Benchmark
+
+Load-tests pipeline.serve locally: starts the server as a subprocess over a
+synthetic (or given) city and replays a request log with many concurrent
+keep-alive clients — once against a cold cache, once warm. A share of the
+requests revalidate a previously seen ETag, as browsers do.
+
+The synthetic log mimics map panning: z14–z17 tiles over the city with
+Zipf-distributed popularity (a few hot tiles, a long tail), 60 % buildings,
+30 % roads, 10 % POIs, plus some bbox queries.
+
+Usage:
+    python -m pipeline.benchmarks.replay_server                      # 50k-building synthetic city
+    python -m pipeline.benchmarks.replay_server --buildings 200000 --requests 20000 --concurrency 64
+    python -m pipeline.benchmarks.replay_server --output-dir data/processed --log requests.txt
+
+A log file holds one request target per line, e.g.
+    /bolzano_italy/buildings/16/34812/23288.geojson
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "replay_server.json"
+LAYER_MIX = {"buildings": 0.6, "roads": 0.3, "pois": 0.1}
+ZOOMS = (14, 15, 16, 17)
+BBOX_SHARE = 0.1          # Share of bbox (instead of tile) requests
+REVALIDATE_SHARE = 0.2    # Share of requests sent with a known ETag
+ZIPF_S = 1.1              # Popularity skew of tiles
+
+
+def write_synthetic_city(output_dir: Path, n_buildings: int, seed: int = 0) -> tuple[str, tuple]:
+    """
+    Process a synthetic city and save its layers as processed checkpoints.
+
+    Returns:
+        (city slug, (north, south, east, west) bbox)
+    """
+    from pipeline.benchmarks.synthetic_city import generate_city, synthetic_bbox
+    from pipeline.stages.checkpoint import save_checkpoint
+    from pipeline.stages.clean_geometry import clean_geometries
+    from pipeline.stages.fetch_roads import classify_roads
+    from pipeline.stages.process_heights import process_heights
+
+    city = generate_city(n_buildings, seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        layers = {
+            "buildings": clean_geometries(process_heights(city["buildings"])),
+            "roads": classify_roads(city["roads"]),
+            "pois": city["pois"],
+        }
+    slug = "synthetic_city"
+    for name, gdf in layers.items():
+        save_checkpoint(gdf, output_dir / slug, name)
+    return slug, synthetic_bbox(n_buildings)
+
+
+def _tile_xy(lon: float, lat: float, z: int) -> tuple[int, int]:
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def synthetic_requests(
+    slug: str, bbox: tuple[float, float, float, float], n: int, seed: int = 0
+) -> list[str]:
+    """Request targets over a (north, south, east, west) bbox, with panning-like popularity."""
+    rng = np.random.default_rng(seed)
+    north, south, east, west = bbox
+    candidates = []
+    for z in ZOOMS:
+        x0, y0 = _tile_xy(west, north, z)
+        x1, y1 = _tile_xy(east, south, z)
+        candidates += [(z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+    order = rng.permutation(len(candidates))  # which tiles are hot
+    weights = 1.0 / np.arange(1, len(candidates) + 1) ** ZIPF_S
+    tiles = [candidates[order[i]] for i in rng.choice(len(candidates), n, p=weights / weights.sum())]
+    layers = rng.choice(list(LAYER_MIX), n, p=list(LAYER_MIX.values()))
+
+    requests = []
+    for (z, x, y), layer, use_bbox in zip(tiles, layers, rng.random(n) < BBOX_SHARE):
+        if use_bbox:
+            lon = rng.uniform(west, east)
+            lat = rng.uniform(south, north)
+            half = 0.002
+            requests.append(f"/{slug}/{layer}?bbox={lon - half:.4f},{lat - half:.4f},{lon + half:.4f},{lat + half:.4f}")
+        else:
+            requests.append(f"/{slug}/{layer}/{z}/{x}/{y}.geojson")
+    return requests
+
+
+async def _client(
+    host: str, port: int, queue: asyncio.Queue, etags: dict, results: list, rng: np.random.Generator
+) -> None:
+    """One keep-alive connection working through the shared request queue."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            headers = f"GET {target} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n"
+            if target in etags and rng.random() < REVALIDATE_SHARE:
+                headers += f"If-None-Match: {etags[target]}\r\n"
+            start = time.perf_counter()
+            writer.write((headers + "\r\n").encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            status = int(lines[0].split()[1])
+            fields = {k.lower(): v.strip() for k, v in (l.split(":", 1) for l in lines[1:] if ":" in l)}
+            body = await reader.readexactly(int(fields.get("content-length", 0)))
+            results.append((time.perf_counter() - start, status, len(body)))
+            if "etag" in fields:
+                etags[target] = fields["etag"]
+    finally:
+        writer.close()
+
+
+async def replay(
+    host: str, port: int, requests: list[str], concurrency: int, seed: int = 0
+) -> dict:
+    """
+    Replay requests over `concurrency` connections.
+
+    Returns:
+        {"requests", "seconds", "requests_per_s", "latency_ms": {p50, p95, p99, max},
+         "status": {code: count}, "mb_received"}
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for target in requests:
+        queue.put_nowait(target)
+    etags: dict[str, str] = {}
+    results: list[tuple[float, int, int]] = []
+    rng = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, queue, etags, results, rng) for _ in range(concurrency)
+    ))
+    seconds = time.perf_counter() - start
+
+    latency = np.array([r[0] for r in results]) * 1000
+    statuses: dict[str, int] = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(results),
+        "seconds": round(seconds, 3),
+        "requests_per_s": round(len(results) / seconds, 1),
+        "latency_ms": {
+            f"p{q}": round(float(np.percentile(latency, q)), 2) for q in (50, 95, 99)
+        } | {"max": round(float(latency.max()), 2)},
+        "status": statuses,
+        "mb_received": round(sum(r[2] for r in results) / 1e6, 2),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _get_json(host: str, port: int, target: str) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b"\r\n\r\n", 1)[1])
+
+
+def run_benchmark(
+    output_dir: Path, requests: list[str], concurrency: int, cache_mb: float, workers: int
+) -> dict:
+    """Start the server on output_dir and replay requests cold, then warm."""
+    host, port = "127.0.0.1", _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "pipeline.serve", "--output-dir", str(output_dir),
+         "--port", str(port), "--cache-mb", str(cache_mb), "--workers", str(workers)],
+        cwd=_PROJECT_ROOT, stdout=subprocess.DEVNULL,
+    )
+    try:
+        async def run() -> dict:
+            for _ in range(300):  # wait for the server to listen
+                try:
+                    await _get_json(host, port, "/cities")
+                    break
+                except OSError:
+                    await asyncio.sleep(0.1)
+            slug = requests[0].split("/")[1]
+            load_start = time.perf_counter()  # first request of a city loads it
+            await _get_json(host, port, f"/{slug}/buildings?bbox=0,0,0.0001,0.0001")
+            load_seconds = time.perf_counter() - load_start
+
+            cold = await replay(host, port, requests, concurrency)
+            warm = await replay(host, port, requests, concurrency, seed=1)
+            stats = await _get_json(host, port, "/stats")
+            return {"city_load_seconds": round(load_seconds, 2), "cold": cold, "warm": warm,
+                    "server": stats["cache"]}
+
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban3D Navigator tile server replay benchmark")
+    parser.add_argument("--buildings", type=int, default=50_000, help="Synthetic city size")
+    parser.add_argument("--output-dir", type=Path, default=None,
+                        help="Serve existing outputs instead of a synthetic city (needs --log)")
+    parser.add_argument("--log", type=Path, default=None, help="Request log, one target per line")
+    parser.add_argument("--requests", type=int, default=5_000, help="Synthetic log length")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--cache-mb", type=float, default=256)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    if args.output_dir is not None and args.log is None:
+        parser.error("--output-dir needs a --log of requests")
+
+    print(f"{'=' * 60}")
+    print("Urban3D Navigator — Tile server replay benchmark")
+    print(f"{'=' * 60}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = args.output_dir
+        if output_dir is None:
+            output_dir = Path(tmp)
+            print(f"  Building synthetic city ({args.buildings:,} buildings)...")
+            slug, bbox = write_synthetic_city(output_dir, args.buildings, args.seed)
+            requests = synthetic_requests(slug, bbox, args.requests, args.seed)
+        if args.log is not None:
+            requests = [line.strip() for line in args.log.read_text().splitlines() if line.strip()]
+
+        print(f"  Replaying {len(requests):,} requests over {args.concurrency} connections...")
+        results = run_benchmark(output_dir, requests, args.concurrency, args.cache_mb, args.workers)
+
+    for phase in ("cold", "warm"):
+        r = results[phase]
+        print(f"  {phase:<5} {r['requests_per_s']:>8.0f} req/s   p50 {r['latency_ms']['p50']:>7.2f} ms   "
+              f"p99 {r['latency_ms']['p99']:>7.2f} ms   {r['status']}")
+    print(f"  server cache: {results['server']}")
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "buildings": args.buildings if args.output_dir is None else None,
+        "concurrency": args.concurrency,
+        "cache_mb": args.cache_mb,
+        "workers": args.workers,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\n  Results written: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Urban3D Navigator — Offline Stage Benchmarks
+
+Times the processing stages on synthetic cities of increasing size and
+writes the results to JSON. With --baseline, the run is compared against a
+previous results file and exits non-zero if any stage got slower than the
+regression threshold.
+
+Usage:
+    python -m pipeline.benchmarks.run_benchmarks                    # 5k, 50k, 500k
+    python -m pipeline.benchmarks.run_benchmarks --sizes 5000 50000 --repeat 3
+    python -m pipeline.benchmarks.run_benchmarks --baseline baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from pipeline.benchmarks.synthetic_city import generate_city
+from pipeline.stages.city_blocks import aggregate_blocks
+from pipeline.stages.clean_geometry import clean_geometries
+from pipeline.stages.export_geojson import export_geojson
+from pipeline.stages.fetch_overture import merge_osm_overture
+from pipeline.stages.fetch_roads import classify_roads
+from pipeline.stages.footprint_qa import footprint_qa
+from pipeline.stages.generate_metadata import generate_metadata
+from pipeline.stages.process_heights import process_heights
+from pipeline.stages.schema import enable_copy_on_write, frame_memory_mb, peak_rss_mb
+from pipeline.stages.street_labels import merge_street_paths, place_street_labels
+
+DEFAULT_SIZES = (5_000, 50_000, 500_000)
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "latest.json"
+MAX_SLOWDOWN = 1.25   # Fail if a stage is >25% slower than the baseline
+MIN_SECONDS = 0.05    # Ignore stages faster than this (timer noise dominates)
+
+
+def _time_best(fn: Callable[[], object], repeat: int) -> tuple[float, object]:
+    """Best-of-`repeat` wall time of fn() (stage prints suppressed) and its last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_size(n_buildings: int, repeat: int = 1, seed: int = 0) -> dict[str, dict]:
+    """
+    Run every benchmarked stage once per repeat on a synthetic city.
+
+    Stages run in pipeline order, each on the previous stage's output.
+
+    Returns:
+        {stage: {"seconds": ..., "features": ..., "us_per_feature": ...,
+                 "frame_mb": ... (stage output frames only)}}
+    """
+    city = generate_city(n_buildings, seed)
+    results: dict[str, dict] = {}
+
+    def record(stage: str, fn: Callable[[], object], features: int):
+        seconds, out = _time_best(fn, repeat)
+        results[stage] = {
+            "seconds": round(seconds, 4),
+            "features": features,
+            "us_per_feature": round(seconds / max(features, 1) * 1e6, 3),
+        }
+        if hasattr(out, "memory_usage"):
+            results[stage]["frame_mb"] = round(frame_memory_mb(out), 2)
+        print(f"  {n_buildings:>9,} | {stage:<20} {seconds:8.3f} s")
+        return out
+
+    buildings = record(
+        "merge_osm_overture",
+        lambda: merge_osm_overture(city["buildings"], city["overture"]),
+        len(city["buildings"]),
+    )
+    buildings = record("process_heights", lambda: process_heights(buildings), len(buildings))
+    buildings = record("clean_geometries", lambda: clean_geometries(buildings), len(buildings))
+    buildings = record("footprint_qa", lambda: footprint_qa(buildings)[0], len(buildings))
+    record("aggregate_blocks", lambda: aggregate_blocks(buildings), len(buildings))
+    roads = record("classify_roads", lambda: classify_roads(city["roads"]), len(city["roads"]))
+    record("street_labels", lambda: place_street_labels(merge_street_paths(roads)), len(roads))
+    pois = city["pois"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+
+        def _export():
+            export_geojson(buildings, out_dir / "buildings.geojson", "buildings")
+            export_geojson(roads, out_dir / "roads.geojson", "roads")
+            export_geojson(pois, out_dir / "pois.geojson", "pois")
+
+        record("export_geojson", _export, len(buildings) + len(roads) + len(pois))
+        record(
+            "generate_metadata",
+            lambda: generate_metadata(
+                "Synthetic City", buildings, roads, out_dir / "metadata.json", pois_gdf=pois
+            ),
+            len(buildings),
+        )
+
+    return results
+
+
+def compare_results(
+    current: dict,
+    baseline: dict,
+    max_slowdown: float = MAX_SLOWDOWN,
+    min_seconds: float = MIN_SECONDS,
+) -> list[dict]:
+    """
+    Stages slower than max_slowdown × baseline (sizes/stages in both files only).
+
+    Returns:
+        List of {"size", "stage", "baseline", "current", "ratio"} regressions
+    """
+    regressions = []
+    for size, stages in current["results"].items():
+        base_stages = baseline.get("results", {}).get(size, {})
+        for stage, timing in stages.items():
+            if stage not in base_stages:
+                continue
+            base = base_stages[stage]["seconds"]
+            now = timing["seconds"]
+            if max(base, now) < min_seconds:
+                continue
+            ratio = now / base if base > 0 else float("inf")
+            if ratio > max_slowdown:
+                regressions.append(
+                    {"size": size, "stage": stage, "baseline": base, "current": now,
+                     "ratio": round(ratio, 2)}
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban3D Navigator offline stage benchmarks")
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+        help="Building counts to benchmark (default: 5000 50000 500000)",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Best-of-N timing (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic city seed (default: 0)")
+    parser.add_argument(
+        "--output", type=Path, default=DEFAULT_OUTPUT,
+        help=f"Results JSON (default: {DEFAULT_OUTPUT})",
+    )
+    parser.add_argument("--baseline", type=Path, default=None, help="Previous results to compare against")
+    parser.add_argument(
+        "--max-slowdown", type=float, default=MAX_SLOWDOWN,
+        help=f"Regression threshold as a ratio to the baseline (default: {MAX_SLOWDOWN})",
+    )
+    args = parser.parse_args()
+    enable_copy_on_write()  # as in the pipeline CLI
+
+    print(f"{'=' * 60}")
+    print("Urban3D Navigator — Stage benchmarks")
+    print(f"Sizes: {', '.join(f'{n:,}' for n in args.sizes)} buildings · repeat={args.repeat}")
+    print(f"{'=' * 60}")
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "thresholds": {"max_slowdown": args.max_slowdown, "min_seconds": MIN_SECONDS},
+        "results": {
+            str(n): benchmark_size(n, repeat=args.repeat, seed=args.seed) for n in args.sizes
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\n  Results written: {args.output}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_results(report, baseline, args.max_slowdown)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline}:")
+            for r in regressions:
+                print(
+                    f"    {r['stage']} @ {r['size']}: {r['baseline']:.3f} s → "
+                    f"{r['current']:.3f} s (×{r['ratio']})"
+                )
+            sys.exit(1)
+        print(f"\n✅ No regressions vs {args.baseline} (threshold ×{args.max_slowdown})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Urban3D Navigator — Shared-Memory Transport Benchmark
+
+Measures what handing a processed building frame to worker processes costs
+with pickled chunks versus the shared-memory transport
+(pipeline.stages.shared_frames):
+
+- serialisation: handing every chunk over without any work. "parent" is the
+  serial part (pickle.dumps per chunk versus one SharedFrame.create),
+  "workers" the part that runs in parallel (pickle.loads versus to_frame),
+  "piped" what goes through the pool's pipe; both get only the columns the
+  workload reads
+- map_chunks: a cheap vectorised footprint-metrics function over the whole
+  frame on a process pool, per transport and with a SharedFrame reused
+  across calls, against running it in-process
+
+Usage:
+    python -m pipeline.benchmarks.shared_frames                        # 100k-building synthetic city
+    python -m pipeline.benchmarks.shared_frames --buildings 500000 --workers 8 --chunk-rows 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import pickle
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from pipeline.config import SHARED_CHUNK_ROWS, SHARED_WORKERS
+
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "shared_frames.json"
+
+
+def synthetic_frame(n_buildings: int, seed: int = 0) -> gpd.GeoDataFrame:
+    """Processed synthetic buildings (numeric, categorical, string and list columns) in a metric CRS."""
+    from pipeline.benchmarks.synthetic_city import generate_buildings, synthetic_bbox
+    from pipeline.stages.clean_geometry import clean_geometries
+    from pipeline.stages.process_heights import process_heights
+    from pipeline.stages.working_crs import WorkingCRS
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        buildings = clean_geometries(process_heights(generate_buildings(n_buildings, seed)))
+    buildings = WorkingCRS.from_bbox(synthetic_bbox(n_buildings)).project(buildings)
+    rng = np.random.default_rng(seed)
+    # OSM tags that survive as lists after merging ways (e.g. highway, addr:*)
+    buildings["tags"] = [["building", str(k)] if k else None for k in rng.integers(0, 4, len(buildings))]
+    return buildings
+
+
+def footprint_metrics(chunk: gpd.GeoDataFrame) -> pd.DataFrame:
+    """Per-footprint area, perimeter, compactness and volume — the vectorised stand-in workload."""
+    area = chunk.geometry.area
+    perimeter = chunk.geometry.length
+    return pd.DataFrame({
+        "area": area,
+        "perimeter": perimeter,
+        "compactness": 4 * np.pi * area / perimeter.pow(2),
+        "volume": area * chunk["height"],
+    }, index=chunk.index)
+
+
+METRIC_COLUMNS = ["geometry", "height"]   # Columns footprint_metrics reads
+
+
+def _serialisation(frame: gpd.GeoDataFrame, chunk_rows: int) -> dict:
+    """Parent-side (serial) and worker-side (parallel) handoff cost of every chunk, without work."""
+    from pipeline.stages.shared_frames import SharedFrame
+
+    frame = frame[METRIC_COLUMNS]
+    ranges = range(0, len(frame), chunk_rows)
+    start = time.perf_counter()
+    payloads = [pickle.dumps(frame.iloc[i:i + chunk_rows], protocol=pickle.HIGHEST_PROTOCOL) for i in ranges]
+    pickle_parent = time.perf_counter() - start
+    start = time.perf_counter()
+    for payload in payloads:
+        pickle.loads(payload)
+    pickle_worker = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shared = SharedFrame.create(frame)
+    handle = pickle.dumps(shared)
+    shared_parent = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in ranges:
+        pickle.loads(handle).to_frame(i, i + chunk_rows)
+    shared_worker = time.perf_counter() - start
+    shared.unlink()
+    return {
+        "pickle": {"parent_s": pickle_parent, "worker_s": pickle_worker,
+                   "piped_mb": sum(map(len, payloads)) / 1e6},
+        "shared": {"parent_s": shared_parent, "worker_s": shared_worker,
+                   "piped_mb": len(handle) * len(ranges) / 1e6},
+    }
+
+
+def run_benchmark(frame: gpd.GeoDataFrame, chunk_rows: int = SHARED_CHUNK_ROWS,
+                  workers: int = SHARED_WORKERS, repeats: int = 3) -> dict:
+    """
+    Time chunk handoff and map_chunks(footprint_metrics) per transport.
+
+    Returns:
+        {"serialisation": {"pickle" | "shared": {"parent_s", "worker_s", "piped_mb"}},
+         "map_chunks": {"in_process_s", "pickle_s", "shared_s", "shared_reused_s",
+                        "<transport>_overhead_s", "mismatches"}}
+    """
+    from pipeline.stages.shared_frames import SharedFrame, map_chunks
+
+    runs = [_serialisation(frame, chunk_rows) for _ in range(repeats)]
+    serialisation = {
+        transport: {key: round(min(run[transport][key] for run in runs), 3) for key in runs[0][transport]}
+        for transport in ("pickle", "shared")
+    }
+
+    def timed_map(source, transport: str, n_workers: int) -> tuple[float, pd.DataFrame]:
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = pd.concat(map_chunks(footprint_metrics, source, chunk_rows, n_workers, transport,
+                                          columns=METRIC_COLUMNS))
+            seconds = time.perf_counter() - start
+            best = (seconds, result) if best is None or seconds < best[0] else best
+        return best
+
+    in_process_s, expected = timed_map(frame, "pickle", 1)
+    timings = {"in_process_s": round(in_process_s, 3)}
+    mismatches = 0
+    with SharedFrame.create(frame) as shared:
+        for key, source, transport in (("pickle", frame, "pickle"), ("shared", frame, "shared"),
+                                       ("shared_reused", shared, "shared")):
+            seconds, result = timed_map(source, transport, workers)
+            timings[f"{key}_s"] = round(seconds, 3)
+            timings[f"{key}_overhead_s"] = round(seconds - in_process_s, 3)
+            mismatches += int(not result.index.equals(expected.index)
+                              or not np.allclose(result.to_numpy(), expected.to_numpy(), equal_nan=True))
+
+    return {
+        "rows": len(frame),
+        "chunk_rows": chunk_rows,
+        "workers": workers,
+        "serialisation": serialisation,
+        "map_chunks": dict(timings, mismatches=mismatches),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban3D Navigator shared-memory transport benchmark")
+    parser.add_argument("--buildings", type=int, default=100_000, help="Synthetic city size")
+    parser.add_argument("--chunk-rows", type=int, default=SHARED_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=SHARED_WORKERS)
+    parser.add_argument("--repeats", type=int, default=3, help="Best-of runs per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    print(f"{'=' * 60}")
+    print("Urban3D Navigator — shared-memory transport benchmark")
+    print(f"{'=' * 60}")
+    print(f"  Building synthetic city ({args.buildings:,} buildings)...")
+    frame = synthetic_frame(args.buildings, args.seed)
+    results = run_benchmark(frame, args.chunk_rows, args.workers, args.repeats)
+
+    for transport, r in results["serialisation"].items():
+        print(f"  {transport:<7} parent {r['parent_s']:>7.3f} s   workers {r['worker_s']:>7.3f} s   "
+              f"piped {r['piped_mb']:>8.2f} MB")
+    m = results["map_chunks"]
+    print(f"  map_chunks  in-process {m['in_process_s']:.3f} s   pickle {m['pickle_s']:.3f} s   "
+          f"shared {m['shared_s']:.3f} s   shared (reused) {m['shared_reused_s']:.3f} s   "
+          f"{m['mismatches']} mismatches")
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "buildings": args.buildings,
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\n  Results written: {args.output}")
+    if m["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
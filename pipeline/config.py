@@ -27,15 +27,121 @@ DEFAULT_HEIGHT_M = 9.0    # Fallback when no height data is available (3 floors)
 FLOOR_HEIGHT_M = 3.0      # Meters per building:levels (European standard)
 MIN_HEIGHT_M = 2.0        # Sanity cap — minimum building height
 MAX_HEIGHT_M = 300.0      # Sanity cap — maximum building height
+HEIGHT_HIST_BIN_M = 1.0   # Height histogram bin width (stats / quantiles)
 
 # ── OSM Settings ────────────────────────────────────────
 OSM_TIMEOUT = 300          # Overpass API timeout in seconds
 OSM_MAX_QUERY_AREA = 50_000_000  # Max query area in m²
 
+# ── Overpass Request Planner ────────────────────────────
+OSM_CELL_FEATURE_BUDGET = 20_000  # Split a quadtree cell returning more features than this
+OSM_MAX_SPLIT_DEPTH = 4    # Max adaptive splits (4 → cells 1/256 of the initial area)
+OSM_FETCH_WORKERS = 2      # Concurrent Overpass requests (public instance allows ~2 slots)
+OSM_FETCH_RETRIES = 3      # Retries per cell for non-timeout failures
+OSM_RETRY_BACKOFF_S = 5.0  # Base delay for exponential retry backoff
+
 # ── Spatial Tiling (Phase 2) ────────────────────────────
 TILE_SIZE_KM = 1.0         # Tile size for large areas
+EXPORT_TILES = False       # Also write per-tile GeoJSON (tiles/<layer>/<ix>_<iy>.geojson)
 GEOJSON_COORD_PRECISION = 6  # Decimal places (~10cm accuracy)
 
+# ── Attribute Sidecars ──────────────────────────────────
+SPLIT_ATTRIBUTES = False     # Keep only RENDER_PROPERTIES in <layer>.geojson, the rest in <layer>.attributes.json
+RENDER_PROPERTIES = {        # Properties the first render needs (extrusion, colour, icons)
+    "buildings": ("height", "base_elevation", "building_type"),
+    "roads": ("road_class", "line_width"),
+    "pois": ("category",),
+}
+
+# ── Height Bands ────────────────────────────────────────
+EXPORT_HEIGHT_BANDS = False  # Also write height-sorted buildings per band (height_bands/band_<i>.geojson)
+HEIGHT_BAND_EDGES_M = (6.0, 10.0, 15.0, 25.0, 40.0, 80.0)  # Band upper edges; last band is open-ended
+
+# ── Streaming Export (NDJSON) ───────────────────────────
+EXPORT_NDJSON = False        # Also write Hilbert-ordered <layer>.ndjson + byte-offset index
+NDJSON_CHUNK_FEATURES = 512  # Features per indexed chunk (one HTTP range request each)
+HILBERT_ORDER = 16           # Hilbert curve grid of 2^16 × 2^16 cells over the layer bounds
+
+# ── Building BVH ────────────────────────────────────────
+EXPORT_BVH = False           # Write buildings.geojson in BVH leaf order + buildings.bvh sidecar
+BVH_LEAF_SIZE = 8            # Max buildings per BVH leaf
+
+# ── Terrain DEM ─────────────────────────────────────────
+DEM_PATH = None              # GeoTIFF or Terrarium tile dir ({z}/{x}/{y}.png); None = flat export
+DEM_TERRARIUM_ZOOM = 14      # Tile zoom to sample (~7 m/px at Bolzano)
+DEM_TILE_CACHE = 64          # Decoded Terrarium tiles kept in memory
+DEM_BUILDING_BASE = "min"    # Ground under a footprint: "min" or "median"
+DEM_ROAD_SEGMENT_M = 25.0    # Densify roads to this vertex spacing before draping
+
+# ── Footprint QA ────────────────────────────────────────
+QA_OVERLAP_MIN_RATIO = 0.05   # Flag pairs whose overlap covers ≥ this share of the smaller footprint
+QA_DUPLICATE_RATIO = 0.8      # … and treat them as duplicates from this share on
+QA_DEDUPE = False             # Drop duplicate footprints (keeps the better-sourced / larger one)
+QA_SLIVER_MIN_AREA_M2 = 4.0   # Footprints smaller than this are slivers
+QA_SLIVER_MIN_WIDTH_M = 0.5   # … as are footprints with area / perimeter below this (≈ half width)
+QA_CHUNK_SIZE = 20_000        # Footprints per STRtree query chunk
+QA_WORKERS = 4                # Threads for chunked queries (shapely releases the GIL)
+
+# ── City Blocks ─────────────────────────────────────────
+BLOCK_GAP_M = 2.0             # Footprints closer than this merge into one block (gaps closed)
+BLOCK_SIMPLIFY_M = 1.0        # Simplification tolerance of block outlines
+BLOCK_WORKERS = 4             # Threads for per-tile unions (shapely releases the GIL)
+
+# ── Process Pools ───────────────────────────────────────
+SHARED_WORKERS = 4            # Worker processes for map_chunks (frames travel via shared memory)
+SHARED_CHUNK_ROWS = 20_000    # Rows per map_chunks task
+
+# ── POI ↔ Building Association ──────────────────────────
+POI_BUILDING_MAX_DISTANCE_M = 20.0  # Snap POIs outside any footprint to the nearest building within this
+
+# ── POI Clustering ──────────────────────────────────────
+POI_CLUSTER_MIN_ZOOM = 10     # Coarsest zoom with a cluster level
+POI_CLUSTER_MAX_ZOOM = 16     # Above this the frontend draws individual POIs
+POI_CLUSTER_RADIUS_PX = 64    # Grid cell size in screen pixels (256 px tiles)
+
+# ── Street Labels ───────────────────────────────────────
+STREET_LABEL_MIN_ZOOM = 14       # Coarsest zoom with a label level
+STREET_LABEL_MAX_ZOOM = 18       # Finest label level (the frontend reuses it above)
+STREET_LABEL_CLASS_MIN_ZOOM = {"major": 14, "minor": 15, "other": 16, "path": 17}  # First zoom labelling each road class
+STREET_LABEL_FONT_PX = 12        # Label text size in screen pixels
+STREET_LABEL_CHAR_PX = 7.0       # Average glyph advance at that size (label width estimate)
+STREET_LABEL_PADDING_PX = 4.0    # Clear space kept around each label
+STREET_LABEL_SPACING_PX = 256.0  # Min distance between two labels of the same street
+STREET_LABEL_MIN_STRAIGHTNESS = 0.9  # Chord / path length under a label (skip sharp bends)
+STREET_LABEL_GRID_PX = 64        # Cell size of the collision grid hash
+
+# ── Landmark Extraction ─────────────────────────────────
+LANDMARK_RADIUS_M = 150.0        # Neighbourhood radius for relative height / junction proximity
+LANDMARK_JUNCTION_MIN_DEGREE = 4  # Streets meeting at a "major" junction
+LANDMARK_WEIGHTS = {"height": 0.4, "junction": 0.2, "pois": 0.25, "name": 0.15}
+LANDMARK_MIN_SCORE = 0.25        # Candidates below this are never labelled
+LANDMARK_MIN_SPACING_M = 120.0   # Min distance between two selected landmarks
+LANDMARK_MAX_COUNT = 40          # Landmarks per city
+
+# ── Batch Runs ──────────────────────────────────────────
+CITY_CATALOGUE = Path(__file__).parent / "cities.catalogue.json"
+CACHE_DIR = Path(__file__).parent / "data" / "cache"  # Overpass + Overture responses shared by batch workers
+CACHE_MAX_AGE_H = 20.0        # Older cache entries are dropped at batch start (nightly builds refetch)
+BATCH_WORKERS = 2             # Cities processed concurrently (Overpass allows ~2 slots per IP)
+BATCH_MEMORY_LIMIT_MB = 8_000  # Default per-city address-space limit (catalogue entries may override)
+
+# ── Job Queue ───────────────────────────────────────────
+JOB_DB_NAME = "jobs.sqlite"   # Queue database, created in the output directory
+JOB_LEASE_S = 600.0           # A running job whose lease is not renewed for this long is reclaimed
+JOB_MAX_ATTEMPTS = 3          # Attempts before a job is marked failed
+JOB_BACKOFF_S = 60.0          # Retry delay after the first failure, doubled per further attempt
+JOB_POLL_S = 5.0              # Idle workers re-check the queue this often (--wait)
+
+# ── Tile Server ─────────────────────────────────────────
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+SERVE_CACHE_MB = 256          # LRU budget for gzipped responses
+SERVE_GZIP_LEVEL = 5          # Response compression (1 fast … 9 small)
+SERVE_RELOAD_S = 2.0          # Loaded cities are checked for a newly published run this often
+SERVE_WORKERS = 4             # Threads building responses off the event loop
+SERVE_KEEPALIVE_S = 15.0      # Idle keep-alive connections are closed after this long
+SERVE_MAX_ZOOM = 22
+
 # ── Overture S3 URL ─────────────────────────────────────
 OVERTURE_S3_BASE = (
     f"s3://overturemaps-us-west-2/release/{OVERTURE_RELEASE}"
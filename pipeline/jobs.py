@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Urban3D Navigator — Durable Job Queue
+
+A SQLite-backed queue of city jobs, so long multi-city runs survive
+Overpass failures, OOM kills and crashed machines. Each job has a state,
+an attempt counter and a lease:
+
+    queued ──claim──▶ running ──ok──▶ done
+      ▲                  │
+      └── retry after ───┤ failure / lease expired (attempts < max)
+          backoff        └──────────────────────────▶ failed
+
+- claim: a worker takes the oldest runnable job in one IMMEDIATE
+  transaction and holds a lease of JOB_LEASE_S seconds, renewed while the
+  job runs. A job whose lease runs out (the worker or its machine died) is
+  claimed again by the next free worker.
+- failure: the job is re-queued with exponential backoff (JOB_BACKOFF_S,
+  doubled per attempt) until JOB_MAX_ATTEMPTS, then marked failed.
+- every job runs in a fresh child process (batch.run_city), so a city
+  killed by the OOM killer only costs that attempt, and the worker keeps
+  renewing the lease while it waits.
+
+Workers on several machines can share one queue through shared storage;
+the database uses SQLite's rollback journal (not WAL) for that reason.
+Throughput grows by starting more workers; a crashed run resumes by
+simply starting workers again.
+
+Usage:
+    python -m pipeline.jobs enqueue                       # config.CITY_CATALOGUE
+    python -m pipeline.jobs enqueue my_cities.json --only "Trento, Italy"
+    python -m pipeline.jobs work --workers 2              # until the queue is drained
+    python -m pipeline.jobs work --wait                   # keep polling for new jobs
+    python -m pipeline.jobs status
+    python -m pipeline.jobs retry                         # re-queue failed jobs
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from pipeline.batch import _init_worker, _prune_cache, load_catalogue, run_city, write_city_index
+from pipeline.config import (
+    BATCH_MEMORY_LIMIT_MB,
+    CACHE_DIR,
+    CACHE_MAX_AGE_H,
+    CITY_CATALOGUE,
+    JOB_BACKOFF_S,
+    JOB_DB_NAME,
+    JOB_LEASE_S,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_S,
+    OUTPUT_DIR,
+)
+from pipeline.run import city_slug
+from pipeline.stages.schema import enable_copy_on_write
+
+STATES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY,
+    key           TEXT NOT NULL UNIQUE,
+    kind          TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    state         TEXT NOT NULL DEFAULT 'queued',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    not_before    REAL NOT NULL DEFAULT 0,
+    worker        TEXT,
+    lease_expires REAL,
+    started_at    REAL,
+    finished_at   REAL,
+    error         TEXT,
+    result        TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (state, not_before);
+"""
+
+
+class JobQueue:
+    """
+    A job table in one SQLite file.
+
+    Every state change is a single short transaction, so any number of
+    worker processes can share the file. Methods taking `now` default to
+    the current time (tests pass it explicitly).
+    """
+
+    def __init__(self, path: Path, lease_s: float = JOB_LEASE_S):
+        self.path = Path(path)
+        self.lease_s = lease_s
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: transactions are opened explicitly below
+        self._conn = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database's write lock from the start."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def enqueue(
+        self,
+        entries: Iterable[dict],
+        kind: str = "city",
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        force: bool = False,
+    ) -> int:
+        """
+        Add one job per catalogue entry, keyed by city slug.
+
+        Entries already in the queue are left alone, unless force=True
+        re-queues them (with fresh attempts and the new payload) — running
+        jobs are never touched.
+
+        Returns:
+            Number of jobs added or re-queued
+        """
+        now = time.time()
+        changed = 0
+        with self._transaction() as conn:
+            for entry in entries:
+                key, payload = city_slug(entry["name"]), json.dumps(entry)
+                cursor = conn.execute(
+                    "INSERT INTO jobs (key, kind, payload, max_attempts, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO NOTHING",
+                    (key, kind, payload, max_attempts, now, now),
+                )
+                if not cursor.rowcount and force:
+                    cursor = conn.execute(
+                        "UPDATE jobs SET state = 'queued', payload = ?, attempts = 0, "
+                        "max_attempts = ?, not_before = 0, error = NULL, result = NULL, "
+                        "worker = NULL, lease_expires = NULL, updated_at = ? "
+                        "WHERE key = ? AND state != 'running'",
+                        (payload, max_attempts, now, key),
+                    )
+                changed += cursor.rowcount
+        return changed
+
+    def claim(self, worker: str, now: float | None = None) -> dict | None:
+        """
+        Lease the next runnable job to worker.
+
+        Runnable: queued with its backoff elapsed, or running with an
+        expired lease (its worker is gone). Expired jobs that have used up
+        their attempts are marked failed instead.
+
+        Returns:
+            The job (payload decoded), or None if nothing is runnable
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', finished_at = ?, updated_at = ?, "
+                "error = 'lease expired: worker ' || worker || ' lost' "
+                "WHERE state = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now, now),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs "
+                "WHERE (state = 'queued' AND not_before <= ?) "
+                "   OR (state = 'running' AND lease_expires < ?) "
+                "ORDER BY not_before, id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?, "
+                "lease_expires = ?, started_at = ?, updated_at = ? WHERE id = ?",
+                (worker, now + self.lease_s, now, now, row["id"]),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return _decode(job)
+
+    def heartbeat(self, job_id: int, worker: str, now: float | None = None) -> bool:
+        """Renew a lease; False if the job is no longer leased to worker."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (now + self.lease_s, now, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: dict, now: float | None = None) -> bool:
+        """Mark a leased job done; False if the lease was lost meanwhile."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'done', result = ?, error = NULL, lease_expires = NULL, "
+                "finished_at = ?, updated_at = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                (json.dumps(result), now, now, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def fail(
+        self,
+        job_id: int,
+        worker: str,
+        error: str,
+        result: dict | None = None,
+        backoff_s: float = JOB_BACKOFF_S,
+        now: float | None = None,
+    ) -> str | None:
+        """
+        Record a failed attempt: re-queue with backoff, or fail for good
+        once max_attempts is reached.
+
+        Returns:
+            The job's new state, or None if the lease was lost meanwhile
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return None
+            if row["attempts"] >= row["max_attempts"]:
+                state, not_before, finished_at = "failed", 0.0, now
+            else:
+                state, not_before, finished_at = "queued", now + backoff_s * 2 ** (row["attempts"] - 1), None
+            conn.execute(
+                "UPDATE jobs SET state = ?, not_before = ?, finished_at = ?, error = ?, result = ?, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (state, not_before, finished_at, error,
+                 json.dumps(result) if result is not None else None, now, job_id),
+            )
+        return state
+
+    def retry_failed(self) -> int:
+        """Re-queue every failed job with fresh attempts; returns how many."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'queued', attempts = 0, not_before = 0, "
+                "finished_at = NULL, updated_at = ? WHERE state = 'failed'",
+                (now,),
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs per state."""
+        counts = dict.fromkeys(STATES, 0)
+        for row in self._conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"):
+            counts[row["state"]] = row["n"]
+        return counts
+
+    def jobs(self) -> list[dict]:
+        """All jobs in queue order."""
+        return [_decode(row) for row in self._conn.execute("SELECT * FROM jobs ORDER BY id")]
+
+    def next_runnable_in(self, now: float | None = None) -> float | None:
+        """
+        Seconds until some job may become runnable: 0 if one is runnable
+        now, None if every job is done or failed.
+        """
+        now = time.time() if now is None else now
+        row = self._conn.execute(
+            "SELECT MIN(CASE state WHEN 'queued' THEN not_before ELSE lease_expires END) AS t "
+            "FROM jobs WHERE state IN ('queued', 'running')"
+        ).fetchone()
+        return None if row["t"] is None else max(row["t"] - now, 0.0)
+
+
+def _decode(row: sqlite3.Row) -> dict:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def _run_leased(
+    queue: JobQueue,
+    job: dict,
+    worker: str,
+    runner: Callable[..., dict],
+    runner_args: tuple,
+    cache_dir: Path | None,
+) -> dict:
+    """
+    Run one job in a fresh child process, renewing its lease until the
+    child returns. A child killed outright (OOM killer) becomes a failed
+    summary instead of an exception.
+    """
+    with ProcessPoolExecutor(
+        max_workers=1, initializer=_init_worker, initargs=(cache_dir,)
+    ) as pool:
+        future = pool.submit(runner, job["payload"], *runner_args)
+        while True:
+            try:
+                return future.result(timeout=queue.lease_s / 3)
+            except TimeoutError:
+                if not queue.heartbeat(job["id"], worker):
+                    print(f"  [{worker}] lost the lease on {job['key']} — result will be discarded")
+            except BrokenProcessPool as e:
+                return {"city": job["payload"].get("name"), "status": "failed",
+                        "error": f"job process died: {e}"}
+
+
+def work(
+    db_path: Path,
+    output_dir: Path = OUTPUT_DIR,
+    cache_dir: Path | None = CACHE_DIR,
+    memory_limit_mb: float | None = BATCH_MEMORY_LIMIT_MB,
+    wait: bool = False,
+    worker: str | None = None,
+    runner: Callable[..., dict] = run_city,
+    backoff_s: float = JOB_BACKOFF_S,
+) -> int:
+    """
+    Worker loop: claim jobs and run them until the queue is drained.
+
+    Args:
+        db_path: Queue database
+        output_dir: Root output directory for the city runs
+        cache_dir: Shared response cache (None = osmnx default)
+        memory_limit_mb: Default per-city limit (entries may set memory_limit_mb)
+        wait: Keep polling for new jobs instead of exiting once drained
+        worker: Worker name in the queue (default: host:pid)
+        runner: Job function, called as runner(payload, output_dir, cache_dir,
+            memory_limit_mb) in a child process; returns a batch.run_city summary
+        backoff_s: Retry delay after a job's first failed attempt
+
+    Returns:
+        Number of jobs this worker ran
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(db_path)
+    ran = 0
+    try:
+        while True:
+            job = queue.claim(worker)
+            if job is None:
+                # Keep waiting while other workers' jobs may still be re-queued
+                idle = queue.next_runnable_in()
+                if idle is None and not wait:
+                    break
+                time.sleep(min(idle if idle is not None else JOB_POLL_S, JOB_POLL_S) or 0.1)
+                continue
+
+            print(f"  [{worker}] {job['key']}: attempt {job['attempts']}/{job['max_attempts']}")
+            summary = _run_leased(
+                queue, job, worker, runner, (output_dir, cache_dir, memory_limit_mb), cache_dir
+            )
+            ran += 1
+            if summary.get("status") == "ok":
+                queue.complete(job["id"], worker, summary)
+                print(f"  [{worker}] {job['key']}: done ({summary.get('seconds')} s)")
+            else:
+                error = summary.get("error") or summary.get("status", "failed")
+                state = queue.fail(job["id"], worker, error, result=summary, backoff_s=backoff_s)
+                print(f"  [{worker}] {job['key']}: {summary.get('status')} — {error}"
+                      + (" (will retry)" if state == "queued" else ""))
+    finally:
+        queue.close()
+    return ran
+
+
+def print_status(queue: JobQueue, now: float | None = None) -> dict[str, int]:
+    """Print per-state totals and one line per job; returns the totals."""
+    now = time.time() if now is None else now
+    counts = queue.counts()
+    total = sum(counts.values())
+    print(f"Jobs in {queue.path}: {total} total · "
+          + " · ".join(f"{counts[s]} {s}" for s in STATES))
+    for job in queue.jobs():
+        if job["state"] == "running":
+            detail = f"{job['worker']}, lease {max(job['lease_expires'] - now, 0):.0f} s left"
+        elif job["state"] == "queued" and job["not_before"] > now:
+            detail = f"retry in {job['not_before'] - now:.0f} s — {job['error']}"
+        elif job["state"] == "failed":
+            detail = job["error"] or ""
+        elif job["state"] == "done":
+            detail = f"{(job['result'] or {}).get('seconds', '-')} s"
+        else:
+            detail = ""
+        print(f"  {job['key']:<28} {job['state']:<8} "
+              f"{job['attempts']}/{job['max_attempts']}  {detail}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban3D Navigator durable job queue")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument(
+        "--db", type=Path, default=None,
+        help=f"Queue database (default: <output-dir>/{JOB_DB_NAME})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add catalogue cities to the queue")
+    enqueue.add_argument("catalogue", nargs="?", type=Path, default=CITY_CATALOGUE)
+    enqueue.add_argument("--only", action="append", metavar="CITY", help="Only this city (repeatable)")
+    enqueue.add_argument("--max-attempts", type=int, default=JOB_MAX_ATTEMPTS)
+    enqueue.add_argument(
+        "--force", action="store_true", help="Re-queue cities that are already done or failed"
+    )
+
+    run = commands.add_parser("work", help="Run queued jobs")
+    run.add_argument("--workers", type=int, default=1, help="Worker processes on this machine")
+    run.add_argument("--wait", action="store_true", help="Keep polling once the queue is drained")
+    run.add_argument("--memory-limit-mb", type=float, default=BATCH_MEMORY_LIMIT_MB,
+                     help="Default per-city address-space limit (0 = unlimited)")
+    run.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    run.add_argument("--no-cache", action="store_true", help="Do not use the shared cache")
+
+    commands.add_parser("status", help="Show queue progress")
+    commands.add_parser("retry", help="Re-queue failed jobs")
+    args = parser.parse_args()
+    enable_copy_on_write()  # inherited by the forked job processes
+
+    db_path = args.db or args.output_dir / JOB_DB_NAME
+
+    if args.command == "enqueue":
+        cities = load_catalogue(args.catalogue)
+        if args.only:
+            unknown = set(args.only) - {c["name"] for c in cities}
+            if unknown:
+                parser.error(f"Not in catalogue: {sorted(unknown)}")
+            cities = [c for c in cities if c["name"] in args.only]
+        queue = JobQueue(db_path)
+        added = queue.enqueue(cities, max_attempts=args.max_attempts, force=args.force)
+        print(f"Queued {added} of {len(cities)} cities in {db_path}")
+        queue.close()
+
+    elif args.command == "work":
+        cache_dir = None if args.no_cache else args.cache_dir
+        if cache_dir is not None:
+            removed = _prune_cache(cache_dir, CACHE_MAX_AGE_H)
+            print(f"  Shared cache: {cache_dir} ({removed} stale entries removed)")
+        kwargs = dict(
+            db_path=db_path, output_dir=args.output_dir, cache_dir=cache_dir,
+            memory_limit_mb=args.memory_limit_mb or None, wait=args.wait,
+        )
+        if args.workers == 1:
+            work(**kwargs)
+        else:
+            processes = [multiprocessing.Process(target=work, kwargs=kwargs) for _ in range(args.workers)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        write_city_index(args.output_dir)
+        queue = JobQueue(db_path)
+        counts = print_status(queue)
+        queue.close()
+        sys.exit(1 if counts["failed"] else 0)
+
+    elif args.command == "status":
+        queue = JobQueue(db_path)
+        print_status(queue)
+        queue.close()
+
+    elif args.command == "retry":
+        queue = JobQueue(db_path)
+        print(f"Re-queued {queue.retry_failed()} failed jobs")
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
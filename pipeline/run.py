@@ -7,13 +7,25 @@ Orchestrates all stages from data fetch to GeoJSON export.
 Usage:
     python -m pipeline.run                     # Uses defaults from config.py
     python -m pipeline.run --city "Milan, Italy" --use-overture
+    python -m pipeline.run --city "Bolzano, Italy" --apply-osc changes.osc.gz
+    python -m pipeline.run --city "Bolzano, Italy" --stages export,metadata,publish
+    python -m pipeline.run --tiles --height-bands  # + per-tile and per-height-band buildings
+    python -m pipeline.run --ndjson                # + Hilbert-ordered NDJSON for streaming
+    python -m pipeline.run --bvh                   # + BVH sidecar for culling / picking
+    python -m pipeline.run --split-attributes      # lean layer files + lazy attribute sidecars
+
+Stage modules (and with them geopandas, osmnx, duckdb) are imported when a
+run starts, not at module load, so `--help` and argument errors return
+immediately.
 """
 
 from __future__ import annotations
 
 import argparse
+import shutil
 import sys
 from pathlib import Path
+from typing import Iterable
 
 # Ensure the project root (parent of `pipeline/`) is on sys.path so that
 # `from pipeline.X import ...` resolves correctly whether run.py is invoked
@@ -22,92 +34,626 @@ _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(_PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(_PROJECT_ROOT))
 
-from pipeline.config import BBOX, CITY, OUTPUT_DIR, USE_OVERTURE
-from pipeline.stages.fetch_buildings import fetch_osm_buildings
-from pipeline.stages.fetch_pois import fetch_pois
-from pipeline.stages.fetch_overture import fetch_overture_buildings, merge_osm_overture
-from pipeline.stages.process_heights import process_heights
-from pipeline.stages.fetch_roads import fetch_road_network
-from pipeline.stages.clean_geometry import clean_geometries
-from pipeline.stages.export_geojson import export_geojson
-from pipeline.stages.generate_metadata import generate_metadata
-from pipeline.stages.validate import validate_building_data
+from pipeline.config import (
+    BBOX, CITY, DEM_PATH, EXPORT_BVH, EXPORT_HEIGHT_BANDS, EXPORT_NDJSON, EXPORT_TILES, OUTPUT_DIR,
+    QA_DEDUPE, SPLIT_ATTRIBUTES, USE_OVERTURE,
+)
+
+
+# Stages of a full run, in order. A run may select a subset (--stages /
+# --skip): without "fetch" the layers come from the previous run's
+# checkpoints — the fetched layers if a processing stage is selected,
+# otherwise the processed layers saved by "export". Selecting any output
+# stage implies "publish" unless it is skipped explicitly.
+STAGES = (
+    "fetch", "heights", "clean", "qa", "pois", "terrain",
+    "export", "landmarks", "clusters", "blocks", "labels", "metadata", "publish",
+)
+PROCESSING_STAGES = STAGES[:6]
+OUTPUT_STAGES = STAGES[6:]
+
+# Checkpoint names of the fetched (unprocessed) layers
+FETCHED_PREFIX = "fetched_"
+
+# Directory of the per-height-band building files (--height-bands)
+HEIGHT_BANDS_DIRNAME = "height_bands"
+
+# BVH sidecar of buildings.geojson (--bvh)
+BVH_FILENAME = "buildings.bvh"
+
+# Per-city artifacts written next to the layer GeoJSON, referenced from metadata.json
+EXTRA_FILES = {
+    "landmarks": "landmarks.json",
+    "poi_clusters": "poi_clusters.json",
+    "blocks": "blocks.geojson",
+    "street_labels": "street_labels.json",
+    "qa_report": "qa_report.json",
+}
+
+
+def city_slug(city: str) -> str:
+    """Output directory name for a city ("Bolzano, Italy" → "bolzano_italy")."""
+    return city.lower().replace(" ", "_").replace(",", "")
+
+
+def select_stages(stages: str | None = None, skip: str | None = None) -> tuple[str, ...]:
+    """
+    Resolve --stages / --skip (comma-separated stage names) to the stages
+    to run, in pipeline order.
+
+    Output stages are written to a staging directory, so "publish" is added
+    to any selection with an output stage; --skip publish leaves the
+    artifacts staged instead.
+
+    Raises:
+        ValueError: On unknown stage names or an empty selection
+    """
+    def parse(value: str | None) -> list[str]:
+        names = [name.strip() for name in (value or "").split(",") if name.strip()]
+        unknown = [name for name in names if name not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown stage(s) {', '.join(unknown)}; choose from {', '.join(STAGES)}")
+        return names
+
+    skipped = set(parse(skip))
+    selected = (set(parse(stages)) if stages else set(STAGES)) - skipped
+    if selected & set(OUTPUT_STAGES) and "publish" not in skipped:
+        selected.add("publish")
+    if not selected:
+        raise ValueError("No stages left to run")
+    return tuple(name for name in STAGES if name in selected)
+
+
+def check_publishable(stages: set[str], city_dir: Path) -> None:
+    """
+    Reject a run that would publish without a metadata.json: "publish"
+    needs either the "metadata" stage or one from an earlier run to seed.
+
+    Raises:
+        ValueError: If the selection cannot be published
+    """
+    if "publish" in stages and "metadata" not in stages and not (city_dir / "metadata.json").exists():
+        raise ValueError(
+            f"'publish' without 'metadata' needs a previously published {city_dir / 'metadata.json'}; "
+            "add 'metadata' to the stages or skip 'publish'"
+        )
+
+
+def _staged_extra_files(staging_dir: Path) -> dict[str, str]:
+    """The EXTRA_FILES entries present in the staging directory, for metadata.json."""
+    return {key: name for key, name in EXTRA_FILES.items() if (staging_dir / name).exists()}
+
+
+def _prepare_staging(city_dir: Path, seed: bool = False) -> Path:
+    """
+    Create an empty staging directory for the city, or one holding a copy
+    of the published artifacts (seed=True) for runs that rewrite only some
+    of them.
+    """
+    from pipeline.stages.publish_delta import STAGING_DIRNAME, seed_staging
+
+    staging_dir = city_dir / STAGING_DIRNAME
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)  # leftover of an interrupted run
+    staging_dir.mkdir(parents=True)
+    if seed:
+        copied = seed_staging(city_dir, staging_dir)
+        print(f"  Staging seeded with {copied} published files")
+    return staging_dir
+
+
+def _export_layers(
+    staging_dir: Path,
+    bbox: tuple[float, float, float, float],
+    layers: dict,
+    tiled: bool,
+    height_bands: bool = False,
+    ndjson: bool = False,
+    bvh: bool = False,
+    split_attributes: bool = False,
+) -> tuple[dict, dict]:
+    """
+    Export layers (in EPSG:4326) into the city's staging directory.
+
+    Returns:
+        (exports, layers): generate_metadata keyword arguments describing
+        the optional exports — "tiles" (per-tile file paths by layer),
+        "height_bands" (band entries), "streams" (NDJSON file + index by
+        layer), "bvh" (BVH sidecar by layer) and "attributes" (attribute
+        sidecar by layer), each None when off — and the layers as exported
+        (buildings in BVH leaf order), to checkpoint once the staging dir
+        is published into city_dir by publish_delta
+    """
+    from pipeline.config import HEIGHT_BAND_EDGES_M
+    from pipeline.stages.bvh import export_bvh
+    from pipeline.stages.export_geojson import (
+        attributes_path, export_geojson, export_geojson_tiles, export_height_bands, export_ndjson,
+        ndjson_index_path,
+    )
+
+    # With a BVH, buildings are exported (and checkpointed) in its leaf
+    # order, so leaf feature ranges index buildings.geojson directly
+    layers = dict(layers)
+    bvh_path = staging_dir / BVH_FILENAME
+    sidecars = None
+    if bvh:
+        layers["buildings"], tree = export_bvh(layers["buildings"], bvh_path)
+        sidecars = {"buildings": {"file": BVH_FILENAME, "nodes": len(tree.bounds), "leaf_size": tree.leaf_size}}
+    else:
+        bvh_path.unlink(missing_ok=True)  # seeded from a run with --bvh
+
+    band_edges = HEIGHT_BAND_EDGES_M if height_bands else None
+    tiles = {} if tiled else None
+    attributes = {} if split_attributes else None
+    for name, gdf in layers.items():
+        path = export_geojson(gdf, staging_dir / f"{name}.geojson", name, split_attributes=split_attributes)
+        if split_attributes:
+            attributes[name] = {"file": attributes_path(path).name}
+        else:
+            attributes_path(path).unlink(missing_ok=True)  # seeded from a run with --split-attributes
+        if tiled:
+            tile_dir = staging_dir / "tiles" / name
+            if tile_dir.exists():
+                shutil.rmtree(tile_dir)  # seeded tiles that may have become empty
+            paths = export_geojson_tiles(
+                gdf, tile_dir, name, bbox, band_edges=band_edges if name == "buildings" else None
+            )
+            tiles[name] = [p.relative_to(staging_dir).as_posix() for p in paths]
+
+    streams = {} if ndjson else None
+    for name, gdf in layers.items():
+        path = staging_dir / f"{name}.ndjson"
+        if ndjson:
+            export_ndjson(gdf, path, name)
+            streams[name] = {"file": path.name, "index": ndjson_index_path(path).name}
+        else:
+            path.unlink(missing_ok=True)  # seeded from a run with --ndjson
+            ndjson_index_path(path).unlink(missing_ok=True)
+
+    bands_dir = staging_dir / HEIGHT_BANDS_DIRNAME
+    if bands_dir.exists():
+        shutil.rmtree(bands_dir)  # seeded bands that may have become empty (or are off now)
+    bands = None
+    if height_bands:
+        bands = export_height_bands(layers["buildings"], bands_dir, band_edges)
+        for entry in bands:
+            entry["file"] = entry["file"].relative_to(staging_dir).as_posix()
+
+    exports = {
+        "tiles": tiles, "height_bands": bands, "streams": streams, "bvh": sidecars, "attributes": attributes,
+    }
+    return exports, layers
+
+
+def _save_processed(city_dir: Path, layers: dict) -> None:
+    """
+    Checkpoint the exported layers for incremental (--apply-osc) and
+    partial runs — only after publishing, so unpublished runs never replace
+    them. serve.py prefers them over the GeoJSON and includes them in a
+    city's version token, so a reload between publish and this save is
+    followed by another once the checkpoints are written.
+    """
+    from pipeline.stages.checkpoint import save_checkpoint
+
+    for name, gdf in layers.items():
+        save_checkpoint(gdf, city_dir, name)
 
 
 def run_pipeline(
     city: str = CITY,
     bbox: tuple[float, float, float, float] = BBOX,
     output_dir: Path = OUTPUT_DIR,
-    use_overture: bool = USE_OVERTURE,
+    use_overture: bool | None = None,
+    tiled: bool = EXPORT_TILES,
+    dem_path: Path | None = None,
+    dedupe: bool | None = None,
+    cache_dir: Path | None = None,
+    stages: Iterable[str] = STAGES,
+    height_bands: bool = EXPORT_HEIGHT_BANDS,
+    ndjson: bool = EXPORT_NDJSON,
+    bvh: bool = EXPORT_BVH,
+    split_attributes: bool = SPLIT_ATTRIBUTES,
 ) -> Path:
     """
-    Run the complete ETL pipeline for a city.
+    Run the complete ETL pipeline for a city, or a subset of its stages.
 
     Args:
         city: City name (for metadata + slug)
         bbox: (north, south, east, west) bounding box
         output_dir: Root output directory
         use_overture: Whether to fetch Overture data for gap filling
+        tiled: Also export per-tile GeoJSON files under tiles/<layer>/
+        dem_path: Local DEM (GeoTIFF or Terrarium tile dir) to bake
+            building base elevations and road Z from
+        dedupe: Drop duplicate (heavily overlapping) building footprints.
+            use_overture, dem_path and dedupe default (None) to the previous
+            run's values without "fetch", otherwise to config.py (where
+            DEM_PATH = None means a flat export)
+        cache_dir: Shared on-disk cache for Overpass responses (cache_dir/osm)
+            and Overture query results (cache_dir/overture); None = osmnx default
+        stages: Stages to run (see STAGES / select_stages). Without "fetch",
+            bbox and the export options are taken from the previous run's
+            run.json
+        height_bands: Also export buildings sorted by height, one file per
+            height band (height_bands/), and sort building tiles by height
+        ndjson: Also export each layer as Hilbert-ordered <layer>.ndjson with
+            a chunk byte-offset index, for streaming / range requests
+        bvh: Also write a BVH over the building prisms (buildings.bvh) and
+            export buildings.geojson in its leaf order
+        split_attributes: Keep only render properties in the layer GeoJSON
+            files and write the rest to <layer>.attributes.json sidecars
 
     Returns:
         Path to the city output directory
     """
+    from pipeline.stages.associate_pois import associate_pois
+    from pipeline.stages.building_stats import compute_building_stats
+    from pipeline.stages.checkpoint import (
+        load_checkpoint, load_run_info, save_checkpoint, save_run_info, update_run_info,
+    )
+    from pipeline.stages.city_blocks import aggregate_blocks
+    from pipeline.stages.clean_geometry import clean_geometries
+    from pipeline.stages.cluster_pois import export_poi_clusters
+    from pipeline.stages.export_geojson import export_geojson
+    from pipeline.stages.extract_landmarks import extract_landmarks
+    from pipeline.stages.fetch_buildings import fetch_osm_buildings
+    from pipeline.stages.fetch_overture import fetch_overture_buildings, merge_osm_overture
+    from pipeline.stages.fetch_pois import fetch_pois
+    from pipeline.stages.fetch_roads import fetch_road_network
+    from pipeline.stages.footprint_qa import footprint_qa, write_qa_report
+    from pipeline.stages.generate_metadata import generate_metadata
+    from pipeline.stages.process_heights import process_heights
+    from pipeline.stages.publish_delta import publish_delta
+    from pipeline.stages.request_planner import use_response_cache
+    from pipeline.stages.schema import report_memory
+    from pipeline.stages.street_labels import export_street_labels
+    from pipeline.stages.terrain import add_base_elevation, drape_roads, open_dem
+    from pipeline.stages.validate import validate_building_data
+    from pipeline.stages.working_crs import WorkingCRS
+
+    stages = set(stages)
+    partial = stages != set(STAGES)
+    city_dir = output_dir / city_slug(city)
+    defaults = {"use_overture": USE_OVERTURE, "dem_path": DEM_PATH, "dedupe": QA_DEDUPE}
+    if "fetch" not in stages:
+        run_info = load_run_info(city_dir)
+        bbox, tiled = tuple(run_info["bbox"]), run_info.get("tiled", False)
+        height_bands = run_info.get("height_bands", False)
+        ndjson = run_info.get("ndjson", False)
+        bvh = run_info.get("bvh", False)
+        split_attributes = run_info.get("split_attributes", False)
+        defaults.update({key: run_info[key] for key in defaults if key in run_info})
+    check_publishable(stages, city_dir)
+    use_overture = defaults["use_overture"] if use_overture is None else use_overture
+    dem_path = defaults["dem_path"] if dem_path is None else dem_path
+    dem_path = Path(dem_path) if dem_path is not None else None
+    dedupe = defaults["dedupe"] if dedupe is None else dedupe
+    run_options = dict(
+        city=city, bbox=list(bbox), use_overture=use_overture, tiled=tiled,
+        dem_path=str(dem_path) if dem_path is not None else None, dedupe=dedupe,
+        height_bands=height_bands, ndjson=ndjson, bvh=bvh, split_attributes=split_attributes,
+    )
+
     print(f"{'=' * 60}")
     print(f"Urban3D Navigator — ETL Pipeline")
     print(f"City: {city}")
     print(f"Bbox: N={bbox[0]}, S={bbox[1]}, E={bbox[2]}, W={bbox[3]}")
     print(f"Overture: {'enabled' if use_overture else 'disabled'}")
+    if partial:
+        print(f"Stages: {', '.join(name for name in STAGES if name in stages)}")
     print(f"{'=' * 60}")
 
-    # ── Stage 2: Fetch OSM buildings ─────────────────────
-    print("\n[1/7] Fetching OSM buildings...")
-    buildings = fetch_osm_buildings(bbox)
-    print(f"  Fetched {len(buildings)} buildings")
-
-    # ── Stage 3: Overture gap filling (optional) ─────────
-    if use_overture:
-        print("\n[2/7] Fetching Overture buildings for height gap-filling...")
-        overture = fetch_overture_buildings(bbox)
-        buildings = merge_osm_overture(buildings, overture)
-        print(f"  Merged Overture heights")
+    # Metric working CRS for every processing stage; layers are projected
+    # once after fetching and converted back to EPSG:4326 once, at export
+    working = WorkingCRS.from_bbox(bbox)
+    if cache_dir is not None:
+        use_response_cache(cache_dir / "osm")
+
+    if "fetch" in stages:
+        # ── Stage 2: Fetch OSM buildings ─────────────────
+        print("\n[1/7] Fetching OSM buildings...")
+        buildings = working.project(fetch_osm_buildings(bbox))
+        print(f"  Fetched {len(buildings)} buildings (working CRS {working.crs.to_string()})")
+        report_memory("fetch", buildings=buildings)
+
+        # ── Stage 3: Overture gap filling (optional) ─────
+        if use_overture:
+            print("\n[2/7] Fetching Overture buildings for height gap-filling...")
+            overture = fetch_overture_buildings(
+                bbox, cache_dir=cache_dir / "overture" if cache_dir is not None else None
+            )
+            buildings = merge_osm_overture(buildings, overture)
+            print(f"  Merged Overture heights")
+        else:
+            print("\n[2/7] Skipping Overture (disabled)")
+
+        # ── Stage 5: Fetch roads ─────────────────────────
+        print("\n[3/7] Fetching road network...")
+        roads = working.project(fetch_road_network(bbox))
+        print(f"  Fetched {len(roads)} road segments")
+
+        # ── Stage 5b: Fetch POIs ─────────────────────────
+        print("\n[3b/7] Fetching POIs...")
+        pois = working.project(fetch_pois(bbox))
+        print(f"  Fetched {len(pois)} POIs")
+        report_memory("roads/POIs", roads=roads, pois=pois)
+
+        # Fetched layers (working CRS) let later runs re-process without refetching
+        for name, gdf in {"buildings": buildings, "roads": roads, "pois": pois}.items():
+            save_checkpoint(gdf, city_dir, FETCHED_PREFIX + name)
+        save_run_info(city_dir, **run_options)
     else:
-        print("\n[2/7] Skipping Overture (disabled)")
+        prefix = FETCHED_PREFIX if stages & set(PROCESSING_STAGES) else ""
+        print(f"\n[1/7] Loading {'fetched' if prefix else 'processed'} layers from checkpoints...")
+        buildings, roads, pois = (
+            working.project(load_checkpoint(city_dir, prefix + name))
+            for name in ("buildings", "roads", "pois")
+        )
+        print(f"  Loaded {len(buildings)} buildings, {len(roads)} roads, {len(pois)} POIs")
 
     # ── Stage 4: Process heights ─────────────────────────
-    print("\n[3/7] Processing building heights...")
-    buildings = process_heights(buildings)
-    validate_building_data(buildings)
-
-    # ── Stage 5: Fetch roads ─────────────────────────────
-    print("\n[4/7] Fetching road network...")
-    roads = fetch_road_network(bbox)
-    print(f"  Fetched {len(roads)} road segments")
+    if "heights" in stages:
+        print("\n[4/7] Processing building heights...")
+        buildings = process_heights(buildings)
+        report_memory("heights", buildings=buildings)
 
     # ── Stage 6: Clean geometries ────────────────────────
-    print("\n[5/7] Cleaning geometries...")
-    buildings = clean_geometries(buildings)
-    roads = clean_geometries(roads)
+    if "clean" in stages:
+        print("\n[5/7] Cleaning geometries...")
+        buildings = clean_geometries(buildings)
+        roads = clean_geometries(roads)
+        report_memory("clean", buildings=buildings, roads=roads)
+
+    # ── Stage 6a: Footprint QA ───────────────────────────────────────
+    qa_report = None
+    if "qa" in stages:
+        buildings, qa_report = footprint_qa(buildings, dedupe=dedupe)
+
+    # One statistics pass shared by validation and metadata, once buildings
+    # have heights; geometries are valid after cleaning (or in processed
+    # checkpoints), so the is_valid check is skipped then
+    processed_input = "fetch" not in stages and not stages & set(PROCESSING_STAGES)
+    building_stats = None
+    if "heights" in stages or processed_input:
+        building_stats = compute_building_stats(
+            buildings, assume_valid="clean" in stages or processed_input
+        )
+        validate_building_data(buildings, building_stats)
+
+    # ── Stage 6c: Link POIs to buildings ─────────────────────────────
+    if "pois" in stages:
+        print("\n[5b/7] Linking POIs to buildings...")
+        pois, buildings = associate_pois(pois, buildings)
+        report_memory("POIs", buildings=buildings, pois=pois)
+
+    # ── Stage 6d: Terrain (optional) ─────────────────────────────────
+    if "terrain" in stages and dem_path is not None:
+        print("\n[5c/7] Sampling terrain...")
+        dem = open_dem(dem_path, bbox)
+        buildings = add_base_elevation(buildings, dem)
+        roads = drape_roads(roads, dem)
+        report_memory("terrain", buildings=buildings, roads=roads)
 
-    # ── Stage 6b: Fetch POIs ─────────────────────────────────────────
-    print("\n[5b/7] Fetching POIs...")
-    pois = fetch_pois(bbox)
-    print(f"  Fetched {len(pois)} POIs")
+    if not stages & set(OUTPUT_STAGES):
+        print(f"\n✅ Stages complete (nothing exported)")
+        return city_dir
 
     # ── Stage 7: Export ──────────────────────────────────────────────
-    print("\n[6/7] Exporting GeoJSON files...")
-    city_slug = city.lower().replace(" ", "_").replace(",", "")
-    city_dir = output_dir / city_slug
+    staging_dir = _prepare_staging(city_dir, seed=partial)
+    projected = {"buildings": buildings, "roads": roads, "pois": pois}
+    layers = {name: working.to_wgs84(gdf) for name, gdf in projected.items()}
+    exported = None
+    if "export" in stages:
+        print("\n[6/7] Exporting GeoJSON files...")
+        exports, exported = _export_layers(
+            staging_dir, bbox, layers, tiled, height_bands, ndjson, bvh, split_attributes
+        )
+    else:
+        exports = _published_exports(staging_dir)
+    if qa_report is not None:
+        write_qa_report(qa_report, staging_dir / "qa_report.json")
+
+    # ── Stage 7b: Landmarks ──────────────────────────────────────────
+    if "landmarks" in stages:
+        print("\n[6b/7] Extracting landmarks...")
+        extract_landmarks(buildings, roads, staging_dir / "landmarks.json", pois_gdf=pois)
+
+    # ── Stage 7c: POI clusters ───────────────────────────────────────
+    if "clusters" in stages:
+        print("\n[6c/7] Clustering POIs...")
+        export_poi_clusters(layers["pois"], staging_dir / "poi_clusters.json")
+
+    # ── Stage 7d: City blocks (overview zooms) ───────────────────────
+    if "blocks" in stages:
+        print("\n[6d/7] Aggregating city blocks...")
+        blocks = working.to_wgs84(aggregate_blocks(buildings))
+        export_geojson(blocks, staging_dir / "blocks.geojson", "blocks")
 
-    export_geojson(buildings, city_dir / "buildings.geojson", "buildings")
-    export_geojson(roads, city_dir / "roads.geojson", "roads")
-    export_geojson(pois, city_dir / "pois.geojson", "pois")
+    # ── Stage 7e: Street labels ──────────────────────────────────────
+    if "labels" in stages:
+        print("\n[6e/7] Placing street labels...")
+        export_street_labels(layers["roads"], staging_dir / "street_labels.json")
 
     # ── Stage 8: Metadata ────────────────────────────────────────────
-    print("\n[7/7] Generating metadata...")
-    generate_metadata(city, buildings, roads, city_dir / "metadata.json", pois_gdf=pois)
+    if "metadata" in stages:
+        print("\n[7/7] Generating metadata...")
+        generate_metadata(
+            city, layers["buildings"], layers["roads"], staging_dir / "metadata.json",
+            pois_gdf=layers["pois"], stats=building_stats,
+            extra_files=_staged_extra_files(staging_dir), **exports,
+        )
+
+    # ── Stage 9: Publish only changed artifacts ──────────────────────
+    if "publish" in stages:
+        print("\n[7b/7] Publishing changed artifacts...")
+        publish_delta(staging_dir, city_dir)
+        if exported is not None:
+            _save_processed(city_dir, exported)
+            update_run_info(city_dir, **run_options)
+    else:
+        print(f"\n  Not published — staged artifacts left in {staging_dir}")
 
     print(f"\n{'=' * 60}")
-    print(f"✅ Pipeline complete! Output: {city_dir}")
+    print(f"✅ Pipeline complete! Output: {city_dir if 'publish' in stages else staging_dir}")
+    print(f"{'=' * 60}")
+
+    return city_dir
+
+
+def _published_exports(staging_dir: Path) -> dict:
+    """_export_layers' description of the optional exports, from the (seeded) metadata of the previous run."""
+    import json
+
+    metadata_path = staging_dir / "metadata.json"
+    metadata = json.loads(metadata_path.read_text()) if metadata_path.exists() else {}
+    return {
+        "tiles": metadata.get("tiles", {}).get("layers"),
+        "height_bands": metadata.get("height_bands", {}).get("bands"),
+        "streams": metadata.get("streams"),
+        "bvh": metadata.get("bvh"),
+        "attributes": metadata.get("attributes"),
+    }
+
+
+def run_incremental(
+    city: str,
+    osc_path: Path,
+    output_dir: Path = OUTPUT_DIR,
+) -> Path:
+    """
+    Apply an OSM change file to a previous run's checkpointed layers.
+
+    Only the tiles touched by the diff are re-fetched and re-processed
+    (heights, clean); all other features are reused. Exports, metadata and
+    checkpoints are then rewritten atomically.
+
+    Args:
+        city: City name of a previous full run
+        osc_path: Local .osc / .osc.gz diff
+        output_dir: Root output directory of the previous run
+
+    Returns:
+        Path to the city output directory
+    """
+    import pandas as pd
+
+    from pipeline.stages.associate_pois import associate_pois
+    from pipeline.stages.building_stats import compute_building_stats
+    from pipeline.stages.checkpoint import load_checkpoint, load_run_info
+    from pipeline.stages.city_blocks import aggregate_blocks
+    from pipeline.stages.clean_geometry import clean_geometries
+    from pipeline.stages.cluster_pois import export_poi_clusters
+    from pipeline.stages.export_geojson import export_geojson
+    from pipeline.stages.extract_landmarks import extract_landmarks
+    from pipeline.stages.fetch_buildings import fetch_osm_buildings
+    from pipeline.stages.fetch_overture import fetch_overture_buildings, merge_osm_overture
+    from pipeline.stages.fetch_pois import fetch_pois
+    from pipeline.stages.fetch_roads import fetch_road_network
+    from pipeline.stages.footprint_qa import footprint_qa, write_qa_report
+    from pipeline.stages.generate_metadata import generate_metadata
+    from pipeline.stages.osm_change import affected_tiles, parse_osc, replace_tiles
+    from pipeline.stages.process_heights import process_heights
+    from pipeline.stages.publish_delta import publish_delta
+    from pipeline.stages.schema import enforce_schema, report_memory
+    from pipeline.stages.street_labels import export_street_labels
+    from pipeline.stages.terrain import add_base_elevation, drape_roads, open_dem
+    from pipeline.stages.tiling import tile_bbox
+    from pipeline.stages.validate import validate_building_data
+    from pipeline.stages.working_crs import WorkingCRS
+
+    city_dir = output_dir / city_slug(city)
+    run_info = load_run_info(city_dir)
+    bbox = tuple(run_info["bbox"])
+    use_overture = run_info.get("use_overture", False)
+    tiled = run_info.get("tiled", False)
+    height_bands = run_info.get("height_bands", False)
+    ndjson = run_info.get("ndjson", False)
+    bvh = run_info.get("bvh", False)
+    split_attributes = run_info.get("split_attributes", False)
+    dem_path = run_info.get("dem_path")
+    dedupe = run_info.get("dedupe", QA_DEDUPE)
+
+    print(f"{'=' * 60}")
+    print(f"Urban3D Navigator — Incremental update")
+    print(f"City: {city}")
+    print(f"Change file: {osc_path}")
+    print(f"{'=' * 60}")
+
+    print("\n[1/4] Loading checkpoints and parsing change file...")
+    layers = {name: load_checkpoint(city_dir, name) for name in ("buildings", "roads", "pois")}
+    change = parse_osc(osc_path)
+    tiles = affected_tiles(change, layers, bbox)
+    print(f"  {len(change['changed_ids'])} changed elements → {len(tiles)} affected tiles")
+
+    if not tiles:
+        print("\n  Nothing inside the city bbox changed — outputs left untouched")
+        return city_dir
+
+    print("\n[2/4] Re-fetching and processing affected tiles...")
+    fresh = {name: [] for name in layers}
+    for ix, iy in sorted(tiles):
+        cell = tile_bbox(ix, iy, bbox)
+        buildings = fetch_osm_buildings(cell)
+        if use_overture:
+            buildings = merge_osm_overture(buildings, fetch_overture_buildings(cell))
+        fresh["buildings"].append(clean_geometries(process_heights(buildings)))
+        try:
+            fresh["roads"].append(clean_geometries(fetch_road_network(cell, retain_all=True)))
+        except ValueError:
+            pass  # no roads in this tile
+        fresh["pois"].append(fetch_pois(cell))
+        print(f"  Tile ({ix}, {iy}) refreshed")
+
+    print("\n[3/4] Merging into checkpointed layers...")
+    for name, frames in fresh.items():
+        frames = [f for f in frames if not f.empty]
+        fresh_gdf = pd.concat(frames, ignore_index=True) if frames else layers[name].iloc[:0]
+        layers[name] = replace_tiles(
+            layers[name], fresh_gdf, tiles, bbox, deleted_ids=change["deleted_ids"]
+        )
+    # Checkpoints and tile merging are in EPSG:4326; metric stages run in
+    # the working CRS
+    working = WorkingCRS.from_bbox(bbox)
+    layers = {name: working.project(gdf) for name, gdf in layers.items()}
+    layers["buildings"], qa_report = footprint_qa(layers["buildings"], dedupe=dedupe)
+    layers["pois"], layers["buildings"] = associate_pois(layers["pois"], layers["buildings"])
+    if dem_path is not None:
+        dem = open_dem(Path(dem_path), bbox)
+        layers["buildings"] = add_base_elevation(layers["buildings"], dem)
+        layers["roads"] = drape_roads(layers["roads"], dem)
+    # concat of frames with different category sets falls back to object
+    layers = {name: enforce_schema(gdf, name) for name, gdf in layers.items()}
+    report_memory("merge", **layers)
+    building_stats = compute_building_stats(layers["buildings"], assume_valid=True)
+    validate_building_data(layers["buildings"], building_stats)
+
+    print("\n[4/4] Exporting and publishing updated files...")
+    projected = layers
+    layers = {name: working.to_wgs84(gdf) for name, gdf in projected.items()}
+    staging_dir = _prepare_staging(city_dir)
+    exports, exported = _export_layers(
+        staging_dir, bbox, layers, tiled, height_bands, ndjson, bvh, split_attributes
+    )
+    write_qa_report(qa_report, staging_dir / "qa_report.json")
+    extract_landmarks(
+        projected["buildings"], projected["roads"], staging_dir / "landmarks.json",
+        pois_gdf=projected["pois"],
+    )
+    export_poi_clusters(layers["pois"], staging_dir / "poi_clusters.json")
+    export_geojson(
+        working.to_wgs84(aggregate_blocks(projected["buildings"])), staging_dir / "blocks.geojson", "blocks"
+    )
+    export_street_labels(layers["roads"], staging_dir / "street_labels.json")
+    generate_metadata(
+        city, layers["buildings"], layers["roads"], staging_dir / "metadata.json",
+        pois_gdf=layers["pois"], stats=building_stats,
+        extra_files=_staged_extra_files(staging_dir), **exports,
+    )
+    publish_delta(staging_dir, city_dir)
+    _save_processed(city_dir, exported)
+
+    print(f"\n{'=' * 60}")
+    print(f"✅ Incremental update complete! Output: {city_dir}")
     print(f"{'=' * 60}")
 
     return city_dir
@@ -127,8 +673,8 @@ def main():
     parser.add_argument(
         "--use-overture",
         action="store_true",
-        default=USE_OVERTURE,
-        help="Enable Overture Maps gap filling",
+        default=None,
+        help=f"Enable Overture Maps gap filling (default: previous run's without 'fetch', else {USE_OVERTURE})",
     )
     parser.add_argument(
         "--output-dir",
@@ -136,13 +682,106 @@ def main():
         default=OUTPUT_DIR,
         help=f"Output directory (default: {OUTPUT_DIR})",
     )
+    parser.add_argument(
+        "--tiles",
+        action="store_true",
+        default=EXPORT_TILES,
+        help="Also export per-tile GeoJSON files (published as per-tile deltas)",
+    )
+    parser.add_argument(
+        "--height-bands",
+        action="store_true",
+        default=EXPORT_HEIGHT_BANDS,
+        help="Also export buildings sorted by height, one GeoJSON file per height band",
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        default=EXPORT_NDJSON,
+        help="Also export Hilbert-ordered newline-delimited GeoJSON + chunk byte-offset index per layer",
+    )
+    parser.add_argument(
+        "--bvh",
+        action="store_true",
+        default=EXPORT_BVH,
+        help="Also write a BVH over building prisms (buildings.bvh); buildings.geojson is in its leaf order",
+    )
+    parser.add_argument(
+        "--split-attributes",
+        action="store_true",
+        default=SPLIT_ATTRIBUTES,
+        help="Keep only render properties in <layer>.geojson; the rest go to <layer>.attributes.json",
+    )
+    parser.add_argument(
+        "--apply-osc",
+        type=Path,
+        default=None,
+        metavar="OSC",
+        help="Incrementally apply a local .osc/.osc.gz diff to the previous run of --city",
+    )
+    parser.add_argument(
+        "--dem",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Local DEM (GeoTIFF or Terrarium {z}/{x}/{y}.png tile dir) for base elevations + road Z "
+        "(default: previous run's without 'fetch', else config.py)",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        default=None,
+        help="Drop duplicate building footprints found by the QA stage (see qa_report.json; "
+        "default: previous run's without 'fetch', else config.py)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Shared Overpass / Overture response cache (as used by pipeline.batch)",
+    )
+    parser.add_argument(
+        "--stages",
+        default=None,
+        metavar="LIST",
+        help=f"Comma-separated stages to run, from checkpointed inputs if 'fetch' is not among them "
+        f"({','.join(STAGES)}). Output stages imply 'publish' (add --skip publish to only stage them), "
+        f"which needs 'metadata' or a previously published metadata.json",
+    )
+    parser.add_argument(
+        "--skip", default=None, metavar="LIST", help="Comma-separated stages to leave out"
+    )
     args = parser.parse_args()
+    try:
+        stages = select_stages(args.stages, args.skip)
+        check_publishable(set(stages), args.output_dir / city_slug(args.city))
+    except ValueError as e:
+        parser.error(str(e))
+
+    from pipeline.stages.schema import enable_copy_on_write
+
+    enable_copy_on_write()
+
+    if args.apply_osc is not None:
+        if stages != STAGES:
+            parser.error("--stages / --skip do not apply to --apply-osc runs")
+        run_incremental(city=args.city, osc_path=args.apply_osc, output_dir=args.output_dir)
+        return
 
     run_pipeline(
         city=args.city,
         bbox=tuple(args.bbox),
         output_dir=args.output_dir,
         use_overture=args.use_overture,
+        tiled=args.tiles,
+        height_bands=args.height_bands,
+        ndjson=args.ndjson,
+        bvh=args.bvh,
+        split_attributes=args.split_attributes,
+        dem_path=args.dem,
+        dedupe=args.dedupe,
+        cache_dir=args.cache_dir,
+        stages=stages,
     )
 
 
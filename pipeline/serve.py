@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+Urban3D Navigator — Local Tile Server
+
+Serves bbox and z/x/y queries over the pipeline's processed outputs, so the
+frontend (or any GeoJSON client) can load just the area it shows instead
+of whole static files — without re-exporting anything.
+
+- Each city is loaded on its first request: the processed layers are
+  encoded once with the GeoJSON exporter and indexed with an STRtree.
+  Served features carry every property and no feature "id", also for runs
+  exported with --split-attributes (whose layer files keep only the render
+  properties).
+- A query intersects the tree, reuses the pre-encoded JSON of features
+  lying inside the query box and clips only those crossing its edge.
+- Responses are gzipped once and kept in an LRU cache with a byte budget
+  (SERVE_CACHE_MB). ETags derive from the city's published version and the
+  query, so If-None-Match is answered with 304 before any work is done.
+  Concurrent misses for the same query share one computation.
+- Hot reload: every SERVE_RELOAD_S the loaded cities' manifest.json and
+  processed checkpoints are checked; a newly published run is loaded off the event loop and swapped
+  in atomically. Requests in flight finish on the snapshot they started
+  with, and the old version's responses are dropped from the cache.
+
+Layer sources, first found wins: <layer>.parquet (GeoParquet, needs
+pyarrow) or <layer>.fgb (FlatGeobuf) copies next to the outputs, the
+processed checkpoint (checkpoints/<layer>.pkl), or <layer>.geojson.
+
+Endpoints:
+    GET /cities                                    cities in the output directory
+    GET /stats                                     cache and reload counters
+    GET /<city>/<layer>/<z>/<x>/<y>.geojson        features in a map tile, clipped to it
+    GET /<city>/<layer>?bbox=W,S,E,N[&clip=0]      features in a lon/lat box
+
+Usage:
+    python -m pipeline.serve                              # config.OUTPUT_DIR on 127.0.0.1:8765
+    python -m pipeline.serve --port 9000 --cache-mb 512
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import hashlib
+import json
+import math
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import shapely
+from shapely.geometry import mapping, shape
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from pipeline.config import (
+    GEOJSON_COORD_PRECISION,
+    OUTPUT_DIR,
+    SERVE_CACHE_MB,
+    SERVE_GZIP_LEVEL,
+    SERVE_HOST,
+    SERVE_KEEPALIVE_S,
+    SERVE_MAX_ZOOM,
+    SERVE_PORT,
+    SERVE_RELOAD_S,
+    SERVE_WORKERS,
+)
+
+LAYERS = ("buildings", "roads", "pois")
+
+_JSON = {"separators": (",", ":"), "ensure_ascii": False}
+_REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """A request error answered with `status` and a JSON message."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ── Data ──────────────────────────────────────────────────────────────
+
+
+def _round_coords(coords):
+    """x/y at GEOJSON_COORD_PRECISION, Z to the centimetre (as the exporter)."""
+    if isinstance(coords[0], (list, tuple)):
+        return [_round_coords(c) for c in coords]
+    return [round(c, GEOJSON_COORD_PRECISION) for c in coords[:2]] + [round(c, 2) for c in coords[2:]]
+
+
+def _keep_dimension(geom, dimension: int):
+    """
+    Drop lower-dimensional debris of a clip (a polygon touching the box edge
+    also yields a line); None if nothing of the feature's dimension is left.
+    """
+    if geom.is_empty:
+        return None
+    parts = shapely.get_parts(geom)
+    parts = parts[shapely.get_dimensions(parts) == dimension]
+    if len(parts) == 0:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return {0: shapely.multipoints, 1: shapely.multilinestrings, 2: shapely.multipolygons}[dimension](parts)
+
+
+class LayerIndex:
+    """A layer's exported features, pre-encoded, with an STRtree over their geometries."""
+
+    def __init__(self, features: list[dict]):
+        # Geometries come from the exported features, so clipped roads keep
+        # the Z the exporter baked into bridges
+        self.geoms = np.array([shape(f["geometry"]) for f in features], dtype=object)
+        self.dimensions = shapely.get_dimensions(self.geoms)
+        self.encoded = [json.dumps(f, **_JSON) for f in features]
+        self.properties = [json.dumps(f["properties"], **_JSON) for f in features]
+        self.tree = shapely.STRtree(self.geoms)
+        self.tree.query(shapely.box(0, 0, 0, 0))  # GEOS builds the tree lazily
+
+    def __len__(self) -> int:
+        return len(self.encoded)
+
+    def query(
+        self, west: float, south: float, east: float, north: float, clip: bool = True
+    ) -> tuple[bytes, int]:
+        """
+        FeatureCollection of the features intersecting a lon/lat box.
+
+        Returns:
+            (UTF-8 GeoJSON, number of features)
+        """
+        area = shapely.box(west, south, east, north)
+        idx = np.sort(self.tree.query(area, predicate="intersects"))
+        parts: list[str] = []
+        if clip and len(idx):
+            inside = shapely.covered_by(self.geoms[idx], area)
+            clipped = dict(zip(
+                idx[~inside].tolist(), shapely.intersection(self.geoms[idx[~inside]], area)
+            ))
+            for i in idx.tolist():
+                if i not in clipped:
+                    parts.append(self.encoded[i])
+                    continue
+                geom = _keep_dimension(clipped[i], self.dimensions[i])
+                if geom is None:
+                    continue
+                geometry = mapping(geom)
+                geometry["coordinates"] = _round_coords(geometry["coordinates"])
+                parts.append(
+                    '{"type":"Feature","properties":' + self.properties[i]
+                    + ',"geometry":' + json.dumps(geometry, **_JSON) + "}"
+                )
+        else:
+            parts = [self.encoded[i] for i in idx.tolist()]
+        body = '{"type":"FeatureCollection","features":[' + ",".join(parts) + "]}"
+        return body.encode(), len(parts)
+
+
+@dataclass(frozen=True)
+class CitySnapshot:
+    """One published version of a city, as served."""
+
+    slug: str
+    version: str
+    layers: dict[str, LayerIndex]
+    loaded_at: float
+
+
+def _layer_sources(city_dir: Path, layer: str) -> list[Path]:
+    return [
+        city_dir / f"{layer}.parquet",
+        city_dir / f"{layer}.fgb",
+        city_dir / "checkpoints" / f"{layer}.pkl",
+        city_dir / f"{layer}.geojson",
+    ]
+
+
+def city_version(city_dir: Path) -> str | None:
+    """
+    Version token of a city's published outputs: the mtime and size of
+    manifest.json (rewritten by publish_delta) and of the processed
+    checkpoints, which run.py saves just after publishing — a poll between
+    the two sees the new manifest with the old checkpoints, and the next
+    poll a new token again. Without a manifest, those of the layer sources.
+    None if the directory holds no servable layer.
+    """
+    manifest = city_dir / "manifest.json"
+    if manifest.exists():
+        checkpoints = [city_dir / "checkpoints" / f"{layer}.pkl" for layer in LAYERS]
+        paths = [manifest] + [p for p in checkpoints if p.exists()]
+    else:
+        paths = [p for layer in LAYERS for p in _layer_sources(city_dir, layer) if p.exists()]
+    if not paths:
+        return None
+    stats = [p.stat() for p in paths]
+    return "-".join(f"{s.st_mtime_ns:x}.{s.st_size:x}" for s in stats)
+
+
+def _load_features(path: Path, layer: str) -> list[dict]:
+    """Exported features of a layer source file."""
+    if path.suffix == ".geojson":
+        return json.loads(path.read_text())["features"]
+
+    import geopandas as gpd
+    import pandas as pd
+
+    from pipeline.stages.export_geojson import _feature_collection
+
+    if path.suffix == ".parquet":
+        gdf = gpd.read_parquet(path)
+    elif path.suffix == ".pkl":
+        gdf = pd.read_pickle(path)
+    else:
+        gdf = gpd.read_file(path)
+    return _feature_collection(gdf.to_crs("EPSG:4326"), layer)["features"]
+
+
+def load_city(city_dir: Path) -> CitySnapshot:
+    """
+    Load and index every layer of a city's outputs.
+
+    Raises:
+        FileNotFoundError: If the directory holds no servable layer
+    """
+    version = city_version(city_dir)
+    if version is None:
+        raise FileNotFoundError(f"No processed layers in {city_dir}")
+    layers = {}
+    for layer in LAYERS:
+        path = next((p for p in _layer_sources(city_dir, layer) if p.exists()), None)
+        if path is not None:
+            layers[layer] = LayerIndex(_load_features(path, layer))
+    return CitySnapshot(city_dir.name, version, layers, time.time())
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """(west, south, east, north) of a Web Mercator (slippy map) tile."""
+    n = 2 ** z
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+# ── Response cache ────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes       # gzipped
+    raw_bytes: int
+    features: int
+
+
+class ResponseCache:
+    """LRU cache of gzipped responses, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        response = self._entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: tuple, response: CachedResponse) -> None:
+        """Insert, evicting least recently used entries; oversized responses are not kept."""
+        if len(response.body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous.body)
+        self._entries[key] = response
+        self.bytes += len(response.body)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted.body)
+            self.evictions += 1
+
+    def discard_city(self, slug: str) -> int:
+        """Drop every entry of a city (keys start with its slug); returns how many."""
+        keys = [key for key in self._entries if key[0] == slug]
+        for key in keys:
+            self.bytes -= len(self._entries.pop(key).body)
+        return len(keys)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+        }
+
+
+def _encode(
+    index: LayerIndex, bounds: tuple[float, float, float, float], clip: bool, etag: str, level: int
+) -> CachedResponse:
+    """Build and gzip one response (runs on the worker threads)."""
+    body, features = index.query(*bounds, clip=clip)
+    return CachedResponse(etag, gzip.compress(body, compresslevel=level, mtime=0), len(body), features)
+
+
+# ── Server ────────────────────────────────────────────────────────────
+
+
+class TileServer:
+    """
+    Query handling, city snapshots and the HTTP/1.1 front end.
+
+    handle() is the transport-independent entry point; start() serves it
+    over asyncio streams with keep-alive.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path = OUTPUT_DIR,
+        cache_mb: float = SERVE_CACHE_MB,
+        reload_s: float = SERVE_RELOAD_S,
+        workers: int = SERVE_WORKERS,
+        gzip_level: int = SERVE_GZIP_LEVEL,
+    ):
+        self.output_dir = Path(output_dir)
+        self.reload_s = reload_s
+        self.gzip_level = gzip_level
+        self.cache = ResponseCache(int(cache_mb * 1024 * 1024))
+        self.reloads = 0
+        self._cities: dict[str, CitySnapshot] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tiles")
+        self._watcher: asyncio.Task | None = None
+
+    # Snapshots
+
+    async def _load(self, slug: str) -> CitySnapshot:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, load_city, self.output_dir / slug)
+
+    async def city(self, slug: str) -> CitySnapshot:
+        """The current snapshot of a city, loading it on first use."""
+        snapshot = self._cities.get(slug)
+        if snapshot is not None:
+            return snapshot
+        if slug.startswith(".") or city_version(self.output_dir / slug) is None:
+            raise HTTPError(404, f"Unknown city: {slug}")
+        async with self._locks.setdefault(slug, asyncio.Lock()):
+            if slug not in self._cities:
+                snapshot = await self._load(slug)
+                self._cities[slug] = snapshot
+                print(f"  Loaded {slug} ({', '.join(f'{len(v)} {k}' for k, v in snapshot.layers.items())})")
+        return self._cities[slug]
+
+    async def reload_changed(self) -> list[str]:
+        """Swap in newly published versions of loaded cities; returns their slugs."""
+        reloaded = []
+        for slug, snapshot in list(self._cities.items()):
+            version = city_version(self.output_dir / slug)
+            if version is None or version == snapshot.version:
+                continue
+            async with self._locks.setdefault(slug, asyncio.Lock()):
+                if self._cities[slug].version == version:
+                    continue
+                try:
+                    fresh = await self._load(slug)
+                except Exception as e:  # keep serving the previous version
+                    print(f"  Reload of {slug} failed, still serving {snapshot.version}: {e}")
+                    continue
+                self._cities[slug] = fresh
+                dropped = self.cache.discard_city(slug)
+                self.reloads += 1
+                reloaded.append(slug)
+                print(f"  Reloaded {slug} (version {fresh.version}, {dropped} cached responses dropped)")
+        return reloaded
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_s)
+            try:
+                await self.reload_changed()
+            except Exception:
+                traceback.print_exc()
+
+    # Requests
+
+    def _available_cities(self) -> list[str]:
+        if not self.output_dir.exists():
+            return []
+        return sorted(
+            p.name for p in self.output_dir.iterdir()
+            if p.is_dir() and not p.name.startswith(".") and city_version(p) is not None
+        )
+
+    async def _response(
+        self, key: tuple, snapshot: CitySnapshot, layer: str,
+        bounds: tuple[float, float, float, float], clip: bool, etag: str,
+    ) -> CachedResponse:
+        """Cached response, or build it once however many requests ask concurrently."""
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._executor, _encode, snapshot.layers[layer], bounds, clip, etag, self.gzip_level
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        response = await asyncio.shield(future)
+        current = self._cities.get(snapshot.slug)
+        if current is not None and current.version == snapshot.version:
+            self.cache.put(key, response)  # not if a reload landed meanwhile
+        return response
+
+    async def handle(self, method: str, target: str, headers: dict[str, str]) -> tuple[int, dict, bytes]:
+        """
+        Answer one request.
+
+        Args:
+            method: HTTP method
+            target: Request target (path and query string)
+            headers: Request headers, lower-case names
+
+        Returns:
+            (status, response headers, body)
+        """
+        try:
+            return await self._handle(method, target, headers)
+        except HTTPError as e:
+            body = json.dumps({"error": str(e)}).encode()
+            return e.status, {"Content-Type": "application/json"}, body
+        except Exception:
+            traceback.print_exc()
+            return 500, {"Content-Type": "application/json"}, b'{"error":"internal error"}'
+
+    async def _handle(self, method: str, target: str, headers: dict[str, str]) -> tuple[int, dict, bytes]:
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(405, f"Method not allowed: {method}")
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts in ([], ["cities"]):
+            body = json.dumps({"cities": self._available_cities()}).encode()
+            return 200, {"Content-Type": "application/json"}, body
+        if parts == ["stats"]:
+            stats = {
+                "cache": self.cache.stats(),
+                "reloads": self.reloads,
+                "cities": {slug: s.version for slug, s in self._cities.items()},
+            }
+            return 200, {"Content-Type": "application/json"}, json.dumps(stats).encode()
+        if len(parts) not in (2, 5) or parts[1] not in LAYERS:
+            raise HTTPError(404, f"Not found: {url.path}")
+
+        slug, layer = parts[:2]
+        if len(parts) == 5:
+            try:
+                z, x, y = int(parts[2]), int(parts[3]), int(parts[4].split(".")[0])
+            except ValueError:
+                raise HTTPError(400, "Tile path must be /<city>/<layer>/<z>/<x>/<y>.geojson") from None
+            if not (0 <= z <= SERVE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+                raise HTTPError(400, f"No tile {z}/{x}/{y}")
+            bounds, clip, query = tile_bounds(z, x, y), True, ("tile", z, x, y)
+        else:
+            params = parse_qs(url.query)
+            try:
+                west, south, east, north = (float(v) for v in params["bbox"][0].split(","))
+            except (KeyError, ValueError):
+                raise HTTPError(400, "bbox=west,south,east,north is required") from None
+            if not (west < east and south < north):
+                raise HTTPError(400, "bbox must be west,south,east,north with west < east, south < north")
+            clip = params.get("clip", ["1"])[0] != "0"
+            bounds = (west, south, east, north)
+            query = ("bbox", *(round(v, GEOJSON_COORD_PRECISION) for v in bounds), clip)
+
+        snapshot = await self.city(slug)
+        if layer not in snapshot.layers:
+            raise HTTPError(404, f"{slug} has no {layer} layer")
+
+        key = (slug, snapshot.version, layer, query)
+        etag = '"' + hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest() + '"'
+        out = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",  # revalidate: a reload changes the ETag
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            return 304, out, b""
+
+        response = await self._response(key, snapshot, layer, bounds, clip, etag)
+        out["Content-Type"] = "application/geo+json"
+        out["X-Feature-Count"] = str(response.features)
+        if "gzip" in headers.get("accept-encoding", ""):
+            out["Content-Encoding"] = "gzip"
+            return 200, out, response.body
+        return 200, out, gzip.decompress(response.body)
+
+    # Transport
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """HTTP/1.1 with keep-alive; request bodies are read and ignored."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), SERVE_KEEPALIVE_S)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+                try:
+                    request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                    method, target, version = request_line.split(" ", 2)
+                    headers = {
+                        name.strip().lower(): value.strip()
+                        for name, value in (line.split(":", 1) for line in header_lines)
+                    }
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    writer.write(_http_response(400, {"Connection": "close"}, b""))
+                    break
+                if length:
+                    await reader.readexactly(length)
+
+                status, out, body = await self.handle(method, target, headers)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                out["Connection"] = "keep-alive" if keep_alive else "close"
+                out["Access-Control-Allow-Origin"] = "*"
+                writer.write(_http_response(status, out, body, head_only=method == "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def start(self, host: str = SERVE_HOST, port: int = SERVE_PORT) -> asyncio.Server:
+        """Listen on host:port (0 = any free port) and start watching for new runs."""
+        server = await asyncio.start_server(self._serve_connection, host, port)
+        self._watcher = asyncio.create_task(self._watch())
+        return server
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._watcher
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _http_response(status: int, headers: dict, body: bytes, head_only: bool = False) -> bytes:
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head_only else body)
+
+
+async def serve(
+    output_dir: Path = OUTPUT_DIR,
+    host: str = SERVE_HOST,
+    port: int = SERVE_PORT,
+    **options,
+) -> None:
+    """Run the tile server until cancelled (TileServer options as keywords)."""
+    tiles = TileServer(output_dir, **options)
+    server = await tiles.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Serving {output_dir} on http://{address[0]}:{address[1]} "
+          f"(cities: {', '.join(tiles._available_cities()) or 'none yet'})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await tiles.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Urban3D Navigator local tile server")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--cache-mb", type=float, default=SERVE_CACHE_MB)
+    parser.add_argument("--reload-s", type=float, default=SERVE_RELOAD_S)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    args = parser.parse_args()
+    from pipeline.stages.schema import enable_copy_on_write
+
+    enable_copy_on_write()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(
+            args.output_dir, args.host, args.port,
+            cache_mb=args.cache_mb, reload_s=args.reload_s, workers=args.workers,
+        ))
+
+
+if __name__ == "__main__":
+    main()
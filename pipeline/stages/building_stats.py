@@ -0,0 +1,136 @@
+"""
+Building Statistics
+
+One pass over a processed buildings frame produces a BuildingStats summary
+that both validate_building_data and generate_metadata consume.
+
+Summaries are mergeable: counts, min/max, sum and a fixed-bin height
+histogram all combine exactly, so per-tile summaries computed in parallel
+merge into the same city summary as a single pass over the whole city.
+Quantiles are read from the histogram (accurate to HEIGHT_HIST_BIN_M).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+import geopandas as gpd
+import numpy as np
+
+from pipeline.config import HEIGHT_HIST_BIN_M, MAX_HEIGHT_M
+from pipeline.stages.schema import as_strings
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+_N_BINS = int(np.ceil(MAX_HEIGHT_M / HEIGHT_HIST_BIN_M)) + 1  # last bin catches h == MAX
+
+
+@dataclass
+class BuildingStats:
+    """Mergeable summary of building heights, sources and types."""
+
+    count: int = 0
+    source_counts: Counter = field(default_factory=Counter)
+    type_counts: Counter = field(default_factory=Counter)
+    height_min: float = float("inf")
+    height_max: float = float("-inf")
+    height_sum: float = 0.0
+    histogram: np.ndarray = field(default_factory=lambda: np.zeros(_N_BINS, dtype=np.int64))
+    invalid_geometries: int = 0
+
+    @property
+    def height_mean(self) -> float:
+        return self.height_sum / self.count if self.count else float("nan")
+
+    def merge(self, other: BuildingStats) -> BuildingStats:
+        """Combine two summaries (e.g. of neighbouring tiles) into a new one."""
+        return BuildingStats(
+            count=self.count + other.count,
+            source_counts=self.source_counts + other.source_counts,
+            type_counts=self.type_counts + other.type_counts,
+            height_min=min(self.height_min, other.height_min),
+            height_max=max(self.height_max, other.height_max),
+            height_sum=self.height_sum + other.height_sum,
+            histogram=self.histogram + other.histogram,
+            invalid_geometries=self.invalid_geometries + other.invalid_geometries,
+        )
+
+    def quantile(self, q: float) -> float:
+        """Approximate height quantile, linearly interpolated within a histogram bin."""
+        n = int(self.histogram.sum())
+        if not n:
+            return float("nan")
+        cum = np.cumsum(self.histogram)
+        target = q * n
+        i = int(np.searchsorted(cum, target, side="left"))
+        i = min(i, len(cum) - 1)
+        prev = cum[i - 1] if i > 0 else 0
+        frac = (target - prev) / self.histogram[i] if self.histogram[i] else 0.0
+        value = (i + frac) * HEIGHT_HIST_BIN_M
+        return float(min(max(value, self.height_min), self.height_max))
+
+    def quantiles(self) -> dict[str, float | None]:
+        """{"p10": ..., "p50": ..., ...} rounded to 0.1 m; None without heights."""
+        known = bool(self.histogram.sum())
+        return {f"p{round(q * 100)}": round(self.quantile(q), 1) if known else None for q in QUANTILES}
+
+    def height_summary(self) -> dict[str, float | None]:
+        """
+        {"min", "max", "mean"} height rounded to 0.1 m. Without heights all
+        three are None (JSON null): ±inf / NaN would make metadata.json
+        unparseable by the browser's JSON.parse.
+        """
+        if not self.histogram.sum():
+            return {"min": None, "max": None, "mean": None}
+        return {
+            "min": round(self.height_min, 1),
+            "max": round(self.height_max, 1),
+            "mean": round(self.height_mean, 1),
+        }
+
+
+def merge_stats(summaries: list[BuildingStats]) -> BuildingStats:
+    """Merge any number of summaries (an empty list gives an empty summary)."""
+    total = BuildingStats()
+    for summary in summaries:
+        total = total.merge(summary)
+    return total
+
+
+def compute_building_stats(
+    gdf: gpd.GeoDataFrame,
+    assume_valid: bool = False,
+) -> BuildingStats:
+    """
+    Summarise a processed buildings frame in one pass over each column.
+
+    Args:
+        gdf: GeoDataFrame with height + height_source (building_type optional)
+        assume_valid: Skip the is_valid check (clean_geometries has already
+            dropped invalid geometries) and report 0 invalid geometries
+
+    Returns:
+        BuildingStats summary
+    """
+    heights = gdf["height"].to_numpy(dtype=np.float64)
+    heights = heights[~np.isnan(heights)]
+
+    bins = np.clip((heights // HEIGHT_HIST_BIN_M).astype(np.int64), 0, _N_BINS - 1)
+    histogram = np.bincount(bins, minlength=_N_BINS).astype(np.int64)
+
+    type_counts = Counter()
+    if "building_type" in gdf.columns:
+        types = as_strings(gdf["building_type"]).fillna("yes").astype(str)
+        type_counts = Counter(types.value_counts().to_dict())
+
+    return BuildingStats(
+        count=len(gdf),
+        source_counts=Counter(as_strings(gdf["height_source"]).astype(str).value_counts().to_dict()),
+        type_counts=type_counts,
+        height_min=float(heights.min()) if heights.size else float("inf"),
+        height_max=float(heights.max()) if heights.size else float("-inf"),
+        height_sum=float(heights.sum()),
+        histogram=histogram,
+        invalid_geometries=0 if assume_valid else int((~gdf.geometry.is_valid).sum()),
+    )
@@ -0,0 +1,354 @@
+"""
+Bounding-Volume Hierarchy over building prisms
+
+A binary BVH over the axis-aligned prism of every building (footprint bbox
+× [base, base + height]), so frustum culling, box queries and ray picking
+visit O(log n) nodes instead of every building.
+
+- built top-down with median splits along the longest axis of the node's
+  prism centres, BVH_LEAF_SIZE buildings per leaf at most
+- nodes are stored depth-first: an internal node's left child directly
+  follows it, `offset` holds its right child; a leaf holds the feature
+  range [offset, offset + count)
+- feature positions are leaf order: the exporter writes buildings.geojson
+  in `order`, so leaf ranges index straight into the exported features
+- frustum / box queries traverse one tree level at a time with vectorised
+  box tests, and whole subtrees fully inside are taken without descending;
+  ray picking is best-first (nearest node entry first)
+
+Sidecar file (`buildings.bvh`, little-endian, every array 4-byte aligned
+so a browser can map it with typed-array views):
+
+    b"BVH1", uint32 node count M, uint32 feature count N, uint32 leaf size
+    float32[M × 6]  node bounds   (minx, miny, minz, maxx, maxy, maxz)
+    int32[M]        offset        (right child | first feature)
+    int32[M]        count         (0 = internal node | leaf feature count)
+    float32[N × 6]  feature prism bounds, in leaf order
+
+x/y are in the frame's CRS (degrees for the EPSG:4326 export), z in metres;
+float32 bounds are rounded outwards so they always contain the features.
+"""
+
+from __future__ import annotations
+
+import heapq
+import struct
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+
+from pipeline.config import BVH_LEAF_SIZE
+from pipeline.stages.checkpoint import atomic_write
+
+MAGIC = b"BVH1"
+_HEADER = struct.Struct("<4sIII")
+
+
+def prism_bounds(gdf: gpd.GeoDataFrame) -> np.ndarray:
+    """(N, 6) prism bounds of buildings: footprint bbox × [base_elevation, base_elevation + height]."""
+    xy = gdf.geometry.bounds.to_numpy()
+    n = len(gdf)
+    base = (
+        np.nan_to_num(gdf["base_elevation"].to_numpy(dtype="float64", na_value=np.nan))
+        if "base_elevation" in gdf.columns else np.zeros(n)
+    )
+    height = np.nan_to_num(gdf["height"].to_numpy(dtype="float64", na_value=np.nan))
+    return np.column_stack([xy[:, 0], xy[:, 1], base, xy[:, 2], xy[:, 3], base + height])
+
+
+def _outward_f32(bounds: np.ndarray) -> np.ndarray:
+    """float32 copy of (…, 6) bounds, rounded so the boxes only grow."""
+    out = bounds.astype(np.float32)
+    lo, hi = out[..., :3], out[..., 3:]
+    lo[:] = np.where(lo > bounds[..., :3], np.nextafter(lo, np.float32(-np.inf)), lo)
+    hi[:] = np.where(hi < bounds[..., 3:], np.nextafter(hi, np.float32(np.inf)), hi)
+    return out
+
+
+def box_planes(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """The 6 inward-facing planes (a, b, c, d; inside: a·x + b·y + c·z + d ≥ 0) of a box."""
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    eye = np.eye(3)
+    return np.vstack([
+        np.column_stack([eye, -lo]),    # x ≥ lo
+        np.column_stack([-eye, hi]),    # x ≤ hi
+    ])
+
+
+def frustum_planes(
+    eye: np.ndarray,
+    target: np.ndarray,
+    fov_deg: float,
+    aspect: float,
+    near: float,
+    far: float,
+    up: np.ndarray = (0.0, 0.0, 1.0),
+) -> np.ndarray:
+    """
+    The 6 inward-facing planes of a perspective camera's view frustum.
+
+    Args:
+        eye, target: Camera position and look-at point
+        fov_deg: Vertical field of view
+        aspect: Viewport width / height
+        near, far: Clip distances along the view direction
+        up: World up vector
+
+    Returns:
+        (6, 4) planes (a, b, c, d) with a·x + b·y + c·z + d ≥ 0 inside
+    """
+    eye = np.asarray(eye, dtype=float)
+    forward = np.asarray(target, dtype=float) - eye
+    forward /= np.linalg.norm(forward)
+    right = np.cross(forward, up)
+    right /= np.linalg.norm(right)
+    cam_up = np.cross(right, forward)
+    tan_v = np.tan(np.radians(fov_deg) / 2)
+    tan_h = tan_v * aspect
+
+    planes = [
+        np.r_[forward, -forward @ (eye + forward * near)],
+        np.r_[-forward, forward @ (eye + forward * far)],
+    ]
+    for edge, across in (
+        (forward - right * tan_h, cam_up), (forward + right * tan_h, cam_up),
+        (forward - cam_up * tan_v, right), (forward + cam_up * tan_v, right),
+    ):
+        normal = np.cross(edge, across)
+        normal /= np.linalg.norm(normal)
+        if normal @ forward < 0:  # the view axis is inside every side plane
+            normal = -normal
+        planes.append(np.r_[normal, -normal @ eye])
+    return np.array(planes)
+
+
+def frustum_test(bounds: np.ndarray, planes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Classify (B, 6) boxes against convex (K, 4) planes.
+
+    The overlap test is the usual conservative one: a box is only rejected
+    when it lies entirely outside one plane.
+
+    Returns:
+        (overlaps, fully_inside) boolean masks
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    planes = np.asarray(planes, dtype=np.float64)
+    normal, d = planes[:, :3], planes[:, 3]
+    positive = normal >= 0
+    lo, hi = bounds[:, None, :3], bounds[:, None, 3:]
+    far_corner = np.where(positive, hi, lo)    # furthest along each plane normal
+    near_corner = np.where(positive, lo, hi)
+    overlaps = ((far_corner * normal).sum(-1) + d >= 0).all(axis=1)
+    inside = ((near_corner * normal).sum(-1) + d >= 0).all(axis=1)
+    return overlaps, inside
+
+
+def ray_entry(bounds: np.ndarray, origin: np.ndarray, direction: np.ndarray) -> np.ndarray:
+    """Ray parameter t ≥ 0 at which the ray enters each (B, 6) box; inf where it misses."""
+    bounds = np.asarray(bounds, dtype=np.float64)
+    origin = np.asarray(origin, dtype=np.float64)
+    direction = np.asarray(direction, dtype=np.float64)
+    lo, hi = bounds[:, :3], bounds[:, 3:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t1 = (lo - origin) / direction
+        t2 = (hi - origin) / direction
+    # On axes the ray is parallel to, it is inside the slab for all t or never
+    parallel = direction == 0
+    within = (lo <= origin) & (origin <= hi)
+    t1 = np.where(parallel, np.where(within, -np.inf, np.inf), t1)
+    t2 = np.where(parallel, np.inf, t2)
+    t_enter = np.maximum(np.minimum(t1, t2).max(axis=1), 0.0)
+    t_exit = np.maximum(t1, t2).min(axis=1)
+    return np.where(t_exit >= t_enter, t_enter, np.inf)
+
+
+@dataclass(frozen=True)
+class BVH:
+    """Flat BVH arrays (see module docstring); `order` maps positions to input rows."""
+
+    bounds: np.ndarray        # (M, 6) float32 node bounds
+    offset: np.ndarray        # (M,) int32 right child | first feature
+    count: np.ndarray         # (M,) int32 0 | leaf feature count
+    item_bounds: np.ndarray   # (N, 6) float32 feature prisms in leaf order
+    leaf_size: int = BVH_LEAF_SIZE
+    order: np.ndarray | None = None  # (N,) input row of each position (build only)
+
+    @cached_property
+    def span(self) -> tuple[np.ndarray, np.ndarray]:
+        """First and end feature position of every node's subtree (leaf ranges are contiguous)."""
+        first = np.where(self.count > 0, self.offset, 0)
+        end = np.where(self.count > 0, self.offset + self.count, 0)
+        for node in np.flatnonzero(self.count == 0)[::-1]:  # children come after their parent
+            first[node] = first[node + 1]
+            end[node] = end[self.offset[node]]
+        return first, end
+
+    def _children(self, nodes: np.ndarray) -> np.ndarray:
+        internal = nodes[self.count[nodes] == 0]
+        return np.concatenate([internal + 1, self.offset[internal]])
+
+    @staticmethod
+    def _ranges(first: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Concatenated aranges [first_i, end_i)."""
+        lengths = end - first
+        if not lengths.sum():
+            return np.empty(0, dtype=np.int64)
+        starts = np.repeat(first - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+        return starts + np.arange(lengths.sum())
+
+    def query_frustum(self, planes: np.ndarray) -> np.ndarray:
+        """Sorted feature positions whose prisms overlap a convex frustum (frustum_test semantics)."""
+        if not len(self.item_bounds):
+            return np.empty(0, dtype=np.int64)
+        first, end = self.span
+        found = []
+        frontier = np.zeros(1, dtype=np.int64)
+        while frontier.size:
+            overlaps, inside = frustum_test(self.bounds[frontier], planes)
+            whole = frontier[inside]
+            found.append(self._ranges(first[whole], end[whole]))
+            partial = frontier[overlaps & ~inside]
+            leaves = partial[self.count[partial] > 0]
+            if leaves.size:
+                candidates = self._ranges(self.offset[leaves], self.offset[leaves] + self.count[leaves])
+                found.append(candidates[frustum_test(self.item_bounds[candidates], planes)[0]])
+            frontier = self._children(partial)
+        return np.sort(np.concatenate(found))
+
+    def query_box(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Sorted feature positions whose prisms intersect the box [lo, hi]."""
+        return self.query_frustum(box_planes(lo, hi))
+
+    def raycast(
+        self, origin: np.ndarray, direction: np.ndarray, max_t: float = np.inf
+    ) -> tuple[int, float] | None:
+        """
+        Nearest prism hit by a ray (ties: lowest position).
+
+        Returns:
+            (feature position, ray parameter t), or None if nothing is hit
+            within max_t
+        """
+        if not len(self.item_bounds):
+            return None
+        # Best-first: nodes in order of entry distance, so the search stops
+        # as soon as the nearest open node is further than the best hit
+        best, best_t = -1, max_t
+        heap = [(float(ray_entry(self.bounds[:1], origin, direction)[0]), 0)]
+        while heap:
+            t_node, node = heapq.heappop(heap)
+            if t_node > best_t or t_node == np.inf:
+                break
+            if self.count[node]:
+                start = int(self.offset[node])
+                t = ray_entry(self.item_bounds[start:start + self.count[node]], origin, direction)
+                k = int(np.argmin(t))  # first of equal t: the lowest position
+                if t[k] < best_t or (t[k] == best_t and start + k < best):
+                    best, best_t = start + k, float(t[k])
+                continue
+            children = (node + 1, int(self.offset[node]))
+            for child, t_child in zip(children, ray_entry(self.bounds[list(children)], origin, direction)):
+                if t_child <= best_t and t_child < np.inf:
+                    heapq.heappush(heap, (float(t_child), child))
+        return (best, best_t) if best >= 0 else None
+
+    def save(self, path: Path) -> Path:
+        """Write the sidecar file (atomically)."""
+        with atomic_write(path) as tmp, open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(self.bounds), len(self.item_bounds), self.leaf_size))
+            for array, dtype in (
+                (self.bounds, "<f4"), (self.offset, "<i4"), (self.count, "<i4"), (self.item_bounds, "<f4"),
+            ):
+                f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "BVH":
+        """Read a sidecar file written by save()."""
+        data = Path(path).read_bytes()
+        magic, m, n, leaf_size = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a BVH file")
+        pos = _HEADER.size
+
+        def take(dtype: str, count: int) -> np.ndarray:
+            nonlocal pos
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=pos)
+            pos += array.nbytes
+            return array
+
+        bounds = take("<f4", m * 6).reshape(m, 6)
+        offset, count = take("<i4", m), take("<i4", m)
+        return cls(bounds, offset, count, take("<f4", n * 6).reshape(n, 6), leaf_size)
+
+
+def build_bvh(bounds: np.ndarray, leaf_size: int = BVH_LEAF_SIZE) -> BVH:
+    """
+    Build a BVH over (N, 6) boxes by median splits along the longest axis
+    of the box centres.
+
+    Returns:
+        BVH whose `order` gives the input row of every feature position
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    n = len(bounds)
+    centres = (bounds[:, :3] + bounds[:, 3:]) / 2
+    order = np.arange(n)
+    node_bounds, offsets, counts = [], [], []
+
+    stack = [(0, n, -1)] if n else []  # (start, end, parent whose right child this is)
+    while stack:
+        start, end, parent = stack.pop()
+        node = len(counts)
+        if parent >= 0:
+            offsets[parent] = node
+        items = order[start:end]
+        node_bounds.append(np.r_[bounds[items, :3].min(axis=0), bounds[items, 3:].max(axis=0)])
+        if end - start <= leaf_size:
+            offsets.append(start)
+            counts.append(end - start)
+            continue
+        c = centres[items]
+        axis = int(np.argmax(c.max(axis=0) - c.min(axis=0)))
+        mid = (end - start) // 2
+        order[start:end] = items[np.argpartition(c[:, axis], mid)]
+        offsets.append(-1)  # patched when the right child is visited
+        counts.append(0)
+        stack.append((start + mid, end, node))   # right
+        stack.append((start, start + mid, -1))   # left = node + 1, visited next
+
+    return BVH(
+        bounds=_outward_f32(np.array(node_bounds).reshape(-1, 6)),
+        offset=np.array(offsets, dtype=np.int32),
+        count=np.array(counts, dtype=np.int32),
+        item_bounds=_outward_f32(bounds[order]),
+        leaf_size=leaf_size,
+        order=order,
+    )
+
+
+def export_bvh(
+    buildings_gdf: gpd.GeoDataFrame, output_path: Path, leaf_size: int = BVH_LEAF_SIZE
+) -> tuple[gpd.GeoDataFrame, BVH]:
+    """
+    Build the buildings' BVH and write its sidecar.
+
+    Args:
+        buildings_gdf: Buildings in the export CRS
+        output_path: Sidecar path (buildings.bvh)
+        leaf_size: Max buildings per leaf
+
+    Returns:
+        (buildings in leaf order — export these so leaf ranges index the
+        exported features —, the BVH)
+    """
+    tree = build_bvh(prism_bounds(buildings_gdf), leaf_size)
+    tree.save(output_path)
+    leaves = int((tree.count > 0).sum())
+    print(f"  BVH: {len(tree.item_bounds)} buildings → {len(tree.bounds)} nodes, {leaves} leaves "
+          f"({output_path.stat().st_size / 1024:.0f} KB)")
+    return buildings_gdf.iloc[tree.order].reset_index(drop=True), tree
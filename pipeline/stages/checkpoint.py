@@ -0,0 +1,93 @@
+"""
+Stage Checkpoints & Atomic Output
+
+Persists the processed (pre-export) layers of a run next to its outputs so
+later runs can reuse them, and provides atomic file replacement so readers
+never see a half-written artifact.
+
+Layout:
+    <city_dir>/checkpoints/run.json         – city, bbox and options of the run
+    <city_dir>/checkpoints/<layer>.pkl      – processed GeoDataFrame
+    <city_dir>/checkpoints/fetched_<layer>.pkl – fetched layer (working CRS), for partial runs
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import geopandas as gpd
+import pandas as pd
+
+CHECKPOINT_DIRNAME = "checkpoints"
+
+
+@contextmanager
+def atomic_write(path: Path) -> Iterator[Path]:
+    """
+    Yield a temporary path next to `path`; move it into place on success.
+
+    os.replace is atomic on the same filesystem, so concurrent readers see
+    either the old file or the complete new one. On error the temp file is removed.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def checkpoint_dir(city_dir: Path) -> Path:
+    return city_dir / CHECKPOINT_DIRNAME
+
+
+def save_checkpoint(gdf: gpd.GeoDataFrame, city_dir: Path, layer: str) -> Path:
+    """Atomically write a processed layer checkpoint."""
+    path = checkpoint_dir(city_dir) / f"{layer}.pkl"
+    with atomic_write(path) as tmp:
+        gdf.to_pickle(tmp)
+    return path
+
+
+def load_checkpoint(city_dir: Path, layer: str) -> gpd.GeoDataFrame:
+    """
+    Load a processed layer checkpoint.
+
+    Raises:
+        FileNotFoundError: If the run never wrote this layer
+    """
+    path = checkpoint_dir(city_dir) / f"{layer}.pkl"
+    if not path.exists():
+        raise FileNotFoundError(f"No checkpoint for layer '{layer}' at {path}")
+    return pd.read_pickle(path)
+
+
+def save_run_info(city_dir: Path, **info) -> Path:
+    """Record the parameters of a run (city, bbox, ...) alongside its checkpoints."""
+    path = checkpoint_dir(city_dir) / "run.json"
+    with atomic_write(path) as tmp:
+        tmp.write_text(json.dumps(info, indent=2))
+    return path
+
+
+def update_run_info(city_dir: Path, **info) -> Path:
+    """Merge parameters into the recorded run, keeping the keys not given."""
+    path = checkpoint_dir(city_dir) / "run.json"
+    recorded = json.loads(path.read_text()) if path.exists() else {}
+    return save_run_info(city_dir, **{**recorded, **info})
+
+
+def load_run_info(city_dir: Path) -> dict:
+    path = checkpoint_dir(city_dir) / "run.json"
+    if not path.exists():
+        raise FileNotFoundError(f"No checkpointed run at {checkpoint_dir(city_dir)}")
+    return json.loads(path.read_text())
@@ -1,7 +1,9 @@
 """
 Stage 6: Geometry Validation & CRS
 
-Fixes invalid geometries and ensures EPSG:4326 for web rendering.
+Fixes invalid geometries. The CRS is left as is: processing stages work in
+the run's metric working CRS and layers go back to EPSG:4326 once, at
+export (see stages/working_crs.py).
 """
 
 import geopandas as gpd
@@ -9,10 +11,10 @@ import geopandas as gpd
 
 def clean_geometries(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
-    Fix invalid geometries and ensure correct CRS.
+    Fix invalid geometries, keeping the input CRS.
 
     Operations:
-    1. Reproject to EPSG:4326 if needed (deck.gl expects lat/lon)
+    1. Assume EPSG:4326 if the frame has no CRS
     2. Fix invalid polygons using buffer(0)
     3. Remove empty geometries
 
@@ -20,22 +22,19 @@ def clean_geometries(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
         gdf: GeoDataFrame with potentially invalid geometries
 
     Returns:
-        Cleaned GeoDataFrame in EPSG:4326
+        Cleaned GeoDataFrame in the input CRS
     """
-    gdf = gdf.copy()
-
-    # Ensure WGS84
     if gdf.crs is None:
         gdf = gdf.set_crs("EPSG:4326")
-    elif gdf.crs != "EPSG:4326":
-        gdf = gdf.to_crs("EPSG:4326")
 
-    # Fix invalid geometries
+    # Fix invalid geometries (in a new geometry column: the input is not modified)
     invalid_mask = ~gdf.geometry.is_valid
     if invalid_mask.any():
         count = invalid_mask.sum()
         print(f"  Fixing {count} invalid geometries via buffer(0)")
-        gdf.loc[invalid_mask, "geometry"] = gdf.loc[invalid_mask, "geometry"].buffer(0)
+        geoms = gdf.geometry.to_numpy().copy()
+        geoms[invalid_mask.to_numpy()] = gdf.geometry[invalid_mask].buffer(0).to_numpy()
+        gdf = gdf.set_geometry(geoms, crs=gdf.crs)
 
     # Remove still-invalid or empty geometries
     gdf = gdf[gdf.geometry.is_valid & ~gdf.geometry.is_empty]
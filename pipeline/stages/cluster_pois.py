@@ -0,0 +1,155 @@
+"""
+Stage 7c: POI Cluster Index
+
+Precomputes a hierarchical grid clustering of POIs for zoom levels
+POI_CLUSTER_MIN_ZOOM … POI_CLUSTER_MAX_ZOOM, so the frontend can draw one
+bubble per cluster instead of thousands of overlapping icons.
+
+At zoom z POIs are bucketed into square Web Mercator cells of
+POI_CLUSTER_RADIUS_PX screen pixels. Cell sizes halve with every zoom and
+share the same origin, so each cell at z+1 lies in exactly one cell at z and
+the levels form a tree. Everything is NumPy grid hashing + reduceat over one
+sort of the POIs — no per-cluster Python loops.
+
+Output (poi_clusters.json, columnar per level):
+    categories  – category order of the per-cluster count rows
+    levels[k]   – zoom, lon/lat (member centroid), count,
+                  category_counts (flat, row-major, len(categories) per cluster),
+                  children (CSR offsets, len = clusters + 1) into levels[k + 1],
+                  or into `leaves` for the last level
+    leaves      – POI feature indices in pois.geojson, grouped by finest cluster
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+
+from pipeline.config import (
+    GEOJSON_COORD_PRECISION,
+    POI_CLUSTER_MAX_ZOOM,
+    POI_CLUSTER_MIN_ZOOM,
+    POI_CLUSTER_RADIUS_PX,
+)
+from pipeline.stages.checkpoint import atomic_write
+from pipeline.stages.schema import POI_CATEGORIES, as_strings
+
+_TILE_PX = 256
+
+
+def mercator_unit(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """WGS84 → Web Mercator in [0, 1) world units (x east, y south, as in slippy tiles)."""
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0
+    sin = np.sin(np.radians(np.clip(lat, -85.0511, 85.0511)))
+    y = 0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)
+    return x, y
+
+
+def cell_keys(
+    x: np.ndarray, y: np.ndarray, zoom: int, radius_px: float = POI_CLUSTER_RADIUS_PX
+) -> np.ndarray:
+    """One int64 grid-cell key per point at `zoom` (cells radius_px screen pixels wide)."""
+    cells_per_axis = _TILE_PX * 2.0 ** zoom / radius_px
+    ix = np.floor(x * cells_per_axis).astype(np.int64)
+    iy = np.floor(y * cells_per_axis).astype(np.int64)
+    return (ix << 32) | iy
+
+
+def build_cluster_index(
+    pois_gdf: gpd.GeoDataFrame,
+    min_zoom: int = POI_CLUSTER_MIN_ZOOM,
+    max_zoom: int = POI_CLUSTER_MAX_ZOOM,
+    radius_px: float = POI_CLUSTER_RADIUS_PX,
+) -> dict:
+    """
+    Build the cluster hierarchy for POIs.
+
+    Args:
+        pois_gdf: POI points in EPSG:4326 (category column), in export order
+        min_zoom: Coarsest cluster level
+        max_zoom: Finest cluster level
+        radius_px: Cell size in screen pixels
+
+    Returns:
+        JSON-ready cluster index (see module docstring)
+    """
+    n = len(pois_gdf)
+    lon = pois_gdf.geometry.x.to_numpy(dtype=np.float64)
+    lat = pois_gdf.geometry.y.to_numpy(dtype=np.float64)
+    x, y = mercator_unit(lon, lat)
+
+    category_index = {name: i for i, name in enumerate(POI_CATEGORIES)}
+    other = category_index["other"]
+    category = as_strings(pois_gdf["category"]).map(category_index).fillna(other).to_numpy(dtype=np.int64)
+    k = len(POI_CATEGORIES)
+
+    zooms = list(range(min_zoom, max_zoom + 1))
+    keys = [cell_keys(x, y, z, radius_px) for z in zooms]
+
+    # Coarsest key is the primary sort key; since cells nest, equal keys at any
+    # level are then contiguous and each level's runs subdivide the previous one
+    order = np.lexsort(keys[::-1]) if n else np.empty(0, dtype=np.int64)
+    lon_s, lat_s, cat_s = lon[order], lat[order], category[order]
+
+    starts_by_level = []
+    for key in keys:
+        key_s = key[order]
+        boundary = np.r_[True, key_s[1:] != key_s[:-1]] if n else np.empty(0, dtype=bool)
+        starts_by_level.append(np.flatnonzero(boundary))
+
+    precision = GEOJSON_COORD_PRECISION
+    levels = []
+    for i, (zoom, starts) in enumerate(zip(zooms, starts_by_level)):
+        count = np.diff(np.r_[starts, n])
+        cluster_of = np.repeat(np.arange(len(starts)), count)
+        category_counts = np.bincount(cluster_of * k + cat_s, minlength=len(starts) * k)
+
+        if i + 1 < len(zooms):
+            # Children are the next level's runs starting inside this run
+            children = np.searchsorted(starts_by_level[i + 1], np.r_[starts, n])
+        else:
+            children = np.r_[starts, n]  # offsets into `leaves`
+
+        levels.append(
+            {
+                "zoom": zoom,
+                "lon": np.round(np.add.reduceat(lon_s, starts) / count, precision).tolist() if n else [],
+                "lat": np.round(np.add.reduceat(lat_s, starts) / count, precision).tolist() if n else [],
+                "count": count.tolist(),
+                "category_counts": category_counts.tolist(),
+                "children": children.tolist(),
+            }
+        )
+
+    return {
+        "min_zoom": min_zoom,
+        "max_zoom": max_zoom,
+        "radius_px": radius_px,
+        "categories": list(POI_CATEGORIES),
+        "levels": levels,
+        "leaves": order.tolist(),
+    }
+
+
+def export_poi_clusters(pois_gdf: gpd.GeoDataFrame, output_path: Path) -> Path:
+    """
+    Write the POI cluster index as compact JSON.
+
+    Args:
+        pois_gdf: POI points, in the same order as exported pois.geojson
+        output_path: Destination file path
+
+    Returns:
+        Path to the written file
+    """
+    index = build_cluster_index(pois_gdf)
+
+    with atomic_write(output_path) as tmp, open(tmp, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    sizes = ", ".join(f"z{lvl['zoom']}: {len(lvl['count'])}" for lvl in index["levels"])
+    print(f"  Clustered {len(pois_gdf)} POIs ({sizes})")
+    return output_path
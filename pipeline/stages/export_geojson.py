@@ -2,57 +2,64 @@
 Stage 7: Export to GeoJSON
 
 Writes processed GeoDataFrames to compact GeoJSON files
-with coordinate precision control.
+with coordinate precision control, either one file per layer,
+one file per spatial tile or (buildings) one file per height band —
+or as newline-delimited features in Hilbert-curve order for streaming.
+Layer files can be split into geometry + render properties and a lazily
+loaded columnar attribute sidecar.
 """
 
 import json
 import math
 from pathlib import Path
+from typing import Sequence
 
 import geopandas as gpd
+import numpy as np
 
-from pipeline.config import GEOJSON_COORD_PRECISION
+from pipeline.config import (
+    GEOJSON_COORD_PRECISION, HEIGHT_BAND_EDGES_M, NDJSON_CHUNK_FEATURES, RENDER_PROPERTIES, TILE_SIZE_KM,
+)
+from pipeline.stages.checkpoint import atomic_write
+from pipeline.stages.tiling import hilbert_order, owner_tiles
 
 
-def export_geojson(
-    gdf: gpd.GeoDataFrame,
-    output_path: Path,
-    layer_name: str,
-) -> Path:
-    """
-    Export GeoDataFrame to optimized GeoJSON.
-
-    Optimizations:
-    - Coordinate precision reduced to ~10 cm accuracy
-    - Only necessary properties included
-    - Compact JSON (no whitespace)
-
-    Args:
-        gdf: Processed GeoDataFrame
-        output_path: Destination file path
-        layer_name: 'buildings' or 'roads' (selects which columns to keep)
-
-    Returns:
-        Path to the written file
-    """
+def _feature_collection(gdf: gpd.GeoDataFrame, layer_name: str) -> dict:
+    """Build the compact FeatureCollection dict for a layer (one feature per row, in order)."""
+    if gdf.crs is not None and gdf.crs.is_projected:
+        raise ValueError(
+            f"{layer_name}: GeoJSON export expects EPSG:4326, got {gdf.crs.to_string()} "
+            "(convert once with WorkingCRS.to_wgs84 before exporting)"
+        )
     # Select minimal columns per layer type
     if layer_name == "buildings":
-        keep_cols = ["geometry", "height", "height_source", "building_type", "name"]
+        keep_cols = [
+            "geometry", "osm_id", "height", "base_elevation", "height_source",
+            "building_type", "name", "poi_count", "poi_mask",
+        ]
     elif layer_name == "roads":
         # bridge + layer are used to bake Z elevation; stripped from props after
         keep_cols = ["geometry", "highway", "road_class", "name", "line_width", "bridge", "layer"]
     elif layer_name == "pois":
-        keep_cols = ["geometry", "name", "category", "amenity_tag"]
+        keep_cols = ["geometry", "name", "category", "amenity_tag", "building_id"]
+    elif layer_name == "blocks":
+        keep_cols = ["geometry", "height", "max_height", "building_count", "base_elevation"]
     else:
         raise ValueError(f"Unknown layer_name: {layer_name}")
 
     # Keep only columns that exist
     keep_cols = [c for c in keep_cols if c in gdf.columns]
-    gdf_export = gdf[keep_cols].copy()
+    gdf_export = gdf[keep_cols]
+
+    # float32 columns would serialise as e.g. 12.300000190734863
+    gdf_export = gdf_export.assign(**{
+        col: gdf_export[col].astype("float64").round(2)
+        for col in gdf_export.columns if gdf_export[col].dtype == "float32"
+    })
 
     # Fill null names with empty string (reduces GeoJSON size vs null entries)
     if "name" in gdf_export.columns:
-        gdf_export["name"] = gdf_export["name"].fillna("")
+        gdf_export = gdf_export.assign(name=gdf_export["name"].fillna(""))
 
     # Serialize
     geojson_str = gdf_export.to_json(drop_id=True)
@@ -66,12 +73,18 @@ def export_geojson(
     # After baking, strip bridge/layer from exported properties.
     if layer_name == "roads":
         def _taper_coords(coords: list, z_max: float) -> list:
-            """Set Z using a cosine taper (0 → z_max → 0).
+            """Set Z using a cosine deck offset taper (0 → z_max → 0).
 
             Most OSM bridge edges are 2-node LineStrings after graph
             simplification, so we first ensure at least 5 evenly-spaced
             points by linear interpolation before applying the taper.
             """
+            # The deck runs straight between its abutments: base Z is
+            # interpolated from the endpoint elevations (0 unless roads
+            # were draped onto terrain)
+            z_start = coords[0][2] if len(coords[0]) > 2 else 0.0
+            z_end = coords[-1][2] if len(coords[-1]) > 2 else 0.0
+
             # Ensure minimum point density so the taper is visible
             MIN_PTS = 5
             if len(coords) < MIN_PTS:
@@ -90,7 +103,7 @@ def export_geojson(
                 t = i / (n - 1) if n > 1 else 0.5
                 # cosine taper: 0 at endpoints, z_max at midpoint (t=0.5)
                 z = z_max * 0.5 * (1 - math.cos(math.pi * 2 * min(t, 1 - t)))
-                result.append([pt[0], pt[1], z])
+                result.append([pt[0], pt[1], z_start + t * (z_end - z_start) + z])
             return result
 
         for feature in geojson_data["features"]:
@@ -118,18 +131,324 @@ def export_geojson(
     def _round_coords(coords):
         if isinstance(coords[0], (list, tuple)):
             return [_round_coords(c) for c in coords]
-        return [round(c, precision) for c in coords]
+        # x/y at GEOJSON_COORD_PRECISION, Z (metres) to the centimetre
+        return [round(c, precision) for c in coords[:2]] + [round(c, 2) for c in coords[2:]]
 
     for feature in geojson_data["features"]:
         geom = feature["geometry"]
         geom["coordinates"] = _round_coords(geom["coordinates"])
 
-    # Write compact JSON
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(geojson_data, f, separators=(",", ":"))
+    return geojson_data
+
+
+def _write_compact_json(data: dict, output_path: Path) -> None:
+    """Write compact JSON (atomically — the frontend may be serving this file)."""
+    with atomic_write(output_path) as tmp, open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def attributes_path(geojson_path: Path) -> Path:
+    """Attribute sidecar written next to a split layer file (`<layer>.attributes.json`)."""
+    return geojson_path.with_name(geojson_path.stem + ".attributes.json")
+
+
+def _encode_column(values: list) -> dict:
+    """
+    Columnar encoding of one property. Missing values (null, "") are left
+    out via "rows" (sorted feature ids that have a value) when most features
+    lack one, and are null otherwise; columns with few distinct values are
+    dictionary-encoded as "values" (most frequent first) + "codes".
+    """
+    present = [i for i, v in enumerate(values) if v is not None and v != ""]
+    column: dict = {}
+    if len(present) < len(values) / 2:
+        column["rows"] = present
+        values = [values[i] for i in present]
+    else:
+        values = [v if v != "" else None for v in values]
+
+    counts: dict = {}
+    try:
+        for v in values:
+            if v is not None:
+                counts[v] = counts.get(v, 0) + 1
+    except TypeError:  # list-valued (e.g. OSM highway lists): no dictionary
+        counts = None
+    if counts is not None and len(counts) <= len(values) / 2:
+        dictionary = sorted(counts, key=counts.get, reverse=True)
+        code = {v: i for i, v in enumerate(dictionary)}
+        column["values"] = dictionary
+        column["codes"] = [code[v] if v is not None else None for v in values]
+    else:
+        column["values"] = values
+    return column
+
+
+def _split_attributes(data: dict, layer_name: str) -> dict:
+    """
+    Move every property but the layer's RENDER_PROPERTIES out of a
+    FeatureCollection into a columnar sidecar, and give each feature its
+    position as `id` — the key into the sidecar.
+    """
+    if layer_name not in RENDER_PROPERTIES:
+        raise ValueError(f"{layer_name}: no render properties configured for an attribute split")
+    render = set(RENDER_PROPERTIES[layer_name])
+    features = data["features"]
+
+    names: dict = {}  # ordered union of property names
+    for feature in features:
+        names.update(dict.fromkeys(k for k in feature["properties"] if k not in render))
+    columns = {
+        name: _encode_column([feature["properties"].pop(name, None) for feature in features])
+        for name in names
+    }
+    for i, feature in enumerate(features):
+        feature["id"] = i
+    return {"layer": layer_name, "features": len(features), "columns": columns}
+
+
+def export_geojson(
+    gdf: gpd.GeoDataFrame,
+    output_path: Path,
+    layer_name: str,
+    split_attributes: bool = False,
+) -> Path:
+    """
+    Export GeoDataFrame to optimized GeoJSON.
+
+    Optimizations:
+    - Coordinate precision reduced to ~10 cm accuracy
+    - Only necessary properties included
+    - Compact JSON (no whitespace)
+    - Optionally (split_attributes) only the properties the first render
+      needs (RENDER_PROPERTIES); the others go to a columnar sidecar (see
+      attributes_path) keyed by feature `id`, which clients load when a
+      tooltip or panel needs it
+
+    Args:
+        gdf: Processed GeoDataFrame
+        output_path: Destination file path
+        layer_name: 'buildings', 'roads', 'pois' or 'blocks' (selects which columns to keep)
+        split_attributes: Write the attribute sidecar (not for 'blocks')
+
+    Returns:
+        Path to the written file
+    """
+    data = _feature_collection(gdf, layer_name)
+    sidecar = _split_attributes(data, layer_name) if split_attributes else None
+    _write_compact_json(data, output_path)
 
     file_size_mb = output_path.stat().st_size / 1_000_000
     print(f"  Exported {layer_name}: {len(gdf)} features, {file_size_mb:.2f} MB")
+    if sidecar is not None:
+        _write_compact_json(sidecar, attributes_path(output_path))
+        sidecar_mb = attributes_path(output_path).stat().st_size / 1_000_000
+        print(f"  Exported {layer_name} attributes: {len(sidecar['columns'])} columns, {sidecar_mb:.2f} MB")
+
+    return output_path
+
+
+def _sort_by_height(
+    gdf: gpd.GeoDataFrame, edges: Sequence[float]
+) -> tuple[gpd.GeoDataFrame, np.ndarray]:
+    """
+    Order buildings by ascending height and band them.
+
+    The sort is stable, so buildings of equal height keep their input order.
+    Band i holds heights in [edges[i-1], edges[i]) (band 0 starts at 0, the
+    last band is open-ended); buildings without a height sort last and get
+    band len(edges) + 1, i.e. no band.
+
+    Returns:
+        (sorted frame, band index per sorted row)
+    """
+    heights = gdf["height"].to_numpy(dtype="float64", na_value=np.nan)
+    order = np.argsort(heights, kind="stable")  # NaN sorts last
+    sorted_heights = heights[order]
+    bands = np.searchsorted(np.asarray(edges, dtype="float64"), sorted_heights, side="right")
+    bands[np.isnan(sorted_heights)] = len(edges) + 1
+    return gdf.iloc[order], bands
+
+
+def _band_offsets(bands: np.ndarray, n_bands: int) -> list[int]:
+    """Start index of each band in a height-sorted run of features, plus its end."""
+    return np.searchsorted(bands, np.arange(n_bands + 1)).tolist()
+
+
+def export_geojson_tiles(
+    gdf: gpd.GeoDataFrame,
+    output_dir: Path,
+    layer_name: str,
+    bbox: tuple[float, float, float, float],
+    tile_km: float = TILE_SIZE_KM,
+    band_edges: Sequence[float] | None = None,
+) -> list[Path]:
+    """
+    Export a layer as one GeoJSON file per spatial tile.
+
+    Each feature goes to the tile owning it (see tiling.owner_tiles), so tiles
+    never overlap and an edit only changes the files of the tiles it touches.
+
+    With band_edges (buildings only), the features of each tile are sorted
+    by height and the tile records where each height band starts as a
+    `height_bands` member: features[height_bands[i]:height_bands[i + 1]]
+    is band i, features from height_bands[-1] on have no height.
+
+    Args:
+        gdf: Processed GeoDataFrame
+        output_dir: Directory for the tile files, written as `{ix}_{iy}.geojson`
+        layer_name: 'buildings', 'roads' or 'pois'
+        bbox: City bbox the tile grid is anchored to
+        tile_km: Tile size
+        band_edges: Height band upper edges (see HEIGHT_BAND_EDGES_M), or None
+
+    Returns:
+        Paths of the written tile files, in tile order
+    """
+    if band_edges is not None:
+        if layer_name != "buildings":
+            raise ValueError(f"{layer_name}: height bands only apply to buildings")
+        gdf, bands = _sort_by_height(gdf, band_edges)
+    geojson_data = _feature_collection(gdf, layer_name)
+    ix, iy = owner_tiles(gdf, bbox, tile_km)
+
+    by_tile: dict[tuple[int, int], list] = {}
+    for i, tile in enumerate(zip(ix.tolist(), iy.tolist())):
+        by_tile.setdefault(tile, []).append(i)
+
+    paths = []
+    features = geojson_data["features"]
+    for (tx, ty), rows in sorted(by_tile.items()):
+        path = output_dir / f"{tx}_{ty}.geojson"
+        tile_data = {"type": "FeatureCollection", "features": [features[i] for i in rows]}
+        if band_edges is not None:
+            # rows are in sorted order, so each tile is height-sorted too
+            tile_data["height_bands"] = _band_offsets(bands[rows], len(band_edges) + 1)
+        _write_compact_json(tile_data, path)
+        paths.append(path)
+
+    print(f"  Exported {layer_name} tiles: {len(gdf)} features in {len(paths)} tiles")
+    return paths
+
+
+def export_height_bands(
+    gdf: gpd.GeoDataFrame,
+    output_dir: Path,
+    edges: Sequence[float] = HEIGHT_BAND_EDGES_M,
+) -> list[dict]:
+    """
+    Export buildings sorted by height, one GeoJSON file per height band.
+
+    A height-range filter can then load or drop whole bands and only needs
+    to binary-search the features of the (at most two) bands the range
+    boundaries fall into, instead of scanning every building.
+
+    Args:
+        gdf: Processed buildings GeoDataFrame (EPSG:4326)
+        output_dir: Directory for the band files, written as `band_{i}.geojson`
+        edges: Band upper edges in metres; band i covers [edges[i-1], edges[i]),
+            the first band starts at 0 and the last one is open-ended
+
+    Returns:
+        One entry per non-empty band: {"band", "file" (Path), "min_height",
+        "max_height" (band limits, None = open), "count", "height_range"
+        (actual [lowest, highest] height), "bbox" {west, south, east, north}}
+    """
+    sorted_gdf, bands = _sort_by_height(gdf, edges)
+    features = _feature_collection(sorted_gdf, "buildings")["features"]
+    offsets = _band_offsets(bands, len(edges) + 1)
+    heights = sorted_gdf["height"].to_numpy(dtype="float64", na_value=np.nan)
+    bounds = sorted_gdf.geometry.bounds.to_numpy()
+
+    entries = []
+    for band, (start, end) in enumerate(zip(offsets, offsets[1:])):
+        if start == end:
+            continue
+        path = output_dir / f"band_{band}.geojson"
+        _write_compact_json({"type": "FeatureCollection", "features": features[start:end]}, path)
+        west, south = bounds[start:end, :2].min(axis=0)
+        east, north = bounds[start:end, 2:].max(axis=0)
+        entries.append({
+            "band": band,
+            "file": path,
+            "min_height": float(edges[band - 1]) if band > 0 else 0.0,
+            "max_height": float(edges[band]) if band < len(edges) else None,
+            "count": end - start,
+            "height_range": [round(float(heights[start]), 2), round(float(heights[end - 1]), 2)],
+            "bbox": {"west": float(west), "south": float(south), "east": float(east), "north": float(north)},
+        })
+
+    unbanded = len(gdf) - offsets[-1]
+    print(f"  Exported buildings height bands: {offsets[-1]} features in {len(entries)} bands"
+          + (f" ({unbanded} without height left out)" if unbanded else ""))
+    return entries
+
+
+def ndjson_index_path(ndjson_path: Path) -> Path:
+    """Chunk index written next to an NDJSON export (`<layer>.ndjson.index.json`)."""
+    return ndjson_path.with_name(ndjson_path.name + ".index.json")
+
+
+def export_ndjson(
+    gdf: gpd.GeoDataFrame,
+    output_path: Path,
+    layer_name: str,
+    chunk_size: int = NDJSON_CHUNK_FEATURES,
+) -> Path:
+    """
+    Export a layer as newline-delimited GeoJSON features (GeoJSONSeq without
+    record separators) in Hilbert-curve order, plus a chunk index.
+
+    A client can render features as the lines arrive instead of waiting for
+    one FeatureCollection to download and parse, and — thanks to the
+    spatial order — fetch only the chunks intersecting its view with HTTP
+    range requests. The index (see ndjson_index_path) holds, per chunk of
+    chunk_size features, its byte offset and length in the file, its
+    feature count and its [west, south, east, north] bbox.
+
+    Args:
+        gdf: Processed GeoDataFrame (EPSG:4326)
+        output_path: Destination `.ndjson` file
+        layer_name: 'buildings', 'roads', 'pois' or 'blocks'
+        chunk_size: Features per indexed chunk
+
+    Returns:
+        Path to the written NDJSON file
+    """
+    ordered = gdf.iloc[hilbert_order(gdf)]
+    features = _feature_collection(ordered, layer_name)["features"]
+    lines = [(json.dumps(f, separators=(",", ":")) + "\n").encode() for f in features]
+    bounds = ordered.geometry.bounds.to_numpy()
+
+    chunks = []
+    offset = 0
+    for start in range(0, len(lines), chunk_size):
+        length = sum(len(line) for line in lines[start:start + chunk_size])
+        part = bounds[start:start + chunk_size]
+        chunks.append({
+            "offset": offset,
+            "length": length,
+            "count": len(part),
+            "bbox": [round(float(v), GEOJSON_COORD_PRECISION) for v in (
+                np.nanmin(part[:, 0]), np.nanmin(part[:, 1]), np.nanmax(part[:, 2]), np.nanmax(part[:, 3])
+            )],
+        })
+        offset += length
+
+    with atomic_write(output_path) as tmp, open(tmp, "wb") as f:
+        f.writelines(lines)
+    _write_compact_json(
+        {
+            "layer": layer_name,
+            "order": "hilbert",
+            "features": len(lines),
+            "bytes": offset,
+            "chunk_size": chunk_size,
+            "chunks": chunks,
+        },
+        ndjson_index_path(output_path),
+    )
 
+    print(f"  Exported {layer_name} NDJSON: {len(lines)} features in {len(chunks)} chunks, "
+          f"{offset / 1_000_000:.2f} MB")
     return output_path
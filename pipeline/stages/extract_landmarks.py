@@ -0,0 +1,234 @@
+"""
+Stage 7b: Landmark Extraction
+
+Scores every building as a potential landmark from processed pipeline data
+and writes a compact landmarks.json for the frontend label layer.
+
+Score components (weights in config.py):
+- height relative to the mean height of neighbours within LANDMARK_RADIUS_M
+- proximity to a high-degree road junction (≥ LANDMARK_JUNCTION_MIN_DEGREE
+  streets), derived from the road graph's edges
+- named POIs inside the footprint, plus a bonus for a named building
+
+All neighbourhood queries are bulk shapely.STRtree queries in the working
+CRS (frames in EPSG:4326 are projected to their UTM zone first), so scoring
+stays near-linear at 200k+ buildings.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from pipeline.config import (
+    LANDMARK_JUNCTION_MIN_DEGREE,
+    LANDMARK_MAX_COUNT,
+    LANDMARK_MIN_SCORE,
+    LANDMARK_MIN_SPACING_M,
+    LANDMARK_RADIUS_M,
+    LANDMARK_WEIGHTS,
+)
+from pipeline.stages.checkpoint import atomic_write
+from pipeline.stages.working_crs import working_crs_for
+
+# Frontend Landmark['category'] values
+_TRANSPORT_TYPES = {"train_station", "transportation", "station"}
+_MARKET_TYPES = {"retail", "commercial", "supermarket", "marketplace", "kiosk"}
+
+
+def junction_points(roads_gdf: gpd.GeoDataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Road graph nodes and their street count, rebuilt from the edge frame.
+
+    fetch_road_network returns one row per directed edge; each physical
+    street between two endpoints is counted once per endpoint.
+
+    Returns:
+        (points as shapely Point array, degree array)
+    """
+    if roads_gdf.empty:
+        return np.empty(0, dtype=object), np.empty(0, dtype=np.int64)
+
+    geoms = roads_gdf.geometry.to_numpy()
+    start = shapely.get_coordinates(shapely.get_point(geoms, 0))[:, :2]
+    end = shapely.get_coordinates(shapely.get_point(geoms, -1))[:, :2]
+
+    # Node keys from rounded coordinates (~1 cm); undirected edge = sorted node pair
+    nodes, inverse = np.unique(
+        np.round(np.vstack([start, end]), 7), axis=0, return_inverse=True
+    )
+    inverse = inverse.ravel()
+    u, v = inverse[: len(geoms)], inverse[len(geoms):]
+    pairs = np.unique(np.column_stack([np.minimum(u, v), np.maximum(u, v)]), axis=0)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]  # self-loops do not add streets
+    degree = np.bincount(pairs.ravel(), minlength=len(nodes))
+
+    return shapely.points(nodes), degree
+
+
+def score_landmarks(
+    buildings_gdf: gpd.GeoDataFrame,
+    roads_gdf: gpd.GeoDataFrame,
+    pois_gdf: gpd.GeoDataFrame | None = None,
+) -> pd.DataFrame:
+    """
+    Score every building as a landmark.
+
+    Args:
+        buildings_gdf: Processed buildings (height, building_type, name)
+        roads_gdf: Processed roads (LineStrings, one row per graph edge)
+        pois_gdf: Optional POI points with name + category
+
+    Returns:
+        DataFrame aligned with buildings_gdf: score, rel_height,
+        junction_proximity, named_pois, poi_name, poi_category
+    """
+    working = working_crs_for(buildings_gdf)
+    footprints = working.project(buildings_gdf).geometry.to_numpy()
+    centroids = shapely.centroid(footprints)
+    heights = buildings_gdf["height"].to_numpy(dtype=np.float64)
+    n = len(footprints)
+
+    # ── Height relative to the neighbourhood mean (excluding self) ─────
+    tree = shapely.STRtree(centroids)
+    src, dst = tree.query(centroids, predicate="dwithin", distance=LANDMARK_RADIUS_M)
+    not_self = src != dst
+    src, dst = src[not_self], dst[not_self]
+    neighbour_sum = np.bincount(src, weights=heights[dst], minlength=n)
+    neighbour_count = np.bincount(src, minlength=n)
+    neighbour_mean = np.where(neighbour_count > 0, neighbour_sum / np.maximum(neighbour_count, 1), heights)
+    rel_height = heights / np.maximum(neighbour_mean, 1.0)
+    # 1× neighbourhood → 0, 3× or more → 1
+    height_score = np.clip((rel_height - 1.0) / 2.0, 0.0, 1.0)
+
+    # ── Proximity to high-degree junctions ─────────────────────────────
+    junction_proximity = np.zeros(n)
+    points, degree = junction_points(roads_gdf)
+    major = points[degree >= LANDMARK_JUNCTION_MIN_DEGREE]
+    if len(major):
+        major_proj = working.project(gpd.GeoDataFrame(geometry=major, crs=roads_gdf.crs)).geometry.to_numpy()
+        (b_idx, _), dist = shapely.STRtree(major_proj).query_nearest(
+            footprints, max_distance=LANDMARK_RADIUS_M, return_distance=True, all_matches=False
+        )
+        junction_proximity[b_idx] = 1.0 - dist / LANDMARK_RADIUS_M
+
+    # ── Named POIs inside the footprint ────────────────────────────────
+    named_pois = np.zeros(n, dtype=np.int64)
+    poi_name = np.full(n, "", dtype=object)
+    poi_category = np.full(n, "", dtype=object)
+    if pois_gdf is not None and not pois_gdf.empty:
+        named = pois_gdf[pois_gdf["name"].fillna("").astype(str) != ""]
+        if not named.empty:
+            poi_points = working.project(named).geometry.to_numpy()
+            p_idx, b_idx = shapely.STRtree(footprints).query(poi_points, predicate="within")
+            named_pois = np.bincount(b_idx, minlength=n)
+            # First named POI per building provides a fallback label
+            first = pd.Series(p_idx).groupby(b_idx).min()
+            poi_name[first.index] = named["name"].to_numpy()[first.to_numpy()]
+            poi_category[first.index] = named["category"].to_numpy()[first.to_numpy()]
+
+    has_name = buildings_gdf["name"].fillna("").astype(str).ne("").to_numpy()
+
+    w = LANDMARK_WEIGHTS
+    score = (
+        w["height"] * height_score
+        + w["junction"] * junction_proximity
+        + w["pois"] * np.minimum(named_pois, 3) / 3.0
+        + w["name"] * has_name
+    )
+
+    return pd.DataFrame(
+        {
+            "score": score,
+            "rel_height": rel_height,
+            "junction_proximity": junction_proximity,
+            "named_pois": named_pois,
+            "poi_name": poi_name,
+            "poi_category": poi_category,
+        },
+        index=buildings_gdf.index,
+    )
+
+
+def _category(building_type, poi_category: str) -> str:
+    """Map building type / POI category onto the frontend landmark categories."""
+    if building_type in _TRANSPORT_TYPES:
+        return "transport"
+    if building_type in _MARKET_TYPES or poi_category == "shopping":
+        return "market"
+    return "culture"
+
+
+def extract_landmarks(
+    buildings_gdf: gpd.GeoDataFrame,
+    roads_gdf: gpd.GeoDataFrame,
+    output_path: Path,
+    pois_gdf: gpd.GeoDataFrame | None = None,
+    max_count: int = LANDMARK_MAX_COUNT,
+) -> Path:
+    """
+    Select the top-scoring, labelled buildings and write landmarks.json.
+
+    A building needs a label (its own name, or a named POI inside it) to
+    qualify. Landmarks closer than LANDMARK_MIN_SPACING_M to a higher-scoring
+    one are dropped so labels do not pile up.
+
+    Args:
+        buildings_gdf: Processed buildings (working CRS or EPSG:4326)
+        roads_gdf: Processed roads, same CRS as buildings_gdf
+        output_path: Destination file path
+        pois_gdf: Optional POI points
+        max_count: Maximum number of landmarks
+
+    Returns:
+        Path to the written file
+    """
+    scores = score_landmarks(buildings_gdf, roads_gdf, pois_gdf)
+
+    names = buildings_gdf["name"].fillna("").astype(str)
+    label = names.where(names != "", scores["poi_name"])
+    candidates = scores[(label != "") & (scores["score"] >= LANDMARK_MIN_SCORE)]
+    candidates = candidates.sort_values("score", ascending=False, kind="stable")
+
+    working = working_crs_for(buildings_gdf)
+    centroids_proj = working.project(buildings_gdf).geometry.centroid
+
+    # Greedy spacing: keep a candidate only if no kept landmark is too close
+    kept: list = []
+    kept_points: list = []
+    for idx in candidates.index:
+        point = centroids_proj.loc[idx]
+        if kept_points and min(point.distance(p) for p in kept_points) < LANDMARK_MIN_SPACING_M:
+            continue
+        kept.append(idx)
+        kept_points.append(point)
+        if len(kept) >= max_count:
+            break
+
+    kept_xy = shapely.get_coordinates(centroids_proj.loc[kept].to_numpy())
+    lons, lats = working.lonlat_xy(kept_xy[:, 0], kept_xy[:, 1])
+
+    landmarks = []
+    for idx, lon, lat in zip(kept, lons, lats):
+        row = buildings_gdf.loc[idx]
+        landmarks.append(
+            {
+                "name": label.loc[idx],
+                "coordinates": [round(float(lon), 6), round(float(lat), 6)],
+                "category": _category(row.get("building_type"), scores.at[idx, "poi_category"]),
+                "score": round(float(scores.at[idx, "score"]), 3),
+                "height": round(float(row["height"]), 1),
+                "osm_id": row.get("osm_id") if isinstance(row.get("osm_id"), str) else None,
+            }
+        )
+
+    with atomic_write(output_path) as tmp, open(tmp, "w") as f:
+        json.dump({"landmarks": landmarks}, f, separators=(",", ":"), ensure_ascii=False)
+
+    print(f"  Extracted {len(landmarks)} landmarks from {len(buildings_gdf)} buildings")
+    return output_path
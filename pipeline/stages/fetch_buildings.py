@@ -6,19 +6,36 @@ Downloads building footprints from OpenStreetMap via osmnx.
 
 import osmnx as ox
 import geopandas as gpd
+from osmnx._errors import InsufficientResponseError
 
 from pipeline.config import OSM_TIMEOUT, OSM_MAX_QUERY_AREA
+from pipeline.stages.request_planner import (
+    check_overpass_remarks, concat_unique_features, fetch_quadtree, osm_id_column,
+)
+from pipeline.stages.schema import enforce_schema
+
+
+def _fetch_building_cell(cell: tuple[float, float, float, float]) -> gpd.GeoDataFrame:
+    """Fetch the buildings of one quadtree cell (empty frame if the cell has none)."""
+    try:
+        return ox.features_from_bbox(bbox=cell, tags={"building": True})
+    except InsufficientResponseError:
+        return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
 
 
 def fetch_osm_buildings(bbox: tuple[float, float, float, float]) -> gpd.GeoDataFrame:
     """
     Fetch all buildings in bbox from OSM.
 
+    The bbox is fetched as adaptively split quadtree cells (see
+    request_planner) and buildings crossing cell edges are deduplicated by OSM ID.
+
     Args:
         bbox: (north, south, east, west) in WGS84
 
     Returns:
         GeoDataFrame with columns:
+        - osm_id ("way/123" or "relation/456", stable across runs)
         - geometry (Polygon/MultiPolygon)
         - building_type
         - height_osm (meters, may be NaN)
@@ -27,12 +44,15 @@ def fetch_osm_buildings(bbox: tuple[float, float, float, float]) -> gpd.GeoDataF
     """
     ox.settings.timeout = OSM_TIMEOUT
     ox.settings.max_query_area_size = OSM_MAX_QUERY_AREA
+    check_overpass_remarks()
 
-    tags = {"building": True}
-    gdf = ox.features_from_bbox(bbox=bbox, tags=tags)
+    gdf = fetch_quadtree(bbox, _fetch_building_cell, count=len, merge=concat_unique_features)
 
     # Keep only polygon geometries (some OSM buildings are erroneously points/lines)
-    gdf = gdf[gdf.geometry.type.isin(["Polygon", "MultiPolygon"])].copy()
+    gdf = gdf[gdf.geometry.type.isin(["Polygon", "MultiPolygon"])]
+
+    # Keep the OSM ID so incremental updates can find features again
+    gdf = gdf.assign(osm_id=osm_id_column(gdf))
 
     # Rename columns for consistency
     rename_map = {
@@ -43,9 +63,7 @@ def fetch_osm_buildings(bbox: tuple[float, float, float, float]) -> gpd.GeoDataF
     gdf = gdf.rename(columns={k: v for k, v in rename_map.items() if k in gdf.columns})
 
     # Select only the columns we need (others may or may not exist)
-    keep = ["geometry", "building_type", "height_osm", "levels", "name"]
-    for col in keep:
-        if col not in gdf.columns:
-            gdf[col] = None
+    keep = ["osm_id", "geometry", "building_type", "height_osm", "levels", "name"]
+    gdf = gdf.assign(**{col: None for col in keep if col not in gdf.columns})
 
-    return gdf[keep].reset_index(drop=True)
+    return enforce_schema(gdf[keep].reset_index(drop=True), "buildings")
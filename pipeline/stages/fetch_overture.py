@@ -2,17 +2,30 @@
 Stage 3: Fetch Overture Buildings (Gap Filling)
 
 Queries Overture Maps Foundation cloud Parquet files via DuckDB
-to fill height gaps in OSM data.
+to fill height gaps in OSM data. Query results can be cached on disk per
+release + bbox so batch workers and reruns skip the S3 scan.
 """
 
+import hashlib
+from pathlib import Path
+
 import duckdb
 import geopandas as gpd
+import pandas as pd
+
+from pipeline.config import OVERTURE_RELEASE, OVERTURE_S3_BASE
+from pipeline.stages.checkpoint import atomic_write
+from pipeline.stages.working_crs import working_crs_for
+
 
-from pipeline.config import OVERTURE_S3_BASE
+def _cache_path(cache_dir: Path, bbox: tuple[float, float, float, float]) -> Path:
+    key = f"{OVERTURE_RELEASE}|" + ",".join(f"{v:.6f}" for v in bbox)
+    return cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()[:16]}.pkl"
 
 
 def fetch_overture_buildings(
     bbox: tuple[float, float, float, float],
+    cache_dir: Path | None = None,
 ) -> gpd.GeoDataFrame:
     """
     Query Overture Maps for buildings in bbox.
@@ -21,10 +34,17 @@ def fetch_overture_buildings(
 
     Args:
         bbox: (north, south, east, west) in WGS84
+        cache_dir: Optional directory of cached query results (shared by
+            concurrent runs; entries are written atomically)
 
     Returns:
         GeoDataFrame with geometry, height, name, building_type
     """
+    if cache_dir is not None:
+        cached = _cache_path(cache_dir, bbox)
+        if cached.exists():
+            return pd.read_pickle(cached)
+
     north, south, east, west = bbox
 
     query = f"""
@@ -50,6 +70,9 @@ def fetch_overture_buildings(
     conn.close()
 
     gdf = gpd.GeoDataFrame(result, geometry="geometry", crs="EPSG:4326")
+    if cache_dir is not None:
+        with atomic_write(cached) as tmp:
+            gdf.to_pickle(tmp)
     return gdf
 
 
@@ -72,25 +95,20 @@ def merge_osm_overture(
     Returns:
         OSM GeoDataFrame with 'height_overture' column added where gaps filled
     """
-    osm_gdf = osm_gdf.copy()
-    osm_gdf["height_overture"] = None
-
     if overture_gdf.empty:
-        return osm_gdf
+        return osm_gdf.assign(height_overture=None)
 
     # Buildings missing OSM height
-    import pandas as pd
-
     missing_height = osm_gdf[pd.to_numeric(osm_gdf["height_osm"], errors="coerce").isna()]
 
     if missing_height.empty:
-        return osm_gdf
+        return osm_gdf.assign(height_overture=None)
 
-    # Spatial join: nearest neighbour within 5m
-    # Convert to projected CRS for accurate distance
-    local_crs = missing_height.estimate_utm_crs()
-    missing_proj = missing_height.to_crs(local_crs)
-    overture_proj = overture_gdf.to_crs(local_crs)
+    # Spatial join: nearest neighbour within 5m, in metres — OSM buildings
+    # already in the working CRS are used as-is, only Overture is projected
+    working = working_crs_for(osm_gdf)
+    missing_proj = working.project(missing_height)
+    overture_proj = working.project(overture_gdf)
 
     joined = gpd.sjoin_nearest(
         missing_proj,
@@ -100,7 +118,8 @@ def merge_osm_overture(
         distance_col="match_distance",
     )
 
-    # Write matched Overture heights back to the original OSM dataframe
-    osm_gdf.loc[joined.index, "height_overture"] = joined["height"].values
+    # Matched Overture heights as a new column of the OSM dataframe
+    height_overture = pd.Series(None, index=osm_gdf.index, dtype=object)
+    height_overture.loc[joined.index] = joined["height"].values
 
-    return osm_gdf
+    return osm_gdf.assign(height_overture=height_overture)
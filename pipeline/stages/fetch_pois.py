@@ -19,10 +19,17 @@ from __future__ import annotations
 import osmnx as ox
 import geopandas as gpd
 import pandas as pd
+from osmnx._errors import InsufficientResponseError
 
 from pipeline.config import OSM_TIMEOUT, OSM_MAX_QUERY_AREA
+from pipeline.stages.request_planner import (
+    check_overpass_remarks, concat_unique_features, fetch_quadtree, osm_id_column,
+)
+from pipeline.stages.schema import POI_CATEGORIES, enforce_schema  # noqa: F401 (re-export)
+from pipeline.stages.working_crs import WorkingCRS
 
 # ── Category mapping ─────────────────────────────────────────────────────────
+# Category order (POI_CATEGORIES) is defined in stages/schema.py
 # Each entry: (tag_key, tag_value) → category label
 _AMENITY_TO_CATEGORY: dict[str, str] = {
     # Food & drink
@@ -85,29 +92,40 @@ def _fetch_tag_group(
 ) -> gpd.GeoDataFrame | None:
     """Fetch features for one tag key and assign categories."""
     tags = {tag_key: tag_values}
+
+    def _fetch_cell(cell: tuple[float, float, float, float]) -> gpd.GeoDataFrame:
+        try:
+            return ox.features_from_bbox(bbox=cell, tags=tags)
+        except InsufficientResponseError:
+            return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
+
     try:
-        gdf = ox.features_from_bbox(bbox=bbox, tags=tags)
+        gdf = fetch_quadtree(bbox, _fetch_cell, count=len, merge=concat_unique_features)
     except Exception:
         return None
 
     if gdf.empty:
         return None
 
-    # Use centroid for polygons so every feature is a Point.
-    # Project to UTM zone 32N (covers northern Italy) for accurate centroids,
-    # then reproject back to WGS84.
-    gdf = gdf.copy()
-    gdf = gdf.to_crs("EPSG:32632")
-    gdf["geometry"] = gdf.geometry.centroid
-    gdf = gdf.to_crs("EPSG:4326")
+    # Use centroid for polygons so every feature is a Point. Centroids are
+    # taken in the bbox's UTM zone; point features are left untouched.
+    gdf = gdf.assign(osm_id=osm_id_column(gdf))
+    areal = (gdf.geom_type != "Point").to_numpy()
+    if areal.any():
+        working = WorkingCRS.from_bbox(bbox)
+        centroids = working.project(gdf[areal]).geometry.centroid
+        geoms = gdf.geometry.to_numpy().copy()
+        geoms[areal] = working.to_wgs84(gpd.GeoDataFrame(geometry=centroids)).geometry.to_numpy()
+        gdf = gdf.set_geometry(geoms, crs=gdf.crs)
 
     # Assign category
     if tag_col in gdf.columns:
-        gdf["category"] = gdf[tag_col].map(category_map).fillna("other")
-        gdf["amenity_tag"] = gdf[tag_col].astype(str)
+        gdf = gdf.assign(
+            category=gdf[tag_col].map(category_map).fillna("other"),
+            amenity_tag=gdf[tag_col].astype(str),
+        )
     else:
-        gdf["category"] = "other"
-        gdf["amenity_tag"] = tag_key
+        gdf = gdf.assign(category="other", amenity_tag=tag_key)
 
     return gdf
 
@@ -121,6 +139,7 @@ def fetch_pois(bbox: tuple[float, float, float, float]) -> gpd.GeoDataFrame:
 
     Returns:
         GeoDataFrame with columns:
+          osm_id      – "node/123" / "way/456" (stable across runs)
           geometry    – Point (WGS84)
           name        – string or ""
           category    – one of: food, healthcare, education, finance,
@@ -129,6 +148,7 @@ def fetch_pois(bbox: tuple[float, float, float, float]) -> gpd.GeoDataFrame:
     """
     ox.settings.timeout = OSM_TIMEOUT
     ox.settings.max_query_area_size = OSM_MAX_QUERY_AREA
+    check_overpass_remarks()
 
     frames: list[gpd.GeoDataFrame] = []
 
@@ -167,10 +187,13 @@ def fetch_pois(bbox: tuple[float, float, float, float]) -> gpd.GeoDataFrame:
 
     if not frames:
         # Return empty GeoDataFrame with correct schema
-        return gpd.GeoDataFrame(
-            columns=["geometry", "name", "category", "amenity_tag"],
-            geometry="geometry",
-            crs="EPSG:4326",
+        return enforce_schema(
+            gpd.GeoDataFrame(
+                columns=["osm_id", "geometry", "name", "category", "amenity_tag"],
+                geometry="geometry",
+                crs="EPSG:4326",
+            ),
+            "pois",
         )
 
     combined = gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), crs="EPSG:4326")
@@ -185,8 +208,8 @@ def fetch_pois(bbox: tuple[float, float, float, float]) -> gpd.GeoDataFrame:
     combined = combined.drop_duplicates(subset=["geometry"]).reset_index(drop=True)
 
     # Final column selection
-    keep = ["geometry", "name", "category", "amenity_tag"]
+    keep = ["osm_id", "geometry", "name", "category", "amenity_tag"]
     for col in keep:
         if col not in combined.columns:
             combined[col] = ""
-    return combined[keep].copy()
+    return enforce_schema(combined[keep], "pois")
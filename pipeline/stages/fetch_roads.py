@@ -4,10 +4,14 @@ Stage 5: Fetch Road Network
 Downloads the road/path network from OSM and classifies into visual hierarchy.
 """
 
+import networkx as nx
 import osmnx as ox
 import geopandas as gpd
+from osmnx._errors import InsufficientResponseError
 
 from ..config import OSM_TIMEOUT
+from .request_planner import check_overpass_remarks, fetch_quadtree
+from .schema import enforce_schema
 
 
 # Visual hierarchy mapping
@@ -27,26 +31,72 @@ ROAD_HIERARCHY: dict[str, str] = {
 WIDTH_MAP: dict[str, int] = {"major": 3, "minor": 2, "path": 1, "other": 1}
 
 
+def _fetch_road_cell(cell: tuple[float, float, float, float]) -> nx.MultiDiGraph:
+    """
+    Fetch the raw (unsimplified) road graph of one quadtree cell.
+
+    Edges crossing the cell edge are kept (truncate_by_edge) so that
+    neighbouring cells share the boundary nodes and compose seamlessly.
+    """
+    try:
+        return ox.graph_from_bbox(
+            bbox=cell,
+            network_type="all",
+            simplify=False,
+            retain_all=True,
+            truncate_by_edge=True,
+        )
+    except InsufficientResponseError:
+        return nx.MultiDiGraph()
+
+
+def _merge_road_cells(graphs: list[nx.MultiDiGraph]) -> nx.MultiDiGraph:
+    """Compose cell graphs; nodes and edges are keyed by OSM ID so duplicates collapse."""
+    graphs = [G for G in graphs if len(G)]
+    if not graphs:
+        return nx.MultiDiGraph()
+    return nx.compose_all(graphs)
+
+
 def fetch_road_network(
     bbox: tuple[float, float, float, float],
+    retain_all: bool = False,
 ) -> gpd.GeoDataFrame:
     """
     Fetch road network from OSM as LineString GeoDataFrame.
 
     Args:
         bbox: (north, south, east, west) in WGS84
+        retain_all: Keep disconnected components and edges crossing the bbox
+            edge instead of only the largest component (used for per-tile refetches)
 
     Returns:
-        GeoDataFrame with geometry, highway, name, road_class, line_width
+        GeoDataFrame with geometry, osmid (OSM way ID, or list of IDs for
+        merged edges), highway, name, road_class, line_width
     """
     ox.settings.timeout = OSM_TIMEOUT
-
-    G = ox.graph_from_bbox(bbox=bbox, network_type="all", simplify=True)
+    check_overpass_remarks()
+
+    # Fetch raw cells, then truncate to the bbox (largest component unless
+    # retain_all, as graph_from_bbox does) and simplify once over the stitched graph so
+    # edges are not split at cell boundaries.
+    G = fetch_quadtree(
+        bbox,
+        _fetch_road_cell,
+        count=lambda G: G.number_of_edges(),
+        merge=_merge_road_cells,
+    )
+    G = ox.truncate.truncate_graph_bbox(
+        G, bbox=bbox, truncate_by_edge=retain_all, retain_all=retain_all
+    )
+    G = ox.simplify_graph(G)
+    nx.set_node_attributes(G, values=ox.stats.count_streets_per_node(G), name="street_count")
     gdf_edges = ox.graph_to_gdfs(G, nodes=False, edges=True)
 
     # Keep relevant columns (handle missing gracefully)
     # bridge / layer are required to bake vertical elevation into the export
-    keep = ["geometry", "highway", "name", "bridge", "layer"]
+    # osmid is kept so incremental updates can match changed ways
+    keep = ["osmid", "geometry", "highway", "name", "bridge", "layer"]
     for col in keep:
         if col not in gdf_edges.columns:
             gdf_edges[col] = None
@@ -60,10 +110,8 @@ def classify_roads(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     """
     Classify roads into visual categories and assign widths.
 
-    Categories: major, minor, path, other
+    Categories: major, minor, path, other (Categorical), widths as uint8
     """
-    gdf = gdf.copy()
-
     # highway can be a list (e.g. ['residential', 'tertiary']); take first
     def _first(val):
         if isinstance(val, list):
@@ -71,7 +119,7 @@ def classify_roads(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
         return val
 
     highway_flat = gdf["highway"].apply(_first)
-    gdf["road_class"] = highway_flat.map(ROAD_HIERARCHY).fillna("other")
-    gdf["line_width"] = gdf["road_class"].map(WIDTH_MAP)
+    road_class = highway_flat.map(ROAD_HIERARCHY).fillna("other")
+    gdf = gdf.assign(road_class=road_class, line_width=road_class.map(WIDTH_MAP))
 
-    return gdf
+    return enforce_schema(gdf, "roads")
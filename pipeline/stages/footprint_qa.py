@@ -0,0 +1,237 @@
+"""
+Stage 6a: Footprint QA
+
+Finds overlapping and sliver building footprints after cleaning. Duplicate
+footprints (OSM building + building:part, the same building from OSM and
+Overture, …) double the GPU work and z-fight; slivers are digitising noise.
+
+- overlaps: one STRtree self-query over all footprints, split into chunks of
+  QA_CHUNK_SIZE query geometries on a thread pool; the intersection areas of
+  all candidate pairs are computed in bulk and divided by the smaller
+  footprint's area
+- duplicates: overlap ratio ≥ QA_DUPLICATE_RATIO; with dedupe=True only the
+  best footprint of each duplicate group is kept (better height_source,
+  then larger area)
+- slivers: area < QA_SLIVER_MIN_AREA_M2 or area / perimeter <
+  QA_SLIVER_MIN_WIDTH_M (≈ half the width of a thin strip)
+
+Buildings get a uint8 qa_flags bitmask (QA_OVERLAP | QA_DUPLICATE |
+QA_SLIVER); the findings are written to qa_report.json.
+"""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from pipeline.config import (
+    QA_CHUNK_SIZE,
+    QA_DEDUPE,
+    QA_DUPLICATE_RATIO,
+    QA_OVERLAP_MIN_RATIO,
+    QA_SLIVER_MIN_AREA_M2,
+    QA_SLIVER_MIN_WIDTH_M,
+    QA_WORKERS,
+)
+from pipeline.stages.checkpoint import atomic_write
+from pipeline.stages.schema import HEIGHT_SOURCES, as_strings
+from pipeline.stages.working_crs import metric_geometry
+
+# qa_flags bits
+QA_OVERLAP = 1
+QA_DUPLICATE = 2
+QA_SLIVER = 4
+
+
+def _overlaps_in_chunk(
+    tree: shapely.STRtree, geoms: np.ndarray, start: int, stop: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pairs (i < j) with i in [start, stop) and their intersection areas."""
+    src, dst = tree.query(geoms[start:stop], predicate="intersects")
+    src = src + start
+    keep = src < dst
+    src, dst = src[keep], dst[keep]
+    overlap = shapely.area(shapely.intersection(geoms[src], geoms[dst]))
+    return src, dst, overlap
+
+
+def overlap_pairs(
+    geoms: np.ndarray,
+    chunk_size: int = QA_CHUNK_SIZE,
+    workers: int = QA_WORKERS,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    All pairs of footprints whose interiors overlap.
+
+    Args:
+        geoms: Footprint polygons in a metric CRS
+        chunk_size: Query geometries per chunk
+        workers: Threads running chunks concurrently
+
+    Returns:
+        (i, j, overlap_m2, ratio) arrays with i < j, where ratio is the
+        overlap area over the smaller footprint's area
+    """
+    n = len(geoms)
+    areas = shapely.area(geoms)
+    tree = shapely.STRtree(geoms)
+    tree.query(geoms[:1])  # GEOS builds the tree lazily — do it before fanning out
+
+    starts = range(0, n, chunk_size)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(
+            lambda start: _overlaps_in_chunk(tree, geoms, start, min(start + chunk_size, n)),
+            starts,
+        ))
+
+    if parts:
+        i, j, overlap = (np.concatenate(arrays) for arrays in zip(*parts))
+    else:
+        i = j = np.empty(0, dtype=np.int64)
+        overlap = np.empty(0)
+    touching = overlap <= 0
+    i, j, overlap = i[~touching], j[~touching], overlap[~touching]
+    ratio = overlap / np.maximum(np.minimum(areas[i], areas[j]), 1e-9)
+    return i, j, overlap, np.minimum(ratio, 1.0)
+
+
+def sliver_mask(
+    geoms: np.ndarray,
+    min_area: float = QA_SLIVER_MIN_AREA_M2,
+    min_width: float = QA_SLIVER_MIN_WIDTH_M,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flag tiny or very thin footprints.
+
+    Returns:
+        (mask, area_m2, area / perimeter in metres)
+    """
+    area = shapely.area(geoms)
+    width = area / np.maximum(shapely.length(geoms), 1e-9)
+    return (area < min_area) | (width < min_width), area, width
+
+
+def _duplicates_to_drop(
+    i: np.ndarray, j: np.ndarray, rank: np.ndarray, area: np.ndarray
+) -> np.ndarray:
+    """
+    Greedy duplicate removal: visit footprints best-first (rank, then larger
+    area) and drop every one that duplicates an already kept footprint.
+    """
+    n = len(rank)
+    # CSR adjacency of the duplicate graph (both directions)
+    a, b = np.concatenate([i, j]), np.concatenate([j, i])
+    order = np.argsort(a, kind="stable")
+    a, b = a[order], b[order]
+    offsets = np.searchsorted(a, np.arange(n + 1))
+
+    involved = np.unique(a)
+    visit = involved[np.lexsort((involved, -area[involved], rank[involved]))]
+    dropped = np.zeros(n, dtype=bool)
+    kept = np.zeros(n, dtype=bool)
+    for idx in visit:
+        if kept[b[offsets[idx]:offsets[idx + 1]]].any():
+            dropped[idx] = True
+        else:
+            kept[idx] = True
+    return dropped
+
+
+def footprint_qa(
+    buildings_gdf: gpd.GeoDataFrame,
+    dedupe: bool = QA_DEDUPE,
+    chunk_size: int = QA_CHUNK_SIZE,
+    workers: int = QA_WORKERS,
+) -> tuple[gpd.GeoDataFrame, dict]:
+    """
+    Flag overlapping / sliver footprints and optionally drop duplicates.
+
+    Args:
+        buildings_gdf: Cleaned buildings (working CRS or EPSG:4326)
+        dedupe: Remove duplicate footprints, keeping the best of each group
+        chunk_size: Footprints per STRtree query chunk
+        workers: Threads for the chunked queries
+
+    Returns:
+        (buildings with a qa_flags column, QA report dict)
+    """
+    geoms = metric_geometry(buildings_gdf)
+    n = len(geoms)
+    if "osm_id" in buildings_gdf.columns:
+        osm_id = buildings_gdf["osm_id"].astype(object)
+        ids = osm_id.where(osm_id.notna(), None).to_numpy()
+    else:
+        ids = buildings_gdf.index.to_numpy(dtype=object)
+
+    i, j, overlap, ratio = overlap_pairs(geoms, chunk_size, workers)
+    flagged = ratio >= QA_OVERLAP_MIN_RATIO
+    i, j, overlap, ratio = i[flagged], j[flagged], overlap[flagged], ratio[flagged]
+    duplicate = ratio >= QA_DUPLICATE_RATIO
+    slivers, area, width = sliver_mask(geoms)
+
+    flags = np.zeros(n, dtype=np.uint8)
+    flags[np.concatenate([i, j])] |= QA_OVERLAP
+    flags[np.concatenate([i[duplicate], j[duplicate]])] |= QA_DUPLICATE
+    flags[slivers] |= QA_SLIVER
+    buildings_gdf = buildings_gdf.assign(qa_flags=flags)
+
+    drop = np.zeros(n, dtype=bool)
+    if dedupe and duplicate.any():
+        source_rank = {name: r for r, name in enumerate(HEIGHT_SOURCES)}
+        if "height_source" in buildings_gdf.columns:
+            rank = as_strings(buildings_gdf["height_source"]).map(source_rank)
+            rank = rank.fillna(len(HEIGHT_SOURCES)).to_numpy(dtype=np.int64)
+        else:
+            rank = np.zeros(n, dtype=np.int64)
+        drop = _duplicates_to_drop(i[duplicate], j[duplicate], rank, area)
+        buildings_gdf = buildings_gdf[~drop].reset_index(drop=True)
+
+    sliver_idx = np.flatnonzero(slivers)
+    report = {
+        "buildings": n,
+        "thresholds": {
+            "overlap_min_ratio": QA_OVERLAP_MIN_RATIO,
+            "duplicate_ratio": QA_DUPLICATE_RATIO,
+            "sliver_min_area_m2": QA_SLIVER_MIN_AREA_M2,
+            "sliver_min_width_m": QA_SLIVER_MIN_WIDTH_M,
+        },
+        "summary": {
+            "overlap_pairs": int(len(i)),
+            "duplicate_pairs": int(duplicate.sum()),
+            "slivers": int(len(sliver_idx)),
+            "removed": int(drop.sum()),
+        },
+        "overlaps": [
+            {
+                "a": ids[a], "b": ids[b],
+                "overlap_m2": round(float(o), 2), "ratio": round(float(r), 3),
+                "duplicate": bool(d),
+            }
+            for a, b, o, r, d in zip(i.tolist(), j.tolist(), overlap, ratio, duplicate)
+        ],
+        "slivers": [
+            {"id": ids[k], "area_m2": round(float(area[k]), 2), "width_m": round(float(width[k]), 3)}
+            for k in sliver_idx.tolist()
+        ],
+        "removed": [ids[k] for k in np.flatnonzero(drop).tolist()],
+    }
+
+    summary = report["summary"]
+    print(
+        f"  QA: {summary['overlap_pairs']} overlapping pairs "
+        f"({summary['duplicate_pairs']} duplicates), {summary['slivers']} slivers"
+        + (f", removed {summary['removed']} duplicates" if dedupe else "")
+    )
+    return buildings_gdf, report
+
+
+def write_qa_report(report: dict, output_path: Path) -> Path:
+    """Write the QA report from footprint_qa() as JSON."""
+    with atomic_write(output_path) as tmp, open(tmp, "w") as f:
+        json.dump(report, f, separators=(",", ":"), ensure_ascii=False, default=str)
+    return output_path
@@ -10,6 +10,10 @@ from pathlib import Path
 
 import geopandas as gpd
 
+from pipeline.config import HEIGHT_BAND_EDGES_M, TILE_SIZE_KM
+from pipeline.stages.building_stats import BuildingStats, compute_building_stats
+from pipeline.stages.checkpoint import atomic_write
+
 
 def generate_metadata(
     city_name: str,
@@ -17,11 +21,19 @@ def generate_metadata(
     roads_gdf: gpd.GeoDataFrame,
     output_path: Path,
     pois_gdf: gpd.GeoDataFrame | None = None,
+    tiles: dict[str, list[str]] | None = None,
+    stats: BuildingStats | None = None,
+    extra_files: dict[str, str] | None = None,
+    height_bands: list[dict] | None = None,
+    streams: dict[str, dict[str, str]] | None = None,
+    bvh: dict[str, dict] | None = None,
+    attributes: dict[str, dict] | None = None,
 ) -> Path:
     """
     Generate metadata JSON for frontend consumption.
 
-    Includes bounding box, center point, feature counts, and height statistics.
+    Includes bounding box, center point, feature counts, and height statistics
+    (including quantiles the frontend colour scale can use directly).
 
     Args:
         city_name: Human-readable city name
@@ -29,14 +41,31 @@ def generate_metadata(
         roads_gdf: Processed roads GeoDataFrame
         output_path: Destination file path
         pois_gdf: Optional POI GeoDataFrame
+        tiles: Optional per-tile files by layer (relative paths) from a tiled export
+        stats: Precomputed building summary (shared with validate_building_data)
+        extra_files: Additional artifacts by key (relative paths), e.g. landmarks
+        height_bands: Optional per-band entries (relative file paths) from
+            export_height_bands; building tiles are then height-sorted too
+        streams: Optional NDJSON exports by layer ({"file", "index"}, relative
+            paths) from export_ndjson
+        bvh: Optional BVH sidecars by layer ({"file", "nodes", "leaf_size"})
+            from export_bvh; the layer's GeoJSON is then in BVH leaf order
+        attributes: Optional attribute sidecars by layer ({"file"}) of layer
+            files exported with split_attributes
 
     Returns:
         Path to the written file
     """
-    bounds = buildings_gdf.total_bounds  # [minx, miny, maxx, maxy]
+    # [minx, miny, maxx, maxy] of the buildings, or of the roads / POIs of a
+    # city without buildings
+    extents = [gdf for gdf in (buildings_gdf, roads_gdf, pois_gdf) if gdf is not None and not gdf.empty]
+    bounds = (extents[0] if extents else buildings_gdf).total_bounds
+
+    if stats is None:
+        stats = compute_building_stats(buildings_gdf, assume_valid=True)
 
     # Height source breakdown
-    source_counts = buildings_gdf["height_source"].value_counts().to_dict()
+    source_counts = dict(stats.source_counts)
 
     metadata = {
         "city": city_name,
@@ -52,14 +81,16 @@ def generate_metadata(
             "lat": float((bounds[1] + bounds[3]) / 2),
         },
         "stats": {
-            "buildings_count": len(buildings_gdf),
+            "buildings_count": stats.count,
             "roads_count": len(roads_gdf),
             "pois_count": len(pois_gdf) if pois_gdf is not None else 0,
-            "avg_building_height": round(float(buildings_gdf["height"].mean()), 1),
-            "max_building_height": round(float(buildings_gdf["height"].max()), 1),
+            "avg_building_height": stats.height_summary()["mean"],
+            "max_building_height": stats.height_summary()["max"],
+            "height_quantiles": stats.quantiles(),
             "height_sources": source_counts,
+            "building_types": dict(stats.type_counts.most_common()),
             "pct_known_height": round(
-                (1 - source_counts.get("default", 0) / max(len(buildings_gdf), 1)) * 100,
+                (1 - source_counts.get("default", 0) / max(stats.count, 1)) * 100,
                 1,
             ),
         },
@@ -74,9 +105,26 @@ def generate_metadata(
         },
     }
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+    if extra_files:
+        metadata["files"].update(extra_files)
+
+    if tiles:
+        metadata["tiles"] = {"size_km": TILE_SIZE_KM, "layers": tiles}
+
+    if height_bands:
+        metadata["height_bands"] = {"edges": list(HEIGHT_BAND_EDGES_M), "bands": height_bands}
+
+    if streams:
+        metadata["streams"] = streams
+
+    if bvh:
+        metadata["bvh"] = bvh
+
+    if attributes:
+        metadata["attributes"] = attributes
+
+    with atomic_write(output_path) as tmp, open(tmp, "w") as f:
+        json.dump(metadata, f, indent=2, allow_nan=False)  # NaN / Infinity are not JSON
 
     print(f"  Metadata written: {output_path}")
     return output_path
@@ -0,0 +1,232 @@
+"""
+Incremental Updates from OSM Change Files
+
+Applies a local osmChange (.osc / .osc.gz) diff to a previous run's
+checkpointed layers without rebuilding the whole city.
+
+Strategy:
+1. Parse the diff into changed / deleted element IDs and the new locations
+   of changed nodes
+2. Map those to the spatial tiles they touch: node locations directly,
+   way/relation IDs via the previous geometry of the matching features
+3. Re-fetch and re-process (heights, clean) only the affected tiles
+4. Replace every feature owned by an affected tile with the fresh ones;
+   everything else is reused from the checkpoint
+"""
+
+from __future__ import annotations
+
+import gzip
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import box
+
+from pipeline.config import TILE_SIZE_KM
+from pipeline.stages.tiling import in_tiles, owner_tiles, tile_bbox, tile_index
+
+_ACTIONS = ("create", "modify", "delete")
+_ELEMENTS = ("node", "way", "relation")
+
+
+def parse_osc(path: Path) -> dict:
+    """
+    Parse an osmChange file.
+
+    Args:
+        path: .osc or gzip-compressed .osc.gz file
+
+    Returns:
+        Dictionary with:
+        - changed_ids: set of "node/1", "way/2", ... for every created,
+          modified or deleted element
+        - deleted_ids: subset of changed_ids that were deleted
+        - way_ids: set of integer way IDs in changed_ids (for road matching)
+        - points: (N, 2) array of (lon, lat) for changed nodes with a location
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    changed: set[str] = set()
+    deleted: set[str] = set()
+    way_ids: set[int] = set()
+    points: list[tuple[float, float]] = []
+
+    action = None
+    with opener(path, "rb") as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if elem.tag in _ACTIONS:
+                    action = elem.tag
+                continue
+            if elem.tag in _ACTIONS:
+                action = None
+            elif elem.tag in _ELEMENTS and action is not None:
+                osm_id = f"{elem.tag}/{elem.get('id')}"
+                changed.add(osm_id)
+                if action == "delete":
+                    deleted.add(osm_id)
+                if elem.tag == "way":
+                    way_ids.add(int(elem.get("id")))
+                if elem.tag == "node" and elem.get("lat") is not None:
+                    points.append((float(elem.get("lon")), float(elem.get("lat"))))
+                elem.clear()
+
+    return {
+        "changed_ids": changed,
+        "deleted_ids": deleted,
+        "way_ids": way_ids,
+        "points": np.array(points, dtype=float).reshape(-1, 2),
+    }
+
+
+def _edge_way_ids(roads: gpd.GeoDataFrame) -> pd.Series:
+    """Way IDs of each road edge, one row per ID (osmid is an int, or a list for merged edges)."""
+    ids = roads["osmid"].explode().dropna()
+    return ids.astype(np.int64)
+
+
+def _road_way_mask(roads: gpd.GeoDataFrame, way_ids: set[int]) -> np.ndarray:
+    """Roads whose osmid references one of `way_ids`."""
+    if "osmid" not in roads.columns or not way_ids:
+        return np.zeros(len(roads), dtype=bool)
+    ids = _edge_way_ids(roads.reset_index(drop=True))
+    hits = ids.index[ids.isin(way_ids).to_numpy()].unique()
+    mask = np.zeros(len(roads), dtype=bool)
+    mask[hits] = True
+    return mask
+
+
+def affected_tiles(
+    change: dict,
+    layers: dict[str, gpd.GeoDataFrame],
+    bbox: tuple[float, float, float, float],
+    tile_km: float = TILE_SIZE_KM,
+) -> set[tuple[int, int]]:
+    """
+    Tiles touched by a parsed change.
+
+    Args:
+        change: Output of parse_osc()
+        layers: Checkpointed layers by name ('buildings', 'roads', 'pois')
+        bbox: City bbox the tile grid is anchored to
+        tile_km: Tile size
+
+    Returns:
+        Set of (ix, iy) tile indices inside the city bbox
+    """
+    tiles: set[tuple[int, int]] = set()
+
+    # New locations of created / modified nodes
+    points = change["points"]
+    north, south, east, west = bbox
+    inside = (
+        (points[:, 0] >= west) & (points[:, 0] <= east)
+        & (points[:, 1] >= south) & (points[:, 1] <= north)
+    )
+    ix, iy = tile_index(points[inside, 0], points[inside, 1], bbox, tile_km)
+    tiles.update(zip(ix.tolist(), iy.tolist()))
+
+    # Previous locations of changed features (covers modifications and deletions)
+    for name, gdf in layers.items():
+        if name == "roads":
+            mask = _road_way_mask(gdf, change["way_ids"])
+        elif "osm_id" in gdf.columns:
+            mask = gdf["osm_id"].isin(change["changed_ids"]).to_numpy()
+        else:
+            continue
+        ix, iy = owner_tiles(gdf[mask], bbox, tile_km)
+        tiles.update(zip(ix.tolist(), iy.tolist()))
+
+    return tiles
+
+
+def replace_tiles(
+    previous: gpd.GeoDataFrame,
+    fresh: gpd.GeoDataFrame,
+    tiles: set[tuple[int, int]],
+    bbox: tuple[float, float, float, float],
+    deleted_ids: set[str] = frozenset(),
+    tile_km: float = TILE_SIZE_KM,
+) -> gpd.GeoDataFrame:
+    """
+    Swap the features owned by `tiles` in `previous` for those in `fresh`.
+
+    Fresh features outside the affected tiles (fetched because they cross a
+    tile edge) are discarded. Where features carry an osm_id, a previous copy
+    of any fresh ID is dropped too, so a building whose nodes moved into
+    another tile is not duplicated.
+
+    Road edges are matched by the way IDs in their osmid instead: see
+    _replace_road_tiles.
+
+    Returns:
+        Merged GeoDataFrame with a fresh RangeIndex
+    """
+    if "osmid" in previous.columns and "osmid" in fresh.columns:
+        return _replace_road_tiles(previous, fresh, tiles, bbox, deleted_ids, tile_km)
+
+    keep_prev = ~in_tiles(previous, tiles, bbox, tile_km)
+    fresh = fresh[in_tiles(fresh, tiles, bbox, tile_km)]
+
+    if "osm_id" in previous.columns:
+        stale = set(deleted_ids)
+        if "osm_id" in fresh.columns:
+            stale |= set(fresh["osm_id"])
+        keep_prev &= ~previous["osm_id"].isin(stale).to_numpy()
+
+    previous = previous[keep_prev]
+    if fresh.empty:
+        return previous.reset_index(drop=True)
+    fresh = fresh.reindex(columns=previous.columns)
+    merged = pd.concat([previous, fresh], ignore_index=True)
+    return gpd.GeoDataFrame(merged, geometry="geometry", crs=previous.crs)
+
+
+def _replace_road_tiles(
+    previous: gpd.GeoDataFrame,
+    fresh: gpd.GeoDataFrame,
+    tiles: set[tuple[int, int]],
+    bbox: tuple[float, float, float, float],
+    deleted_ids: set[str],
+    tile_km: float,
+) -> gpd.GeoDataFrame:
+    """
+    replace_tiles() for road edges, which are split at intersections rather than per way.
+
+    A tile refetch returns the edges of every way that enters it, truncated
+    one node past the tile edge, so neither previous nor fresh edges of a way
+    crossing into an unaffected tile line up with the tile boundary. Previous
+    edges of any way present in the fresh roads are therefore cut back to the
+    part outside the affected tiles and the fresh edges to the part inside,
+    which joins the two at the tile edge without duplicated or missing
+    segments. Edges of other ways are replaced by ownership as in
+    replace_tiles().
+    """
+    cells = [tile_bbox(ix, iy, bbox, tile_km) for ix, iy in tiles]
+    area = shapely.union_all([box(west, south, east, north) for north, south, east, west in cells])
+
+    previous = previous.reset_index(drop=True)
+    fresh = fresh[fresh.intersects(area).to_numpy()].reset_index(drop=True)
+    deleted_ways = {int(i.split("/", 1)[1]) for i in deleted_ids if i.startswith("way/")}
+    deleted = _road_way_mask(previous, deleted_ways)
+    refreshed = _road_way_mask(previous, set(_edge_way_ids(fresh))) & ~deleted
+    keep_prev = ~(refreshed | deleted | in_tiles(previous, tiles, bbox, tile_km))
+
+    outside = previous[refreshed]
+    outside = outside.set_geometry(outside.geometry.difference(area))
+    fresh = fresh.reindex(columns=previous.columns)
+    fresh = fresh.set_geometry(fresh.geometry.intersection(area))
+
+    parts = [p for p in (previous[keep_prev], _line_parts(outside), _line_parts(fresh)) if not p.empty]
+    merged = pd.concat(parts or [previous.iloc[:0]], ignore_index=True)
+    return gpd.GeoDataFrame(merged, geometry="geometry", crs=previous.crs)
+
+
+def _line_parts(edges: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Explode clipped edges into their non-empty LineString parts."""
+    edges = edges.explode(index_parts=False)
+    lines = (edges.geom_type == "LineString") & ~edges.is_empty
+    return edges[lines.to_numpy()]
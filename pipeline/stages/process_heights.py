@@ -14,6 +14,7 @@ import pandas as pd
 import geopandas as gpd
 
 from pipeline.config import DEFAULT_HEIGHT_M, FLOOR_HEIGHT_M, MIN_HEIGHT_M, MAX_HEIGHT_M
+from pipeline.stages.schema import enforce_schema
 
 
 def process_heights(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
@@ -21,8 +22,8 @@ def process_heights(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     Calculate final building heights using fallback hierarchy.
 
     Adds columns:
-    - height: final numeric height in meters
-    - height_source: 'osm' | 'overture' | 'levels' | 'default'
+    - height: final numeric height in meters (float32)
+    - height_source: 'osm' | 'overture' | 'levels' | 'default' (Categorical)
 
     Buildings with height_source='default' should render as wireframe-only
     in the frontend to be visually honest about data gaps.
@@ -33,46 +34,49 @@ def process_heights(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
     Returns:
         GeoDataFrame with height + height_source columns, intermediate columns dropped
     """
-    gdf = gdf.copy()
+    # Heights and sources are built as new Series and assigned at the end,
+    # so the input frame is never written to
 
-    # Priority 1: OSM height
-    gdf["height"] = pd.to_numeric(gdf["height_osm"], errors="coerce")
+    # Priority 1: OSM height (astype: an own copy even if already numeric)
+    height = pd.to_numeric(gdf["height_osm"], errors="coerce").astype("float64")
 
     # Priority 2: Overture height (if column exists)
     if "height_overture" in gdf.columns:
-        mask = gdf["height"].isna() & gdf["height_overture"].notna()
-        gdf.loc[mask, "height"] = pd.to_numeric(
+        mask = height.isna() & gdf["height_overture"].notna()
+        height.loc[mask] = pd.to_numeric(
             gdf.loc[mask, "height_overture"], errors="coerce"
         )
 
     # Priority 3: Levels × floor height
-    mask = gdf["height"].isna() & gdf["levels"].notna()
-    gdf.loc[mask, "height"] = (
+    mask = height.isna() & gdf["levels"].notna()
+    height.loc[mask] = (
         pd.to_numeric(gdf.loc[mask, "levels"], errors="coerce") * FLOOR_HEIGHT_M
     )
 
     # Priority 4: Default
-    gdf["height"] = gdf["height"].fillna(DEFAULT_HEIGHT_M)
+    height = height.fillna(DEFAULT_HEIGHT_M)
 
     # Sanity clamp
-    gdf["height"] = gdf["height"].clip(lower=MIN_HEIGHT_M, upper=MAX_HEIGHT_M)
+    height = height.clip(lower=MIN_HEIGHT_M, upper=MAX_HEIGHT_M)
 
     # ── Track height source ─────────────────────────────
-    gdf["height_source"] = "default"
+    source = pd.Series("default", index=gdf.index, dtype=object)
 
     mask_osm = pd.to_numeric(gdf["height_osm"], errors="coerce").notna()
-    gdf.loc[mask_osm, "height_source"] = "osm"
+    source.loc[mask_osm] = "osm"
 
     if "height_overture" in gdf.columns:
         mask_overture = gdf["height_overture"].notna() & ~mask_osm
-        gdf.loc[mask_overture, "height_source"] = "overture"
+        source.loc[mask_overture] = "overture"
 
     mask_levels = gdf["levels"].notna() & ~mask_osm
     if "height_overture" in gdf.columns:
         mask_levels = mask_levels & ~gdf["height_overture"].notna()
-    gdf.loc[mask_levels, "height_source"] = "levels"
+    source.loc[mask_levels] = "levels"
+
+    gdf = gdf.assign(height=height, height_source=source)
 
     # Drop intermediate columns
     gdf = gdf.drop(columns=["height_osm", "height_overture", "levels"], errors="ignore")
 
-    return gdf
+    return enforce_schema(gdf, "buildings")
@@ -0,0 +1,166 @@
+"""
+Stage 9: Delta Publishing
+
+Publishes a freshly exported run from a staging directory into the city
+output directory, touching only what actually changed.
+
+Strategy:
+1. Hash every staged artifact (SHA-256 of the file bytes)
+2. Compare against manifest.json of the previously published run
+3. Move only added / changed files into place; unchanged files keep their
+   bytes and mtime, so CDN and client caches stay valid
+4. Delete files that the previous manifest listed but the new run no longer
+   produces (e.g. tiles that became empty)
+5. Record the changelog in metadata.json and write the new manifest
+
+metadata.json always changes (generated_at) and is always republished.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from pipeline.stages.checkpoint import atomic_write
+
+MANIFEST_NAME = "manifest.json"
+METADATA_NAME = "metadata.json"
+STAGING_DIRNAME = ".staging"
+
+# Never part of the artifact diff: written by this stage itself
+_UNMANAGED = {MANIFEST_NAME, METADATA_NAME}
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Streaming SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(root: Path) -> dict[str, dict]:
+    """
+    Hash all artifacts below root.
+
+    Returns:
+        {relative posix path: {"sha256": ..., "bytes": ...}}, sorted by path
+    """
+    files = {}
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        rel = path.relative_to(root).as_posix()
+        if rel in _UNMANAGED:
+            continue
+        files[rel] = {"sha256": file_sha256(path), "bytes": path.stat().st_size}
+    return files
+
+
+def _load_manifest(publish_dir: Path) -> dict:
+    path = publish_dir / MANIFEST_NAME
+    if not path.exists():
+        return {"generated_at": None, "files": {}}
+    return json.loads(path.read_text())
+
+
+def _prune_empty_dirs(root: Path, start: Path) -> None:
+    """Remove empty parent directories of a deleted file, up to root."""
+    parent = start.parent
+    while parent != root and parent.is_dir() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+def seed_staging(publish_dir: Path, staging_dir: Path) -> int:
+    """
+    Copy the previously published artifacts (and metadata.json) into
+    staging_dir.
+
+    A partial run rewrites only some artifacts; seeding keeps the others in
+    the staged set, so publish_delta sees them as unchanged instead of
+    removed.
+
+    Returns:
+        Number of files copied
+    """
+    previous = _load_manifest(publish_dir)
+    copied = 0
+    for rel in [*previous.get("files", {}), METADATA_NAME]:
+        source = publish_dir / rel
+        if source.exists():
+            target = staging_dir / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+            copied += 1
+    return copied
+
+
+def publish_delta(staging_dir: Path, publish_dir: Path) -> dict:
+    """
+    Publish a staged run, writing only changed artifacts.
+
+    Args:
+        staging_dir: Directory the run exported into (removed afterwards)
+        publish_dir: City output directory served to the frontend / CDN
+
+    Returns:
+        Changelog dict (also stored under "changelog" in metadata.json)
+    """
+    previous = _load_manifest(publish_dir)
+    old_files: dict[str, dict] = previous.get("files", {})
+    new_files = build_manifest(staging_dir)
+
+    added = [rel for rel in new_files if rel not in old_files]
+    changed = [
+        rel for rel in new_files
+        if rel in old_files and new_files[rel]["sha256"] != old_files[rel]["sha256"]
+    ]
+    # Files missing from disk (e.g. deleted by hand) are re-published too
+    changed += [
+        rel for rel in new_files
+        if rel in old_files and rel not in changed and not (publish_dir / rel).exists()
+    ]
+    removed = [rel for rel in old_files if rel not in new_files]
+    unchanged = len(new_files) - len(added) - len(changed)
+
+    for rel in added + changed:
+        target = publish_dir / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(staging_dir / rel, target)
+
+    for rel in removed:
+        target = publish_dir / rel
+        if target.exists():
+            target.unlink()
+            _prune_empty_dirs(publish_dir, target)
+
+    metadata = json.loads((staging_dir / METADATA_NAME).read_text())
+    changelog = {
+        "previous_generated_at": previous.get("generated_at"),
+        "added": sorted(added),
+        "changed": sorted(changed),
+        "removed": sorted(removed),
+        "unchanged_count": unchanged,
+        "published_bytes": sum(new_files[rel]["bytes"] for rel in added + changed),
+    }
+    metadata["changelog"] = changelog
+    metadata["files"]["manifest"] = MANIFEST_NAME
+
+    with atomic_write(publish_dir / METADATA_NAME) as tmp:
+        tmp.write_text(json.dumps(metadata, indent=2))
+    with atomic_write(publish_dir / MANIFEST_NAME) as tmp:
+        tmp.write_text(
+            json.dumps({"generated_at": metadata["generated_at"], "files": new_files}, indent=2)
+        )
+
+    shutil.rmtree(staging_dir)
+
+    print(
+        f"  Published {len(added)} added, {len(changed)} changed, "
+        f"{len(removed)} removed, {unchanged} unchanged "
+        f"({changelog['published_bytes'] / 1_000_000:.2f} MB uploaded)"
+    )
+    return changelog
@@ -0,0 +1,251 @@
+"""
+Overpass Request Planner
+
+Splits a bounding box into quadtree cells so that dense city cores are
+fetched in pieces Overpass can answer within OSM_TIMEOUT.
+
+Strategy:
+1. Pre-split the bbox until every cell is below OSM_MAX_QUERY_AREA
+   (so osmnx never falls back to its own density-blind subdivision)
+2. Fetch cells concurrently on a bounded thread pool
+3. If a cell times out (including Overpass "runtime error" remarks on an
+   HTTP 200 answer) or returns more than the feature budget, split it into
+   four children and fetch those instead
+4. Other transient failures are retried with exponential backoff
+5. Cell results are stitched back by the caller's merge function, which
+   deduplicates features crossing cell edges by OSM ID
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, TypeVar
+
+import geopandas as gpd
+import pandas as pd
+import requests
+
+from pipeline.config import (
+    OSM_CELL_FEATURE_BUDGET,
+    OSM_FETCH_RETRIES,
+    OSM_FETCH_WORKERS,
+    OSM_MAX_QUERY_AREA,
+    OSM_MAX_SPLIT_DEPTH,
+    OSM_RETRY_BACKOFF_S,
+)
+
+BBox = tuple[float, float, float, float]
+T = TypeVar("T")
+
+_EARTH_RADIUS_M = 6_371_008.8
+
+# HTTP statuses Overpass answers an overloaded / too expensive query with
+_SPLIT_STATUSES = frozenset({429, 504})
+# osmnx's ResponseStatusCodeError keeps only its message: "'<host>' responded: <status> <reason> ..."
+_OSMNX_STATUS = re.compile(r"responded: (\d{3}) ")
+# Remark of an HTTP 200 answer whose query hit Overpass' time or memory limit (elements are partial)
+_RUNTIME_ERROR = re.compile(r"runtime error: Query (timed out|ran out of memory)")
+
+
+class OverpassRuntimeError(TimeoutError):
+    """Overpass stopped a query at its time or memory limit and answered with partial elements."""
+
+
+def bbox_area_m2(bbox: BBox) -> float:
+    """Approximate area of a (north, south, east, west) bbox in m²."""
+    north, south, east, west = bbox
+    height = math.radians(north - south) * _EARTH_RADIUS_M
+    mid_lat = math.radians((north + south) / 2)
+    width = math.radians(east - west) * _EARTH_RADIUS_M * math.cos(mid_lat)
+    return abs(height * width)
+
+
+def use_response_cache(cache_dir: Path) -> None:
+    """
+    Keep raw Overpass responses in cache_dir (osmnx's response cache).
+
+    Every process pointing at the same directory shares it, so cells already
+    fetched by another batch worker are read from disk.
+    """
+    import osmnx as ox
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    ox.settings.use_cache = True
+    ox.settings.cache_folder = str(cache_dir)
+
+
+def split_bbox(bbox: BBox) -> list[BBox]:
+    """Split a (north, south, east, west) bbox into its four quadrants (NW, NE, SW, SE)."""
+    north, south, east, west = bbox
+    mid_lat = (north + south) / 2
+    mid_lon = (east + west) / 2
+    return [
+        (north, mid_lat, mid_lon, west),
+        (north, mid_lat, east, mid_lon),
+        (mid_lat, south, mid_lon, west),
+        (mid_lat, south, east, mid_lon),
+    ]
+
+
+def initial_cells(bbox: BBox, max_area: float = OSM_MAX_QUERY_AREA) -> list[BBox]:
+    """Quadtree-split bbox until every cell is at most max_area m²."""
+    cells = [bbox]
+    while any(bbox_area_m2(c) > max_area for c in cells):
+        cells = [child for c in cells for child in split_bbox(c)]
+    return cells
+
+
+def check_overpass_remarks() -> None:
+    """
+    Make osmnx raise OverpassRuntimeError for answers with a runtime error remark.
+
+    osmnx only logs the remark and returns the partial elements, which would
+    silently drop features; raising instead lets fetch_quadtree split the
+    cell. Cached answers pass through the same check. Idempotent.
+    """
+    from osmnx import _overpass
+
+    request = _overpass._overpass_request
+    if getattr(request, "checks_remarks", False):
+        return
+
+    @functools.wraps(request)
+    def checked(*args, **kwargs):
+        response_json = request(*args, **kwargs)
+        remark = response_json.get("remark") or ""
+        if _RUNTIME_ERROR.search(remark):
+            raise OverpassRuntimeError(remark)
+        return response_json
+
+    checked.checks_remarks = True
+    _overpass._overpass_request = checked
+
+
+def _http_status(exc: BaseException) -> int | None:
+    """HTTP status of a failed requests / osmnx call, None for other errors."""
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code
+    from osmnx._errors import ResponseStatusCodeError
+
+    if isinstance(exc, ResponseStatusCodeError):
+        match = _OSMNX_STATUS.search(str(exc))
+        return int(match.group(1)) if match else None
+    return None
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    """True if exc is an Overpass/HTTP timeout (or 429 / 504 status) rather than a hard failure."""
+    if isinstance(exc, (requests.exceptions.Timeout, TimeoutError)):
+        return True
+    return _http_status(exc) in _SPLIT_STATUSES
+
+
+def _fetch_after(fetch_cell: Callable[[BBox], T], cell: BBox, delay: float) -> T:
+    """Sleep for the backoff delay (if any), then fetch one cell."""
+    if delay > 0:
+        time.sleep(delay)
+    return fetch_cell(cell)
+
+
+def fetch_quadtree(
+    bbox: BBox,
+    fetch_cell: Callable[[BBox], T],
+    count: Callable[[T], int],
+    merge: Callable[[list[T]], T],
+    feature_budget: int = OSM_CELL_FEATURE_BUDGET,
+    max_workers: int = OSM_FETCH_WORKERS,
+    max_depth: int = OSM_MAX_SPLIT_DEPTH,
+    retries: int = OSM_FETCH_RETRIES,
+    backoff_s: float = OSM_RETRY_BACKOFF_S,
+) -> T:
+    """
+    Fetch bbox as adaptively split quadtree cells and merge the results.
+
+    Args:
+        bbox: (north, south, east, west) in WGS84
+        fetch_cell: Fetches one cell bbox (e.g. a wrapped osmnx call)
+        count: Number of features in a cell result (compared to feature_budget)
+        merge: Combines cell results into one, deduplicating by OSM ID
+        feature_budget: Split a cell that returns more features than this
+        max_workers: Concurrent cell requests
+        max_depth: Maximum number of adaptive splits below the initial cells
+        retries: Retries per cell for failures that cannot be split further
+        backoff_s: Base delay for exponential backoff between retries
+
+    Returns:
+        Merged result of all leaf cells
+
+    Raises:
+        The last cell exception once a cell can neither be split nor retried
+    """
+    results: list[tuple[BBox, T]] = []
+    pending: dict[Future, tuple[BBox, int, int]] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        def submit(cell: BBox, depth: int, attempt: int = 0, delay: float = 0.0) -> None:
+            future = pool.submit(_fetch_after, fetch_cell, cell, delay)
+            pending[future] = (cell, depth, attempt)
+
+        for cell in initial_cells(bbox):
+            submit(cell, 0)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell, depth, attempt = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    if is_timeout_error(exc) and depth < max_depth:
+                        print(f"    Cell timed out, splitting (depth {depth + 1}): {cell}")
+                        for child in split_bbox(cell):
+                            submit(child, depth + 1)
+                    elif attempt < retries:
+                        delay = backoff_s * 2**attempt
+                        print(f"    Cell failed ({exc!r}), retrying in {delay:.0f}s")
+                        submit(cell, depth, attempt + 1, delay)
+                    else:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        raise
+                    continue
+
+                n = count(result)
+                if n > feature_budget and depth < max_depth:
+                    print(f"    Cell returned {n} features, splitting (depth {depth + 1})")
+                    for child in split_bbox(cell):
+                        submit(child, depth + 1)
+                else:
+                    results.append((cell, result))
+
+    # Merge in a deterministic (north-west first) order regardless of completion order
+    results.sort(key=lambda item: (-item[0][0], item[0][3]))
+    return merge([result for _, result in results])
+
+
+def concat_unique_features(frames: list[gpd.GeoDataFrame]) -> gpd.GeoDataFrame:
+    """
+    Concatenate osmnx feature frames, dropping duplicate OSM IDs.
+
+    osmnx indexes features by (element_type, osmid); a building or POI
+    straddling a cell edge is returned by every cell it intersects.
+    """
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
+    combined = gpd.GeoDataFrame(pd.concat(frames), crs=frames[0].crs)
+    return combined[~combined.index.duplicated(keep="first")]
+
+
+def osm_id_column(gdf: gpd.GeoDataFrame) -> pd.Series:
+    """Turn an osmnx (element_type, osmid) index into "way/123"-style ID strings."""
+    if gdf.empty or gdf.index.nlevels != 2:
+        return pd.Series([], index=gdf.index, dtype=object)
+    element_type = gdf.index.get_level_values(0).astype(str)
+    osmid = gdf.index.get_level_values(1).astype(str)
+    return pd.Series(element_type + "/" + osmid, index=gdf.index)
@@ -0,0 +1,132 @@
+"""
+Layer Schemas & Memory Accounting
+
+Compact column dtypes for the buildings, roads and POI layers, enforced by
+the stage that produces each column:
+- heights / elevations as float32 (cm precision is plenty up to 300 m)
+- closed enumerations (height_source, road_class, category) as Categoricals
+  with fixed categories, open ones (building_type, amenity_tag) as plain
+  Categoricals
+- small integers (line_width, poi_mask, qa_flags) as uint8
+
+Stages never write into their input frames: they return new frames via
+.assign / set_geometry, which is correct under either pandas mode. The CLI
+entry points enable copy-on-write (enable_copy_on_write), so those frames
+share every unchanged column instead of deep-copying the whole frame per
+stage.
+"""
+
+from __future__ import annotations
+
+import sys
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+HEIGHT_SOURCES: tuple[str, ...] = ("osm", "overture", "levels", "default")
+ROAD_CLASSES: tuple[str, ...] = ("major", "minor", "path", "other")
+
+# Display categories in a fixed order — the index is the category's bit in
+# the per-building poi_mask written by associate_pois (keep the frontend's
+# POI_CATEGORY_BITS in sync)
+POI_CATEGORIES: tuple[str, ...] = (
+    "food", "healthcare", "education", "finance",
+    "accommodation", "culture", "shopping", "other",
+)
+
+LAYER_SCHEMAS: dict[str, dict[str, object]] = {
+    "buildings": {
+        "height": "float32",
+        "base_elevation": "float32",
+        "height_source": CategoricalDtype(HEIGHT_SOURCES),
+        "building_type": "category",
+        "poi_count": "uint16",
+        "poi_mask": "uint8",
+        "qa_flags": "uint8",
+    },
+    "roads": {
+        "road_class": CategoricalDtype(ROAD_CLASSES),
+        "line_width": "uint8",
+    },
+    "pois": {
+        "category": CategoricalDtype(POI_CATEGORIES),
+        "amenity_tag": "category",
+    },
+}
+
+
+def enable_copy_on_write() -> None:
+    """Turn on pandas copy-on-write for this process (CLI entry points only)."""
+    pd.set_option("mode.copy_on_write", True)
+
+
+def enforce_schema(gdf: pd.DataFrame, layer: str) -> pd.DataFrame:
+    """
+    Cast a layer's known columns to their compact dtypes.
+
+    Columns that are missing or already have the right dtype are left alone,
+    so this is cheap to call after every stage that touches a layer (e.g.
+    after pd.concat turned Categoricals with different categories back into
+    object columns).
+
+    Args:
+        gdf: Layer frame
+        layer: "buildings", "roads" or "pois"
+
+    Returns:
+        Frame with compact dtypes (same object if nothing needed casting)
+    """
+    casts = {
+        col: dtype
+        for col, dtype in LAYER_SCHEMAS[layer].items()
+        if col in gdf.columns and not _has_dtype(gdf[col], dtype)
+    }
+    if not casts:
+        return gdf
+    return gdf.astype(casts)
+
+
+def _has_dtype(series: pd.Series, dtype) -> bool:
+    if isinstance(dtype, str) and dtype == "category":
+        return isinstance(series.dtype, CategoricalDtype)
+    return series.dtype == dtype
+
+
+def as_strings(series: pd.Series) -> pd.Series:
+    """Object-dtype view of a (possibly Categorical) string column, NaN kept."""
+    if isinstance(series.dtype, CategoricalDtype):
+        return series.astype(object)
+    return series
+
+
+def frame_memory_mb(gdf: pd.DataFrame) -> float:
+    """Deep memory footprint of a frame in MB (geometry counted as pointers)."""
+    return gdf.memory_usage(deep=True, index=True).sum() / 1e6
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def report_memory(stage: str, **frames: pd.DataFrame) -> dict[str, float]:
+    """
+    Print and return per-layer frame memory and peak RSS after a stage.
+
+    Returns:
+        {"<layer>_mb": ..., "peak_rss_mb": ...}
+    """
+    report = {f"{name}_mb": round(frame_memory_mb(gdf), 1) for name, gdf in frames.items()}
+    rss = peak_rss_mb()
+    if rss is not None:
+        report["peak_rss_mb"] = round(rss, 1)
+    layers = ", ".join(f"{name} {report[f'{name}_mb']:.1f} MB" for name in frames)
+    rss_text = f" · peak RSS {rss:.0f} MB" if rss is not None else ""
+    print(f"  Memory after {stage}: {layers}{rss_text}")
+    return report
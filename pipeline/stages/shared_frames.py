@@ -0,0 +1,368 @@
+"""
+Shared-Memory Frame Transport
+
+Moves (Geo)DataFrames between processes through one
+multiprocessing.shared_memory segment instead of pickling them, and maps a
+vectorised function over row chunks of a frame on a process pool.
+
+Pickled chunks are serialised in the parent, copied through the pool's pipe
+and rebuilt whole in the worker, per chunk and per pass. Here the frame is
+written once, column by column, in an Arrow-like layout (8-byte aligned
+buffers):
+
+- numeric / bool / datetime columns: the raw values
+- Categoricals: the integer codes (categories travel in the handle)
+- geometry: WKB (with Z when present) as one data buffer + int64 offsets
+- strings: UTF-8 as one data buffer + int64 byte and character offsets
+- a validity byte per row for the two above
+- other object cells (e.g. OSM `highway` lists): pickled in blocks of
+  _PICKLE_BLOCK rows, so a chunk only unpickles its own blocks
+
+Workers get a small picklable SharedFrame handle plus a row range and
+decode only the columns they ask for: numeric columns and category codes are
+zero-copy views, WKB and strings are decoded for the chunk's rows only.
+Rebuilding shapely geometries (from_wkb) costs the same as unpickling them;
+what the transport saves is the pipe traffic and re-serialising a frame
+that several passes share. Arrow IPC would give the same layout, but pyarrow
+is only an optional dependency of serve.py; this uses numpy alone.
+"""
+
+from __future__ import annotations
+
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from pipeline.config import SHARED_CHUNK_ROWS, SHARED_WORKERS
+
+_ALIGN = 8
+_PICKLE_BLOCK = 1_024     # Rows per pickle of an object column (a chunk unpickles only its blocks)
+
+# Segments mapped by this process, by name. Zero-copy columns handed out by
+# to_frame() point into these mappings, so they stay open until close().
+_ATTACHED: dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Map an existing segment without registering it with the resource
+    tracker: the creating process owns (and unlinks) it.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _offsets(lengths) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _encode_cells(values: np.ndarray, kind: str) -> dict[str, np.ndarray | bytes]:
+    """Variable-size cells → named buffers (validity, int64 offsets, data)."""
+    if kind == "pickle":
+        blocks = [pickle.dumps(list(values[i:i + _PICKLE_BLOCK]), protocol=pickle.HIGHEST_PROTOCOL)
+                  for i in range(0, len(values), _PICKLE_BLOCK)]
+        return {"offsets": _offsets([len(b) for b in blocks]), "data": b"".join(blocks)}
+    if kind == "wkb":
+        valid = ~shapely.is_missing(values)
+        has_z = bool(shapely.has_z(values[valid]).any())
+        cells = shapely.to_wkb(values, output_dimension=3 if has_z else 2)
+        cells[~valid] = b""
+        buffers = {}
+    else:
+        valid = ~pd.isna(values)
+        text = [v if ok else "" for v, ok in zip(values, valid)]
+        cells = [t.encode() for t in text]
+        buffers = {"chars": _offsets([len(t) for t in text])}
+    buffers.update(valid=valid.view(np.uint8), offsets=_offsets([len(c) for c in cells]), data=b"".join(cells))
+    return buffers
+
+
+def _column_kind(series: pd.Series) -> str:
+    if isinstance(series.dtype, gpd.array.GeometryDtype):
+        return "wkb"
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return "category"
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+        return "numpy"
+    cells = series.dropna()
+    if series.dtype == object and all(isinstance(v, str) for v in cells):
+        return "utf8"
+    return "pickle"
+
+
+@dataclass
+class SharedFrame:
+    """
+    Picklable handle of a frame stored in a shared-memory segment.
+
+    Create one with SharedFrame.create(frame) in the owning process (and
+    unlink() it when done — or use it as a context manager); any process can
+    then rebuild rows with to_frame().
+    """
+
+    name: str
+    rows: int
+    columns: list[dict] = field(default_factory=list)
+    geometry: str | None = None
+    crs: Any = None
+    index: dict | None = None
+    _shm: shared_memory.SharedMemory | None = field(default=None, repr=False, compare=False)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        return state
+
+    @classmethod
+    def create(cls, frame: pd.DataFrame) -> "SharedFrame":
+        """Copy a (Geo)DataFrame into a new shared-memory segment."""
+        buffers: list[tuple[int, bytes | np.ndarray]] = []
+        size = 0
+
+        def place(data: bytes | np.ndarray) -> dict:
+            nonlocal size
+            nbytes = data.nbytes if isinstance(data, np.ndarray) else len(data)
+            buffers.append((size, data))
+            spec = {"offset": size, "nbytes": nbytes}
+            size += -(-nbytes // _ALIGN) * _ALIGN
+            return spec
+
+        def encode(series: pd.Series) -> dict:
+            kind = _column_kind(series)
+            spec: dict = {"kind": kind}
+            if kind == "numpy":
+                values = np.ascontiguousarray(series.to_numpy())
+                spec.update(dtype=values.dtype.str, values=place(values))
+            elif kind == "category":
+                codes = np.ascontiguousarray(series.cat.codes.to_numpy())
+                spec.update(dtype=series.dtype, codes=codes.dtype.str, values=place(codes))
+            else:
+                buffers = _encode_cells(series.to_numpy(dtype=object), kind)
+                spec.update({key: place(data) for key, data in buffers.items()})
+            return spec
+
+        columns = [dict(encode(frame[name]), name=name) for name in frame.columns]
+        index = None
+        if not isinstance(frame.index, pd.RangeIndex) or frame.index.start != 0 or frame.index.step != 1:
+            index = dict(encode(frame.index.to_series()), name=frame.index.name)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for offset, data in buffers:
+            view = np.frombuffer(data, dtype=np.uint8) if isinstance(data, bytes) else data.reshape(-1).view(np.uint8)
+            shm.buf[offset:offset + len(view)] = view
+        is_geo = isinstance(frame, gpd.GeoDataFrame) and frame._geometry_column_name in frame.columns
+        return cls(
+            name=shm.name,
+            rows=len(frame),
+            columns=columns,
+            geometry=frame.geometry.name if is_geo else None,
+            crs=frame.crs if is_geo else None,
+            index=index,
+            _shm=shm,
+        )
+
+    def _buffer(self) -> memoryview:
+        if self._shm is None:
+            if self.name not in _ATTACHED:
+                _ATTACHED[self.name] = _attach(self.name)
+            self._shm = _ATTACHED[self.name]
+        return self._shm.buf
+
+    def _decode(self, spec: dict, start: int, stop: int, copy: bool) -> Any:
+        buf = self._buffer()
+
+        def view(part: dict, dtype: np.dtype | str, first: int, last: int) -> np.ndarray:
+            dtype = np.dtype(dtype)
+            array = np.frombuffer(buf, dtype=dtype, count=part["nbytes"] // dtype.itemsize, offset=part["offset"])
+            return array[first:last]
+
+        kind = spec["kind"]
+        if kind == "numpy":
+            values = view(spec["values"], spec["dtype"], start, stop)
+            return values.copy() if copy else values
+        if kind == "category":
+            codes = view(spec["values"], spec["codes"], start, stop)
+            # validate=False: validation copies the codes
+            return pd.Categorical.from_codes(codes.copy() if copy else codes, dtype=spec["dtype"], validate=False)
+
+        def cells(offsets: np.ndarray) -> bytes:
+            first = spec["data"]["offset"]
+            return bytes(buf[first + int(offsets[0]):first + int(offsets[-1])])
+
+        if kind == "pickle":
+            first, last = start // _PICKLE_BLOCK, -(-stop // _PICKLE_BLOCK)
+            offsets = view(spec["offsets"], np.int64, first, last + 1)
+            data = cells(offsets)
+            values = []
+            for a, b in zip((offsets[:-1] - offsets[0]).tolist(), (offsets[1:] - offsets[0]).tolist()):
+                values.extend(pickle.loads(data[a:b]))
+            skip = start - first * _PICKLE_BLOCK
+            out = np.empty(stop - start, dtype=object)
+            out[:] = values[skip:skip + stop - start]
+            return out
+
+        valid = view(spec["valid"], np.bool_, start, stop)
+        offsets = view(spec["offsets"], np.int64, start, stop + 1)
+        data = cells(offsets)
+        if kind == "utf8":
+            data = data.decode()
+            offsets = view(spec["chars"], np.int64, start, stop + 1)
+        bounds = (offsets - offsets[0]).tolist()
+        out = np.empty(stop - start, dtype=object)
+        out[:] = [data[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        out[~valid] = None
+        if kind == "wkb":
+            # from_wkb only returns geometries or None: skip from_shapely's per-item type check
+            return gpd.array.GeometryArray(shapely.from_wkb(out), crs=self.crs)
+        return out
+
+    def to_frame(
+        self, start: int = 0, stop: int | None = None, copy: bool = False, columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Rebuild rows [start, stop) as a (Geo)DataFrame.
+
+        Args:
+            start: First row
+            stop: End row (exclusive); None = all remaining rows
+            copy: Copy numeric columns and category codes out of the segment.
+                Otherwise they are views into it (keep the segment mapped
+                while they are used); copy before unlinking.
+            columns: Decode only these columns (in this order); None = all
+
+        Returns:
+            DataFrame, or GeoDataFrame when the geometry column is included
+        """
+        stop = self.rows if stop is None else min(stop, self.rows)
+        specs = {spec["name"]: spec for spec in self.columns}
+        names = list(specs) if columns is None else columns
+        data = {name: self._decode(specs[name], start, stop, copy) for name in names}
+        index = (
+            pd.Index(self._decode(self.index, start, stop, True), name=self.index["name"])
+            if self.index is not None else pd.RangeIndex(start, stop)
+        )
+        frame = pd.DataFrame(data, index=index, columns=names, copy=False)
+        if self.geometry not in data:
+            return frame
+        # GeoDataFrame(frame, geometry=...) would copy every column
+        frame = gpd.GeoDataFrame(frame, copy=False)
+        frame.set_geometry(self.geometry, inplace=True)
+        return frame
+
+    def _release(self) -> shared_memory.SharedMemory | None:
+        shm, self._shm = self._shm, None
+        if shm is not None and _ATTACHED.get(self.name) is shm:
+            del _ATTACHED[self.name]
+        return shm
+
+    def close(self) -> None:
+        """Unmap the segment in this process (zero-copy frames from to_frame must be gone)."""
+        shm = self._release()
+        if shm is not None:
+            shm.close()
+
+    def unlink(self) -> None:
+        """Unmap and free the segment (owner only)."""
+        shm = self._release() or _attach(self.name)
+        shm.close()
+        shm.unlink()
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unlink()
+
+
+def _run_chunk(fn: Callable, frame: pd.DataFrame | SharedFrame, start: int, stop: int,
+               columns: list[str] | None) -> Any:
+    """Worker side of map_chunks: rebuild the chunk, apply fn, share a frame result back."""
+    if not isinstance(frame, SharedFrame):
+        return fn(frame)
+    # The mapping stays open for the worker's lifetime: fn's result may still
+    # hold views into it, and later chunks reuse it.
+    result = fn(frame.to_frame(start, stop, columns=columns))
+    if isinstance(result, pd.DataFrame):
+        shared = SharedFrame.create(result)
+        shared.close()
+        return shared
+    return result
+
+
+def map_chunks(
+    fn: Callable[[pd.DataFrame], Any],
+    frame: pd.DataFrame | SharedFrame,
+    chunk_rows: int = SHARED_CHUNK_ROWS,
+    workers: int = SHARED_WORKERS,
+    transport: str = "shared",
+    columns: list[str] | None = None,
+) -> list:
+    """
+    Apply a vectorised function to row chunks of a frame on a process pool.
+
+    With transport="shared" the frame is copied once into shared memory and
+    each worker maps only its rows and the requested columns; DataFrame
+    results come back the same way. Passing a SharedFrame skips the copy, so
+    several passes over one frame serialise it once. transport="pickle"
+    sends pickled chunks (the baseline the benchmark compares against).
+    Chunks keep the frame's index, so results concatenate and align with
+    pd.concat.
+
+    Args:
+        fn: Module-level (picklable) function taking a chunk of the frame
+        frame: (Geo)DataFrame to split, or a SharedFrame of one
+        chunk_rows: Rows per chunk
+        workers: Worker processes; ≤ 1 runs the chunks in this process
+        transport: "shared" or "pickle" (ignored for a SharedFrame)
+        columns: Columns fn needs; None = all
+
+    Returns:
+        fn's results in chunk order
+    """
+    if transport not in ("shared", "pickle"):
+        raise ValueError(f"unknown transport {transport!r}")
+    rows = frame.rows if isinstance(frame, SharedFrame) else len(frame)
+    ranges = [(i, min(i + chunk_rows, rows)) for i in range(0, rows, chunk_rows)]
+    if not isinstance(frame, SharedFrame) and columns is not None:
+        frame = frame[columns]
+    if workers <= 1 or len(ranges) <= 1:
+        if isinstance(frame, SharedFrame):
+            return [fn(frame.to_frame(a, b, copy=True, columns=columns)) for a, b in ranges]
+        return [fn(frame.iloc[a:b]) for a, b in ranges]
+
+    owned = transport == "shared" and not isinstance(frame, SharedFrame)
+    shared = SharedFrame.create(frame) if owned else frame if isinstance(frame, SharedFrame) else None
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            futures = [
+                pool.submit(_run_chunk, fn, shared, a, b, columns) if shared is not None
+                else pool.submit(_run_chunk, fn, frame.iloc[a:b], a, b, None)
+                for a, b in ranges
+            ]
+            results = []
+            for future in futures:
+                result = future.result()
+                if isinstance(result, SharedFrame):
+                    with result:
+                        result = result.to_frame(copy=True)
+                results.append(result)
+            return results
+    finally:
+        if owned:
+            shared.unlink()
@@ -0,0 +1,260 @@
+"""
+Stage 7e: Street Label Placement
+
+Precomputes street-name labels for zoom levels STREET_LABEL_MIN_ZOOM …
+STREET_LABEL_MAX_ZOOM, so the frontend draws them with a plain TextLayer
+instead of merging road segments and placing anchors itself.
+
+roads.geojson has one feature per directed graph edge: a two-way street is
+two reversed copies, and a street is split at every junction. Segments are
+first grouped by (name, road_class) and merged into continuous paths
+(union → line_merge, which also drops the reversed duplicates).
+
+Per zoom, in Web Mercator screen pixels:
+- a path is a candidate from its class's STREET_LABEL_CLASS_MIN_ZOOM on, if
+  its label (estimated width = characters × STREET_LABEL_CHAR_PX) fits
+- candidate anchors are spaced STREET_LABEL_SPACING_PX along the path and
+  centred on it; each is oriented along the chord under the label, turned
+  upright, and dropped where the path bends too much under the text
+- candidates are placed greedily by priority (road class, then longer
+  paths first) if their padded, rotated label box overlaps no placed label
+  — tested against a grid hash of placed boxes (STREET_LABEL_GRID_PX cells)
+  — and no label of the same street lies within STREET_LABEL_SPACING_PX
+
+Output (street_labels.json, columnar per level):
+    names    – street names; levels refer to them by index
+    classes  – road class order
+    levels[k] – zoom, lon/lat (anchor), angle (degrees counter-clockwise
+                from east, within ±90 so text reads left to right),
+                name (index into names), road_class (index into classes)
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from pipeline.config import (
+    GEOJSON_COORD_PRECISION,
+    STREET_LABEL_CHAR_PX,
+    STREET_LABEL_CLASS_MIN_ZOOM,
+    STREET_LABEL_FONT_PX,
+    STREET_LABEL_GRID_PX,
+    STREET_LABEL_MAX_ZOOM,
+    STREET_LABEL_MIN_STRAIGHTNESS,
+    STREET_LABEL_MIN_ZOOM,
+    STREET_LABEL_PADDING_PX,
+    STREET_LABEL_SPACING_PX,
+)
+from pipeline.stages.checkpoint import atomic_write
+from pipeline.stages.cluster_pois import mercator_unit
+from pipeline.stages.schema import ROAD_CLASSES, as_strings
+
+_TILE_PX = 256
+# Placement priority: lower is placed first
+_CLASS_PRIORITY = {"major": 0, "minor": 1, "other": 2, "path": 3}
+
+
+def _street_name(value) -> str | None:
+    """Edge name as one string: merged edges carry a list (first name wins)."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        value = value[0] if len(value) else None
+    if not isinstance(value, str):
+        return None
+    return value.strip() or None
+
+
+def merge_street_paths(roads_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Merge named road segments into continuous paths per (name, road_class).
+
+    Args:
+        roads_gdf: Road edges in EPSG:4326 (name, road_class columns)
+
+    Returns:
+        GeoDataFrame of LineStrings with name and road_class, one row per
+        continuous path (a street branching at a junction yields several)
+    """
+    rows = []
+    if "name" not in roads_gdf.columns:
+        roads_gdf = roads_gdf.iloc[:0].assign(name=None)
+    named = pd.DataFrame({
+        "name": roads_gdf["name"].map(_street_name).to_numpy(dtype=object),
+        "road_class": as_strings(roads_gdf["road_class"]).to_numpy(dtype=object),
+        "geometry": np.asarray(roads_gdf.geometry.values, dtype=object),
+    }).dropna(subset=["name"])
+    named = named[shapely.get_type_id(named["geometry"].to_numpy()) == 1]   # LineStrings only
+
+    for (name, road_class), group in named.groupby(["name", "road_class"], sort=True):
+        # union nodes the segments and removes the reversed duplicates of
+        # two-way streets; line_merge joins them through degree-2 nodes
+        merged = shapely.line_merge(shapely.union_all(np.asarray(group["geometry"], dtype=object)))
+        for part in shapely.get_parts(merged):
+            rows.append((name, road_class, part))
+
+    return gpd.GeoDataFrame(
+        pd.DataFrame(rows, columns=["name", "road_class", "geometry"]), geometry="geometry", crs="EPSG:4326"
+    )
+
+
+def _to_mercator(coords: np.ndarray) -> np.ndarray:
+    x, y = mercator_unit(coords[:, 0], coords[:, 1])
+    return np.column_stack([x, y])
+
+
+def _from_mercator(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    lon = x * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y))))
+    return lon, lat
+
+
+def _place(
+    x: np.ndarray, y: np.ndarray, half_w: np.ndarray, half_h: float, angle: np.ndarray,
+    street: np.ndarray, spacing: float, grid: float,
+) -> np.ndarray:
+    """
+    Greedy collision test over candidates in priority order.
+
+    Returns:
+        Indices of the placed candidates
+    """
+    # Axis-aligned bounds of the rotated label boxes
+    cos, sin = np.abs(np.cos(np.radians(angle))), np.abs(np.sin(np.radians(angle)))
+    ex = half_w * cos + half_h * sin
+    ey = half_w * sin + half_h * cos
+    x0, x1, y0, y1 = x - ex, x + ex, y - ey, y + ey
+    cx0, cx1 = np.floor(x0 / grid).astype(np.int64), np.floor(x1 / grid).astype(np.int64)
+    cy0, cy1 = np.floor(y0 / grid).astype(np.int64), np.floor(y1 / grid).astype(np.int64)
+
+    cells: dict[tuple[int, int], list[int]] = {}
+    anchors: dict[int, list[int]] = {}
+    placed = []
+    for i in range(len(x)):
+        same = anchors.get(street[i], ())
+        if any((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 < spacing ** 2 for j in same):
+            continue
+        keys = [(a, b) for a in range(cx0[i], cx1[i] + 1) for b in range(cy0[i], cy1[i] + 1)]
+        if any(
+            x0[i] < x1[j] and x0[j] < x1[i] and y0[i] < y1[j] and y0[j] < y1[i]
+            for key in keys for j in cells.get(key, ())
+        ):
+            continue
+        for key in keys:
+            cells.setdefault(key, []).append(i)
+        anchors.setdefault(street[i], []).append(i)
+        placed.append(i)
+    return np.asarray(placed, dtype=np.int64)
+
+
+def place_street_labels(
+    paths: gpd.GeoDataFrame,
+    min_zoom: int = STREET_LABEL_MIN_ZOOM,
+    max_zoom: int = STREET_LABEL_MAX_ZOOM,
+) -> dict:
+    """
+    Place non-overlapping street labels per zoom.
+
+    Args:
+        paths: Merged street paths from merge_street_paths (EPSG:4326)
+        min_zoom: Coarsest label level
+        max_zoom: Finest label level
+
+    Returns:
+        JSON-ready label index (see module docstring)
+    """
+    names = sorted(set(paths["name"]))
+    name_index = {name: i for i, name in enumerate(names)}
+    class_index = {name: i for i, name in enumerate(ROAD_CLASSES)}
+    street = paths["name"].map(name_index).to_numpy(dtype=np.int64)
+    road_class = paths["road_class"].map(class_index).fillna(class_index["other"]).to_numpy(dtype=np.int64)
+    class_names = np.asarray(ROAD_CLASSES)[road_class]
+    first_zoom = np.array([STREET_LABEL_CLASS_MIN_ZOOM.get(c, max_zoom + 1) for c in class_names])
+    priority = np.array([_CLASS_PRIORITY.get(c, len(_CLASS_PRIORITY)) for c in class_names])
+
+    geoms = shapely.transform(np.asarray(paths.geometry.values, dtype=object), _to_mercator)
+    length = shapely.length(geoms)                   # world units ([0, 1) across the globe)
+    text_px = paths["name"].str.len().to_numpy(dtype=np.float64) * STREET_LABEL_CHAR_PX
+    pad = STREET_LABEL_PADDING_PX
+    precision = GEOJSON_COORD_PRECISION
+
+    levels = []
+    for zoom in range(min_zoom, max_zoom + 1):
+        scale = _TILE_PX * 2.0 ** zoom                # world units → screen pixels
+        length_px = length * scale
+        fits = (first_zoom <= zoom) & (length_px >= text_px + 2 * pad)
+        idx = np.flatnonzero(fits)
+
+        # Anchors every STREET_LABEL_SPACING_PX, centred on the path, with
+        # the whole label on the path
+        count = np.floor((length_px[idx] - text_px[idx]) / STREET_LABEL_SPACING_PX).astype(np.int64) + 1
+        path = np.repeat(idx, count)
+        k = np.arange(len(path)) - np.repeat(np.cumsum(count) - count, count)
+        along = (length_px[path] - (np.repeat(count, count) - 1) * STREET_LABEL_SPACING_PX) / 2 \
+            + k * STREET_LABEL_SPACING_PX
+
+        half = text_px[path] / 2
+        anchor = shapely.line_interpolate_point(geoms[path], along / scale)
+        start = shapely.get_coordinates(shapely.line_interpolate_point(geoms[path], (along - half) / scale))
+        end = shapely.get_coordinates(shapely.line_interpolate_point(geoms[path], (along + half) / scale))
+        dx, dy = (end - start).T * scale
+        straight = np.hypot(dx, dy) >= STREET_LABEL_MIN_STRAIGHTNESS * 2 * half
+
+        # Screen y points south: counter-clockwise angle is -atan2(dy, dx);
+        # flip by 180° where needed so text is never upside down
+        angle = -np.degrees(np.arctan2(dy, dx))
+        angle = np.where(angle > 90, angle - 180, np.where(angle <= -90, angle + 180, angle))
+
+        keep = np.flatnonzero(straight)
+        order = keep[np.lexsort((k[keep], -length_px[path[keep]], priority[path[keep]]))]
+        xy = shapely.get_coordinates(anchor[order]) * scale
+        placed = order[_place(
+            xy[:, 0], xy[:, 1], half[order] + pad, STREET_LABEL_FONT_PX / 2 + pad, angle[order],
+            street[path[order]], STREET_LABEL_SPACING_PX, STREET_LABEL_GRID_PX,
+        )]
+
+        anchor_xy = shapely.get_coordinates(anchor[placed])
+        lon, lat = _from_mercator(anchor_xy[:, 0], anchor_xy[:, 1])
+        levels.append({
+            "zoom": zoom,
+            "lon": np.round(lon, precision).tolist(),
+            "lat": np.round(lat, precision).tolist(),
+            "angle": (np.round(angle[placed], 1) + 0.0).tolist(),   # + 0.0: no "-0.0" in the JSON
+            "name": street[path[placed]].tolist(),
+            "road_class": road_class[path[placed]].tolist(),
+        })
+
+    return {
+        "min_zoom": min_zoom,
+        "max_zoom": max_zoom,
+        "font_px": STREET_LABEL_FONT_PX,
+        "names": names,
+        "classes": list(ROAD_CLASSES),
+        "levels": levels,
+    }
+
+
+def export_street_labels(roads_gdf: gpd.GeoDataFrame, output_path: Path) -> Path:
+    """
+    Merge street paths, place labels per zoom and write them as compact JSON.
+
+    Args:
+        roads_gdf: Road edges in EPSG:4326
+        output_path: Destination file path
+
+    Returns:
+        Path to the written file
+    """
+    paths = merge_street_paths(roads_gdf)
+    index = place_street_labels(paths)
+
+    with atomic_write(output_path) as tmp, open(tmp, "w") as f:
+        json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+
+    sizes = ", ".join(f"z{lvl['zoom']}: {len(lvl['name'])}" for lvl in index["levels"])
+    print(f"  {len(index['names'])} streets, {len(paths)} paths from {len(roads_gdf)} segments ({sizes})")
+    return output_path
@@ -0,0 +1,299 @@
+"""
+Stage 6d: Terrain Sampling
+
+Bakes ground elevation from a local DEM into the exported layers so the
+frontend never has to query terrain per frame:
+
+- buildings get base_elevation: min (or median, DEM_BUILDING_BASE) of the
+  ground sampled at the footprint's vertices and centroid
+- roads are densified to DEM_ROAD_SEGMENT_M and every vertex gets the
+  terrain Z; export_geojson then adds bridge deck offsets on top
+
+Supported DEM sources (see open_dem):
+- a GeoTIFF (needs the optional `rasterio` package) — only the window
+  covering the city bbox is read
+- a directory of Terrarium-encoded PNG tiles in {z}/{x}/{y}.png layout, the
+  format of the AWS elevation tiles the frontend uses (needs `Pillow`);
+  decoded tiles are kept in an LRU cache
+
+All sampling is vectorised bilinear interpolation over NumPy arrays. Layers
+may be in the working CRS or EPSG:4326; vertices are converted to lon/lat
+only for the DEM lookup.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS, Transformer
+
+from pipeline.config import (
+    DEM_BUILDING_BASE,
+    DEM_ROAD_SEGMENT_M,
+    DEM_TERRARIUM_ZOOM,
+    DEM_TILE_CACHE,
+)
+from pipeline.stages.working_crs import to_lonlat, working_crs_for
+
+_TILE_PX = 256
+
+
+def _bilinear(values, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """
+    Bilinear interpolation at fractional pixel coordinates (pixel centres at .5).
+
+    Args:
+        values: values(ix, iy) → float array for integer pixel indices
+        px, py: Fractional column / row coordinates
+    """
+    px = np.asarray(px, dtype=np.float64) - 0.5
+    py = np.asarray(py, dtype=np.float64) - 0.5
+    x0 = np.floor(px).astype(np.int64)
+    y0 = np.floor(py).astype(np.int64)
+    fx = px - x0
+    fy = py - y0
+    return (
+        values(x0, y0) * (1 - fx) * (1 - fy)
+        + values(x0 + 1, y0) * fx * (1 - fy)
+        + values(x0, y0 + 1) * (1 - fx) * fy
+        + values(x0 + 1, y0 + 1) * fx * fy
+    )
+
+
+class RasterDEM:
+    """
+    An in-memory elevation grid with a north-up affine transform.
+
+    Args:
+        data: (rows, cols) elevations in metres, NaN for nodata
+        origin: (x, y) of the top-left corner in `crs`
+        pixel_size: (width, height) of a pixel in `crs` units (both positive)
+        crs: CRS of the grid (anything pyproj accepts)
+    """
+
+    def __init__(self, data: np.ndarray, origin: tuple[float, float],
+                 pixel_size: tuple[float, float], crs="EPSG:4326"):
+        self.data = np.asarray(data, dtype=np.float32)
+        self.origin = origin
+        self.pixel_size = pixel_size
+        self._to_grid = (
+            None if CRS.from_user_input(crs) == CRS.from_epsg(4326)
+            else Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+        )
+
+    def _values(self, ix: np.ndarray, iy: np.ndarray) -> np.ndarray:
+        rows, cols = self.data.shape
+        return self.data[np.clip(iy, 0, rows - 1), np.clip(ix, 0, cols - 1)]
+
+    def sample(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Bilinear elevation (metres) at WGS84 points; NaN outside the grid."""
+        x, y = np.asarray(lon, dtype=np.float64), np.asarray(lat, dtype=np.float64)
+        if self._to_grid is not None:
+            x, y = self._to_grid.transform(x, y)
+        px = (x - self.origin[0]) / self.pixel_size[0]
+        py = (self.origin[1] - y) / self.pixel_size[1]
+        z = _bilinear(self._values, px, py)
+        rows, cols = self.data.shape
+        outside = (px < 0) | (py < 0) | (px > cols) | (py > rows)
+        return np.where(outside, np.nan, z)
+
+
+def load_geotiff(path: Path, bbox: tuple[float, float, float, float]) -> RasterDEM:
+    """
+    Read the part of a GeoTIFF DEM covering bbox (plus a 2-pixel margin).
+
+    Args:
+        path: GeoTIFF file
+        bbox: (north, south, east, west) in WGS84
+    """
+    try:
+        import rasterio
+        from rasterio.windows import Window, from_bounds
+    except ImportError as e:
+        raise ImportError("GeoTIFF DEMs need rasterio: pip install rasterio") from e
+
+    north, south, east, west = bbox
+    with rasterio.open(path) as src:
+        to_src = Transformer.from_crs("EPSG:4326", src.crs, always_xy=True)
+        xs, ys = to_src.transform([west, east, west, east], [south, south, north, north])
+        window = from_bounds(min(xs), min(ys), max(xs), max(ys), transform=src.transform)
+        window = Window(
+            int(window.col_off) - 2, int(window.row_off) - 2,
+            int(np.ceil(window.width)) + 4, int(np.ceil(window.height)) + 4,
+        ).intersection(Window(0, 0, src.width, src.height))
+        data = src.read(1, window=window, out_dtype="float32")
+        if src.nodata is not None:
+            data[data == src.nodata] = np.nan
+        transform = src.window_transform(window)
+        return RasterDEM(
+            data, (transform.c, transform.f), (transform.a, -transform.e), crs=src.crs
+        )
+
+
+def decode_terrarium(rgb: np.ndarray) -> np.ndarray:
+    """Terrarium PNG pixels (…, 3) → elevation in metres (R·256 + G + B/256 − 32768)."""
+    rgb = rgb.astype(np.float32)
+    return rgb[..., 0] * 256.0 + rgb[..., 1] + rgb[..., 2] / 256.0 - 32768.0
+
+
+class TerrariumTiles:
+    """
+    Terrarium PNG tiles on disk ({root}/{z}/{x}/{y}.png), sampled at one zoom.
+
+    Decoded tiles are kept in an LRU cache of `cache_size` tiles; missing
+    tiles sample as NaN.
+    """
+
+    def __init__(self, root: Path, zoom: int = DEM_TERRARIUM_ZOOM,
+                 cache_size: int = DEM_TILE_CACHE):
+        self.root = Path(root)
+        self.zoom = zoom
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[int, int], np.ndarray] = OrderedDict()
+
+    def _read_tile(self, x: int, y: int) -> np.ndarray:
+        """Decode one tile to a (256, 256) float32 elevation array."""
+        path = self.root / str(self.zoom) / str(x) / f"{y}.png"
+        if not path.exists():
+            return np.full((_TILE_PX, _TILE_PX), np.nan, dtype=np.float32)
+        try:
+            from PIL import Image
+        except ImportError as e:
+            raise ImportError("Terrarium PNG tiles need Pillow: pip install Pillow") from e
+        with Image.open(path) as img:
+            return decode_terrarium(np.asarray(img.convert("RGB")))
+
+    def tile(self, x: int, y: int) -> np.ndarray:
+        """Decoded tile (x, y), from the LRU cache when possible."""
+        key = (x, y)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        data = self._read_tile(x, y)
+        self._cache[key] = data
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    def _values(self, ix: np.ndarray, iy: np.ndarray) -> np.ndarray:
+        # Group lookups by tile so each tile is fetched once per call
+        tx, ty = ix // _TILE_PX, iy // _TILE_PX
+        out = np.empty(ix.shape, dtype=np.float32)
+        keys, inverse = np.unique(np.column_stack([tx, ty]), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for k, (x, y) in enumerate(keys.tolist()):
+            sel = inverse == k
+            out[sel] = self.tile(x, y)[iy[sel] - y * _TILE_PX, ix[sel] - x * _TILE_PX]
+        return out
+
+    def sample(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """Bilinear elevation (metres) at WGS84 points."""
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.clip(np.asarray(lat, dtype=np.float64), -85.0511, 85.0511)
+        world_px = _TILE_PX * 2.0 ** self.zoom
+        px = (lon + 180.0) / 360.0 * world_px
+        sin = np.sin(np.radians(lat))
+        py = (0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)) * world_px
+        if px.size == 0:
+            return np.empty(0)
+        return _bilinear(self._values, px, py)
+
+
+def open_dem(path: Path, bbox: tuple[float, float, float, float]):
+    """
+    Open a DEM source: a Terrarium tile directory or a GeoTIFF file.
+
+    Returns:
+        An object with sample(lon, lat) → elevations
+    """
+    path = Path(path)
+    if path.is_dir():
+        return TerrariumTiles(path)
+    if path.suffix.lower() in (".tif", ".tiff"):
+        return load_geotiff(path, bbox)
+    raise ValueError(f"Unsupported DEM source: {path} (expected a GeoTIFF or tile directory)")
+
+
+def add_base_elevation(
+    buildings_gdf: gpd.GeoDataFrame,
+    dem,
+    stat: str = DEM_BUILDING_BASE,
+) -> gpd.GeoDataFrame:
+    """
+    Add base_elevation (metres above sea level) under each footprint.
+
+    Ground is sampled at every exterior vertex plus the centroid and reduced
+    with `stat` ("min" keeps buildings on slopes from floating, "median"
+    ignores DEM noise at single vertices).
+
+    Args:
+        buildings_gdf: Processed buildings (working CRS or EPSG:4326)
+        dem: DEM from open_dem()
+        stat: "min" or "median"
+
+    Returns:
+        Buildings with a float32 base_elevation column (NaN outside the DEM)
+    """
+    if stat not in ("min", "median"):
+        raise ValueError(f"Unknown DEM_BUILDING_BASE: {stat}")
+
+    geoms = buildings_gdf.geometry.to_numpy()
+    coords, owner = shapely.get_coordinates(shapely.boundary(geoms), return_index=True)
+    centroids = shapely.get_coordinates(shapely.centroid(geoms))
+    coords = np.vstack([coords, centroids])
+    owner = np.concatenate([owner, np.arange(len(geoms))])
+
+    lonlat = to_lonlat(coords, buildings_gdf.crs)
+    z = dem.sample(lonlat[:, 0], lonlat[:, 1])
+    base = pd.Series(z).groupby(owner).agg(stat).reindex(range(len(geoms)))
+    buildings_gdf = buildings_gdf.assign(base_elevation=base.to_numpy(dtype=np.float32))
+
+    known = int(np.isfinite(buildings_gdf["base_elevation"]).sum())
+    print(f"  Base elevation for {known}/{len(buildings_gdf)} buildings")
+    return buildings_gdf
+
+
+def drape_roads(
+    roads_gdf: gpd.GeoDataFrame,
+    dem,
+    segment_m: float = DEM_ROAD_SEGMENT_M,
+) -> gpd.GeoDataFrame:
+    """
+    Densify road lines and set every vertex's Z to the terrain elevation.
+
+    Args:
+        roads_gdf: Processed roads (working CRS or EPSG:4326)
+        dem: DEM from open_dem()
+        segment_m: Max distance between vertices after densifying
+
+    Returns:
+        Roads with 3D geometries in the input CRS (Z = 0 where the DEM has
+        no data)
+    """
+    if roads_gdf.empty:
+        return roads_gdf
+
+    working = working_crs_for(roads_gdf)
+    dense = gpd.GeoDataFrame(
+        geometry=shapely.segmentize(working.project(roads_gdf).geometry.to_numpy(), segment_m),
+        crs=working.crs,
+    )
+    if not roads_gdf.crs.is_projected:
+        dense = working.to_wgs84(dense)
+    dense = dense.geometry.to_numpy()
+
+    def _with_ground(coords: np.ndarray) -> np.ndarray:
+        lonlat = to_lonlat(coords, roads_gdf.crs)
+        z = dem.sample(lonlat[:, 0], lonlat[:, 1])
+        return np.column_stack([coords[:, :2], np.nan_to_num(z, nan=0.0)])
+
+    roads_gdf = roads_gdf.set_geometry(
+        shapely.transform(shapely.force_3d(dense), _with_ground, include_z=True), crs=roads_gdf.crs
+    )
+    print(f"  Draped {len(roads_gdf)} road segments onto terrain")
+    return roads_gdf
@@ -0,0 +1,147 @@
+"""
+Spatial Tiling
+
+Fixed grid of TILE_SIZE_KM tiles anchored at the south-west corner of the
+city bbox. Every feature is owned by exactly one tile (the tile containing
+the centre of its bounding box), so per-tile work never duplicates or
+drops features.
+
+Features can also be put in Hilbert-curve order, so that any run of
+consecutive features covers a compact area.
+"""
+
+from __future__ import annotations
+
+import math
+
+import geopandas as gpd
+import numpy as np
+
+from pipeline.config import HILBERT_ORDER, TILE_SIZE_KM
+
+_KM_PER_DEG_LAT = 111.32
+
+
+def tile_step_deg(
+    bbox: tuple[float, float, float, float],
+    tile_km: float = TILE_SIZE_KM,
+) -> tuple[float, float]:
+    """
+    Tile size in degrees for a (north, south, east, west) bbox.
+
+    Returns:
+        (dlon, dlat) — longitude step uses the cosine of the bbox mid-latitude
+    """
+    north, south, _, _ = bbox
+    mid_lat = math.radians((north + south) / 2)
+    dlat = tile_km / _KM_PER_DEG_LAT
+    dlon = tile_km / (_KM_PER_DEG_LAT * math.cos(mid_lat))
+    return dlon, dlat
+
+
+def tile_index(
+    lon: np.ndarray,
+    lat: np.ndarray,
+    bbox: tuple[float, float, float, float],
+    tile_km: float = TILE_SIZE_KM,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorised (ix, iy) tile indices of lon/lat arrays."""
+    _, south, _, west = bbox
+    dlon, dlat = tile_step_deg(bbox, tile_km)
+    ix = np.floor((np.asarray(lon, dtype=float) - west) / dlon).astype(np.int64)
+    iy = np.floor((np.asarray(lat, dtype=float) - south) / dlat).astype(np.int64)
+    return ix, iy
+
+
+def tile_bbox(
+    ix: int,
+    iy: int,
+    bbox: tuple[float, float, float, float],
+    tile_km: float = TILE_SIZE_KM,
+) -> tuple[float, float, float, float]:
+    """(north, south, east, west) bbox of tile (ix, iy)."""
+    _, south, _, west = bbox
+    dlon, dlat = tile_step_deg(bbox, tile_km)
+    return (
+        south + (iy + 1) * dlat,
+        south + iy * dlat,
+        west + (ix + 1) * dlon,
+        west + ix * dlon,
+    )
+
+
+def owner_tiles(
+    gdf: gpd.GeoDataFrame,
+    bbox: tuple[float, float, float, float],
+    tile_km: float = TILE_SIZE_KM,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(ix, iy) of the tile owning each feature (centre of its bounds, WGS84)."""
+    if gdf.empty:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    bounds = gdf.geometry.bounds.to_numpy()
+    lon = (bounds[:, 0] + bounds[:, 2]) / 2
+    lat = (bounds[:, 1] + bounds[:, 3]) / 2
+    return tile_index(lon, lat, bbox, tile_km)
+
+
+def in_tiles(
+    gdf: gpd.GeoDataFrame,
+    tiles: set[tuple[int, int]],
+    bbox: tuple[float, float, float, float],
+    tile_km: float = TILE_SIZE_KM,
+) -> np.ndarray:
+    """Boolean mask of features owned by any of the given tiles."""
+    ix, iy = owner_tiles(gdf, bbox, tile_km)
+    return np.fromiter(
+        ((x, y) in tiles for x, y in zip(ix.tolist(), iy.tolist())),
+        dtype=bool,
+        count=len(ix),
+    )
+
+
+def hilbert_index(x: np.ndarray, y: np.ndarray, order: int = HILBERT_ORDER) -> np.ndarray:
+    """
+    Vectorised distance along the Hilbert curve of integer grid cells.
+
+    Args:
+        x, y: Cell coordinates in [0, 2**order)
+        order: Curve order (grid of 2**order × 2**order cells)
+
+    Returns:
+        int64 Hilbert index per cell, in [0, 4**order)
+    """
+    n = 1 << order
+    x = np.asarray(x, dtype=np.int64)
+    y = np.asarray(y, dtype=np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # Rotate the quadrant so the sub-curve is in standard orientation
+        flip = rx & ~ry
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+
+def hilbert_order(gdf: gpd.GeoDataFrame, order: int = HILBERT_ORDER) -> np.ndarray:
+    """
+    Row positions of gdf sorted along a Hilbert curve over its total bounds
+    (by the centre of each feature's bounds; ties keep input order).
+    """
+    if gdf.empty:
+        return np.empty(0, dtype=np.int64)
+    bounds = gdf.geometry.bounds.to_numpy()
+    cx = (bounds[:, 0] + bounds[:, 2]) / 2
+    cy = (bounds[:, 1] + bounds[:, 3]) / 2
+    cells = (1 << order) - 1
+    span_x = max(cx.max() - cx.min(), 1e-12)
+    span_y = max(cy.max() - cy.min(), 1e-12)
+    x = np.round((cx - cx.min()) / span_x * cells)
+    y = np.round((cy - cy.min()) / span_y * cells)
+    return np.argsort(hilbert_index(x, y, order), kind="stable")
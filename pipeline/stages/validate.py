@@ -5,15 +5,21 @@ Generates a quality report after height processing.
 Uses the height_source column (available after process_heights).
 """
 
+from __future__ import annotations
+
 import geopandas as gpd
 
+from pipeline.stages.building_stats import BuildingStats, compute_building_stats
+
 
-def validate_building_data(gdf: gpd.GeoDataFrame) -> dict:
+def validate_building_data(gdf: gpd.GeoDataFrame, stats: BuildingStats | None = None) -> dict:
     """
     Quality checks on processed building data.
 
     Args:
         gdf: GeoDataFrame with height + height_source columns
+        stats: Precomputed summary (shared with generate_metadata); computed
+            here, including the geometry validity check, if omitted
 
     Returns:
         Dictionary of quality metrics
@@ -26,8 +32,11 @@ def validate_building_data(gdf: gpd.GeoDataFrame) -> dict:
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
-    total = len(gdf)
-    source_counts = gdf["height_source"].value_counts()
+    if stats is None:
+        stats = compute_building_stats(gdf)
+
+    total = stats.count
+    source_counts = stats.source_counts
 
     checks = {
         "total_buildings": total,
@@ -36,10 +45,11 @@ def validate_building_data(gdf: gpd.GeoDataFrame) -> dict:
         "height_from_levels": int(source_counts.get("levels", 0)),
         "height_default": int(source_counts.get("default", 0)),
         "pct_known_height": f"{(1 - source_counts.get('default', 0) / max(total, 1)) * 100:.1f}%",
-        "avg_height": round(float(gdf["height"].mean()), 1),
-        "max_height": round(float(gdf["height"].max()), 1),
-        "min_height": round(float(gdf["height"].min()), 1),
-        "invalid_geometries": int((~gdf.geometry.is_valid).sum()),
+        "avg_height": stats.height_summary()["mean"],
+        "max_height": stats.height_summary()["max"],
+        "min_height": stats.height_summary()["min"],
+        "median_height": stats.quantiles()["p50"],
+        "invalid_geometries": stats.invalid_geometries,
     }
 
     print("\n  ── Data Quality Report ──")
@@ -0,0 +1,147 @@
+"""
+Working CRS
+
+One local metric CRS per run. The UTM zone is estimated once from the city
+bbox and its pyproj Transformers are cached, so:
+
+- fetched layers are projected once (WorkingCRS.project) and every metric
+  stage (Overture matching, POI association, landmarks, terrain draping)
+  works on them without reprojecting
+- layers go back to EPSG:4326 exactly once, at export (WorkingCRS.to_wgs84)
+
+Stages also accept EPSG:4326 input (tests, benchmarks, ad-hoc use):
+metric_geometry() then projects to the frame's own UTM zone.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+from pyproj.aoi import AreaOfInterest
+from pyproj.database import query_utm_crs_info
+
+WGS84 = CRS.from_epsg(4326)
+
+
+def _transform_arrays(transformer: Transformer, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    transformer.transform for coordinate arrays of any size.
+
+    pyproj tries its single-point path first, which converts size-1 arrays
+    to scalars (deprecated by NumPy); those go through as lists instead.
+    """
+    if x.ndim > 0 and x.size == 1:
+        tx, ty = transformer.transform(x.ravel().tolist(), y.ravel().tolist())
+        return np.reshape(tx, x.shape), np.reshape(ty, y.shape)
+    return transformer.transform(x, y)
+
+
+@dataclass(frozen=True)
+class WorkingCRS:
+    """A projected CRS with cached transformers to/from EPSG:4326."""
+
+    crs: CRS
+    _forward: Transformer = field(repr=False, compare=False)
+    _inverse: Transformer = field(repr=False, compare=False)
+
+    @classmethod
+    def from_bbox(cls, bbox: tuple[float, float, float, float]) -> "WorkingCRS":
+        """
+        Working CRS for a (north, south, east, west) WGS84 bbox: the UTM zone
+        containing its centre. Instances are cached per zone.
+        """
+        north, south, east, west = bbox
+        return _for_epsg(utm_epsg((east + west) / 2, (north + south) / 2))
+
+    def _transform(self, transformer: Transformer, geoms: np.ndarray) -> np.ndarray:
+        def _xy(coords: np.ndarray) -> np.ndarray:
+            x, y = _transform_arrays(transformer, coords[:, 0], coords[:, 1])
+            return np.column_stack([x, y, coords[:, 2:]])  # Z (if any) untouched
+
+        return shapely.transform(geoms, _xy, include_z=True)
+
+    def project(self, gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Frame in the working CRS (returned as-is if it already is)."""
+        if gdf.crs is not None and CRS.from_user_input(gdf.crs) == self.crs:
+            return gdf
+        if gdf.crs is None or CRS.from_user_input(gdf.crs) != WGS84:
+            return gdf.to_crs(self.crs)
+        geoms = self._transform(self._forward, gdf.geometry.to_numpy())
+        return gdf.set_geometry(gpd.GeoSeries(geoms, index=gdf.index, crs=self.crs))
+
+    def to_wgs84(self, gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Frame in EPSG:4326 (returned as-is if it already is)."""
+        if gdf.crs is not None and CRS.from_user_input(gdf.crs) == WGS84:
+            return gdf
+        if CRS.from_user_input(gdf.crs) != self.crs:
+            return gdf.to_crs(WGS84)
+        geoms = self._transform(self._inverse, gdf.geometry.to_numpy())
+        return gdf.set_geometry(gpd.GeoSeries(geoms, index=gdf.index, crs=WGS84))
+
+    def project_xy(self, lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """WGS84 lon/lat arrays → working-CRS x/y arrays."""
+        return _transform_arrays(self._forward, np.asarray(lon), np.asarray(lat))
+
+    def lonlat_xy(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Working-CRS x/y arrays → WGS84 lon/lat arrays."""
+        return _transform_arrays(self._inverse, np.asarray(x), np.asarray(y))
+
+
+def utm_epsg(lon: float, lat: float) -> int:
+    """EPSG code of the WGS 84 / UTM zone containing (lon, lat)."""
+    infos = query_utm_crs_info(
+        datum_name="WGS 84",
+        area_of_interest=AreaOfInterest(lon, lat, lon, lat),
+    )
+    if not infos:
+        raise ValueError(f"No UTM zone for ({lon}, {lat})")
+    return int(infos[0].code)
+
+
+@lru_cache(maxsize=None)
+def _for_epsg(epsg: int) -> WorkingCRS:
+    crs = CRS.from_epsg(epsg)
+    return WorkingCRS(
+        crs,
+        Transformer.from_crs(WGS84, crs, always_xy=True),
+        Transformer.from_crs(crs, WGS84, always_xy=True),
+    )
+
+
+def working_crs_for(gdf: gpd.GeoDataFrame) -> WorkingCRS:
+    """
+    WorkingCRS for a frame: its own CRS if it is a projected EPSG CRS,
+    otherwise the UTM zone of its bounds centre.
+    """
+    crs = CRS.from_user_input(gdf.crs) if gdf.crs is not None else WGS84
+    if crs.is_projected and crs.to_epsg() is not None:
+        return _for_epsg(crs.to_epsg())
+    west, south, east, north = gdf.to_crs(WGS84).total_bounds if crs != WGS84 else gdf.total_bounds
+    if not np.isfinite([west, south, east, north]).all():  # empty frame
+        west = south = east = north = 0.0
+    return _for_epsg(utm_epsg((west + east) / 2, (south + north) / 2))
+
+
+def metric_geometry(gdf: gpd.GeoDataFrame) -> np.ndarray:
+    """Geometry array in metres: as-is for projected frames, else in the frame's UTM zone."""
+    if gdf.crs is not None and CRS.from_user_input(gdf.crs).is_projected:
+        return gdf.geometry.to_numpy()
+    return working_crs_for(gdf).project(gdf).geometry.to_numpy()
+
+
+def to_lonlat(coords: np.ndarray, crs) -> np.ndarray:
+    """(N, 2+) coordinates in `crs` → (N, 2) WGS84 lon/lat."""
+    crs = CRS.from_user_input(crs) if crs is not None else WGS84
+    if crs == WGS84 or len(coords) == 0:
+        return coords[:, :2]
+    if crs.is_projected and crs.to_epsg() is not None:
+        transformer = _for_epsg(crs.to_epsg())._inverse
+    else:
+        transformer = Transformer.from_crs(crs, WGS84, always_xy=True)
+    lon, lat = transformer.transform(coords[:, 0], coords[:, 1])
+    return np.column_stack([lon, lat])
@@ -0,0 +1,74 @@
+"""Tests for the POI ↔ building association stage."""
+import geopandas as gpd
+from shapely.geometry import Point, box
+
+# ~10 m in degrees around Bolzano
+D = 0.0001
+
+
+def _buildings() -> gpd.GeoDataFrame:
+    """Helper: a large block with a small kiosk inside it, and a separate house."""
+    return gpd.GeoDataFrame(
+        {
+            "osm_id": ["way/1", "way/2", "way/3"],
+            "geometry": [
+                box(11.35, 46.5, 11.35 + 4 * D, 46.5 + 4 * D),
+                box(11.35 + D, 46.5 + D, 11.35 + 2 * D, 46.5 + 2 * D),
+                box(11.35 + 10 * D, 46.5, 11.35 + 12 * D, 46.5 + 2 * D),
+            ],
+        },
+        crs="EPSG:4326",
+    )
+
+
+def _pois(points) -> gpd.GeoDataFrame:
+    """Helper: (x, y, category) in D units → POI points."""
+    return gpd.GeoDataFrame(
+        {
+            "osm_id": [f"node/{i}" for i in range(len(points))],
+            "geometry": [Point(11.35 + x * D, 46.5 + y * D) for x, y, _ in points],
+            "category": [c for *_, c in points],
+        },
+        crs="EPSG:4326",
+    )
+
+
+class TestAssociatePois:
+    """Tests for associate_pois()."""
+
+    def test_containing_smallest_then_nearest(self):
+        from pipeline.stages.associate_pois import associate_pois
+
+        pois = _pois([
+            (3.5, 3.5, "food"),        # inside the block only
+            (1.5, 1.5, "shopping"),    # inside block and kiosk → kiosk
+            (12.5, 1.0, "culture"),    # ~4 m east of the house → snapped
+            (30.0, 30.0, "finance"),   # far from everything
+        ])
+        pois_out, buildings_out = associate_pois(pois, _buildings(), max_distance=20.0)
+
+        assert list(pois_out["building_id"]) == ["way/1", "way/2", "way/3", None]
+        assert list(buildings_out["poi_count"]) == [1, 1, 1]
+
+    def test_category_bitmask(self):
+        from pipeline.stages.associate_pois import associate_pois
+        from pipeline.stages.fetch_pois import POI_CATEGORIES
+
+        pois = _pois([(3, 3, "food"), (3.5, 3.5, "culture"), (3.2, 3.2, "food"), (3.1, 3.4, "mystery")])
+        _, buildings_out = associate_pois(pois, _buildings())
+
+        bit = {c: 1 << i for i, c in enumerate(POI_CATEGORIES)}
+        assert buildings_out["poi_count"].iloc[0] == 4
+        assert buildings_out["poi_mask"].iloc[0] == bit["food"] | bit["culture"] | bit["other"]
+        assert buildings_out["poi_mask"].iloc[2] == 0
+
+    def test_empty_inputs(self):
+        from pipeline.stages.associate_pois import associate_pois
+
+        pois_out, buildings_out = associate_pois(_pois([(0, 0, "food")]), _buildings().iloc[:0])
+        assert list(pois_out["building_id"]) == [None]
+        assert buildings_out.empty
+
+        pois_out, buildings_out = associate_pois(_pois([]), _buildings())
+        assert pois_out.empty
+        assert list(buildings_out["poi_mask"]) == [0, 0, 0]
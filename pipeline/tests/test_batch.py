@@ -0,0 +1,178 @@
+"""Tests for the multi-city batch runner."""
+import json
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import box
+
+
+def _write_catalogue(path, cities):
+    path.write_text(json.dumps({"cities": cities}))
+    return path
+
+
+def _fake_city(output_dir, name, bounds=(11.3, 46.4, 11.4, 46.5)):
+    """Helper: a city directory with a metadata.json, as written by run_pipeline."""
+    from pipeline.run import city_slug
+
+    city_dir = output_dir / city_slug(name)
+    city_dir.mkdir(parents=True)
+    west, south, east, north = bounds
+    (city_dir / "metadata.json").write_text(json.dumps({
+        "city": name,
+        "bounds": {"west": west, "south": south, "east": east, "north": north},
+        "center": {"lon": (west + east) / 2, "lat": (south + north) / 2},
+        "stats": {"buildings_count": 2, "roads_count": 3, "pois_count": 1},
+        "files": {"buildings": "buildings.geojson", "landmarks": "landmarks.json"},
+    }))
+    return city_dir
+
+
+class TestCatalogue:
+    """Tests for load_catalogue() / resolve_bbox()."""
+
+    def test_validation(self, tmp_path):
+        from pipeline.batch import load_catalogue
+
+        ok = _write_catalogue(tmp_path / "ok.json", [
+            {"name": "Bolzano, Italy", "bbox": [46.5, 46.4, 11.4, 11.3]},
+            {"name": "Trento, Italy", "boundary": "Trento, Italy"},
+        ])
+        assert [c["name"] for c in load_catalogue(ok)] == ["Bolzano, Italy", "Trento, Italy"]
+
+        for cities, message in [
+            ([{"bbox": [1, 0, 1, 0]}], "no name"),
+            ([{"name": "X"}], "bbox or a boundary"),
+            ([{"name": "X", "bbox": [1, 0, 1]}], "north, south, east, west"),
+            ([{"name": "A b", "bbox": [1, 0, 1, 0]}, {"name": "a B", "bbox": [1, 0, 1, 0]}], "duplicate"),
+        ]:
+            with pytest.raises(ValueError, match=message):
+                load_catalogue(_write_catalogue(tmp_path / "bad.json", cities))
+
+    def test_resolve_bbox_from_bbox_and_boundary_file(self, tmp_path):
+        from pipeline.batch import resolve_bbox
+
+        assert resolve_bbox({"bbox": [46.5, 46.4, 11.4, 11.3]}) == (46.5, 46.4, 11.4, 11.3)
+
+        boundary = tmp_path / "boundary.geojson"
+        gpd.GeoDataFrame(geometry=[box(11.3, 46.4, 11.4, 46.5)], crs="EPSG:4326").to_file(
+            boundary, driver="GeoJSON"
+        )
+        assert resolve_bbox({"boundary": str(boundary)}) == pytest.approx((46.5, 46.4, 11.4, 11.3))
+
+
+def _killing_runner(entry, output_dir, cache_dir, memory_limit_mb):
+    """City runner for run_batch(): "Killed" takes its worker process down."""
+    import os
+    import time
+
+    if entry["name"] == "Killed":
+        time.sleep(0.2)  # let the other worker start its city
+        os._exit(1)
+    time.sleep(0.3)
+    return {"city": entry["name"], "status": "ok", "error": None, "seconds": 0.3}
+
+
+class TestRunCity:
+    """Tests for run_city() with the pipeline replaced by a stub."""
+
+    def test_success_and_failure_are_reported(self, tmp_path, monkeypatch):
+        import pipeline.batch as batch
+
+        calls = []
+
+        def fake_run_pipeline(city, bbox, output_dir, **kwargs):
+            calls.append((city, bbox, kwargs))
+            if city == "Broken":
+                raise RuntimeError("Overpass said no")
+            print("pipeline output")
+            return _fake_city(output_dir, city)
+
+        monkeypatch.setattr(batch, "run_pipeline", fake_run_pipeline)
+
+        ok = batch.run_city(
+            {"name": "Bolzano, Italy", "bbox": [46.5, 46.4, 11.4, 11.3], "use_overture": True},
+            tmp_path, cache_dir=tmp_path / "cache", memory_limit_mb=None,
+        )
+        assert ok["status"] == "ok"
+        assert ok["counts"] == {"buildings": 2, "roads": 3, "pois": 1}
+        assert calls[0][2]["use_overture"] is True
+        assert calls[0][2]["cache_dir"] == tmp_path / "cache"
+        assert "pipeline output" in (tmp_path / "logs" / "bolzano_italy.log").read_text()
+
+        failed = batch.run_city({"name": "Broken", "bbox": [1, 0, 1, 0]}, tmp_path, memory_limit_mb=None)
+        assert failed["status"] == "failed"
+        assert failed["error"] == "RuntimeError: Overpass said no"
+        assert "Traceback" in (tmp_path / "logs" / "broken.log").read_text()
+
+
+class TestRunBatch:
+    """Tests for run_batch() with a stub city runner."""
+
+    def test_killed_worker_fails_only_its_city(self, tmp_path):
+        from pipeline.batch import run_batch
+
+        names = ["Alpha", "Killed", "Beta", "Gamma", "Delta"]
+        catalogue = tmp_path / "cities.catalogue.json"
+        _write_catalogue(catalogue, [{"name": name, "bbox": [46.5, 46.4, 11.4, 11.3]} for name in names])
+
+        report = run_batch(catalogue, tmp_path / "out", workers=2, cache_dir=None, runner=_killing_runner)
+        statuses = {r["city"]: r["status"] for r in report["cities"]}
+        assert statuses == {name: "failed" if name == "Killed" else "ok" for name in names}
+        assert report["cities"][1]["error"].startswith("worker died")
+
+
+class TestCityIndex:
+    """Tests for write_city_index()."""
+
+    def test_index_lists_every_city_with_relative_paths(self, tmp_path):
+        from pipeline.batch import write_city_index
+
+        _fake_city(tmp_path, "Trento, Italy")
+        _fake_city(tmp_path, "Bolzano, Italy")
+        (tmp_path / "logs").mkdir()  # not a city
+
+        index = json.loads(write_city_index(tmp_path).read_text())
+        assert [c["slug"] for c in index["cities"]] == ["bolzano_italy", "trento_italy"]
+        bolzano = index["cities"][0]
+        assert bolzano["metadata"] == "bolzano_italy/metadata.json"
+        assert bolzano["files"]["landmarks"] == "bolzano_italy/landmarks.json"
+        assert bolzano["bounds"]["north"] == 46.5
+        assert bolzano["counts"]["buildings"] == 2
+
+
+class TestSharedCaches:
+    """Tests for the Overture result cache and cache pruning."""
+
+    def test_overture_cache_hit_skips_query(self, tmp_path, monkeypatch):
+        import pipeline.stages.fetch_overture as fetch_overture
+
+        bbox = (46.5, 46.4, 11.4, 11.3)
+        cached = gpd.GeoDataFrame({"height": [12.0]}, geometry=[box(11.31, 46.41, 11.32, 46.42)], crs="EPSG:4326")
+        path = fetch_overture._cache_path(tmp_path, bbox)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cached.to_pickle(path)
+
+        def no_query():
+            raise AssertionError("S3 queried despite a cached result")
+
+        monkeypatch.setattr(fetch_overture.duckdb, "connect", no_query)
+        result = fetch_overture.fetch_overture_buildings(bbox, cache_dir=tmp_path)
+        assert result["height"].tolist() == [12.0]
+        assert fetch_overture._cache_path(tmp_path, (46.5, 46.4, 11.4, 11.2)) != path
+
+    def test_prune_cache_drops_old_entries(self, tmp_path):
+        import os
+        import time
+
+        from pipeline.batch import _prune_cache
+
+        old, new = tmp_path / "osm" / "old.json", tmp_path / "osm" / "new.json"
+        old.parent.mkdir()
+        old.write_text("{}")
+        new.write_text("{}")
+        day_ago = time.time() - 24 * 3600
+        os.utime(old, (day_ago, day_ago))
+
+        assert _prune_cache(tmp_path, max_age_h=20) == 1
+        assert not old.exists() and new.exists()
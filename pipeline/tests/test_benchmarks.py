@@ -0,0 +1,119 @@
+"""Tests for the synthetic city generator and benchmark comparison."""
+import pytest
+
+
+class TestSyntheticCity:
+    """Tests for the synthetic city generators."""
+
+    def test_deterministic_for_seed(self):
+        from pipeline.benchmarks.synthetic_city import generate_city
+
+        a = generate_city(500, seed=3)
+        b = generate_city(500, seed=3)
+        for name in a:
+            assert a[name].equals(b[name]), name
+
+    def test_buildings_match_fetch_schema(self):
+        from pipeline.benchmarks.synthetic_city import generate_buildings
+
+        gdf = generate_buildings(2_000, invalid_share=0.05)
+        assert list(gdf.columns) == ["osm_id", "geometry", "building_type", "height_osm", "levels", "name"]
+        assert len(gdf) == 2_000
+        assert (~gdf.geometry.is_valid).sum() > 0
+        assert gdf["height_osm"].notna().any() and gdf["levels"].notna().any()
+
+    def test_roads_have_lists_bridges_and_layers(self):
+        from pipeline.benchmarks.synthetic_city import generate_roads
+
+        roads = generate_roads(2_000)
+        assert roads["highway"].map(lambda v: isinstance(v, list)).any()
+        assert roads["osmid"].map(lambda v: isinstance(v, list)).any()
+        assert (roads["bridge"] == "yes").any()
+        assert roads["layer"].notna().any()
+
+    def test_stages_run_on_synthetic_city(self):
+        """Every benchmarked stage accepts the synthetic frames."""
+        from pipeline.benchmarks.run_benchmarks import benchmark_size
+
+        results = benchmark_size(300)
+        assert set(results) == {
+            "merge_osm_overture", "process_heights", "clean_geometries", "footprint_qa",
+            "aggregate_blocks", "classify_roads", "street_labels", "export_geojson", "generate_metadata",
+        }
+
+
+class TestCompareResults:
+    """Tests for compare_results()."""
+
+    def _report(self, seconds):
+        return {"results": {"5000": {"process_heights": {"seconds": seconds}}}}
+
+    def test_flags_slowdown_over_threshold(self):
+        from pipeline.benchmarks.run_benchmarks import compare_results
+
+        regressions = compare_results(self._report(2.0), self._report(1.0), max_slowdown=1.25)
+        assert len(regressions) == 1
+        assert regressions[0]["ratio"] == pytest.approx(2.0)
+
+    def test_ignores_noise_below_min_seconds(self):
+        from pipeline.benchmarks.run_benchmarks import compare_results
+
+        assert compare_results(self._report(0.004), self._report(0.001), min_seconds=0.05) == []
+
+
+class TestReplayServer:
+    """Tests for the tile server replay benchmark."""
+
+    def test_replay_synthetic_city(self, tmp_path):
+        import asyncio
+
+        from pipeline.benchmarks.replay_server import replay, synthetic_requests, write_synthetic_city
+        from pipeline.serve import TileServer
+
+        slug, bbox = write_synthetic_city(tmp_path, 400)
+        requests = synthetic_requests(slug, bbox, 200, seed=1)
+        assert requests == synthetic_requests(slug, bbox, 200, seed=1)
+        assert len(set(requests)) < len(requests)  # popular tiles repeat
+
+        async def run():
+            tiles = TileServer(tmp_path, reload_s=3600)
+            server = await tiles.start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            result = await replay("127.0.0.1", port, requests, concurrency=4)
+            server.close()
+            await tiles.close()
+            return result, tiles.cache.stats()
+
+        result, cache = asyncio.run(run())
+        assert result["requests"] == 200
+        assert set(result["status"]) <= {"200", "304"}
+        assert cache["hits"] > 0
+
+
+class TestBvhQueries:
+    """Tests for the BVH query benchmark."""
+
+    def test_bvh_matches_brute_force_on_synthetic_city(self):
+        from pipeline.benchmarks.bvh_queries import run_benchmark, synthetic_prisms
+
+        bounds = synthetic_prisms(400)
+        results = run_benchmark(bounds, n_queries=20, leaf_size=4)
+
+        assert results["build"]["buildings"] == len(bounds)
+        for kind in ("frustum", "box", "ray"):
+            assert results[kind]["queries"] == 20 and results[kind]["mismatches"] == 0
+        assert results["frustum"]["mean_results"] > 0
+
+
+class TestSharedFrames:
+    """Tests for the shared-memory transport benchmark."""
+
+    def test_transports_agree_on_synthetic_city(self):
+        from pipeline.benchmarks.shared_frames import run_benchmark, synthetic_frame
+
+        frame = synthetic_frame(600)
+        results = run_benchmark(frame, chunk_rows=200, workers=2, repeats=1)
+
+        assert results["rows"] == len(frame)
+        assert results["map_chunks"]["mismatches"] == 0
+        assert results["serialisation"]["shared"]["piped_mb"] < results["serialisation"]["pickle"]["piped_mb"]
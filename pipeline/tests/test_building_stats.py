@@ -0,0 +1,106 @@
+"""Tests for the mergeable building statistics summary."""
+import numpy as np
+import pytest
+import geopandas as gpd
+from shapely.geometry import box
+
+
+def _buildings(heights, sources=None, types=None) -> gpd.GeoDataFrame:
+    """Helper: processed buildings frame with one unit box per height."""
+    n = len(heights)
+    return gpd.GeoDataFrame(
+        {
+            "geometry": [box(i, 0, i + 1, 1) for i in range(n)],
+            "height": heights,
+            "height_source": sources or ["osm"] * n,
+            "building_type": types or ["residential"] * n,
+        },
+        crs="EPSG:4326",
+    )
+
+
+class TestComputeBuildingStats:
+    """Tests for compute_building_stats()."""
+
+    def test_basic_summary(self):
+        from pipeline.stages.building_stats import compute_building_stats
+
+        gdf = _buildings(
+            [3.0, 9.0, 12.0, 30.0],
+            sources=["osm", "default", "levels", "osm"],
+            types=["house", None, "house", "office"],
+        )
+        stats = compute_building_stats(gdf)
+
+        assert stats.count == 4
+        assert stats.source_counts == {"osm": 2, "default": 1, "levels": 1}
+        assert stats.type_counts == {"house": 2, "yes": 1, "office": 1}
+        assert stats.height_min == 3.0
+        assert stats.height_max == 30.0
+        assert stats.height_mean == pytest.approx(13.5)
+        assert stats.histogram.sum() == 4
+
+    def test_quantiles_close_to_exact(self):
+        from pipeline.stages.building_stats import compute_building_stats
+
+        rng = np.random.default_rng(0)
+        heights = rng.gamma(2.0, 6.0, 5_000).clip(2, 300)
+        stats = compute_building_stats(_buildings(list(heights)), assume_valid=True)
+
+        for q in (0.1, 0.5, 0.9):
+            assert stats.quantile(q) == pytest.approx(np.quantile(heights, q), abs=1.0)
+
+    def test_empty_city_has_no_heights(self):
+        from pipeline.stages.building_stats import compute_building_stats
+
+        stats = compute_building_stats(_buildings([]), assume_valid=True)
+        assert stats.height_summary() == {"min": None, "max": None, "mean": None}
+        assert set(stats.quantiles().values()) == {None}
+
+
+class TestMergeStats:
+    """Tests for BuildingStats.merge() / merge_stats()."""
+
+    def test_tile_summaries_merge_into_city_summary(self):
+        from pipeline.stages.building_stats import compute_building_stats, merge_stats
+
+        rng = np.random.default_rng(1)
+        heights = list(rng.uniform(2, 80, 300).round(1))
+        sources = list(rng.choice(["osm", "levels", "default"], 300))
+        gdf = _buildings(heights, sources=sources)
+
+        whole = compute_building_stats(gdf)
+        chunks = [gdf.iloc[i:i + 50] for i in range(0, len(gdf), 50)]
+        parts = merge_stats([compute_building_stats(chunk) for chunk in chunks])
+
+        assert parts.count == whole.count
+        assert parts.source_counts == whole.source_counts
+        assert parts.type_counts == whole.type_counts
+        assert parts.height_min == whole.height_min
+        assert parts.height_max == whole.height_max
+        assert parts.height_sum == pytest.approx(whole.height_sum)
+        assert np.array_equal(parts.histogram, whole.histogram)
+        assert parts.quantiles() == whole.quantiles()
+
+
+class TestStatsInMetadata:
+    """Tests for building stats as written to metadata.json by generate_metadata()."""
+
+    def test_empty_city_gives_null_heights(self, tmp_path):
+        import json
+
+        from shapely.geometry import LineString
+
+        from pipeline.stages.building_stats import compute_building_stats
+        from pipeline.stages.generate_metadata import generate_metadata
+
+        buildings = _buildings([])
+        stats = compute_building_stats(buildings, assume_valid=True)
+        roads = gpd.GeoDataFrame(geometry=[LineString([(11.3, 46.4), (11.4, 46.5)])], crs="EPSG:4326")
+        path = generate_metadata("Empty", buildings, roads, tmp_path / "metadata.json", stats=stats)
+        text = path.read_text()
+        assert "Infinity" not in text and "NaN" not in text
+        metadata = json.loads(text)
+        assert metadata["stats"]["max_building_height"] is None
+        assert metadata["stats"]["height_quantiles"]["p50"] is None
+        assert metadata["bounds"] == {"west": 11.3, "south": 46.4, "east": 11.4, "north": 46.5}
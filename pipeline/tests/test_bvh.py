@@ -0,0 +1,162 @@
+"""Tests for the building-prism BVH: build, sidecar round trip and queries against brute force."""
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import box
+
+
+def _prisms(n=500, seed=0):
+    """Helper: n random prisms in a 1 km × 1 km city, 3–60 m tall, on 250–280 m ground."""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 1000, (n, 2))
+    size = rng.uniform(5, 30, (n, 2))
+    base = rng.uniform(250, 280, n)
+    return np.column_stack([xy, base, xy + size, base + rng.uniform(3, 60, n)])
+
+
+class TestBuildBvh:
+    """Tests for build_bvh() and the flat layout."""
+
+    def test_leaves_partition_features_and_nodes_contain_children(self):
+        from pipeline.stages.bvh import build_bvh
+
+        bounds = _prisms()
+        tree = build_bvh(bounds, leaf_size=4)
+
+        assert sorted(tree.order.tolist()) == list(range(len(bounds)))
+        np.testing.assert_allclose(tree.item_bounds, bounds[tree.order], rtol=1e-6)
+        leaves = tree.count > 0
+        assert tree.count[leaves].max() <= 4 and tree.count.sum() == len(bounds)
+        # Leaf ranges tile [0, N) in node order
+        assert tree.offset[leaves].tolist() == np.r_[0, np.cumsum(tree.count[leaves])[:-1]].tolist()
+
+        first, end = tree.span
+        for node in np.flatnonzero(~leaves):
+            for child in (node + 1, tree.offset[node]):
+                assert (tree.bounds[node, :3] <= tree.bounds[child, :3]).all()
+                assert (tree.bounds[node, 3:] >= tree.bounds[child, 3:]).all()
+        items = tree.item_bounds[first[0]:end[0]]
+        assert (items[:, :3] >= tree.bounds[0, :3]).all() and (items[:, 3:] <= tree.bounds[0, 3:]).all()
+
+    def test_float32_bounds_contain_float64_input(self):
+        from pipeline.stages.bvh import build_bvh
+
+        bounds = _prisms(50) + np.array([11.3, 46.4, 0, 11.3, 46.4, 0]) * 1e3  # large coordinates
+        tree = build_bvh(bounds)
+        original = bounds[tree.order]
+        assert (tree.item_bounds[:, :3] <= original[:, :3]).all()
+        assert (tree.item_bounds[:, 3:] >= original[:, 3:]).all()
+
+    def test_empty_and_single(self):
+        from pipeline.stages.bvh import build_bvh
+
+        empty = build_bvh(np.empty((0, 6)))
+        assert len(empty.bounds) == 0
+        assert empty.query_box([0, 0, 0], [1, 1, 1]).size == 0 and empty.raycast([0, 0, 0], [1, 0, 0]) is None
+
+        single = build_bvh(np.array([[0, 0, 0, 1, 1, 1.0]]))
+        assert single.count.tolist() == [1]
+        assert single.raycast([-1, 0.5, 0.5], [1, 0, 0]) == (0, 1.0)
+
+
+class TestQueries:
+    """BVH queries return exactly what brute force over every prism returns."""
+
+    def test_box_and_frustum_queries_match_brute_force(self):
+        from pipeline.stages.bvh import box_planes, build_bvh, frustum_planes, frustum_test
+
+        tree = build_bvh(_prisms(2000))
+        rng = np.random.default_rng(1)
+        for _ in range(20):
+            lo = rng.uniform(0, 900, 3) * [1, 1, 0.35]
+            hi = lo + rng.uniform(10, 300, 3)
+            expected = np.flatnonzero(frustum_test(tree.item_bounds, box_planes(lo, hi))[0])
+            assert tree.query_box(lo, hi).tolist() == expected.tolist()
+
+            eye = np.r_[rng.uniform(0, 1000, 2), rng.uniform(300, 800)]
+            planes = frustum_planes(eye, np.r_[rng.uniform(0, 1000, 2), 260.0], 45, 1.6, 1, 1500)
+            expected = np.flatnonzero(frustum_test(tree.item_bounds, planes)[0])
+            assert tree.query_frustum(planes).tolist() == expected.tolist()
+
+    def test_frustum_planes_contain_view_axis(self):
+        from pipeline.stages.bvh import frustum_planes
+
+        planes = frustum_planes([0, 0, 100], [100, 0, 0], 60, 1.5, 1, 500)
+        inside = lambda p: (planes[:, :3] @ p + planes[:, 3] >= 0).all()  # noqa: E731
+        assert inside(np.array([50.0, 0, 50])) and not inside(np.array([-50.0, 0, 150]))
+        assert not inside(np.array([0.5, 0, 99.5]))  # before the near plane
+
+    def test_raycast_matches_brute_force(self):
+        from pipeline.stages.bvh import build_bvh, ray_entry
+
+        tree = build_bvh(_prisms(2000))
+        rng = np.random.default_rng(2)
+        hits = 0
+        for _ in range(50):
+            origin = np.r_[rng.uniform(0, 1000, 2), rng.uniform(300, 600)]
+            direction = np.r_[rng.uniform(-1, 1, 2), -1.0]
+            t = ray_entry(tree.item_bounds, origin, direction)
+            result = tree.raycast(origin, direction)
+            if np.isinf(t.min()):
+                assert result is None
+            else:
+                hits += 1
+                assert result == (int(np.argmin(t)), pytest.approx(t.min()))
+        assert hits > 10
+
+    def test_axis_parallel_ray(self):
+        from pipeline.stages.bvh import ray_entry
+
+        bounds = np.array([[0, 0, 0, 10, 10, 20.0], [20, 0, 0, 30, 10, 5.0]])
+        # Straight down onto the first prism's roof; horizontally along y = 0 (a face)
+        assert ray_entry(bounds, [5, 5, 100], [0, 0, -1]).tolist() == [80.0, np.inf]
+        assert ray_entry(bounds, [-10, 0, 1], [1, 0, 0]).tolist() == [10.0, 30.0]
+
+
+class TestSidecar:
+    """Tests for BVH.save() / load() and export_bvh()."""
+
+    def test_round_trip(self, tmp_path):
+        from pipeline.stages.bvh import BVH, build_bvh
+
+        tree = build_bvh(_prisms(300), leaf_size=6)
+        path = tree.save(tmp_path / "buildings.bvh")
+        m, n = len(tree.bounds), len(tree.item_bounds)
+        assert path.stat().st_size == 16 + m * 24 + m * 8 + n * 24
+
+        loaded = BVH.load(path)
+        assert loaded.leaf_size == 6 and loaded.order is None
+        for name in ("bounds", "offset", "count", "item_bounds"):
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(tree, name))
+        assert loaded.query_box([0, 0, 0], [200, 200, 400]).tolist() == tree.query_box(
+            [0, 0, 0], [200, 200, 400]
+        ).tolist()
+
+        (tmp_path / "bad.bvh").write_bytes(b"NOPE" + bytes(12))
+        with pytest.raises(ValueError, match="not a BVH file"):
+            BVH.load(tmp_path / "bad.bvh")
+
+    def test_export_reorders_buildings_to_leaf_order(self, tmp_path):
+        from pipeline.stages.bvh import export_bvh, prism_bounds
+
+        buildings = gpd.GeoDataFrame(
+            {
+                "osm_id": [f"way/{i}" for i in range(40)],
+                "height": np.r_[np.full(39, 12.0), np.nan].astype("float32"),
+                "base_elevation": np.full(40, 260.0, dtype="float32"),
+            },
+            geometry=[box(11.33 + (i * 7 % 40) * 1e-4, 46.5, 11.3301 + (i * 7 % 40) * 1e-4, 46.5001)
+                      for i in range(40)],
+            crs="EPSG:4326",
+        )
+        ordered, tree = export_bvh(buildings, tmp_path / "buildings.bvh", leaf_size=4)
+
+        assert ordered["osm_id"].tolist() == buildings["osm_id"].iloc[tree.order].tolist()
+        assert ordered.index.tolist() == list(range(40))
+        prisms = prism_bounds(ordered)
+        assert prisms[-1 if ordered["height"].isna().iloc[-1] else 0, 2] == 260.0
+        assert (prisms[ordered["height"].isna().to_numpy(), 5] == 260.0).all()  # no height → flat
+        # Leaf ranges index the reordered frame
+        hit = tree.query_box([11.33, 46.5, 0], [11.3302, 46.5001, 300])
+        xs = ordered.geometry.bounds["minx"].to_numpy()[hit]
+        assert len(hit) and (xs <= 11.3302).all()
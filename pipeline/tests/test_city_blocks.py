@@ -0,0 +1,80 @@
+"""Tests for the city-block aggregation stage."""
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import box
+
+UTM32N = "EPSG:32632"
+X0, Y0 = 680_000.0, 5_150_000.0   # Bolzano, in UTM 32N
+
+
+def _buildings():
+    """Helper: a row of three houses (the third 1 m apart) and one detached house."""
+    return gpd.GeoDataFrame(
+        {"osm_id": ["way/1", "way/2", "way/3", "way/4"], "height": np.array([10, 20, 30, 12], dtype="float32")},
+        geometry=[
+            box(X0, Y0, X0 + 10, Y0 + 10),            # 100 m², shares a wall with way/2
+            box(X0 + 10, Y0, X0 + 30, Y0 + 10),       # 200 m²
+            box(X0 + 31, Y0, X0 + 41, Y0 + 10),       # 100 m², 1 m gap
+            box(X0 + 200, Y0, X0 + 210, Y0 + 10),     # detached
+        ],
+        crs=UTM32N,
+    )
+
+
+class TestConnectedComponents:
+    """Tests for connected_components()."""
+
+    def test_labels_are_smallest_member(self):
+        from pipeline.stages.city_blocks import connected_components
+
+        i = np.array([3, 0, 1, 4, 2])
+        j = np.array([4, 1, 2, 5, 0])
+        assert connected_components(i, j, 7).tolist() == [0, 0, 0, 3, 3, 3, 6]
+        assert connected_components(np.array([], dtype=int), np.array([], dtype=int), 2).tolist() == [0, 1]
+
+
+class TestAggregateBlocks:
+    """Tests for aggregate_blocks()."""
+
+    def test_row_houses_dissolve_with_weighted_height(self):
+        from pipeline.stages.city_blocks import aggregate_blocks
+
+        blocks = aggregate_blocks(_buildings(), gap_m=2.0, simplify_m=0.5)
+
+        assert len(blocks) == 2 and blocks.crs == UTM32N
+        row = blocks.loc[blocks["building_count"] == 3].iloc[0]
+        assert row.geometry.geom_type == "Polygon"       # the 1 m gap is closed
+        assert row.geometry.area == pytest.approx(410, rel=0.01)
+        assert row["height"] == pytest.approx((100 * 10 + 200 * 20 + 100 * 30) / 400)
+        assert row["max_height"] == 30
+        assert blocks["height"].dtype == "float32" and blocks["building_count"].dtype == "uint32"
+
+    def test_gap_zero_only_merges_touching(self):
+        from pipeline.stages.city_blocks import aggregate_blocks
+
+        blocks = aggregate_blocks(_buildings(), gap_m=0, simplify_m=0)
+
+        assert sorted(blocks["building_count"].tolist()) == [1, 1, 2]
+        assert blocks.loc[blocks["building_count"] == 2, "height"].iloc[0] == pytest.approx(50 / 3)
+
+    def test_blocks_stay_within_tiles_and_keep_input_crs(self):
+        from pipeline.stages.city_blocks import aggregate_blocks
+
+        buildings = _buildings().to_crs("EPSG:4326")
+        buildings["base_elevation"] = np.array([262, 260, 265, 270], dtype="float32")
+
+        whole = aggregate_blocks(buildings)
+        assert whole.crs == "EPSG:4326" and len(whole) == 2
+        assert sorted(whole["base_elevation"].tolist()) == [260, 270]  # lowest ground per block
+
+        split = aggregate_blocks(buildings, tile_km=0.015)  # 15 m tiles: the row is cut up
+        assert len(split) > 2 and split["building_count"].sum() == 4
+
+    def test_empty(self):
+        from pipeline.stages.city_blocks import aggregate_blocks
+
+        blocks = aggregate_blocks(_buildings().iloc[:0])
+        assert blocks.empty and list(blocks.columns) == ["height", "max_height", "building_count", "geometry"]
+        assert shapely.get_num_geometries(blocks.geometry.to_numpy()).sum() == 0
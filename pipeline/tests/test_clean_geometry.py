@@ -29,13 +29,12 @@ class TestCleanGeometries:
         result = clean_geometries(gdf)
         assert len(result) == 2
 
-    def test_crs_is_epsg_4326(self):
-        """Output CRS should always be EPSG:4326."""
+    def test_input_crs_is_kept_and_4326_assumed_when_missing(self):
+        """Output CRS is the input CRS; EPSG:4326 only when the input has none."""
         from pipeline.stages.clean_geometry import clean_geometries
 
-        gdf = gpd.GeoDataFrame(
-            {"geometry": [box(0, 0, 1, 1)]},
-            crs="EPSG:4326",
-        )
-        result = clean_geometries(gdf)
-        assert result.crs.to_epsg() == 4326
+        projected = gpd.GeoDataFrame({"geometry": [box(0, 0, 1, 1)]}, crs="EPSG:32632")
+        assert clean_geometries(projected).crs.to_epsg() == 32632
+
+        missing = gpd.GeoDataFrame({"geometry": [box(0, 0, 1, 1)]})
+        assert clean_geometries(missing).crs.to_epsg() == 4326
@@ -0,0 +1,76 @@
+"""Tests for the hierarchical POI cluster index."""
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import Point
+
+
+def _pois(lonlat, categories) -> gpd.GeoDataFrame:
+    """Helper: POI frame from (lon, lat) pairs."""
+    return gpd.GeoDataFrame(
+        {"geometry": [Point(lon, lat) for lon, lat in lonlat], "category": categories},
+        crs="EPSG:4326",
+    )
+
+
+class TestBuildClusterIndex:
+    """Tests for build_cluster_index()."""
+
+    def test_hierarchy_is_consistent(self):
+        from pipeline.stages.cluster_pois import build_cluster_index
+        from pipeline.stages.fetch_pois import POI_CATEGORIES
+
+        rng = np.random.default_rng(0)
+        n = 5_000
+        lonlat = np.column_stack([rng.uniform(11.30, 11.40, n), rng.uniform(46.46, 46.52, n)])
+        cats = rng.choice(list(POI_CATEGORIES) + ["unknown"], n).tolist()
+        index = build_cluster_index(_pois(lonlat, cats), min_zoom=10, max_zoom=16)
+
+        levels = index["levels"]
+        k = len(index["categories"])
+        assert [lvl["zoom"] for lvl in levels] == list(range(10, 17))
+        assert sorted(index["leaves"]) == list(range(n))
+
+        for i, lvl in enumerate(levels):
+            counts = np.array(lvl["count"])
+            assert counts.sum() == n
+            per_cat = np.array(lvl["category_counts"]).reshape(-1, k)
+            assert np.array_equal(per_cat.sum(axis=1), counts)
+
+            children = np.array(lvl["children"])
+            assert len(children) == len(counts) + 1
+            if i + 1 < len(levels):
+                child_counts = np.array(levels[i + 1]["count"])
+                summed = np.add.reduceat(child_counts, children[:-1])
+            else:
+                summed = np.diff(children)
+            assert np.array_equal(summed, counts)
+
+        # Finer zooms never have fewer clusters
+        sizes = [len(lvl["count"]) for lvl in levels]
+        assert sizes == sorted(sizes)
+        assert sizes[0] < sizes[-1]
+
+    def test_representative_point_and_categories(self):
+        from pipeline.stages.cluster_pois import build_cluster_index
+        from pipeline.stages.fetch_pois import POI_CATEGORIES
+
+        # Two cafés a few metres apart, one museum ~4 km away
+        pois = _pois(
+            [(11.3500, 46.5000), (11.3502, 46.5000), (11.40, 46.5)],
+            ["food", "food", "culture"],
+        )
+        index = build_cluster_index(pois, min_zoom=12, max_zoom=12)
+        level = index["levels"][0]
+        k = len(POI_CATEGORIES)
+
+        assert sorted(level["count"]) == [1, 2]
+        pair = level["count"].index(2)
+        assert level["lon"][pair] == 11.3501
+        assert level["category_counts"][pair * k + POI_CATEGORIES.index("food")] == 2
+
+    def test_empty(self):
+        from pipeline.stages.cluster_pois import build_cluster_index
+
+        index = build_cluster_index(_pois([], []), min_zoom=10, max_zoom=11)
+        assert index["leaves"] == []
+        assert all(lvl["count"] == [] and lvl["children"] == [0] for lvl in index["levels"])
@@ -0,0 +1,192 @@
+"""Tests for the GeoJSON export stage: height-band, height-sorted tile, NDJSON and attribute-sidecar exports."""
+import json
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import box
+
+EDGES = (10.0, 20.0, 40.0)
+# (north, south, east, west)
+BBOX = (46.52, 46.50, 11.36, 11.33)
+
+
+def _buildings(heights):
+    """Helper: one small footprint per height, west to east."""
+    return gpd.GeoDataFrame(
+        {
+            "osm_id": [f"way/{i}" for i in range(len(heights))],
+            "height": np.array(heights, dtype="float32"),
+        },
+        geometry=[box(11.331 + i * 0.002, 46.501, 11.332 + i * 0.002, 46.502) for i in range(len(heights))],
+        crs="EPSG:4326",
+    )
+
+
+class TestExportHeightBands:
+    """Tests for export_height_bands()."""
+
+    def test_bands_are_sorted_partitions_with_counts_and_bbox(self, tmp_path):
+        from pipeline.stages.export_geojson import export_height_bands
+
+        heights = [25.0, 3.0, 12.5, 9.99, 10.0, 3.0, 60.0]
+        entries = export_height_bands(_buildings(heights), tmp_path, EDGES)
+
+        assert [e["band"] for e in entries] == [0, 1, 2, 3]
+        assert [e["count"] for e in entries] == [3, 2, 1, 1]
+        assert entries[0]["min_height"] == 0.0 and entries[0]["max_height"] == 10.0
+        assert entries[-1]["min_height"] == 40.0 and entries[-1]["max_height"] is None
+        assert entries[1]["height_range"] == [10.0, 12.5]
+
+        first = json.loads(entries[0]["file"].read_text())["features"]
+        assert [f["properties"]["height"] for f in first] == [3.0, 3.0, 9.99]
+        assert [f["properties"]["osm_id"] for f in first[:2]] == ["way/1", "way/5"]  # stable
+        assert entries[0]["bbox"]["west"] == pytest.approx(11.333)
+        assert entries[0]["bbox"]["east"] == pytest.approx(11.342)
+
+    def test_empty_bands_and_missing_heights_are_left_out(self, tmp_path):
+        from pipeline.stages.export_geojson import export_height_bands
+
+        entries = export_height_bands(_buildings([50.0, float("nan"), 5.0]), tmp_path, EDGES)
+
+        assert [(e["band"], e["count"]) for e in entries] == [(0, 1), (3, 1)]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["band_0.geojson", "band_3.geojson"]
+
+
+class TestHeightSortedTiles:
+    """Tests for export_geojson_tiles(..., band_edges=...)."""
+
+    def test_tiles_are_height_sorted_with_band_offsets(self, tmp_path):
+        from pipeline.stages.export_geojson import export_geojson_tiles
+
+        heights = [25.0, 3.0, 12.5, float("nan"), 45.0, 11.0]
+        paths = export_geojson_tiles(_buildings(heights), tmp_path, "buildings", BBOX, band_edges=EDGES)
+
+        assert len(paths) == 1  # all within the first 1 km tile
+        tile = json.loads(paths[0].read_text())
+        tile_heights = [f["properties"]["height"] for f in tile["features"]]
+        assert tile_heights[:5] == [3.0, 11.0, 12.5, 25.0, 45.0] and tile_heights[5] is None
+        offsets = tile["height_bands"]
+        assert offsets == [0, 1, 3, 4, 5]
+        assert tile_heights[offsets[1]:offsets[2]] == [11.0, 12.5]
+
+    def test_plain_tiles_unchanged_and_bands_need_buildings(self, tmp_path):
+        from pipeline.stages.export_geojson import export_geojson_tiles
+
+        paths = export_geojson_tiles(_buildings([25.0, 3.0]), tmp_path, "buildings", BBOX)
+        tile = json.loads(paths[0].read_text())
+        assert "height_bands" not in tile
+        assert [f["properties"]["height"] for f in tile["features"]] == [25.0, 3.0]
+
+        with pytest.raises(ValueError, match="only apply to buildings"):
+            export_geojson_tiles(_buildings([1.0]), tmp_path, "roads", BBOX, band_edges=EDGES)
+
+
+class TestHilbertOrder:
+    """Tests for tiling.hilbert_index() / hilbert_order()."""
+
+    def test_curve_visits_neighbouring_cells(self):
+        from pipeline.stages.tiling import hilbert_index
+
+        x, y = np.meshgrid(np.arange(8), np.arange(8))
+        d = hilbert_index(x.ravel(), y.ravel(), order=3)
+        assert sorted(d.tolist()) == list(range(64))
+        cells = np.column_stack([x.ravel(), y.ravel()])[np.argsort(d)]
+        assert (np.abs(np.diff(cells, axis=0)).sum(axis=1) == 1).all()   # one step at a time
+
+    def test_order_keeps_nearby_features_together(self):
+        from pipeline.stages.tiling import hilbert_order
+
+        # Rows 0 and 2 are neighbours in the west, rows 1 and 3 in the east
+        gdf = gpd.GeoDataFrame(
+            geometry=[box(11.330, 46.50, 11.331, 46.501), box(11.359, 46.519, 11.36, 46.52),
+                      box(11.331, 46.50, 11.332, 46.501), box(11.358, 46.519, 11.359, 46.52)],
+            crs="EPSG:4326",
+        )
+        position = {row: i for i, row in enumerate(hilbert_order(gdf).tolist())}
+        assert sorted(position) == [0, 1, 2, 3]
+        assert abs(position[0] - position[2]) == 1 and abs(position[1] - position[3]) == 1
+
+
+class TestExportNdjson:
+    """Tests for export_ndjson()."""
+
+    def test_lines_and_chunk_index_support_range_reads(self, tmp_path):
+        from pipeline.stages.export_geojson import export_ndjson, ndjson_index_path
+
+        buildings = _buildings([float(h) for h in range(10)])
+        path = export_ndjson(buildings.iloc[::-1], tmp_path / "buildings.ndjson", "buildings", chunk_size=4)
+        index = json.loads(ndjson_index_path(path).read_text())
+        data = path.read_bytes()
+
+        assert index["features"] == 10 and index["bytes"] == len(data) and index["order"] == "hilbert"
+        assert [c["count"] for c in index["chunks"]] == [4, 4, 2]
+        ids = []
+        for chunk in index["chunks"]:
+            body = data[chunk["offset"]:chunk["offset"] + chunk["length"]]
+            features = [json.loads(line) for line in body.decode().splitlines()]
+            assert len(features) == chunk["count"]
+            west, south, east, north = chunk["bbox"]
+            for f in features:
+                xs = [x for x, _ in f["geometry"]["coordinates"][0]]
+                assert west <= min(xs) and max(xs) <= east
+            ids += [f["properties"]["osm_id"] for f in features]
+        # buildings in a west–east row: Hilbert order is the row, whatever the input order
+        assert ids == [f"way/{i}" for i in range(10)]
+
+    def test_empty_layer(self, tmp_path):
+        from pipeline.stages.export_geojson import export_ndjson, ndjson_index_path
+
+        path = export_ndjson(_buildings([]), tmp_path / "buildings.ndjson", "buildings")
+        assert path.read_bytes() == b""
+        assert json.loads(ndjson_index_path(path).read_text())["chunks"] == []
+
+
+class TestAttributeSidecar:
+    """Tests for export_geojson(..., split_attributes=True)."""
+
+    @staticmethod
+    def _decode(column, n):
+        """Helper: the full value list of a sidecar column."""
+        values = [column["values"][c] if c is not None else None for c in column["codes"]] \
+            if "codes" in column else column["values"]
+        if "rows" not in column:
+            return values
+        full = [None] * n
+        for row, value in zip(column["rows"], values):
+            full[row] = value
+        return full
+
+    def test_render_properties_stay_and_the_rest_round_trips(self, tmp_path):
+        from pipeline.stages.export_geojson import attributes_path, export_geojson
+
+        buildings = _buildings([12.0, 3.0, 25.0, 9.0])
+        buildings["name"] = [None, "Museion", None, None]
+        buildings["building_type"] = ["house"] * 4
+        buildings["height_source"] = ["osm", "osm", "levels", "osm"]
+        path = export_geojson(buildings, tmp_path / "buildings.geojson", "buildings", split_attributes=True)
+
+        features = json.loads(path.read_text())["features"]
+        assert [f["id"] for f in features] == [0, 1, 2, 3]
+        assert set(features[0]["properties"]) == {"height", "building_type"}
+
+        sidecar = json.loads(attributes_path(path).read_text())
+        assert sidecar["layer"] == "buildings" and sidecar["features"] == 4
+        columns = sidecar["columns"]
+        assert set(columns) == {"osm_id", "height_source", "name"}
+        assert columns["name"] == {"rows": [1], "values": ["Museion"]}            # sparse
+        assert columns["height_source"] == {"values": ["osm", "levels"], "codes": [0, 0, 1, 0]}
+        assert "codes" not in columns["osm_id"]                                     # all distinct: plain
+        assert self._decode(columns["osm_id"], 4) == ["way/0", "way/1", "way/2", "way/3"]
+
+    def test_list_values_and_plain_export(self, tmp_path):
+        from pipeline.stages.export_geojson import _encode_column, attributes_path, export_geojson
+
+        assert _encode_column([["a", "b"], ["a", "b"], "c", None]) == {"values": [["a", "b"], ["a", "b"], "c", None]}
+        assert _encode_column(["x", "", "x", "x"]) == {"values": ["x"], "codes": [0, None, 0, 0]}
+
+        path = export_geojson(_buildings([1.0]), tmp_path / "buildings.geojson", "buildings")
+        assert not attributes_path(path).exists()
+        assert "id" not in json.loads(path.read_text())["features"][0]
+        with pytest.raises(ValueError, match="no render properties"):
+            export_geojson(_buildings([1.0]), tmp_path / "blocks.geojson", "blocks", split_attributes=True)
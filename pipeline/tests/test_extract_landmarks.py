@@ -0,0 +1,107 @@
+"""Tests for the landmark extraction stage."""
+import json
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString, Point, box
+
+# ~10 m in degrees around Bolzano
+D = 0.0001
+
+
+def _buildings(rows) -> gpd.GeoDataFrame:
+    """Helper: (x, y, height, name, building_type) → 8 m square footprints."""
+    return gpd.GeoDataFrame(
+        {
+            "osm_id": [f"way/{i}" for i in range(len(rows))],
+            "geometry": [box(11.35 + x * D, 46.5 + y * D, 11.35 + (x + 0.8) * D, 46.5 + (y + 0.8) * D)
+                         for x, y, *_ in rows],
+            "height": [r[2] for r in rows],
+            "name": [r[3] for r in rows],
+            "building_type": [r[4] for r in rows],
+        },
+        crs="EPSG:4326",
+    )
+
+
+def _star_roads(cx, cy, arms=4) -> gpd.GeoDataFrame:
+    """Helper: `arms` streets meeting at (cx, cy), both edge directions like osmnx."""
+    ends = [(cx + 5, cy), (cx - 5, cy), (cx, cy + 5), (cx, cy - 5)][:arms]
+    lines = []
+    for ex, ey in ends:
+        a = (11.35 + cx * D, 46.5 + cy * D)
+        b = (11.35 + ex * D, 46.5 + ey * D)
+        lines += [LineString([a, b]), LineString([b, a])]
+    return gpd.GeoDataFrame({"geometry": lines}, crs="EPSG:4326")
+
+
+def _pois(points) -> gpd.GeoDataFrame:
+    """Helper: (x, y, name, category) → POI points."""
+    return gpd.GeoDataFrame(
+        {
+            "geometry": [Point(11.35 + (x + 0.4) * D, 46.5 + (y + 0.4) * D) for x, y, *_ in points],
+            "name": [p[2] for p in points],
+            "category": [p[3] for p in points],
+        },
+        crs="EPSG:4326",
+    )
+
+
+class TestJunctionPoints:
+    """Tests for junction_points()."""
+
+    def test_counts_each_street_once(self):
+        from pipeline.stages.extract_landmarks import junction_points
+
+        points, degree = junction_points(_star_roads(0, 0, arms=4))
+        assert len(points) == 5
+        assert sorted(degree.tolist()) == [1, 1, 1, 1, 4]
+
+
+class TestScoreLandmarks:
+    """Tests for score_landmarks()."""
+
+    def test_tall_building_outscores_neighbours(self):
+        from pipeline.stages.extract_landmarks import score_landmarks
+
+        rows = [(x, y, 10.0, None, "residential") for x in range(3) for y in range(3)]
+        rows[4] = (1, 1, 60.0, None, "church")
+        scores = score_landmarks(_buildings(rows), _star_roads(50, 50))
+
+        assert scores["score"].idxmax() == 4
+        assert scores.loc[4, "rel_height"] == pytest.approx(6.0)
+
+    def test_junction_and_pois_raise_score(self):
+        from pipeline.stages.extract_landmarks import score_landmarks
+
+        rows = [(0, 0, 10.0, None, "yes"), (30, 0, 10.0, None, "yes")]
+        pois = _pois([(30, 0, "Museo", "culture"), (30, 0, "Café", "food")])
+        scores = score_landmarks(_buildings(rows), _star_roads(1, 1), pois)
+
+        assert scores.loc[0, "junction_proximity"] > 0.9
+        assert scores.loc[1, "named_pois"] == 2
+        assert scores.loc[1, "poi_name"] == "Museo"
+
+
+class TestExtractLandmarks:
+    """Tests for extract_landmarks()."""
+
+    def test_writes_labelled_spaced_landmarks(self, tmp_path):
+        from pipeline.stages.extract_landmarks import extract_landmarks
+
+        rows = [
+            (0, 0, 80.0, "Duomo", "cathedral"),
+            (2, 0, 70.0, "Campanile", "tower"),    # too close to the Duomo
+            (40, 0, 40.0, None, "train_station"),  # labelled by its POI
+            (80, 0, 90.0, None, "yes"),            # tall but unnamed
+        ] + [(x, 10, 8.0, None, "house") for x in range(0, 90, 5)]
+        pois = _pois([(40, 0, "Stazione", "transport")])
+
+        path = extract_landmarks(_buildings(rows), _star_roads(41, 1), tmp_path / "landmarks.json", pois)
+        landmarks = json.loads(path.read_text())["landmarks"]
+
+        by_name = {lm["name"]: lm for lm in landmarks}
+        assert set(by_name) == {"Duomo", "Stazione"}
+        assert by_name["Stazione"]["category"] == "transport"
+        assert by_name["Duomo"]["osm_id"] == "way/0"
+        assert len(by_name["Duomo"]["coordinates"]) == 2
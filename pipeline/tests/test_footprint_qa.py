@@ -0,0 +1,103 @@
+"""Tests for the footprint overlap / sliver QA stage."""
+import json
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import box
+
+# Metric test frames: UTM 32N near Bolzano
+X0, Y0 = 680_000.0, 5_152_000.0
+
+
+def _buildings() -> gpd.GeoDataFrame:
+    """Helper: an OSM/Overture duplicate pair, a partial overlap, a touching pair and a sliver."""
+    footprints = [
+        box(X0, Y0, X0 + 20, Y0 + 20),                   # 0 original
+        box(X0 + 0.5, Y0, X0 + 20.5, Y0 + 20),           # 1 near-copy of 0
+        box(X0 + 15, Y0 + 15, X0 + 35, Y0 + 35),         # 2 clips the corner of 0 / 1
+        box(X0 + 100, Y0, X0 + 110, Y0 + 10),            # 3 touches 4
+        box(X0 + 110, Y0, X0 + 120, Y0 + 10),            # 4
+        box(X0 + 200, Y0, X0 + 230, Y0 + 0.6),           # 5 sliver (30 m × 0.6 m)
+    ]
+    return gpd.GeoDataFrame(
+        {
+            "osm_id": [f"way/{i}" for i in range(len(footprints))],
+            "height_source": ["default", "osm", "osm", "osm", "osm", "osm"],
+        },
+        geometry=footprints,
+        crs="EPSG:32632",
+    )
+
+
+class TestOverlapPairs:
+    """Tests for overlap_pairs() / sliver_mask()."""
+
+    def test_pairs_ratios_and_chunking(self):
+        from pipeline.stages.footprint_qa import overlap_pairs
+
+        geoms = _buildings().geometry.to_numpy()
+        i, j, overlap, ratio = overlap_pairs(geoms, chunk_size=2, workers=3)
+        pairs = {(a, b): r for a, b, r in zip(i.tolist(), j.tolist(), ratio)}
+
+        assert set(pairs) == {(0, 1), (0, 2), (1, 2)}  # touching 3/4 excluded
+        assert pairs[(0, 1)] > 0.95
+        assert pairs[(0, 2)] < 0.1
+
+        # Chunking / threads do not change the result
+        i1, j1, _, _ = overlap_pairs(geoms, chunk_size=100, workers=1)
+        assert set(zip(i1.tolist(), j1.tolist())) == set(pairs)
+
+    def test_sliver_mask(self):
+        from pipeline.stages.footprint_qa import sliver_mask
+
+        mask, area, width = sliver_mask(_buildings().geometry.to_numpy())
+        assert np.flatnonzero(mask).tolist() == [5]
+        assert width[5] < 0.5 and area[5] > 4.0
+
+
+class TestFootprintQa:
+    """Tests for footprint_qa() / write_qa_report()."""
+
+    def test_flags_and_report(self, tmp_path):
+        from pipeline.stages.footprint_qa import (
+            QA_DUPLICATE, QA_OVERLAP, QA_SLIVER, footprint_qa, write_qa_report,
+        )
+
+        result, report = footprint_qa(_buildings())
+
+        assert len(result) == 6
+        assert result["qa_flags"].dtype == np.uint8
+        flags = result["qa_flags"].tolist()
+        assert flags[0] == flags[1] == QA_OVERLAP | QA_DUPLICATE
+        assert flags[2] == QA_OVERLAP
+        assert flags[3] == flags[4] == 0
+        assert flags[5] == QA_SLIVER
+        assert report["summary"] == {
+            "overlap_pairs": 3, "duplicate_pairs": 1, "slivers": 1, "removed": 0,
+        }
+
+        path = write_qa_report(report, tmp_path / "qa_report.json")
+        data = json.loads(path.read_text())
+        duplicate = [o for o in data["overlaps"] if o["duplicate"]]
+        assert [(o["a"], o["b"]) for o in duplicate] == [("way/0", "way/1")]
+        assert data["slivers"][0]["id"] == "way/5"
+
+    def test_dedupe_keeps_better_source(self):
+        from pipeline.stages.footprint_qa import footprint_qa
+
+        result, report = footprint_qa(_buildings(), dedupe=True)
+
+        # way/0 only has a default height, so its OSM-tagged copy wins
+        assert report["removed"] == ["way/0"]
+        assert "way/0" not in result["osm_id"].tolist()
+        assert len(result) == 5
+
+    def test_accepts_wgs84_and_empty(self):
+        from pipeline.stages.footprint_qa import footprint_qa
+
+        wgs = _buildings().to_crs("EPSG:4326")
+        _, report = footprint_qa(wgs)
+        assert report["summary"]["duplicate_pairs"] == 1
+
+        empty, report = footprint_qa(wgs.iloc[:0])
+        assert len(empty) == 0 and report["summary"]["overlap_pairs"] == 0
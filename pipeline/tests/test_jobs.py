@@ -0,0 +1,111 @@
+"""Tests for the durable SQLite job queue."""
+import pytest
+
+
+def _entries(*names):
+    return [{"name": name, "bbox": [46.5, 46.4, 11.4, 11.3]} for name in names]
+
+
+def _flaky_runner(entry, output_dir, cache_dir, memory_limit_mb):
+    """Job runner for work(): "Flaky" fails its first attempt, "Broken" always fails."""
+    marker = output_dir / f"{entry['name']}.attempted"
+    if entry["name"] == "Broken" or (entry["name"] == "Flaky" and not marker.exists()):
+        marker.touch()
+        return {"city": entry["name"], "status": "failed", "error": "Overpass timeout"}
+    return {"city": entry["name"], "status": "ok", "seconds": 0.1}
+
+
+class TestJobQueue:
+    """Tests for JobQueue state transitions."""
+
+    def test_enqueue_is_idempotent_and_force_requeues(self, tmp_path):
+        from pipeline.jobs import JobQueue
+
+        queue = JobQueue(tmp_path / "jobs.sqlite")
+        assert queue.enqueue(_entries("Bolzano, Italy", "Trento, Italy")) == 2
+        assert queue.enqueue(_entries("Bolzano, Italy")) == 0
+
+        job = queue.claim("w1")
+        queue.complete(job["id"], "w1", {"status": "ok"})
+        assert queue.enqueue(_entries("Bolzano, Italy"), force=True) == 1
+        assert queue.counts() == {"queued": 2, "running": 0, "done": 0, "failed": 0}
+        assert [j["key"] for j in queue.jobs()] == ["bolzano_italy", "trento_italy"]
+
+    def test_leases_expire_and_are_reclaimed(self, tmp_path):
+        from pipeline.jobs import JobQueue
+
+        queue = JobQueue(tmp_path / "jobs.sqlite", lease_s=60)
+        queue.enqueue(_entries("Bolzano, Italy"))
+
+        job = queue.claim("w1", now=1000)
+        assert job["payload"]["name"] == "Bolzano, Italy"
+        assert job["attempts"] == 1 and job["lease_expires"] == 1060
+        assert queue.claim("w2", now=1030) is None          # leased
+        assert queue.heartbeat(job["id"], "w1", now=1030)   # → expires at 1090
+        assert queue.claim("w2", now=1080) is None
+
+        # w1 dies: once the lease runs out, w2 takes over and w1's late result is ignored
+        retaken = queue.claim("w2", now=1100)
+        assert retaken["id"] == job["id"] and retaken["attempts"] == 2
+        assert not queue.heartbeat(job["id"], "w1", now=1100)
+        assert not queue.complete(job["id"], "w1", {"status": "ok"})
+        assert queue.complete(job["id"], "w2", {"status": "ok", "seconds": 3})
+        assert queue.jobs()[0]["result"] == {"status": "ok", "seconds": 3}
+
+    def test_failures_back_off_then_fail(self, tmp_path):
+        from pipeline.jobs import JobQueue
+
+        queue = JobQueue(tmp_path / "jobs.sqlite")
+        queue.enqueue(_entries("Bolzano, Italy"), max_attempts=3)
+
+        job = queue.claim("w1", now=0)
+        assert queue.fail(job["id"], "w1", "Overpass 429", backoff_s=10, now=0) == "queued"
+        assert queue.claim("w1", now=9) is None
+        assert queue.next_runnable_in(now=9) == pytest.approx(1)
+
+        job = queue.claim("w1", now=10)
+        assert queue.fail(job["id"], "w1", "Overpass 429", backoff_s=10, now=10) == "queued"
+        assert queue.claim("w1", now=29) is None            # 2nd retry waits 20 s
+
+        job = queue.claim("w1", now=30)
+        assert queue.fail(job["id"], "w1", "MemoryError", backoff_s=10, now=30) == "failed"
+        assert queue.claim("w1", now=1e9) is None
+        assert queue.next_runnable_in() is None
+        assert queue.jobs()[0]["error"] == "MemoryError"
+
+        assert queue.retry_failed() == 1
+        assert queue.claim("w1")["attempts"] == 1
+
+    def test_expired_lease_on_last_attempt_fails(self, tmp_path):
+        from pipeline.jobs import JobQueue
+
+        queue = JobQueue(tmp_path / "jobs.sqlite", lease_s=60)
+        queue.enqueue(_entries("Bolzano, Italy"), max_attempts=1)
+        queue.claim("w1", now=0)
+
+        assert queue.claim("w2", now=100) is None
+        job = queue.jobs()[0]
+        assert job["state"] == "failed" and "w1" in job["error"]
+
+
+class TestWork:
+    """Tests for the work() loop with a stub runner."""
+
+    def test_drains_queue_with_retries(self, tmp_path, capsys):
+        from pipeline.jobs import JobQueue, print_status, work
+
+        db = tmp_path / "jobs.sqlite"
+        queue = JobQueue(db)
+        queue.enqueue(_entries("Flaky", "Steady", "Broken"), max_attempts=2)
+
+        ran = work(db, output_dir=tmp_path, cache_dir=None, runner=_flaky_runner, backoff_s=0)
+
+        assert ran == 5  # Flaky ×2, Steady ×1, Broken ×2
+        jobs = {j["key"]: j for j in queue.jobs()}
+        assert jobs["flaky"]["state"] == "done" and jobs["flaky"]["attempts"] == 2
+        assert jobs["steady"]["state"] == "done" and jobs["steady"]["attempts"] == 1
+        assert jobs["broken"]["state"] == "failed" and jobs["broken"]["error"] == "Overpass timeout"
+
+        counts = print_status(queue)
+        assert counts == {"queued": 0, "running": 0, "done": 2, "failed": 1}
+        assert "broken" in capsys.readouterr().out
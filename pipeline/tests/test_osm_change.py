@@ -0,0 +1,138 @@
+"""Tests for incremental updates from OSM change files."""
+import pytest
+import geopandas as gpd
+from shapely.geometry import box
+
+BBOX = (46.52, 46.50, 11.36, 11.33)  # ~2.3 km × 2.2 km → 3 × 3 tiles of 1 km
+
+OSC = """<?xml version="1.0" encoding="UTF-8"?>
+<osmChange version="0.6">
+  <modify>
+    <node id="10" lat="46.5005" lon="11.3305"/>
+    <way id="100"><nd ref="10"/><tag k="building" v="yes"/></way>
+  </modify>
+  <delete>
+    <way id="200"/>
+  </delete>
+  <create>
+    <node id="11" lat="48.0" lon="2.0"/>
+  </create>
+</osmChange>
+"""
+
+
+def _buildings(ids, boxes):
+    """Helper: checkpoint-like buildings frame."""
+    return gpd.GeoDataFrame(
+        {"osm_id": ids, "height": [10.0] * len(ids), "geometry": boxes},
+        crs="EPSG:4326",
+    )
+
+
+@pytest.fixture
+def osc_file(tmp_path):
+    path = tmp_path / "change.osc"
+    path.write_text(OSC)
+    return path
+
+
+class TestParseOsc:
+    """Tests for parse_osc()."""
+
+    def test_collects_changed_and_deleted_ids(self, osc_file):
+        from pipeline.stages.osm_change import parse_osc
+
+        change = parse_osc(osc_file)
+        assert change["changed_ids"] == {"node/10", "way/100", "way/200", "node/11"}
+        assert change["deleted_ids"] == {"way/200"}
+        assert change["way_ids"] == {100, 200}
+        assert change["points"].shape == (2, 2)
+
+
+class TestAffectedTiles:
+    """Tests for affected_tiles()."""
+
+    def test_node_locations_and_previous_geometries(self, osc_file):
+        from pipeline.stages.osm_change import affected_tiles, parse_osc
+
+        change = parse_osc(osc_file)
+        buildings = _buildings(
+            ["way/200", "way/300"],
+            [box(11.355, 46.515, 11.3555, 46.5155), box(11.345, 46.51, 11.3455, 46.5105)],
+        )
+        tiles = affected_tiles(change, {"buildings": buildings}, BBOX)
+        # node/10 in the SW tile, deleted way/200 at its previous location;
+        # node/11 (Paris) is outside the bbox
+        assert tiles == {(0, 0), (1, 1)}
+
+
+class TestReplaceTiles:
+    """Tests for replace_tiles()."""
+
+    def test_only_affected_tiles_replaced(self):
+        from pipeline.stages.osm_change import replace_tiles
+
+        previous = _buildings(
+            ["way/1", "way/2", "way/3"],
+            [
+                box(11.331, 46.501, 11.3312, 46.5012),  # tile (0, 0)
+                box(11.332, 46.502, 11.3322, 46.5022),  # tile (0, 0), deleted upstream
+                box(11.355, 46.515, 11.3555, 46.5155),  # tile (1, 1), untouched
+            ],
+        )
+        fresh = _buildings(
+            ["way/1", "way/9"],
+            [box(11.331, 46.501, 11.3313, 46.5013), box(11.333, 46.503, 11.3332, 46.5032)],
+        )
+        fresh["height"] = 20.0
+
+        result = replace_tiles(previous, fresh, {(0, 0)}, BBOX)
+        assert sorted(result["osm_id"]) == ["way/1", "way/3", "way/9"]
+        assert result.set_index("osm_id").loc["way/1", "height"] == 20.0
+        assert result.set_index("osm_id").loc["way/3", "height"] == 10.0
+
+    def test_moved_feature_not_duplicated(self):
+        """A fresh copy of an ID drops its stale copy from an unaffected tile."""
+        from pipeline.stages.osm_change import replace_tiles
+
+        previous = _buildings(["way/5"], [box(11.355, 46.515, 11.3555, 46.5155)])
+        fresh = _buildings(["way/5"], [box(11.331, 46.501, 11.3312, 46.5012)])
+
+        result = replace_tiles(previous, fresh, {(0, 0)}, BBOX)
+        assert len(result) == 1
+        assert result.geometry.iloc[0].bounds[0] == pytest.approx(11.331)
+
+    def test_road_crossing_tile_edge_joined_once(self):
+        """A way leaving the affected tile is cut at the tile edge, not kept twice."""
+        from shapely.geometry import LineString
+        from pipeline.stages.osm_change import replace_tiles
+        from pipeline.stages.tiling import tile_bbox
+
+        edge = tile_bbox(0, 0, BBOX)[2]  # east edge of tile (0, 0)
+        previous = gpd.GeoDataFrame(
+            {
+                "osmid": [7, 9, 20],
+                "name": ["old", "gone", "other"],
+                "geometry": [
+                    LineString([(11.340, 46.505), (11.352, 46.505)]),  # owned by tile (1, 0)
+                    LineString([(11.331, 46.502), (11.332, 46.502)]),  # tile (0, 0), no longer in OSM
+                    LineString([(11.350, 46.507), (11.351, 46.507)]),  # tile (1, 0), untouched
+                ],
+            },
+            crs="EPSG:4326",
+        )
+        fresh = gpd.GeoDataFrame(
+            {
+                "osmid": [[7, 8]],
+                "name": ["new"],
+                # truncated one node past the tile edge, owned by tile (0, 0)
+                "geometry": [LineString([(11.338, 46.505), (11.3435, 46.505)])],
+            },
+            crs="EPSG:4326",
+        )
+
+        result = replace_tiles(previous, fresh, {(0, 0)}, BBOX)
+        way7 = result[result["name"].isin(["old", "new"])].set_index("name")
+        assert sorted(result["name"]) == ["new", "old", "other"]
+        assert way7.geometry["new"].bounds[0::2] == pytest.approx((11.338, edge))
+        assert way7.geometry["old"].bounds[0::2] == pytest.approx((edge, 11.352))
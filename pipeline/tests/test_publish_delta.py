@@ -0,0 +1,67 @@
+"""Tests for delta publishing between pipeline runs."""
+import json
+
+
+def _stage(root, files: dict[str, str], generated_at: str = "t1"):
+    """Helper: write a staged run (artifacts + metadata.json)."""
+    staging = root / ".staging"
+    for rel, content in files.items():
+        path = staging / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    (staging / "metadata.json").write_text(
+        json.dumps({"generated_at": generated_at, "files": {}})
+    )
+    return staging
+
+
+class TestPublishDelta:
+    """Tests for publish_delta()."""
+
+    def test_first_run_publishes_everything(self, tmp_path):
+        from pipeline.stages.publish_delta import publish_delta
+
+        staging = _stage(tmp_path, {"buildings.geojson": "a", "tiles/buildings/0_0.geojson": "b"})
+        changelog = publish_delta(staging, tmp_path)
+
+        assert changelog["added"] == ["buildings.geojson", "tiles/buildings/0_0.geojson"]
+        assert (tmp_path / "tiles/buildings/0_0.geojson").read_text() == "b"
+        assert not staging.exists()
+        manifest = json.loads((tmp_path / "manifest.json").read_text())
+        assert set(manifest["files"]) == {"buildings.geojson", "tiles/buildings/0_0.geojson"}
+
+    def test_unchanged_files_are_not_rewritten(self, tmp_path):
+        from pipeline.stages.publish_delta import publish_delta
+
+        publish_delta(_stage(tmp_path, {"a.geojson": "same", "b.geojson": "old"}), tmp_path)
+        mtime = (tmp_path / "a.geojson").stat().st_mtime_ns
+
+        changelog = publish_delta(
+            _stage(tmp_path, {"a.geojson": "same", "b.geojson": "new"}, "t2"), tmp_path
+        )
+        assert changelog["changed"] == ["b.geojson"]
+        assert changelog["unchanged_count"] == 1
+        assert changelog["previous_generated_at"] == "t1"
+        assert (tmp_path / "a.geojson").stat().st_mtime_ns == mtime
+        assert (tmp_path / "b.geojson").read_text() == "new"
+
+    def test_orphaned_tiles_deleted(self, tmp_path):
+        from pipeline.stages.publish_delta import publish_delta
+
+        publish_delta(
+            _stage(tmp_path, {"tiles/roads/0_0.geojson": "x", "tiles/roads/1_0.geojson": "y"}),
+            tmp_path,
+        )
+        changelog = publish_delta(_stage(tmp_path, {"tiles/roads/0_0.geojson": "x"}), tmp_path)
+
+        assert changelog["removed"] == ["tiles/roads/1_0.geojson"]
+        assert not (tmp_path / "tiles/roads/1_0.geojson").exists()
+
+    def test_changelog_in_metadata(self, tmp_path):
+        from pipeline.stages.publish_delta import publish_delta
+
+        publish_delta(_stage(tmp_path, {"pois.geojson": "p"}), tmp_path)
+        metadata = json.loads((tmp_path / "metadata.json").read_text())
+
+        assert metadata["changelog"]["added"] == ["pois.geojson"]
+        assert metadata["files"]["manifest"] == "manifest.json"
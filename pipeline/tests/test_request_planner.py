@@ -0,0 +1,145 @@
+"""Tests for the Overpass quadtree request planner."""
+import pytest
+import geopandas as gpd
+import pandas as pd
+import requests
+from shapely.geometry import Point
+
+BBOX = (46.51, 46.49, 11.37, 11.33)
+
+
+def _points_in(cell, points):
+    """Helper: fake osmnx frame of the (osmid, lat, lon) points inside cell."""
+    north, south, east, west = cell
+    rows = [(i, lat, lon) for i, lat, lon in points if south <= lat <= north and west <= lon <= east]
+    index = pd.MultiIndex.from_tuples(
+        [("way", i) for i, _, _ in rows], names=["element_type", "osmid"]
+    )
+    return gpd.GeoDataFrame(
+        {"geometry": [Point(lon, lat) for _, lat, lon in rows]}, index=index, crs="EPSG:4326"
+    )
+
+
+class TestFetchQuadtree:
+    """Tests for fetch_quadtree()."""
+
+    def test_splits_cells_over_budget(self):
+        """A cell over the feature budget is replaced by its four children."""
+        from pipeline.stages.request_planner import concat_unique_features, fetch_quadtree
+
+        points = [(i, 46.49 + 0.0002 * i, 11.33 + 0.0004 * i) for i in range(100)]
+        calls = []
+
+        def fetch(cell):
+            calls.append(cell)
+            return _points_in(cell, points)
+
+        result = fetch_quadtree(
+            BBOX, fetch, count=len, merge=concat_unique_features,
+            feature_budget=40, max_workers=2, backoff_s=0,
+        )
+        assert len(calls) > 1
+        assert sorted(result.index.get_level_values("osmid")) == list(range(100))
+
+    def test_deduplicates_features_on_cell_edges(self):
+        """A feature on the shared edge of two cells is returned once."""
+        from pipeline.stages.request_planner import concat_unique_features, fetch_quadtree
+
+        # Exactly on the centre of BBOX → returned by all four quadrants
+        points = [(1, 46.50, 11.35), (2, 46.505, 11.34), (3, 46.495, 11.36)]
+        result = fetch_quadtree(
+            BBOX, lambda c: _points_in(c, points), count=len,
+            merge=concat_unique_features, feature_budget=2, max_depth=1, backoff_s=0,
+        )
+        assert sorted(result.index.get_level_values("osmid")) == [1, 2, 3]
+
+    def test_timeout_splits_cell(self):
+        """A timed-out cell is split instead of retried whole."""
+        from pipeline.stages.request_planner import fetch_quadtree
+
+        def fetch(cell):
+            if cell == BBOX:
+                raise requests.exceptions.ReadTimeout("read timed out")
+            return [cell]
+
+        result = fetch_quadtree(
+            BBOX, fetch, count=len, merge=lambda rs: [c for r in rs for c in r], backoff_s=0
+        )
+        assert len(result) == 4
+
+    def test_timeout_detection_checks_the_status(self):
+        """Only timeouts and 429 / 504 statuses count, not digits anywhere in the message."""
+        from osmnx._errors import ResponseStatusCodeError
+
+        from pipeline.stages.request_planner import is_timeout_error
+
+        def http_error(status):
+            response = requests.Response()
+            response.status_code = status
+            return requests.exceptions.HTTPError(f"{status} error", response=response)
+
+        assert is_timeout_error(requests.exceptions.ConnectTimeout("connect timed out"))
+        assert is_timeout_error(http_error(504)) and is_timeout_error(http_error(429))
+        assert is_timeout_error(ResponseStatusCodeError("'overpass-api.de' responded: 504 Gateway Timeout"))
+        assert not is_timeout_error(http_error(400))
+        assert not is_timeout_error(ResponseStatusCodeError("'overpass-api.de' responded: 400 Bad Request way 504"))
+        assert not is_timeout_error(ValueError("way/1504 has 504 nodes"))
+
+    @pytest.mark.filterwarnings("ignore:The expected order of coordinates:FutureWarning")  # osmnx 1.9 bbox order
+    def test_runtime_error_remark_splits_cell(self, monkeypatch):
+        """An HTTP 200 answer cut short by Overpass is treated as a timeout, not as the cell's features."""
+        import osmnx._overpass as overpass
+        from pipeline.stages.fetch_buildings import _fetch_building_cell
+        from pipeline.stages.request_planner import (
+            check_overpass_remarks, concat_unique_features, fetch_quadtree, is_timeout_error,
+        )
+
+        answers = [{
+            "elements": [],
+            "remark": 'runtime error: Query timed out in "query" at line 3 after 180 seconds.',
+        }]
+        calls = []
+
+        def overpass_request(data, pause=None, error_pause=60):
+            calls.append(data)
+            return answers.pop(0) if answers else {"elements": []}
+
+        monkeypatch.setattr(overpass, "_overpass_request", overpass_request)
+        check_overpass_remarks()
+        check_overpass_remarks()  # installed once
+
+        with pytest.raises(TimeoutError, match="timed out") as excinfo:
+            _fetch_building_cell(BBOX)
+        assert is_timeout_error(excinfo.value)
+
+        answers.append({"elements": [], "remark": "runtime error: Query ran out of memory in \"query\" at line 1."})
+        result = fetch_quadtree(BBOX, _fetch_building_cell, count=len, merge=concat_unique_features, backoff_s=0)
+        assert result.empty and len(calls) == 1 + 1 + 4
+
+    def test_retries_then_raises(self):
+        """Non-timeout failures are retried, then the last error is raised."""
+        from pipeline.stages.request_planner import fetch_quadtree
+
+        attempts = []
+
+        def fetch(cell):
+            attempts.append(cell)
+            raise ValueError("server error")
+
+        with pytest.raises(ValueError):
+            fetch_quadtree(BBOX, fetch, count=len, merge=list, retries=2, backoff_s=0)
+        assert len(attempts) == 3
+
+
+class TestInitialCells:
+    """Tests for initial_cells()."""
+
+    def test_large_bbox_pre_split_below_max_area(self):
+        """Every initial cell must be within the Overpass max query area."""
+        from pipeline.stages.request_planner import bbox_area_m2, initial_cells
+
+        bbox = (45.60, 45.35, 9.35, 9.00)  # ~27 km × 28 km around Milan
+        cells = initial_cells(bbox, max_area=50_000_000)
+        assert len(cells) > 1
+        assert all(bbox_area_m2(c) <= 50_000_000 for c in cells)
+        assert sum(bbox_area_m2(c) for c in cells) == pytest.approx(bbox_area_m2(bbox), rel=1e-3)
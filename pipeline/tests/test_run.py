@@ -0,0 +1,228 @@
+"""Tests for the pipeline CLI: startup imports and stage selection."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString, Point, box
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+HEAVY_MODULES = ("geopandas", "pandas", "numpy", "shapely", "pyproj", "osmnx", "duckdb")
+
+# (north, south, east, west)
+BBOX = (46.52, 46.50, 11.36, 11.33)
+
+
+def _patch_fetchers(monkeypatch, calls):
+    """Helper: replace the network fetches with small fixed layers."""
+    import pipeline.stages.fetch_buildings as fetch_buildings
+    import pipeline.stages.fetch_pois as fetch_pois
+    import pipeline.stages.fetch_roads as fetch_roads
+
+    def buildings(bbox):
+        calls.append("buildings")
+        _, s, _, w = bbox
+        return gpd.GeoDataFrame(
+            {
+                "osm_id": ["way/1", "way/2"],
+                "building_type": ["yes", "house"],
+                "height_osm": ["12", None],
+                "levels": [None, "3"],
+                "name": [None, "Casa"],
+            },
+            geometry=[box(w + 0.001, s + 0.001, w + 0.002, s + 0.002),
+                      box(w + 0.013, s + 0.003, w + 0.014, s + 0.004)],
+            crs="EPSG:4326",
+        )
+
+    def roads(bbox, retain_all=False):
+        n, s, e, w = bbox
+        return fetch_roads.classify_roads(gpd.GeoDataFrame(
+            {"osmid": [5], "highway": ["primary"], "name": ["Via"], "bridge": [None], "layer": [None]},
+            geometry=[LineString([(w, s), (e, n)])],
+            crs="EPSG:4326",
+        ))
+
+    def pois(bbox):
+        _, s, _, w = bbox
+        return gpd.GeoDataFrame(
+            {"osm_id": ["node/9"], "name": ["Bar"], "category": ["food"], "amenity_tag": ["cafe"]},
+            geometry=[Point(w + 0.0015, s + 0.0015)],
+            crs="EPSG:4326",
+        )
+
+    monkeypatch.setattr(fetch_buildings, "fetch_osm_buildings", buildings)
+    monkeypatch.setattr(fetch_roads, "fetch_road_network", roads)
+    monkeypatch.setattr(fetch_pois, "fetch_pois", pois)
+
+
+class TestStartup:
+    """`--help` must not pay for the geo stack."""
+
+    def test_help_does_not_import_heavy_modules(self):
+        code = (
+            "import runpy, sys\n"
+            "sys.argv = ['run', '--help']\n"
+            "try:\n"
+            "    runpy.run_module('pipeline.run', run_name='__main__')\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            f"print('imported:', [m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        )
+        assert "--stages" in result.stdout
+        assert result.stdout.strip().splitlines()[-1] == "imported: []"
+
+
+class TestSelectStages:
+    """Tests for select_stages()."""
+
+    def test_selection_keeps_pipeline_order(self):
+        from pipeline.run import STAGES, select_stages
+
+        assert select_stages() == STAGES
+        assert select_stages("metadata,export") == ("export", "metadata", "publish")
+        assert select_stages("fetch,heights") == ("fetch", "heights")
+        assert select_stages(skip="fetch, terrain") == tuple(
+            s for s in STAGES if s not in ("fetch", "terrain")
+        )
+        assert select_stages("export,metadata,publish", skip="publish") == ("export", "metadata")
+
+    def test_rejects_unknown_and_empty(self):
+        from pipeline.run import select_stages
+
+        with pytest.raises(ValueError, match="Unknown stage"):
+            select_stages("export,upload")
+        with pytest.raises(ValueError, match="No stages"):
+            select_stages("export", skip="export")
+
+
+class TestPartialRuns:
+    """Partial runs start from the previous run's checkpoints."""
+
+    def test_rerun_from_checkpoints_without_fetching(self, tmp_path, monkeypatch):
+        from pipeline.run import run_pipeline, select_stages
+
+        calls = []
+        _patch_fetchers(monkeypatch, calls)
+        city_dir = run_pipeline("Test City", BBOX, tmp_path, use_overture=False, tiled=True, dem_path=None)
+        published = json.loads((city_dir / "manifest.json").read_text())["files"]
+        assert calls == ["buildings"]
+        labels = json.loads((city_dir / "street_labels.json").read_text())
+        assert labels["names"] == ["Via"] and labels["levels"][-1]["name"]
+
+        # Export + metadata from the processed checkpoints: nothing changes
+        run_pipeline("Test City", output_dir=tmp_path, stages=select_stages("export,metadata,publish"))
+        metadata = json.loads((city_dir / "metadata.json").read_text())
+        assert metadata["changelog"]["added"] == metadata["changelog"]["removed"] == []
+        assert metadata["changelog"]["changed"] == []
+        assert set(metadata["tiles"]["layers"]) == {"buildings", "roads", "pois"}
+
+        # Re-processing from the fetched checkpoints reproduces the outputs
+        run_pipeline("Test City", output_dir=tmp_path, stages=select_stages(skip="fetch"))
+        assert json.loads((city_dir / "manifest.json").read_text())["files"] == published
+        assert calls == ["buildings"]
+
+    def test_partial_run_needs_a_previous_run(self, tmp_path):
+        from pipeline.run import run_pipeline, select_stages
+
+        with pytest.raises(FileNotFoundError, match="No checkpointed run"):
+            run_pipeline("Nowhere", output_dir=tmp_path, stages=select_stages("metadata"))
+
+    def test_publish_needs_metadata(self, tmp_path, monkeypatch):
+        from pipeline.run import run_pipeline, select_stages
+
+        _patch_fetchers(monkeypatch, [])
+        run_pipeline("Test City", BBOX, tmp_path, use_overture=False, stages=select_stages("fetch"))
+        with pytest.raises(ValueError, match="'publish' without 'metadata'"):
+            run_pipeline("Test City", output_dir=tmp_path, stages=select_stages(skip="fetch,metadata"))
+
+    def test_metadata_lists_only_written_files(self, tmp_path, monkeypatch):
+        from pipeline.run import run_pipeline, select_stages
+
+        _patch_fetchers(monkeypatch, [])
+        city_dir = run_pipeline(
+            "Test City", BBOX, tmp_path, use_overture=False, dem_path=None,
+            stages=select_stages(skip="landmarks,blocks"),
+        )
+        files = json.loads((city_dir / "metadata.json").read_text())["files"]
+        assert "landmarks" not in files and "blocks" not in files
+        assert files["street_labels"] == "street_labels.json"
+        assert all((city_dir / name).exists() for name in files.values() if isinstance(name, str))
+
+    def test_optional_exports_survive_partial_runs(self, tmp_path, monkeypatch):
+        from pipeline.run import run_pipeline, select_stages
+        from pipeline.stages.bvh import BVH
+
+        _patch_fetchers(monkeypatch, [])
+        city_dir = run_pipeline(
+            "Test City", BBOX, tmp_path, use_overture=False, tiled=True, dem_path=None,
+            height_bands=True, ndjson=True, bvh=True, split_attributes=True,
+        )
+        metadata = json.loads((city_dir / "metadata.json").read_text())
+        bands = metadata["height_bands"]
+        assert sum(band["count"] for band in bands["bands"]) == 2
+        assert all((city_dir / band["file"]).exists() for band in bands["bands"])
+        tiles = [json.loads(p.read_text()) for p in (city_dir / "tiles" / "buildings").iterdir()]
+        assert sum(tile["height_bands"][-1] for tile in tiles) == 2
+        assert metadata["streams"]["roads"] == {"file": "roads.ndjson", "index": "roads.ndjson.index.json"}
+        assert len((city_dir / "buildings.ndjson").read_text().splitlines()) == 2
+        assert metadata["bvh"]["buildings"]["file"] == "buildings.bvh"
+        tree = BVH.load(city_dir / "buildings.bvh")
+        features = json.loads((city_dir / "buildings.geojson").read_text())["features"]
+        assert tree.count.sum() == len(features)
+        assert metadata["attributes"]["pois"] == {"file": "pois.attributes.json"}
+        sidecar = json.loads((city_dir / "buildings.attributes.json").read_text())
+        assert sidecar["features"] == len(features) and "osm_id" in sidecar["columns"]
+
+        run_pipeline("Test City", output_dir=tmp_path, stages=select_stages("metadata,publish"))
+        metadata = json.loads((city_dir / "metadata.json").read_text())
+        assert metadata["height_bands"] == bands and "streams" in metadata and "bvh" in metadata
+        assert "attributes" in metadata
+
+    def test_fetch_only_then_process_from_fetched_checkpoints(self, tmp_path, monkeypatch):
+        from pipeline.run import run_pipeline, select_stages
+
+        calls = []
+        _patch_fetchers(monkeypatch, calls)
+        city_dir = run_pipeline("Test City", BBOX, tmp_path, use_overture=False, stages=select_stages("fetch"))
+        assert not (city_dir / "metadata.json").exists()
+
+        run_pipeline("Test City", output_dir=tmp_path, stages=select_stages(skip="fetch"))
+        metadata = json.loads((city_dir / "metadata.json").read_text())
+        assert metadata["stats"]["buildings_count"] == 2
+        assert calls == ["buildings"]
+
+    def test_partial_runs_keep_recorded_options(self, tmp_path, monkeypatch):
+        from pipeline.run import run_pipeline, select_stages
+        from pipeline.stages.checkpoint import load_run_info
+
+        _patch_fetchers(monkeypatch, [])
+        dem = tmp_path / "dem.tif"
+        city_dir = run_pipeline("Test City", BBOX, tmp_path, stages=select_stages("fetch"), dem_path=dem, dedupe=True)
+        recorded = load_run_info(city_dir)
+
+        run_pipeline("Test City", output_dir=tmp_path, stages=select_stages(skip="fetch,terrain"))
+        assert load_run_info(city_dir) == recorded
+        assert recorded["dem_path"] == str(dem) and recorded["dedupe"] is True
+
+    def test_unpublished_run_leaves_checkpoints(self, tmp_path, monkeypatch):
+        from pipeline.run import run_pipeline, select_stages
+        from pipeline.stages.checkpoint import checkpoint_dir
+
+        import pipeline.stages.fetch_buildings as fetch_buildings
+
+        _patch_fetchers(monkeypatch, [])
+        city_dir = run_pipeline("Test City", BBOX, tmp_path, use_overture=False, dem_path=None)
+        processed = {name: (checkpoint_dir(city_dir) / f"{name}.pkl").read_bytes() for name in ("buildings", "pois")}
+
+        fetch = fetch_buildings.fetch_osm_buildings
+        monkeypatch.setattr(fetch_buildings, "fetch_osm_buildings", lambda bbox: fetch(bbox).iloc[:1])
+        run_pipeline("Test City", BBOX, tmp_path, use_overture=False, stages=select_stages(skip="publish"))
+        assert (city_dir / ".staging" / "buildings.geojson").exists()
+        assert {name: (checkpoint_dir(city_dir) / f"{name}.pkl").read_bytes() for name in processed} == processed
@@ -0,0 +1,124 @@
+"""Tests for compact layer dtypes and copy-free stage data flow."""
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+
+def _raw_buildings() -> gpd.GeoDataFrame:
+    """Helper: fetch-stage buildings frame with object columns."""
+    return gpd.GeoDataFrame(
+        {
+            "osm_id": ["way/1", "way/2", "way/3"],
+            "geometry": [box(i, 0, i + 1, 1) for i in range(3)],
+            "building_type": ["house", "church", None],
+            "height_osm": ["12.5", None, None],
+            "levels": [None, "4", None],
+            "name": [None, "Duomo", None],
+        },
+        crs="EPSG:4326",
+    )
+
+
+class TestEnforceSchema:
+    """Tests for enforce_schema()."""
+
+    def test_casts_known_columns(self):
+        from pipeline.stages.schema import enforce_schema
+
+        gdf = _raw_buildings()
+        gdf["height"] = [12.5, 12.0, 9.0]
+        gdf["height_source"] = ["osm", "levels", "default"]
+        out = enforce_schema(gdf, "buildings")
+
+        assert out["height"].dtype == "float32"
+        assert list(out["height_source"].cat.categories) == ["osm", "overture", "levels", "default"]
+        assert isinstance(out["building_type"].dtype, pd.CategoricalDtype)
+        assert out["osm_id"].dtype == object  # not in the schema
+        assert gdf["height"].dtype == "float64"  # input untouched
+
+    def test_noop_returns_same_frame(self):
+        from pipeline.stages.schema import enforce_schema
+
+        out = enforce_schema(_raw_buildings(), "buildings")
+        assert enforce_schema(out, "buildings") is out
+
+    def test_recasts_concat_of_mismatched_categories(self):
+        from pipeline.stages.schema import enforce_schema
+
+        a = enforce_schema(pd.DataFrame({"amenity_tag": ["cafe"]}), "pois")
+        b = enforce_schema(pd.DataFrame({"amenity_tag": ["bank"]}), "pois")
+        merged = pd.concat([a, b], ignore_index=True)
+        assert merged["amenity_tag"].dtype == object
+        assert isinstance(enforce_schema(merged, "pois")["amenity_tag"].dtype, pd.CategoricalDtype)
+
+
+class TestStageDataFlow:
+    """Stages produce compact dtypes and never modify their input frame."""
+
+    def test_process_heights_and_clean_leave_input_untouched(self):
+        from pipeline.stages.clean_geometry import clean_geometries
+        from pipeline.stages.process_heights import process_heights
+
+        raw = _raw_buildings()
+        before = raw.copy()
+        out = clean_geometries(process_heights(raw))
+
+        assert out["height"].dtype == "float32"
+        assert out["height_source"].tolist() == ["osm", "levels", "default"]
+        pd.testing.assert_frame_equal(raw, before)
+
+    @pytest.mark.parametrize("copy_on_write", [False, True])
+    def test_stages_leave_input_untouched_in_either_pandas_mode(self, copy_on_write):
+        from shapely.geometry import Point, Polygon
+
+        from pipeline.stages.associate_pois import associate_pois
+        from pipeline.stages.clean_geometry import clean_geometries
+        from pipeline.stages.footprint_qa import footprint_qa
+        from pipeline.stages.process_heights import process_heights
+
+        raw = _raw_buildings()
+        raw.loc[2, "geometry"] = Polygon([(2, 0), (3, 1), (3, 0), (2, 1)])  # bow-tie: fixed by clean
+        pois = gpd.GeoDataFrame(
+            {"osm_id": ["node/1"], "category": ["food"]}, geometry=[Point(0.5, 0.5)], crs="EPSG:4326"
+        )
+        before, pois_before = raw.copy(), pois.copy()
+        with pd.option_context("mode.copy_on_write", copy_on_write):
+            buildings = process_heights(raw)
+            processed = buildings.copy()
+            cleaned = clean_geometries(buildings)
+            flagged, _ = footprint_qa(cleaned)
+            linked_pois, linked = associate_pois(pois, flagged)
+
+        pd.testing.assert_frame_equal(raw, before)
+        pd.testing.assert_frame_equal(buildings, processed)
+        pd.testing.assert_frame_equal(pois, pois_before)
+        assert cleaned.geometry.is_valid.all() and not buildings.geometry.is_valid.all()
+        assert "qa_flags" not in cleaned.columns and "poi_count" not in flagged.columns
+        assert linked["poi_count"].tolist() == [1, 0, 0] and linked_pois["building_id"].tolist() == ["way/1"]
+
+    def test_importing_stages_keeps_pandas_mode(self):
+        import importlib
+
+        import pipeline.stages
+
+        importlib.reload(pipeline.stages)
+        assert pd.get_option("mode.copy_on_write") is False
+
+    def test_export_writes_float32_heights_cleanly(self, tmp_path):
+        import json
+
+        from pipeline.stages.export_geojson import export_geojson
+        from pipeline.stages.process_heights import process_heights
+
+        gdf = process_heights(_raw_buildings())
+        path = export_geojson(gdf, tmp_path / "b.geojson", "buildings")
+        props = json.loads(path.read_text())["features"][0]["properties"]
+        assert props["height"] == 12.5
+        assert props["height_source"] == "osm"
+
+    def test_report_memory(self):
+        from pipeline.stages.schema import report_memory
+
+        report = report_memory("test", buildings=_raw_buildings())
+        assert report["buildings_mb"] >= 0
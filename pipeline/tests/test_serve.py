@@ -0,0 +1,225 @@
+"""Tests for the local tile server."""
+import asyncio
+import gzip
+import json
+import os
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString, Point, box
+
+# Buildings either side of lon 11.35; a bridge crossing it
+WEST, SOUTH, EAST, NORTH = 11.34, 46.49, 11.36, 46.51
+
+
+def _write_city(output_dir, height=12.0):
+    """Helper: processed checkpoints + manifest of a small city, as the pipeline writes them."""
+    from pipeline.stages.checkpoint import save_checkpoint
+
+    city_dir = output_dir / "test_city"
+    buildings = gpd.GeoDataFrame(
+        {"osm_id": ["way/1", "way/2", "way/3"], "height": [height, 9.0, 15.0], "name": ["A", None, "C"]},
+        geometry=[
+            box(11.341, 46.495, 11.342, 46.496),     # west, inside
+            box(11.349, 46.495, 11.351, 46.496),     # straddles 11.35
+            box(11.355, 46.495, 11.356, 46.496),     # east
+        ],
+        crs="EPSG:4326",
+    )
+    roads = gpd.GeoDataFrame(
+        {"highway": ["primary"], "road_class": ["major"], "name": ["Ponte"], "bridge": ["yes"], "layer": [None]},
+        geometry=[LineString([(11.345, 46.50), (11.355, 46.50)])],
+        crs="EPSG:4326",
+    )
+    pois = gpd.GeoDataFrame(
+        {"name": ["Bar"], "category": ["food"]}, geometry=[Point(11.3415, 46.4955)], crs="EPSG:4326"
+    )
+    for name, gdf in {"buildings": buildings, "roads": roads, "pois": pois}.items():
+        save_checkpoint(gdf, city_dir, name)
+    manifest = city_dir / "manifest.json"
+    manifest.write_text(json.dumps({"generated_at": str(height), "files": {}}))
+    return city_dir
+
+
+class TestLayerIndex:
+    """Tests for load_city() / LayerIndex.query()."""
+
+    def test_bbox_query_clips_edge_features(self, tmp_path):
+        from pipeline.serve import load_city
+
+        snapshot = load_city(_write_city(tmp_path))
+        body, count = snapshot.layers["buildings"].query(WEST, SOUTH, 11.35, NORTH)
+        features = json.loads(body)["features"]
+
+        assert count == 2
+        assert [f["properties"]["osm_id"] for f in features] == ["way/1", "way/2"]
+        west_edge = max(x for x, _ in features[1]["geometry"]["coordinates"][0])
+        assert west_edge == pytest.approx(11.35)
+        assert features[0]["properties"]["name"] == "A"
+
+        _, unclipped = snapshot.layers["buildings"].query(WEST, SOUTH, 11.35, NORTH, clip=False)
+        assert unclipped == 2
+
+    def test_clipped_bridge_keeps_baked_z(self, tmp_path):
+        from pipeline.serve import load_city
+
+        roads = load_city(_write_city(tmp_path)).layers["roads"]
+        full = json.loads(roads.query(WEST, SOUTH, EAST, NORTH)[0])["features"][0]
+        half = json.loads(roads.query(WEST, SOUTH, 11.35, NORTH)[0])["features"][0]
+
+        assert max(c[2] for c in full["geometry"]["coordinates"]) == 6.0   # deck at mid-span
+        assert half["geometry"]["coordinates"][-1] == [11.35, 46.5, 6.0]
+        assert "bridge" not in half["properties"]
+
+    def test_tile_bounds(self):
+        from pipeline.serve import tile_bounds
+
+        assert tile_bounds(0, 0, 0) == pytest.approx((-180, -85.0511287, 180, 85.0511287))
+        west, south, east, north = tile_bounds(15, 17417, 11591)
+        assert west < 11.35 < east and south < 46.5 < north
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_lru_eviction_within_byte_budget(self):
+        from pipeline.serve import CachedResponse, ResponseCache
+
+        cache = ResponseCache(max_bytes=100)
+        for i in range(3):
+            cache.put(("a", "v1", i), CachedResponse(f'"{i}"', b"x" * 40, 40, 1))
+        assert cache.get(("a", "v1", 0)) is None   # evicted first
+        assert cache.bytes == 80 and cache.evictions == 1
+
+        cache.get(("a", "v1", 1))                  # 1 is now most recent
+        cache.put(("b", "v1", 0), CachedResponse('"b"', b"x" * 40, 40, 1))
+        assert cache.get(("a", "v1", 2)) is None and cache.get(("a", "v1", 1)) is not None
+
+        cache.put(("a", "v1", 9), CachedResponse('"big"', b"x" * 101, 101, 1))
+        assert cache.get(("a", "v1", 9)) is None   # larger than the whole budget
+        assert cache.discard_city("a") == 1 and len(cache) == 1
+        assert cache.stats()["hits"] == 2
+
+
+class TestTileServer:
+    """Tests for TileServer request handling, revalidation and hot reload."""
+
+    def test_requests_etags_and_errors(self, tmp_path):
+        from pipeline.serve import TileServer
+
+        _write_city(tmp_path)
+
+        async def scenario():
+            server = TileServer(tmp_path, reload_s=3600)
+            target = f"/test_city/buildings?bbox={WEST},{SOUTH},{EAST},{NORTH}"
+            status, headers, body = await server.handle("GET", target, {"accept-encoding": "gzip"})
+            assert status == 200 and headers["Content-Encoding"] == "gzip"
+            assert len(json.loads(gzip.decompress(body))["features"]) == 3
+
+            status, _, plain = await server.handle("GET", target, {})
+            assert status == 200 and plain == gzip.decompress(body)
+            assert server.cache.stats()["hits"] == 1
+
+            status, _, body = await server.handle("GET", target, {"if-none-match": headers["ETag"]})
+            assert status == 304 and body == b""
+
+            status, headers, body = await server.handle("GET", "/test_city/pois/15/17416/11592.geojson", {})
+            assert status == 200 and headers["X-Feature-Count"] == "1"
+
+            for target, expected in [
+                ("/nowhere/buildings?bbox=0,0,1,1", 404),
+                ("/test_city/trees?bbox=0,0,1,1", 404),
+                ("/test_city/buildings?bbox=1,1,0,0", 400),
+                ("/test_city/buildings/3/99/0.geojson", 400),
+            ]:
+                assert (await server.handle("GET", target, {}))[0] == expected, target
+            assert (await server.handle("POST", "/cities", {}))[0] == 405
+            assert json.loads((await server.handle("GET", "/cities", {}))[2]) == {"cities": ["test_city"]}
+            await server.close()
+
+        asyncio.run(scenario())
+
+    def test_hot_reload_swaps_snapshot_and_drops_cache(self, tmp_path):
+        from pipeline.serve import TileServer
+
+        city_dir = _write_city(tmp_path)
+
+        async def scenario():
+            server = TileServer(tmp_path, reload_s=3600)
+            target = f"/test_city/buildings?bbox={WEST},{SOUTH},11.345,{NORTH}"
+            _, old_headers, body = await server.handle("GET", target, {})
+            assert json.loads(body)["features"][0]["properties"]["height"] == 12.0
+            old = await server.city("test_city")
+
+            _write_city(tmp_path, height=20.0)  # a new run is published
+            manifest = city_dir / "manifest.json"
+            os.utime(manifest, ns=(manifest.stat().st_atime_ns, manifest.stat().st_mtime_ns + 10**9))
+            assert await server.reload_changed() == ["test_city"]
+            assert await server.reload_changed() == []
+
+            status, headers, body = await server.handle("GET", target, {"if-none-match": old_headers["ETag"]})
+            assert status == 200 and headers["ETag"] != old_headers["ETag"]
+            assert json.loads(body)["features"][0]["properties"]["height"] == 20.0
+            assert old.layers["buildings"].query(WEST, SOUTH, 11.345, NORTH)[1] == 1  # old snapshot intact
+            assert server.reloads == 1 and len(server.cache) == 1
+            await server.close()
+
+        asyncio.run(scenario())
+
+    def test_reload_between_manifest_and_checkpoints(self, tmp_path):
+        """A poll after publish_delta but before the checkpoints are saved is followed by another reload."""
+        from pipeline.serve import TileServer
+        from pipeline.stages.checkpoint import checkpoint_dir
+
+        city_dir = _write_city(tmp_path)
+
+        async def scenario():
+            server = TileServer(tmp_path, reload_s=3600)
+            target = f"/test_city/buildings?bbox={WEST},{SOUTH},11.345,{NORTH}"
+            await server.handle("GET", target, {})
+            old_checkpoints = {p.name: p.read_bytes() for p in checkpoint_dir(city_dir).iterdir()}
+
+            _write_city(tmp_path, height=20.0)
+            new_checkpoints = {p.name: p.read_bytes() for p in checkpoint_dir(city_dir).iterdir()}
+            for name, data in old_checkpoints.items():  # manifest published, checkpoints not yet
+                (checkpoint_dir(city_dir) / name).write_bytes(data)
+            assert await server.reload_changed() == ["test_city"]
+            _, _, body = await server.handle("GET", target, {})
+            assert json.loads(body)["features"][0]["properties"]["height"] == 12.0
+
+            for name, data in new_checkpoints.items():  # checkpoints saved, manifest untouched
+                path = checkpoint_dir(city_dir) / name
+                path.write_bytes(data)
+                os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+            assert await server.reload_changed() == ["test_city"]
+            _, _, body = await server.handle("GET", target, {})
+            assert json.loads(body)["features"][0]["properties"]["height"] == 20.0
+            await server.close()
+
+        asyncio.run(scenario())
+
+    def test_http_keep_alive(self, tmp_path):
+        from pipeline.serve import TileServer
+
+        _write_city(tmp_path)
+
+        async def scenario():
+            tiles = TileServer(tmp_path, reload_s=3600)
+            server = await tiles.start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            responses = []
+            for target in ("/cities", f"/test_city/roads?bbox={WEST},{SOUTH},{EAST},{NORTH}"):
+                writer.write(f"GET {target} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+                head = (await reader.readuntil(b"\r\n\r\n")).decode()
+                length = int(head.split("Content-Length: ")[1].split("\r\n")[0])
+                responses.append((head.split("\r\n")[0], json.loads(await reader.readexactly(length))))
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            await tiles.close()
+            return responses
+
+        (status1, cities), (status2, roads) = asyncio.run(scenario())
+        assert status1 == status2 == "HTTP/1.1 200 OK"
+        assert cities["cities"] == ["test_city"] and len(roads["features"]) == 1
@@ -0,0 +1,151 @@
+"""Tests for the shared-memory frame transport."""
+import pickle
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import LineString, Point, Polygon, box
+
+
+def _frame():
+    """Helper: one column per encoding, with missing values, and a string index."""
+    return gpd.GeoDataFrame(
+        {
+            "height": np.array([9.0, 12.5, np.nan, 30.0, 6.0], dtype="float32"),
+            "levels": np.array([3, 4, 0, 10, 2], dtype="int64"),
+            "flag": [True, False, True, True, False],
+            "building_type": pd.Categorical(["house", "church", "house", None, "shop"]),
+            "name": ["Dom", None, "Café Über", "", None],
+            "highway": [["primary", "secondary"], "residential", None, ["a", "b"], np.nan],
+        },
+        geometry=[
+            box(0, 0, 10, 10),
+            None,
+            Polygon([(0, 0, 5), (4, 0, 5), (4, 4, 5)]),
+            LineString([(0, 0), (1, 1)]),
+            Point(2, 3),
+        ],
+        index=pd.Index(["way/1", "way/2", "way/3", "way/4", "node/5"], name="osm_id"),
+        crs="EPSG:32632",
+    )
+
+
+def _areas(chunk):
+    """Helper: a vectorised per-chunk function (module level, so picklable)."""
+    return pd.DataFrame({"area": chunk.geometry.area, "height": chunk["height"] * 2}, index=chunk.index)
+
+
+def _count(chunk):
+    """Helper: a non-frame per-chunk result."""
+    return len(chunk)
+
+
+def _assert_same(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    assert result.index.equals(expected.index)
+    assert result.crs == expected.crs
+    assert result.geometry.name == expected.geometry.name
+    for name in expected.columns:
+        if name == "geometry":
+            present = expected.geometry.notna()
+            assert (result.geometry.notna() == present).all()
+            assert result.geometry[present].geom_equals_exact(expected.geometry[present], 0).all()
+        else:
+            assert result[name].dtype == expected[name].dtype, name
+            pd.testing.assert_series_equal(result[name], expected[name])
+
+
+class TestSharedFrame:
+    """Tests for SharedFrame."""
+
+    def test_round_trip_keeps_values_dtypes_and_index(self):
+        from pipeline.stages.shared_frames import SharedFrame
+
+        frame = _frame()
+        with SharedFrame.create(frame) as shared:
+            _assert_same(shared.to_frame(copy=True), frame)
+            _assert_same(shared.to_frame(1, 4, copy=True), frame.iloc[1:4])
+
+    def test_keeps_z_coordinates(self):
+        from pipeline.stages.shared_frames import SharedFrame
+
+        with SharedFrame.create(_frame()) as shared:
+            geometry = shared.to_frame(2, 3, copy=True).geometry.iloc[0]
+        assert geometry.has_z and geometry.exterior.coords[0] == (0, 0, 5)
+
+    def test_unpickled_handle_maps_numeric_columns_without_copying(self):
+        from pipeline.stages.shared_frames import SharedFrame
+
+        with SharedFrame.create(_frame()) as shared:
+            handle = pickle.loads(pickle.dumps(shared))
+            assert len(pickle.dumps(handle)) < 4_000
+            chunk = handle.to_frame(1, 4)
+            segment = np.frombuffer(handle._buffer(), dtype=np.uint8)
+            assert np.shares_memory(chunk["height"].to_numpy(), segment)
+            assert np.shares_memory(chunk["building_type"].array.codes, segment)
+            assert not np.shares_memory(handle.to_frame(1, 4, copy=True)["height"].to_numpy(), segment)
+            del chunk, segment
+            handle.close()
+
+    def test_column_selection(self):
+        from pipeline.stages.shared_frames import SharedFrame
+
+        frame = _frame()
+        with SharedFrame.create(frame) as shared:
+            plain = shared.to_frame(copy=True, columns=["name", "height"])
+            geo = shared.to_frame(copy=True, columns=["height", "geometry"])
+        assert not isinstance(plain, gpd.GeoDataFrame)
+        assert list(plain.columns) == ["name", "height"]
+        assert isinstance(geo, gpd.GeoDataFrame) and geo.crs == frame.crs
+
+    def test_plain_dataframe_and_empty_frame(self):
+        from pipeline.stages.shared_frames import SharedFrame
+
+        frame = pd.DataFrame({"a": np.arange(3), "b": ["x", "y", None]})
+        with SharedFrame.create(frame) as shared:
+            result = shared.to_frame(copy=True)
+        assert not isinstance(result, gpd.GeoDataFrame)
+        pd.testing.assert_frame_equal(result, frame)
+        with SharedFrame.create(_frame().iloc[:0]) as shared:
+            assert len(shared.to_frame(copy=True)) == 0
+
+    def test_unlink_frees_the_segment(self):
+        from multiprocessing import shared_memory
+
+        from pipeline.stages.shared_frames import SharedFrame
+
+        shared = SharedFrame.create(_frame())
+        shared.unlink()
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared.name)
+
+
+class TestMapChunks:
+    """Tests for map_chunks()."""
+
+    @pytest.mark.parametrize("transport", ["shared", "pickle"])
+    def test_process_pool_matches_direct_call(self, transport):
+        from pipeline.stages.shared_frames import map_chunks
+
+        frame = _frame()
+        results = map_chunks(_areas, frame, chunk_rows=2, workers=2, transport=transport)
+        assert len(results) == 3
+        pd.testing.assert_frame_equal(pd.concat(results), _areas(frame))
+
+    def test_reused_shared_frame_and_columns(self):
+        from pipeline.stages.shared_frames import SharedFrame, map_chunks
+
+        frame = _frame()
+        with SharedFrame.create(frame) as shared:
+            areas = map_chunks(_areas, shared, chunk_rows=2, workers=2, columns=["geometry", "height"])
+            counts = map_chunks(_count, shared, chunk_rows=2, workers=2, columns=["name"])
+        pd.testing.assert_frame_equal(pd.concat(areas), _areas(frame))
+        assert counts == [2, 2, 1]
+
+    def test_single_worker_runs_in_process(self):
+        from pipeline.stages.shared_frames import map_chunks
+
+        assert map_chunks(_count, _frame(), chunk_rows=4, workers=1) == [4, 1]
+        with pytest.raises(ValueError, match="transport"):
+            map_chunks(_count, _frame(), transport="arrow")
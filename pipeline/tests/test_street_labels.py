@@ -0,0 +1,144 @@
+"""Tests for the street label placement stage."""
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import LineString
+
+LON0, LAT0 = 11.35, 46.50   # Bolzano
+
+
+def _roads(segments):
+    """Helper: classified road edges from (coords, highway, name) triples."""
+    from pipeline.stages.fetch_roads import classify_roads
+
+    return classify_roads(gpd.GeoDataFrame(
+        {"highway": [h for _, h, _ in segments], "name": [n for _, _, n in segments]},
+        geometry=[LineString(c) for c, _, _ in segments],
+        crs="EPSG:4326",
+    ))
+
+
+def _two_way(coords, highway, name):
+    """Helper: both directed edges of a two-way street segment."""
+    return [(coords, highway, name), (coords[::-1], highway, name)]
+
+
+class TestMergeStreetPaths:
+    """Tests for merge_street_paths()."""
+
+    def test_joins_segments_and_drops_reversed_duplicates(self):
+        from pipeline.stages.street_labels import merge_street_paths
+
+        east = [(LON0 + i * 0.001, LAT0) for i in range(4)]
+        roads = _roads(
+            _two_way(east[0:2], "residential", "Via Roma")
+            + _two_way(east[1:3], "residential", ["Via Roma", "Römerstraße"])
+            + _two_way(east[2:4], "residential", "Via Roma")
+            + _two_way([(LON0, LAT0), (LON0, LAT0 + 0.001)], "footway", "Via Roma")
+            + _two_way([(LON0, LAT0), (LON0, LAT0 - 0.001)], "residential", None)
+        )
+        paths = merge_street_paths(roads)
+
+        assert sorted(zip(paths["name"], paths["road_class"])) == [("Via Roma", "minor"), ("Via Roma", "path")]
+        minor = paths[paths["road_class"] == "minor"].geometry.iloc[0]
+        assert minor.geom_type == "LineString"
+        assert np.isclose(minor.length, 0.003)
+
+    def test_empty_and_unnamed(self):
+        from pipeline.stages.street_labels import merge_street_paths
+
+        assert merge_street_paths(_roads([([(LON0, LAT0), (LON0 + 0.001, LAT0)], "primary", None)])).empty
+        assert merge_street_paths(_roads([]).drop(columns="name")).empty
+
+
+class TestPlaceStreetLabels:
+    """Tests for place_street_labels()."""
+
+    def _grid(self, n=12, step=0.001):
+        """Helper: merged paths of an n × n street grid (every 5th east-west street major)."""
+        from pipeline.stages.street_labels import merge_street_paths
+
+        node = lambda i, j: (LON0 + i * step, LAT0 + j * step)  # noqa: E731  (shared, as in OSM)
+        segments = []
+        for i in range(n):
+            for j in range(n):
+                segments += _two_way([node(i, j), node(i + 1, j)], "primary" if j % 5 == 0 else "residential",
+                                     f"Via Est {j}")
+                segments += _two_way([node(i, j), node(i, j + 1)], "residential", f"Via Nord {i}")
+        return merge_street_paths(_roads(segments))
+
+    def test_labels_do_not_overlap_and_repeat_with_spacing(self):
+        from pipeline.config import (
+            STREET_LABEL_CHAR_PX, STREET_LABEL_FONT_PX, STREET_LABEL_PADDING_PX, STREET_LABEL_SPACING_PX,
+        )
+        from pipeline.stages.cluster_pois import mercator_unit
+        from pipeline.stages.street_labels import place_street_labels
+
+        index = place_street_labels(self._grid(), min_zoom=14, max_zoom=18)
+        assert [lvl["zoom"] for lvl in index["levels"]] == list(range(14, 19))
+        sizes = [len(lvl["name"]) for lvl in index["levels"]]
+        assert sizes == sorted(sizes) and sizes[0] > 0
+
+        for lvl in index["levels"]:
+            scale = 256 * 2.0 ** lvl["zoom"]
+            x, y = mercator_unit(np.array(lvl["lon"]), np.array(lvl["lat"]))
+            x, y = x * scale, y * scale
+            angle = np.radians(lvl["angle"])
+            half_w = np.array([len(index["names"][k]) for k in lvl["name"]]) * STREET_LABEL_CHAR_PX / 2
+            half_h = STREET_LABEL_FONT_PX / 2
+            ex = half_w * np.abs(np.cos(angle)) + half_h * np.abs(np.sin(angle)) + STREET_LABEL_PADDING_PX
+            ey = half_w * np.abs(np.sin(angle)) + half_h * np.abs(np.cos(angle)) + STREET_LABEL_PADDING_PX
+            for i in range(len(x)):
+                for j in range(i):
+                    # Rounded lon/lat move anchors by < 0.1 px at z18
+                    assert abs(x[i] - x[j]) >= ex[i] + ex[j] - 0.5 or abs(y[i] - y[j]) >= ey[i] + ey[j] - 0.5
+                    if lvl["name"][i] == lvl["name"][j]:
+                        assert np.hypot(x[i] - x[j], y[i] - y[j]) >= STREET_LABEL_SPACING_PX - 0.5
+
+    def test_class_zooms_and_orientation(self):
+        from pipeline.stages.street_labels import place_street_labels
+
+        index = place_street_labels(self._grid(), min_zoom=14, max_zoom=18)
+        classes = index["classes"]
+        names = index["names"]
+        z14 = index["levels"][0]
+        # z14 labels major streets only; they run east-west
+        assert {classes[c] for c in z14["road_class"]} == {"major"}
+        assert set(z14["angle"]) == {0.0}
+        z18 = index["levels"][-1]
+        north = [a for a, k in zip(z18["angle"], z18["name"]) if names[k].startswith("Via Nord")]
+        assert north and set(north) == {90.0}
+        assert all(-90 < a <= 90 for a in z18["angle"])
+
+    def test_skips_labels_across_sharp_bends(self):
+        from pipeline.stages.street_labels import merge_street_paths, place_street_labels
+
+        # ~320 m legs meeting at about a right angle: at z15 the only
+        # candidate is on the apex, where the text would not follow the street
+        bent = [(LON0, LAT0), (LON0 + 0.003, LAT0 + 0.002), (LON0 + 0.006, LAT0)]
+        straight = [(LON0, LAT0), (LON0 + 0.003, LAT0), (LON0 + 0.006, LAT0)]
+        for coords, expected in ((bent, 0), (straight, 1)):
+            paths = merge_street_paths(_roads([(coords, "primary", "Serpentina")]))
+            level = place_street_labels(paths, min_zoom=15, max_zoom=15)["levels"][0]
+            assert len(level["name"]) == expected
+
+    def test_empty(self):
+        from pipeline.stages.street_labels import merge_street_paths, place_street_labels
+
+        index = place_street_labels(merge_street_paths(_roads([])), min_zoom=14, max_zoom=15)
+        assert index["names"] == []
+        assert all(lvl["name"] == [] and lvl["lon"] == [] for lvl in index["levels"])
+
+
+class TestExportStreetLabels:
+    """Tests for export_street_labels()."""
+
+    def test_writes_compact_json(self, tmp_path):
+        import json
+
+        from pipeline.stages.street_labels import export_street_labels
+
+        roads = _roads(_two_way([(LON0, LAT0), (LON0 + 0.01, LAT0)], "primary", "Corso Libertà"))
+        path = export_street_labels(roads, tmp_path / "street_labels.json")
+        text = path.read_text(encoding="utf-8")
+        assert "Corso Libertà" in text and ", " not in text
+        assert json.loads(text)["levels"][0]["name"] == [0]
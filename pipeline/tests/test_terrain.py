@@ -0,0 +1,129 @@
+"""Tests for DEM sampling, building base elevation and road draping."""
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import LineString, box
+
+
+def _plane_dem(a=1000.0, b=-500.0, c=250.0):
+    """Helper: WGS84 grid covering Bolzano with z = a·(lon−11.3) + b·(lat−46.4) + c."""
+    from pipeline.stages.terrain import RasterDEM
+
+    step = 0.001
+    lon = 11.3 + (np.arange(200) + 0.5) * step
+    lat = 46.6 - (np.arange(200) + 0.5) * step
+    lon_g, lat_g = np.meshgrid(lon, lat)
+    data = a * (lon_g - 11.3) + b * (lat_g - 46.4) + c
+    return RasterDEM(data, origin=(11.3, 46.6), pixel_size=(step, step))
+
+
+def _plane(lon, lat, a=1000.0, b=-500.0, c=250.0):
+    return a * (np.asarray(lon) - 11.3) + b * (np.asarray(lat) - 46.4) + c
+
+
+class TestRasterDEM:
+    """Tests for RasterDEM.sample()."""
+
+    def test_bilinear_is_exact_on_a_plane(self):
+        dem = _plane_dem()
+        rng = np.random.default_rng(0)
+        lon = rng.uniform(11.32, 11.45, 100)
+        lat = rng.uniform(46.45, 46.55, 100)
+        assert np.allclose(dem.sample(lon, lat), _plane(lon, lat), atol=1e-3)
+
+    def test_outside_grid_is_nan(self):
+        dem = _plane_dem()
+        assert np.isnan(dem.sample(np.array([12.0]), np.array([46.5]))).all()
+
+
+class TestTerrariumTiles:
+    """Tests for Terrarium decoding and tile sampling."""
+
+    def test_decode_terrarium(self):
+        from pipeline.stages.terrain import decode_terrarium
+
+        # 262 m = 32768 + 262 → R=129, G=6, B=0
+        rgb = np.array([[[129, 6, 0], [128, 0, 128]]], dtype=np.uint8)
+        assert decode_terrarium(rgb).tolist() == [[262.0, 0.5]]
+
+    def test_sampling_across_tiles_and_lru(self):
+        from pipeline.stages.terrain import TerrariumTiles
+
+        class ConstantTiles(TerrariumTiles):
+            """Every tile is flat at an elevation derived from its x index."""
+            reads = 0
+
+            def _read_tile(self, x, y):
+                ConstantTiles.reads += 1
+                return np.full((256, 256), float(x % 1000), dtype=np.float32)
+
+        tiles = ConstantTiles("unused", zoom=14, cache_size=2)
+        # Bolzano centre at z14 lies in tile x=8708
+        z = tiles.sample(np.array([11.3530, 11.3531]), np.array([46.4983, 46.4983]))
+        assert z.tolist() == [708.0, 708.0]
+        assert ConstantTiles.reads == 1
+
+        tiles.sample(np.array([11.3530 + 0.03, 11.3530 + 0.06]), np.array([46.4983, 46.4983]))
+        assert len(tiles._cache) == 2
+
+
+class TestAddBaseElevation:
+    """Tests for add_base_elevation()."""
+
+    def test_min_and_median(self):
+        from pipeline.stages.terrain import add_base_elevation
+
+        dem = _plane_dem()
+        fp = box(11.35, 46.50, 11.351, 46.501)
+        gdf = gpd.GeoDataFrame({"height": [10.0]}, geometry=[fp], crs="EPSG:4326")
+
+        low = add_base_elevation(gdf, dem, stat="min")["base_elevation"].iloc[0]
+        mid = add_base_elevation(gdf, dem, stat="median")["base_elevation"].iloc[0]
+        # z rises east and falls north → lowest ground at the north-west corner
+        assert low == pytest.approx(_plane(11.35, 46.501), abs=1e-2)
+        assert low < mid
+
+    def test_rejects_unknown_stat(self):
+        from pipeline.stages.terrain import add_base_elevation
+
+        gdf = gpd.GeoDataFrame(geometry=[box(0, 0, 1, 1)], crs="EPSG:4326")
+        with pytest.raises(ValueError):
+            add_base_elevation(gdf, _plane_dem(), stat="mean")
+
+
+class TestDrapeRoads:
+    """Tests for drape_roads() and bridge decks in export."""
+
+    def test_vertices_follow_terrain(self):
+        from pipeline.stages.terrain import drape_roads
+
+        dem = _plane_dem()
+        roads = gpd.GeoDataFrame(
+            geometry=[LineString([(11.35, 46.50), (11.36, 46.50)])], crs="EPSG:4326"
+        )
+        draped = drape_roads(roads, dem, segment_m=50.0).geometry.iloc[0]
+
+        coords = np.asarray(draped.coords)
+        assert draped.has_z
+        assert len(coords) > 10  # ~770 m densified to ≤ 50 m
+        assert np.allclose(coords[:, 2], _plane(coords[:, 0], coords[:, 1]), atol=1e-2)
+
+    def test_bridge_deck_spans_abutments(self, tmp_path):
+        import json
+
+        from pipeline.stages.export_geojson import export_geojson
+
+        roads = gpd.GeoDataFrame(
+            {
+                "road_class": ["primary"], "name": ["Ponte"], "highway": ["primary"],
+                "line_width": [8], "bridge": ["yes"], "layer": ["1"],
+            },
+            geometry=[LineString([(11.35, 46.5, 260.0), (11.36, 46.5, 240.0)])],
+            crs="EPSG:4326",
+        )
+        path = export_geojson(roads, tmp_path / "roads.geojson", "roads")
+        coords = json.loads(path.read_text())["features"][0]["geometry"]["coordinates"]
+
+        z = [c[2] for c in coords]
+        assert z[0] == 260.0 and z[-1] == 240.0
+        assert z[len(z) // 2] == pytest.approx(250.0 + 6.0)
@@ -0,0 +1,142 @@
+"""Tests for the cached local working CRS."""
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import LineString, Point, box
+
+# Bolzano: (north, south, east, west)
+BBOX = (46.52, 46.47, 11.38, 11.30)
+
+
+def _frame() -> gpd.GeoDataFrame:
+    """Helper: a footprint, a 3D line and a point near Bolzano."""
+    return gpd.GeoDataFrame(
+        {"name": ["a", "b", "c"]},
+        geometry=[
+            box(11.35, 46.50, 11.351, 46.501),
+            LineString([(11.34, 46.49, 250.0), (11.36, 46.49, 270.0)]),
+            Point(11.33, 46.51),
+        ],
+        crs="EPSG:4326",
+    )
+
+
+class TestWorkingCRS:
+    """Tests for WorkingCRS."""
+
+    def test_from_bbox_picks_utm_zone_and_caches(self):
+        from pipeline.stages.working_crs import WorkingCRS
+
+        working = WorkingCRS.from_bbox(BBOX)
+        assert working.crs.to_epsg() == 32632
+        # Same zone elsewhere in it → the same cached instance (and transformers)
+        assert WorkingCRS.from_bbox((45.5, 45.4, 9.25, 9.15)) is working
+        assert WorkingCRS.from_bbox((51.6, 51.4, 0.1, -0.3)).crs.to_epsg() == 32630
+
+    def test_matches_geopandas_to_crs_and_keeps_z(self):
+        from pipeline.stages.working_crs import WorkingCRS
+
+        gdf = _frame()
+        working = WorkingCRS.from_bbox(BBOX)
+        projected = working.project(gdf)
+        expected = gdf.to_crs(32632)
+
+        assert projected.crs.to_epsg() == 32632
+        assert projected.geometry.geom_equals_exact(expected.geometry, tolerance=1e-6).all()
+        line = np.asarray(projected.geometry.iloc[1].coords)
+        assert line[:, 2].tolist() == [250.0, 270.0]
+        assert list(projected["name"]) == ["a", "b", "c"]
+
+    def test_round_trip_and_no_op(self):
+        from pipeline.stages.working_crs import WorkingCRS
+
+        gdf = _frame()
+        working = WorkingCRS.from_bbox(BBOX)
+        projected = working.project(gdf)
+        assert working.project(projected) is projected
+
+        back = working.to_wgs84(projected)
+        assert back.crs.to_epsg() == 4326
+        assert back.geometry.geom_equals_exact(gdf.geometry, tolerance=1e-9).all()
+        assert working.to_wgs84(back) is back
+
+    def test_array_transforms(self):
+        from pipeline.stages.working_crs import WorkingCRS
+
+        working = WorkingCRS.from_bbox(BBOX)
+        x, y = working.project_xy(np.array([11.35, 11.36]), np.array([46.5, 46.5]))
+        lon, lat = working.lonlat_xy(x, y)
+        assert lon[0] == pytest.approx(11.35) and lat[0] == pytest.approx(46.5)
+
+    @pytest.mark.filterwarnings("error::DeprecationWarning")
+    def test_single_coordinate_stays_an_array(self):
+        """Size-1 input does not go through pyproj's scalar path (NumPy array-to-scalar deprecation)."""
+        from pipeline.stages.working_crs import WorkingCRS
+
+        working = WorkingCRS.from_bbox(BBOX)
+        expected_x, expected_y = working.project_xy(np.array([11.33, 11.35]), np.array([46.51, 46.5]))
+        projected = working.project(_frame().iloc[[2]]).geometry.iloc[0]
+        assert (projected.x, projected.y) == pytest.approx((expected_x[0], expected_y[0]))
+        x, y = working.project_xy(np.array([11.35]), np.array([46.5]))
+        assert x.shape == y.shape == (1,) and x[0] == pytest.approx(expected_x[1])
+
+
+class TestHelpers:
+    """Tests for metric_geometry() and to_lonlat()."""
+
+    def test_metric_geometry(self):
+        from pipeline.stages.working_crs import WorkingCRS, metric_geometry
+
+        gdf = _frame()
+        # ~77 m × 111 m footprint in degrees → metres
+        assert metric_geometry(gdf)[0].area == pytest.approx(8560, rel=0.01)
+        projected = WorkingCRS.from_bbox(BBOX).project(gdf)
+        assert metric_geometry(projected) is not None
+        assert metric_geometry(projected)[0] is projected.geometry.iloc[0]
+
+    def test_to_lonlat(self):
+        from pipeline.stages.working_crs import WorkingCRS, to_lonlat
+
+        working = WorkingCRS.from_bbox(BBOX)
+        x, y = working.project_xy(np.array([11.35, 11.36]), np.array([46.5, 46.51]))
+        coords = np.column_stack([x, y, [1.0, 2.0]])
+        lonlat = to_lonlat(coords, working.crs)
+        assert lonlat.shape == (2, 2)
+        np.testing.assert_allclose(lonlat, [[11.35, 46.5], [11.36, 46.51]])
+        np.testing.assert_array_equal(to_lonlat(lonlat, "EPSG:4326"), lonlat)
+
+
+class TestProjectedStages:
+    """Stages accept frames already in the working CRS."""
+
+    def test_clean_keeps_crs(self):
+        from pipeline.stages.clean_geometry import clean_geometries
+        from pipeline.stages.working_crs import WorkingCRS
+
+        projected = WorkingCRS.from_bbox(BBOX).project(_frame())
+        assert clean_geometries(projected).crs.to_epsg() == 32632
+
+    def test_associate_pois_same_result_in_either_crs(self):
+        from pipeline.stages.associate_pois import associate_pois
+        from pipeline.stages.working_crs import WorkingCRS
+
+        buildings = gpd.GeoDataFrame(
+            {"osm_id": ["way/1"]}, geometry=[box(11.35, 46.50, 11.3502, 46.5002)], crs="EPSG:4326"
+        )
+        pois = gpd.GeoDataFrame(
+            {"osm_id": ["node/1", "node/2"], "category": ["food", "finance"]},
+            geometry=[Point(11.3501, 46.5001), Point(11.3507, 46.5001)],
+            crs="EPSG:4326",
+        )
+        working = WorkingCRS.from_bbox(BBOX)
+        wgs_pois, _ = associate_pois(pois, buildings)
+        utm_pois, _ = associate_pois(working.project(pois), working.project(buildings))
+        assert list(wgs_pois["building_id"]) == list(utm_pois["building_id"]) == ["way/1", None]
+
+    def test_export_rejects_projected_frames(self, tmp_path):
+        from pipeline.stages.export_geojson import export_geojson
+        from pipeline.stages.working_crs import WorkingCRS
+
+        projected = WorkingCRS.from_bbox(BBOX).project(_frame())
+        with pytest.raises(ValueError, match="EPSG:4326"):
+            export_geojson(projected, tmp_path / "x.geojson", "buildings")